@@ -0,0 +1,86 @@
+"""Cold vs. warm benchmark for ConfigParser.load_config.
+
+Usage:
+    python benchmarks/bench_config_cache.py [--selectors 10000] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from cli_commander.cache import ConfigCache  # noqa: E402
+from cli_commander.config import ConfigParser  # noqa: E402
+
+
+def write_config(directory, count):
+    """Write a synthetic config with `count` selectors."""
+    selectors = {
+        f"selector-{i}": {
+            "description": f"Synthetic selector number {i}",
+            "command": f"echo running selector {i} && true",
+        }
+        for i in range(count)
+    }
+    path = os.path.join(directory, "cli-commander.yml")
+    with open(path, "w") as f:
+        yaml.safe_dump({"selectors": selectors}, f)
+    return path
+
+
+def best_of(repeat, func):
+    """Return the fastest of `repeat` timed calls, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--selectors", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        write_config(tmpdir, args.selectors)
+        cache = ConfigCache(os.path.join(tmpdir, "cache"))
+        original_dir = os.getcwd()
+        os.chdir(tmpdir)
+        try:
+            def pure_python():
+                with open("cli-commander.yml") as f:
+                    yaml.load(f, Loader=yaml.SafeLoader)
+
+            def cold():
+                for name in os.listdir(cache.cache_dir) if os.path.isdir(cache.cache_dir) else []:
+                    os.unlink(os.path.join(cache.cache_dir, name))
+                ConfigParser(cache=cache).load_config()
+
+            def warm():
+                ConfigParser(cache=cache).load_config()
+
+            results = [
+                ("pure-Python SafeLoader", best_of(args.repeat, pure_python)),
+                ("cold (parse + store)", best_of(args.repeat, cold)),
+            ]
+            warm()
+            results.append(("warm (cache hit)", best_of(args.repeat, warm)))
+        finally:
+            os.chdir(original_dir)
+
+    loader = "CSafeLoader" if hasattr(yaml, "CSafeLoader") else "SafeLoader"
+    print(f"{args.selectors} selectors, best of {args.repeat}, cold path uses {loader}")
+    for label, ms in results:
+        print(f"  {label:<24} {ms:10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
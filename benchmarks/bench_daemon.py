@@ -0,0 +1,92 @@
+"""Latency benchmark: cmdr through the daemon vs. the cold in-process path.
+
+Usage:
+    python benchmarks/bench_daemon.py [--selectors 10000] [--repeat 20]
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import yaml
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+
+def write_config(directory, count):
+    """Write a synthetic config with `count` selectors."""
+    selectors = {
+        f"selector-{i}": {
+            "description": f"Synthetic selector number {i}",
+            "command": "true",
+        }
+        for i in range(count)
+    }
+    with open(os.path.join(directory, "cli-commander.yml"), "w") as f:
+        yaml.safe_dump({"selectors": selectors}, f)
+
+
+def timed_runs(argv, cwd, env, repeat):
+    """Return the sorted wall-clock times of `repeat` cmdr invocations, in ms."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "cli_commander.cli"] + argv,
+            cwd=cwd, env=env, stdout=subprocess.DEVNULL, check=True,
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+    return sorted(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--selectors", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir="/tmp") as tmpdir:
+        write_config(tmpdir, args.selectors)
+        env = dict(os.environ)
+        env["PYTHONPATH"] = REPO_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+        env["CMDR_CACHE_DIR"] = os.path.join(tmpdir, "cache")
+        env["CMDR_DAEMON_SOCKET"] = os.path.join(tmpdir, "d.sock")
+
+        cases = {}
+        no_daemon = dict(env, CMDR_NO_DAEMON="1")
+        for label, argv in (("--list", ["--list"]), ("run", ["selector-0"])):
+            no_cache = dict(no_daemon, CMDR_CACHE_DIR=os.path.join(tmpdir, "cold-cache"))
+
+            def cold():
+                subprocess.run(["rm", "-rf", no_cache["CMDR_CACHE_DIR"]], check=True)
+
+            cold_times = []
+            for _ in range(max(1, args.repeat // 4)):
+                cold()
+                cold_times += timed_runs(argv, tmpdir, no_cache, 1)
+            cases[f"{label}: cold (no caches)"] = sorted(cold_times)
+            cases[f"{label}: in-process, warm cache"] = timed_runs(argv, tmpdir, no_daemon, args.repeat)
+
+        daemon = subprocess.Popen(
+            [sys.executable, "-m", "cli_commander.cli", "--daemon"],
+            cwd=tmpdir, env=env, stdout=subprocess.PIPE, text=True,
+        )
+        try:
+            daemon.stdout.readline()
+            for label, argv in (("--list", ["--list"]), ("run", ["selector-0"])):
+                cases[f"{label}: via daemon"] = timed_runs(argv, tmpdir, env, args.repeat)
+        finally:
+            daemon.send_signal(signal.SIGTERM)
+            daemon.wait()
+
+    print(f"{args.selectors} selectors, {args.repeat} runs (median / min, ms)")
+    for label, timings in cases.items():
+        print(f"  {label:<32} {timings[len(timings) // 2]:8.1f} {timings[0]:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
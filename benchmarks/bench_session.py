@@ -0,0 +1,83 @@
+"""Throughput benchmark: shared shell workers vs. one shell per command.
+
+Runs the same short selector many times in-process and reports commands per
+second for each way of starting it.
+
+Usage:
+    python benchmarks/bench_session.py [--commands 500] [--command true] [--jobs 1]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import yaml
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, REPO_ROOT)
+
+from cli_commander.config import ConfigParser  # noqa: E402
+from cli_commander.executor import CommandExecutor  # noqa: E402
+from cli_commander.session import Session, ShellPool  # noqa: E402
+
+
+def write_config(directory, command):
+    """Write a config with a single selector running `command`."""
+    with open(os.path.join(directory, "cli-commander.yml"), "w") as f:
+        yaml.safe_dump({"selectors": {"tiny": {"command": command}}}, f)
+
+
+def throughput(func, count):
+    """Call `func` `count` times and return the calls per second."""
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commands", type=int, default=500)
+    parser.add_argument("--command", default="true", help="Command the selector runs")
+    parser.add_argument("--jobs", type=int, default=1, help="Shell workers for the session case")
+    args = parser.parse_args()
+
+    original_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        write_config(tmpdir, args.command)
+        os.environ["CMDR_CACHE_DIR"] = os.path.join(tmpdir, "cache")
+        os.chdir(tmpdir)
+        try:
+            config_parser = ConfigParser(use_cache=False)
+            selector = config_parser.get_selector("tiny")
+            executor = CommandExecutor(use_history=False)
+            results = []
+            with contextlib.redirect_stdout(io.StringIO()):
+                results.append(("subprocess.run(shell=True)", throughput(
+                    lambda: subprocess.run(args.command, shell=True, stdout=subprocess.DEVNULL),
+                    args.commands)))
+                results.append(("CommandExecutor (shell per run)", throughput(
+                    lambda: executor.execute_selector(selector, "tiny"), args.commands)))
+                with ShellPool(args.jobs) as pool:
+                    results.append(("ShellPool.run", throughput(
+                        lambda: pool.run(args.command), args.commands)))
+                    session = Session(config_parser, executor, pool)
+                    start = time.perf_counter()
+                    session.run(["tiny"] * args.commands, jobs=args.jobs)
+                    results.append(("cmdr session", args.commands / (time.perf_counter() - start)))
+        finally:
+            os.chdir(original_dir)
+
+    baseline = results[1][1]
+    print(f"{args.commands} x {args.command!r} (commands/second)")
+    for label, rate in results:
+        print(f"  {label:<32} {rate:10.0f}  {rate / baseline:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
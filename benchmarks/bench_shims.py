@@ -0,0 +1,100 @@
+"""Latency benchmark: shell shims vs. cmdr for a static selector.
+
+Each case runs a no-op selector `repeat` times from one shell loop, so the
+per-call time excludes the cost of starting that shell.
+
+Usage:
+    python benchmarks/bench_shims.py [--selectors 1000] [--repeat 50]
+"""
+
+import argparse
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+
+import yaml
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, REPO_ROOT)
+
+from cli_commander.shims import functions_path  # noqa: E402
+
+
+def write_config(directory, count):
+    """Write a synthetic config with `count` static selectors."""
+    selectors = {
+        f"selector-{i}": {
+            "description": f"Synthetic selector number {i}",
+            "command": "true",
+        }
+        for i in range(count)
+    }
+    with open(os.path.join(directory, "cli-commander.yml"), "w") as f:
+        yaml.safe_dump({"selectors": selectors}, f)
+
+
+def per_call(script, cwd, env, repeat, rounds=5):
+    """Return the best per-call time of a shell loop calling `script`, in ms."""
+    loop = f"i=0; while [ $i -lt {repeat} ]; do {script} >/dev/null; i=$((i + 1)); done"
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        subprocess.run(["bash", "-c", loop], cwd=cwd, env=env, check=True)
+        elapsed = (time.perf_counter() - start) * 1000 / repeat
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--selectors", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir="/tmp") as tmpdir:
+        os.mkdir(os.path.join(tmpdir, ".git"))
+        write_config(tmpdir, args.selectors)
+        bin_dir = os.path.join(tmpdir, "bin")
+        os.mkdir(bin_dir)
+        cmdr = os.path.join(bin_dir, "cmdr")
+        with open(cmdr, "w") as f:
+            f.write(f"#!/bin/sh\nexec {shlex.quote(sys.executable)} -m cli_commander.cli \"$@\"\n")
+        os.chmod(cmdr, 0o755)
+
+        env = dict(os.environ)
+        env["PYTHONPATH"] = REPO_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+        env["PATH"] = bin_dir + os.pathsep + env["PATH"]
+        env["CMDR_CACHE_DIR"] = os.path.join(tmpdir, "cache")
+        env["CMDR_NO_DAEMON"] = "1"
+
+        subprocess.run(
+            ["cmdr", "shims", "install", os.path.join(tmpdir, "shims")],
+            cwd=tmpdir, env=env, stdout=subprocess.DEVNULL, check=True,
+        )
+        functions = functions_path(os.path.join(tmpdir, "cli-commander.yml"), env["CMDR_CACHE_DIR"])
+        selector = f"selector-{args.selectors - 1}"
+
+        # The function file is sourced once per loop through BASH_ENV, as an
+        # interactive shell would source it once at startup
+        function_env = dict(env, BASH_ENV=functions)
+        cases = [
+            ("bare /bin/sh -c true", "/bin/sh -c true", env),
+            ("cmdr (warm config cache)", f"cmdr {selector}", env),
+            ("executable shim", f"./shims/{selector}", env),
+            ("shell function shim", f"cmdr {selector}", function_env),
+        ]
+        results = [
+            (label, per_call(script, tmpdir, loop_env, args.repeat))
+            for label, script, loop_env in cases
+        ]
+
+    print(f"{args.selectors} selectors, {args.repeat} calls per loop (best per-call time, ms)")
+    for label, elapsed in results:
+        print(f"  {label:<28} {elapsed:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
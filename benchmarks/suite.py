@@ -0,0 +1,291 @@
+"""Benchmark suite for cmdr startup, config loading and executor overhead.
+
+`run` measures every benchmark on synthetic configs of each size and writes
+the timings to a JSON file; `compare` reports the change between two such
+files and exits with status 1 if any benchmark regressed.
+
+Usage:
+    python benchmarks/suite.py run [--sizes 10,1000,10000,100000] [--repeat 10]
+                                   [--output bench-<commit>.json]
+    python benchmarks/suite.py compare BASE.json HEAD.json [--threshold 10]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import yaml
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, REPO_ROOT)
+
+from cli_commander.cache import ConfigCache  # noqa: E402
+from cli_commander.cli import main as cmdr_main  # noqa: E402
+from cli_commander.config import ConfigParser  # noqa: E402
+from cli_commander.executor import CommandExecutor  # noqa: E402
+from cli_commander.session import ShellPool  # noqa: E402
+
+FORMAT_VERSION = 1
+DEFAULT_SIZES = [10, 1000, 10000, 100000]
+# Stop repeating a benchmark once it has run this long, after MIN_SAMPLES
+TIME_BUDGET = 5.0
+MIN_SAMPLES = 3
+# Lookups per get_selector sample, reported per lookup
+LOOKUPS = 10000
+
+
+def write_config(directory, count):
+    """Write a synthetic config with `count` selectors."""
+    selectors = {
+        f"selector-{i}": {
+            "description": f"Synthetic selector number {i}",
+            "command": "true",
+        }
+        for i in range(count)
+    }
+    with open(os.path.join(directory, "cli-commander.yml"), "w") as f:
+        yaml.safe_dump({"selectors": selectors}, f)
+
+
+def sample(func, repeat, per_call=1, unit="ms"):
+    """
+    Time `func` up to `repeat` times, stopping early once TIME_BUDGET is spent.
+
+    Returns a result entry with the time per call in `unit` ("ms" or "us"),
+    where one run of `func` makes `per_call` calls.
+    """
+    scale = {"ms": 1e3, "us": 1e6}[unit]
+    timings = []
+    spent = 0.0
+    while len(timings) < repeat and (len(timings) < MIN_SAMPLES or spent < TIME_BUDGET):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        spent += elapsed
+        timings.append(elapsed * scale / per_call)
+    return {
+        "unit": unit,
+        "best": min(timings),
+        "median": statistics.median(timings),
+        "samples": len(timings),
+    }
+
+
+@contextlib.contextmanager
+def project(count):
+    """Create a project with a synthetic config, chdir into it and isolate cmdr."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.mkdir(os.path.join(tmpdir, ".git"))
+        write_config(tmpdir, count)
+        saved = {name: os.environ.get(name) for name in ("HOME", "CMDR_CACHE_DIR", "CMDR_NO_DAEMON")}
+        original_dir = os.getcwd()
+        os.environ.update(HOME=tmpdir, CMDR_CACHE_DIR=os.path.join(tmpdir, "cache"), CMDR_NO_DAEMON="1")
+        os.chdir(tmpdir)
+        try:
+            yield tmpdir
+        finally:
+            os.chdir(original_dir)
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+
+def quiet_main(argv):
+    """Run cmdr in-process, discarding its output."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            cmdr_main(argv)
+        except SystemExit:
+            pass
+
+
+def cmdr_process(argv):
+    """Return a function running cmdr in a fresh interpreter."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = REPO_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+
+    def run():
+        subprocess.run(
+            [sys.executable, "-m", "cli_commander.cli"] + argv,
+            env=env, stdout=subprocess.DEVNULL, check=True,
+        )
+    return run
+
+
+def bench_size(count, repeat):
+    """Run the benchmarks that depend on the number of selectors."""
+    results = {}
+    with project(count) as tmpdir:
+        cache = ConfigCache(os.path.join(tmpdir, "cache", "config"))
+        results[f"load_config.cold/{count}"] = sample(
+            lambda: ConfigParser(use_cache=False).load_config(), repeat)
+        ConfigParser(cache=cache).load_config()
+        results[f"load_config.warm/{count}"] = sample(
+            lambda: ConfigParser(cache=cache).load_config(), repeat)
+
+        parser = ConfigParser(cache=cache)
+        parser.load_config()
+        rng = random.Random(count)
+        names = [f"selector-{rng.randrange(count)}" for _ in range(LOOKUPS)]
+
+        def lookups():
+            for name in names:
+                parser.get_selector(name)
+        results[f"get_selector/{count}"] = sample(lookups, repeat, per_call=LOOKUPS, unit="us")
+
+        results[f"list.render/{count}"] = sample(lambda: quiet_main(["--list"]), repeat)
+        results[f"startup.list/{count}"] = sample(cmdr_process(["--list"]), repeat)
+        results[f"startup.run/{count}"] = sample(cmdr_process(["selector-0"]), repeat)
+    return results
+
+
+def bench_spawn(repeat):
+    """Compare running `true` through CommandExecutor, a bare subprocess call and a shared shell."""
+    results = {}
+    with project(1):
+        selector = {"command": "true"}
+        executor = CommandExecutor()
+        bare = CommandExecutor(use_history=False)
+
+        def execute(instance):
+            with contextlib.redirect_stdout(io.StringIO()):
+                instance.execute_selector(selector, "selector-0")
+
+        results["spawn.subprocess"] = sample(lambda: subprocess.run("true", shell=True), repeat)
+        results["spawn.executor"] = sample(lambda: execute(bare), repeat)
+        results["spawn.executor+history"] = sample(lambda: execute(executor), repeat)
+        with ShellPool() as pool:
+            results["spawn.session"] = sample(lambda: pool.run("true"), repeat)
+    return results
+
+
+def git_commit():
+    """Return the commit of the working tree, or None outside a git checkout."""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+            stderr=subprocess.DEVNULL, universal_newlines=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    sizes = [int(size) for size in args.sizes.split(",")]
+    commit = git_commit()
+    results = {}
+    for count in sizes:
+        print(f"Benchmarking {count} selectors...", file=sys.stderr)
+        results.update(bench_size(count, args.repeat))
+    print("Benchmarking spawn overhead...", file=sys.stderr)
+    results.update(bench_spawn(max(args.repeat, 20)))
+
+    report = {
+        "version": FORMAT_VERSION,
+        "commit": commit,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "yaml_loader": "CSafeLoader" if hasattr(yaml, "CSafeLoader") else "SafeLoader",
+        "results": results,
+    }
+    output = args.output or f"bench-{commit or 'local'}.json"
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+    width = max(len(name) for name in results)
+    print(f"{'benchmark':<{width}}  {'best':>10}  {'median':>10}")
+    for name, result in results.items():
+        print(f"{name:<{width}}  {result['best']:10.3f}  {result['median']:10.3f} {result['unit']}")
+    print(f"\nWrote {output}")
+    return 0
+
+
+def load_report(path):
+    with open(path) as f:
+        report = json.load(f)
+    if report.get("version") != FORMAT_VERSION:
+        raise SystemExit(f"{path}: unsupported results format {report.get('version')!r}")
+    return report
+
+
+def compare(args):
+    """
+    Compare the best times of two reports.
+
+    A benchmark regressed if its best time grew by more than the threshold;
+    best times are the least affected by other load on the machine.
+    """
+    base = load_report(args.base)
+    head = load_report(args.head)
+    threshold = args.threshold / 100
+    names = [name for name in head["results"] if name in base["results"]]
+    if not names:
+        print("No benchmarks in common", file=sys.stderr)
+        return 1
+
+    width = max(len(name) for name in names)
+    print(f"{'benchmark':<{width}}  {base.get('commit') or 'base':>10}  {head.get('commit') or 'head':>10}")
+    regressions = []
+    for name in names:
+        before = base["results"][name]["best"]
+        after = head["results"][name]["best"]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  improved"
+        unit = head["results"][name]["unit"]
+        print(f"{name:<{width}}  {before:10.3f}  {after:10.3f} {unit:<2}  {change:+7.1%}{flag}")
+    for label, report in (("base", base), ("head", head)):
+        missing = sorted(set(report["results"]) - set(names))
+        if missing:
+            print(f"Only in {label}: {', '.join(missing)}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:g}%")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks and write a JSON report")
+    run_parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                            help="Comma-separated selector counts")
+    run_parser.add_argument("--repeat", type=int, default=10,
+                            help="Maximum samples per benchmark")
+    run_parser.add_argument("-o", "--output", help="Report path (default: bench-<commit>.json)")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="Flag regressions between two reports")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("head")
+    compare_parser.add_argument("--threshold", type=float, default=10.0,
+                                help="Slowdown in percent that counts as a regression (default: 10)")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""Content-addressed artifact cache for cli-commander.
+
+Selectors that declare both ``inputs:`` and ``outputs:`` have their output
+files and captured stdout/stderr stored after a successful run. The entry is
+keyed on the input fingerprint (command, input contents and environment),
+so a later run with the same fingerprint restores the outputs and replays
+the logs instead of executing the command.
+
+Layout under the cache directory::
+
+    artifacts/objects/<ab>/<sha256>   file and log contents, stored once
+    artifacts/entries/<key>.json      manifest per fingerprint
+
+Entries are evicted least-recently-used first once the objects they
+reference exceed the size limit.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+from cli_commander.cache import atomic_write, get_cache_dir
+from cli_commander.config import parse_size
+from cli_commander.state import expand_globs
+
+
+SIZE_LIMIT_ENV = "CMDR_ARTIFACT_CACHE_SIZE"
+DEFAULT_SIZE_LIMIT = "5G"
+
+# Unreferenced objects younger than this may belong to an entry that is
+# still being written by another process, so pruning leaves them alone
+ORPHAN_GRACE_SECONDS = 600
+
+# Linux FICLONE ioctl: share extents copy-on-write (btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+
+def clone_file(source: str, destination: str) -> None:
+    """
+    Copy a file, sharing its blocks via a reflink where the filesystem allows.
+
+    Hard links are deliberately not used: restored outputs are ordinary
+    working-tree files, and an in-place edit of a hard link would silently
+    change the cached object as well.
+    """
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        try:
+            import fcntl
+
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return
+        except (ImportError, OSError):
+            pass
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+
+
+class ArtifactStore:
+    """Local content-addressable store of selector outputs and logs."""
+
+    def __init__(self, root: Optional[str] = None, max_size: Optional[Any] = None):
+        """
+        Args:
+            root: Store directory; defaults to <cache dir>/artifacts
+            max_size: Size limit in bytes or as a string like "2G"; defaults
+                to CMDR_ARTIFACT_CACHE_SIZE or 5G
+        """
+        self.root = root or os.path.join(get_cache_dir(), "artifacts")
+        if max_size is None:
+            max_size = os.environ.get(SIZE_LIMIT_ENV, DEFAULT_SIZE_LIMIT)
+        self.max_size = parse_size(max_size)
+
+    @property
+    def objects_dir(self) -> str:
+        return os.path.join(self.root, "objects")
+
+    @property
+    def entries_dir(self) -> str:
+        return os.path.join(self.root, "entries")
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.entries_dir, key + ".json")
+
+    @staticmethod
+    def cache_key(fingerprint: str) -> str:
+        """Return the entry key for an input fingerprint."""
+        return hashlib.sha256(b"artifacts\0" + fingerprint.encode("ascii")).hexdigest()
+
+    def put_object(self, path: str) -> str:
+        """
+        Store a file's content.
+
+        Args:
+            path: File to store
+
+        Returns:
+            The content digest
+        """
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        value = digest.hexdigest()
+        target = self._object_path(value)
+        if os.path.exists(target):
+            os.utime(target)
+            return value
+
+        import tempfile
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".tmp-")
+        os.close(fd)
+        try:
+            clone_file(path, tmp_path)
+            os.replace(tmp_path, target)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        return value
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the manifest for a key if all of its objects are present.
+
+        A hit refreshes the entry's position in the LRU order.
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        digests = [digest for _, digest, _ in entry.get("files", [])]
+        digests += [d for d in (entry.get("stdout"), entry.get("stderr")) if d]
+        if not all(os.path.exists(self._object_path(d)) for d in digests):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def save(self, key: str, output_patterns: List[str], cwd: str,
+             stdout_path: Optional[str] = None, stderr_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Store a selector's outputs and logs under a key.
+
+        Args:
+            key: Entry key from cache_key
+            output_patterns: The selector's declared output globs
+            cwd: Directory the selector ran in
+            stdout_path: File holding the captured stdout, if any
+            stderr_path: File holding the captured stderr, if any
+
+        Returns:
+            The stored manifest
+        """
+        files = []
+        for path in expand_globs(output_patterns, cwd):
+            mode = os.stat(path).st_mode & 0o7777
+            files.append([os.path.relpath(path, cwd), self.put_object(path), mode])
+        entry = {
+            "files": files,
+            "stdout": self.put_object(stdout_path) if stdout_path else None,
+            "stderr": self.put_object(stderr_path) if stderr_path else None,
+            "created": time.time(),
+        }
+        atomic_write(self._entry_path(key), json.dumps(entry).encode("utf-8"))
+        if self.max_size:
+            self.prune()
+        return entry
+
+    def restore(self, entry: Dict[str, Any], cwd: str) -> None:
+        """
+        Restore a manifest's output files into cwd.
+
+        Args:
+            entry: Manifest returned by lookup
+            cwd: Directory to restore the files into
+        """
+        for relpath, digest, mode in entry.get("files", []):
+            target = os.path.join(cwd, relpath)
+            os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+            tmp_path = target + ".cmdr-restore"
+            clone_file(self._object_path(digest), tmp_path)
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, target)
+
+    def open_log(self, entry: Dict[str, Any], stream: str) -> Optional[BinaryIO]:
+        """
+        Open a captured log of a manifest for replay.
+
+        Args:
+            entry: Manifest returned by lookup
+            stream: "stdout" or "stderr"
+
+        Returns:
+            A binary file object, or None if nothing was captured
+        """
+        digest = entry.get(stream)
+        if not digest:
+            return None
+        return open(self._object_path(digest), "rb")
+
+    def _scan(self) -> Tuple[List[Tuple[float, str, List[str]]], Dict[str, Tuple[int, float]]]:
+        """Return (entries oldest first, objects) found on disk."""
+        entries = []
+        if os.path.isdir(self.entries_dir):
+            for item in os.scandir(self.entries_dir):
+                if not item.name.endswith(".json"):
+                    continue
+                try:
+                    with open(item.path, "r") as f:
+                        entry = json.load(f)
+                    used = item.stat().st_mtime
+                except (OSError, ValueError):
+                    continue
+                digests = [digest for _, digest, _ in entry.get("files", [])]
+                digests += [d for d in (entry.get("stdout"), entry.get("stderr")) if d]
+                entries.append((used, item.path, digests))
+        entries.sort()
+
+        objects = {}
+        if os.path.isdir(self.objects_dir):
+            for bucket in os.scandir(self.objects_dir):
+                if not bucket.is_dir():
+                    continue
+                for item in os.scandir(bucket.path):
+                    if item.name.startswith(".tmp-"):
+                        continue
+                    try:
+                        st = item.stat()
+                    except OSError:
+                        continue
+                    objects[item.name] = (st.st_size, st.st_mtime)
+        return entries, objects
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of entries and objects and the total size in bytes."""
+        entries, objects = self._scan()
+        return {
+            "entries": len(entries),
+            "objects": len(objects),
+            "size": sum(size for size, _ in objects.values()),
+            "max_size": self.max_size,
+        }
+
+    def prune(self, max_size: Optional[int] = None) -> Dict[str, int]:
+        """
+        Evict least-recently-used entries until the store fits the size limit.
+
+        Objects no longer referenced by any entry are deleted.
+
+        Args:
+            max_size: Size limit in bytes; defaults to the store's limit
+
+        Returns:
+            Counts of removed entries and objects and the bytes freed
+        """
+        limit = self.max_size if max_size is None else max_size
+        entries, objects = self._scan()
+
+        references: Dict[str, int] = {}
+        for _, _, digests in entries:
+            for digest in set(digests):
+                references[digest] = references.get(digest, 0) + 1
+        live_size = sum(objects[d][0] for d in references if d in objects)
+
+        removed_entries = 0
+        evicted = set()
+        for _, path, digests in entries:
+            if live_size <= limit:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            removed_entries += 1
+            for digest in set(digests):
+                references[digest] -= 1
+                if references[digest] == 0:
+                    del references[digest]
+                    evicted.add(digest)
+                    live_size -= objects.get(digest, (0, 0))[0]
+
+        removed_objects = 0
+        freed = 0
+        now = time.time()
+        for digest, (size, mtime) in objects.items():
+            if digest in references:
+                continue
+            if digest not in evicted and now - mtime < ORPHAN_GRACE_SECONDS:
+                continue
+            try:
+                os.unlink(self._object_path(digest))
+            except OSError:
+                continue
+            removed_objects += 1
+            freed += size
+        return {"entries": removed_entries, "objects": removed_objects, "freed": freed}
@@ -0,0 +1,456 @@
+"""Asyncio API for running selectors from Python programs.
+
+CommandExecutor is built for the command line: it blocks the calling thread
+and writes to the real stdout. AsyncCommandExecutor runs selectors as
+asyncio subprocesses instead, so many runs can be driven from one event
+loop::
+
+    executor = AsyncCommandExecutor.from_file("cli-commander.yml")
+    result = await executor.run("test", timeout=300)
+    print(result.exit_code, result.duration, result.stdout)
+
+    run = executor.start("build", stream=True)
+    async for line in run:
+        print(line.stream, line.data)
+    result = await run
+
+    results = await executor.run_many(executor.select(["tag:ci"]), jobs=8)
+
+Each command runs in its own session, so cancelling a run or hitting its
+timeout stops the command's whole process tree: SIGTERM first, then SIGKILL
+if anything is still running after a grace period. Without a timeout
+argument, the selector's timeout: applies, and failed runs are retried as
+its retries: setting allows. Selectors with inputs are skipped when
+unchanged and runs are recorded in the history, as on the command line.
+The artifact cache is not used.
+"""
+
+import asyncio
+import os
+import signal
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional
+
+from cli_commander.config import ConfigParser
+from cli_commander.executor import (
+    KILL_GRACE_SECONDS, CommandExecutor, process_group_alive, signal_process_group,
+)
+from cli_commander.parallel import (
+    CANCELLED, FAILED, PASSED, SKIPPED, SUCCESSFUL, TIMED_OUT, UP_TO_DATE,
+)
+from cli_commander.retry import Attempt, RetryPolicy
+from cli_commander.values import has_values
+
+
+# Lines longer than this are delivered in pieces
+LINE_LIMIT = 1024 * 1024
+# Output lines buffered for a streaming consumer before the command is paused
+STREAM_QUEUE_SIZE = 256
+
+
+class OutputLine(NamedTuple):
+    """One line of a command's output, as yielded by a streaming run."""
+
+    stream: str
+    data: bytes
+
+
+@dataclass
+class RunResult:
+    """Outcome of one selector run."""
+
+    name: str
+    status: str
+    exit_code: Optional[int] = None
+    start: float = 0.0
+    duration: float = 0.0
+    # Output of the last attempt
+    stdout: bytes = b""
+    stderr: bytes = b""
+    attempts: List[Attempt] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.status in SUCCESSFUL
+
+
+async def read_lines(reader: asyncio.StreamReader) -> AsyncIterator[bytes]:
+    """Yield the lines of a stream, splitting lines longer than its limit."""
+    while True:
+        try:
+            chunk = await reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            if e.partial:
+                yield e.partial
+            return
+        except asyncio.LimitOverrunError as e:
+            chunk = await reader.read(max(e.consumed, 1))
+        yield chunk
+
+
+class SelectorRun:
+    """
+    A selector run started by AsyncCommandExecutor.start.
+
+    Await it for the RunResult. A run started with stream=True can also be
+    iterated (once) for its OutputLines; while nobody reads them, the
+    command is paused once a bounded number of lines is buffered.
+    """
+
+    def __init__(self, executor: "AsyncCommandExecutor", name: str,
+                 selector_config: Dict[str, Any], timeout: Optional[float],
+                 stream: bool, capture: bool):
+        self.name = name
+        self.selector_config = selector_config
+        self.timeout = timeout
+        self.capture = capture
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.cancelled = False
+        self._cancel_event = asyncio.Event()
+        self._executor = executor
+        self._queue: Optional[asyncio.Queue] = asyncio.Queue(STREAM_QUEUE_SIZE) if stream else None
+        self._finished = False
+        self._task = asyncio.ensure_future(executor._execute(self))
+
+    def __await__(self):
+        return self._task.__await__()
+
+    async def __aiter__(self) -> AsyncIterator[OutputLine]:
+        if self._queue is None:
+            raise RuntimeError("Output is only streamed for runs started with stream=True")
+        while not (self._finished and self._queue.empty()):
+            line = await self._queue.get()
+            if line is None:
+                return
+            yield line
+
+    def done(self) -> bool:
+        return self._task.done()
+
+    def cancel(self) -> None:
+        """Stop the run; its result has status 'cancelled'."""
+        if self.cancelled:
+            return
+        self.cancelled = True
+        self._cancel_event.set()
+        if self.process is not None:
+            asyncio.ensure_future(self._executor._kill(self.process))
+
+    async def _emit(self, stream: str, data: bytes) -> None:
+        if self._queue is not None:
+            # Blocks while the consumer is behind, which stops the pipe
+            # from being read and eventually pauses the command
+            await self._queue.put(OutputLine(stream, data))
+
+    def _finish(self) -> None:
+        """Mark the output as complete, waking up the consumer."""
+        self._finished = True
+        if self._queue is not None and not self._queue.full():
+            self._queue.put_nowait(None)
+
+
+def terminate(process: asyncio.subprocess.Process, sig: int = signal.SIGTERM) -> None:
+    """Send a signal to the process group of a run, if it is still running."""
+    if process.returncode is not None:
+        return
+    try:
+        os.killpg(process.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+class AsyncCommandExecutor:
+    """
+    Runs selectors as asyncio subprocesses.
+
+    Args:
+        config_parser: ConfigParser to take selectors from; by default the
+            configuration of the current directory is loaded on first use
+        force: Run selectors even if their declared inputs are unchanged
+        use_history: Record runs in the execution history
+        kill_grace: Seconds between SIGTERM and SIGKILL when stopping a run
+    """
+
+    def __init__(self, config_parser: Optional[ConfigParser] = None, force: bool = False,
+                 use_history: bool = True, kill_grace: float = KILL_GRACE_SECONDS):
+        self.config_parser = config_parser or ConfigParser()
+        self.executor = CommandExecutor(force=force, use_history=use_history)
+        self.kill_grace = kill_grace
+
+    @classmethod
+    def from_file(cls, config_path: str, **kwargs: Any) -> "AsyncCommandExecutor":
+        """Create an executor for the selectors of a specific config file."""
+        config_parser = ConfigParser()
+        config_parser.load_config_files([os.path.abspath(config_path)])
+        return cls(config_parser, **kwargs)
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        """The configuration, loaded on first use."""
+        if self.config_parser.config is None:
+            self.config_parser.load_config()
+        return self.config_parser.config
+
+    def select(self, terms: List[str], exclude: Optional[List[str]] = None) -> List[str]:
+        """Resolve selector names and expressions such as "tag:ci" (see ConfigParser.select)."""
+        if self.config_parser.config is None:
+            self.config_parser.load_config()
+        return self.config_parser.select(terms, exclude)
+
+    def get_selector(self, name: str) -> Dict[str, Any]:
+        """
+        Return a selector's configuration.
+
+        Raises:
+            KeyError: If the selector does not exist
+        """
+        selector_config = (self.config.get("selectors") or {}).get(name)
+        if selector_config is None:
+            raise KeyError(f"Selector '{name}' not found in configuration")
+        return selector_config
+
+    def start(self, name: str, timeout: Optional[float] = None, stream: bool = False,
+              capture: bool = True) -> SelectorRun:
+        """
+        Start a selector run; must be called with an event loop running.
+
+        Args:
+            name: Selector to run
+            timeout: Seconds after which the command is stopped, overriding
+                the selector's timeout:
+            stream: Make the run iterable over its output lines
+            capture: Keep the output in the result
+
+        Returns:
+            The run, which can be awaited for its RunResult
+
+        Raises:
+            KeyError: If the selector does not exist
+        """
+        return SelectorRun(self, name, self.get_selector(name), timeout, stream, capture)
+
+    async def run(self, name: str, timeout: Optional[float] = None, capture: bool = True) -> RunResult:
+        """Run a selector and return its result."""
+        return await self.start(name, timeout=timeout, capture=capture)
+
+    async def run_many(self, names: List[str], jobs: Optional[int] = None,
+                       timeout: Optional[float] = None, dependencies: bool = True,
+                       fail_fast: bool = False, capture: bool = True) -> List[RunResult]:
+        """
+        Run several selectors concurrently.
+
+        Args:
+            names: Selectors to run
+            jobs: Maximum number of commands running at once (default: CPU count)
+            timeout: Per-selector timeout in seconds, overriding timeout:
+            dependencies: Also run the selectors' depends_on selectors first;
+                dependents of a failed selector are skipped
+            fail_fast: Cancel everything after the first failure
+            capture: Keep the output in the results
+
+        Returns:
+            One RunResult per selector run, dependencies before dependents
+        """
+        if dependencies:
+            graph = self.config_parser.get_dependencies(names)
+        else:
+            graph = {name: [] for name in names}
+        for name in graph:
+            self.get_selector(name)
+        semaphore = asyncio.Semaphore(max(1, jobs or os.cpu_count() or 1))
+        tasks: Dict[str, "asyncio.Future[RunResult]"] = {}
+        runs: Dict[str, SelectorRun] = {}
+        failed = asyncio.Event()
+
+        async def run_node(name: str) -> RunResult:
+            upstream = await asyncio.gather(*(tasks[d] for d in graph[name]))
+            if not all(result.ok for result in upstream) or (fail_fast and failed.is_set()):
+                return RunResult(name, SKIPPED)
+            async with semaphore:
+                if fail_fast and failed.is_set():
+                    return RunResult(name, SKIPPED)
+                runs[name] = self.start(name, timeout=timeout, capture=capture)
+                result = await runs[name]
+            if not result.ok and fail_fast and not failed.is_set():
+                failed.set()
+                for run in runs.values():
+                    if not run.done():
+                        run.cancel()
+            return result
+
+        # The graph lists dependencies first, so their tasks already exist
+        for name in graph:
+            tasks[name] = asyncio.ensure_future(run_node(name))
+        try:
+            return list(await asyncio.gather(*tasks.values()))
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+    async def _execute(self, run: SelectorRun) -> RunResult:
+        try:
+            return await self._execute_run(run)
+        finally:
+            # End the output stream on every path, or streaming consumers hang
+            run._finish()
+
+    async def _execute_run(self, run: SelectorRun) -> RunResult:
+        name, selector_config = run.name, run.selector_config
+        if (selector_config.get("command") is None and selector_config.get("argv") is None
+                and selector_config.get("depends_on")):
+            # A selector that only groups its dependencies has nothing to run
+            return RunResult(name, PASSED, 0)
+        if run.cancelled:
+            return RunResult(name, CANCELLED)
+
+        start, clock = time.time(), time.monotonic()
+        try:
+            if has_values(selector_config):
+                # Value commands block, so compute them off the event loop
+                selector_config = run.selector_config = await asyncio.get_event_loop().run_in_executor(
+                    None, self.executor.resolve_values, selector_config)
+            policy = RetryPolicy.from_config(selector_config)
+        except ValueError as e:
+            return await self._failed(run, e, start, clock)
+        try:
+            up_to_date, token = self.executor.check_inputs(selector_config, name)
+        except OSError:
+            up_to_date, token = False, None
+        if up_to_date:
+            return RunResult(name, UP_TO_DATE, 0, start, time.monotonic() - clock)
+
+        result = RunResult(name, FAILED, start=start)
+        timeout = run.timeout if run.timeout is not None else policy.timeout
+        try:
+            while True:
+                attempt_start, attempt_clock = time.time(), time.monotonic()
+                timed_out = False
+                try:
+                    process = await self._spawn(run)
+                except (ValueError, OSError) as e:
+                    return await self._failed(run, e, start, clock)
+                try:
+                    exit_code = await self._run_process(run, process, result, timeout)
+                except asyncio.TimeoutError:
+                    timed_out = True
+                    exit_code = run.process.returncode
+                attempt = Attempt(exit_code, time.monotonic() - attempt_clock, timed_out, run.cancelled)
+                result.attempts.append(attempt)
+                if not run.cancelled:
+                    self.executor.record_run(name, selector_config, attempt_start,
+                                             attempt.duration, exit_code)
+                if not policy.should_retry(result.attempts):
+                    break
+                try:
+                    # Cancelling the run ends the backoff early
+                    await asyncio.wait_for(run._cancel_event.wait(),
+                                           policy.delay(len(result.attempts)))
+                    break
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            result.duration = time.monotonic() - clock
+
+        last = result.attempts[-1]
+        result.exit_code = last.exit_code
+        if last.timed_out:
+            result.status = TIMED_OUT
+        elif run.cancelled:
+            result.status = CANCELLED
+        elif last.exit_code == 0:
+            result.status = PASSED
+            self.executor.record_success(token)
+        return result
+
+    @staticmethod
+    async def _failed(run: SelectorRun, error: Exception, start: float, clock: float) -> RunResult:
+        """Fail a run whose command could not be started, reporting why on its stderr."""
+        message = f"Error executing command: {error}\n".encode()
+        await run._emit("stderr", message)
+        return RunResult(run.name, FAILED, 1, start, time.monotonic() - clock,
+                         stderr=message if run.capture else b"")
+
+    async def _spawn(self, run: SelectorRun) -> asyncio.subprocess.Process:
+        """
+        Start the command of a selector in its own session.
+
+        Raises:
+            ValueError: If the selector configuration is invalid
+            OSError: If the command cannot be started
+        """
+        selector_config = run.selector_config
+        command = self.executor.get_command(selector_config)
+        argv = self.executor.get_argv(selector_config)
+        kwargs = dict(
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,
+            limit=LINE_LIMIT,
+        )
+        if selector_config.get("cwd"):
+            kwargs["cwd"] = selector_config["cwd"]
+        env = self.executor.get_env(selector_config)
+        if env is not None:
+            kwargs["env"] = env
+        if argv is not None:
+            process = await asyncio.create_subprocess_exec(*argv, **kwargs)
+        else:
+            process = await asyncio.create_subprocess_shell(command, **kwargs)
+        run.process = process
+        if run.cancelled:
+            asyncio.ensure_future(self._kill(process))
+        return process
+
+    async def _run_process(self, run: SelectorRun, process: asyncio.subprocess.Process,
+                           result: RunResult, timeout: Optional[float] = None) -> int:
+        """Wait for a started command, filling in its captured output."""
+        captured: Dict[str, List[bytes]] = {"stdout": [], "stderr": []}
+
+        async def pump(stream: str, reader: asyncio.StreamReader) -> None:
+            async for line in read_lines(reader):
+                if run.capture:
+                    captured[stream].append(line)
+                await run._emit(stream, line)
+
+        async def communicate() -> int:
+            await asyncio.gather(pump("stdout", process.stdout), pump("stderr", process.stderr))
+            return await process.wait()
+
+        task = asyncio.ensure_future(communicate())
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            await self._stop(process, task)
+            raise
+        finally:
+            result.stdout = b"".join(captured["stdout"])
+            result.stderr = b"".join(captured["stderr"])
+
+    async def _kill(self, process: asyncio.subprocess.Process) -> None:
+        """Terminate a command's process group, escalating to SIGKILL after the grace period."""
+        if process.returncode is not None:
+            return
+        deadline = time.monotonic() + self.kill_grace
+        terminate(process)
+        try:
+            await asyncio.wait_for(process.wait(), self.kill_grace)
+        except asyncio.TimeoutError:
+            terminate(process, signal.SIGKILL)
+            await process.wait()
+        # Children of the shell may outlive it; they get the rest of the grace period
+        while process_group_alive(process.pid) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        signal_process_group(process.pid, signal.SIGKILL)
+
+    async def _stop(self, process: asyncio.subprocess.Process, task: "asyncio.Future[int]") -> None:
+        """Stop a command that timed out or whose run was cancelled."""
+        await self._kill(process)
+        # Let the pumps drain whatever the command wrote before it died
+        try:
+            await asyncio.wait_for(task, self.kill_grace)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            task.cancel()
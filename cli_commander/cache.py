@@ -0,0 +1,232 @@
+"""Compiled configuration cache for cli-commander."""
+
+import marshal
+import os
+from typing import Optional, Dict, Any, List, Tuple
+
+
+CACHE_DIR_ENV = "CMDR_CACHE_DIR"
+CACHE_FORMAT_VERSION = 1
+
+
+def get_cache_dir() -> str:
+    """
+    Get the root directory used for cli-commander caches.
+
+    Honours the CMDR_CACHE_DIR environment variable and otherwise
+    defaults to ~/.cli-commander/cache.
+
+    Returns:
+        Path to the cache root directory
+    """
+    override = os.environ.get(CACHE_DIR_ENV)
+    if override:
+        return override
+    return os.path.join(os.path.expanduser("~"), ".cli-commander", "cache")
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    """
+    Write data to path atomically.
+
+    The data is written to a temporary file in the same directory and then
+    renamed over the destination, so readers never observe a partial file.
+
+    Args:
+        path: Destination file path
+        data: Bytes to write
+    """
+    import tempfile
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ConfigCache:
+    """
+    On-disk cache of parsed configuration files.
+
+    Entries are marshalled dictionaries keyed on the config path. Each entry
+    records the file's mtime, size and content hash: a matching stat result
+    is trusted directly, otherwise the content hash decides whether the
+    cached value can still be used.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = os.path.join(cache_dir or get_cache_dir(), "config")
+
+    def entry_path(self, config_path: str) -> str:
+        """Return the cache entry path for a configuration file."""
+        # Percent-encode the path rather than hashing it, so the warm path
+        # does not need to import hashlib (and load OpenSSL)
+        key = os.path.abspath(config_path).replace("%", "%25").replace(os.sep, "%2F")
+        if len(key) > 200:
+            import hashlib
+
+            key = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key + ".marshal")
+
+    @staticmethod
+    def content_hash(content: bytes) -> str:
+        """Return the content hash used to validate cache entries."""
+        import hashlib
+
+        return hashlib.sha256(content).hexdigest()
+
+    def _read_entry(self, config_path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.entry_path(config_path), "rb") as f:
+                entry = marshal.loads(f.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if not isinstance(entry, dict) or entry.get("version") != CACHE_FORMAT_VERSION:
+            return None
+        if entry.get("path") != os.path.abspath(config_path):
+            return None
+        return entry
+
+    def load(self, config_path: str, content: Optional[bytes] = None) -> Optional[Any]:
+        """
+        Return the cached configuration if it is still fresh.
+
+        Args:
+            config_path: Path to the configuration file
+            content: Raw file content, if already read by the caller
+
+        Returns:
+            The cached configuration, or None if missing or stale
+        """
+        entry = self._read_entry(config_path)
+        if entry is None:
+            return None
+
+        try:
+            st = os.stat(config_path)
+        except OSError:
+            return None
+
+        if entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            return entry["config"]
+
+        # Stat changed (touch, checkout, copy): fall back to the content hash
+        if content is None:
+            try:
+                with open(config_path, "rb") as f:
+                    content = f.read()
+            except OSError:
+                return None
+
+        if entry["hash"] != self.content_hash(content):
+            return None
+
+        self.store(config_path, content, entry["config"], st)
+        return entry["config"]
+
+    def store(self, config_path: str, content: bytes, config: Any,
+              st: Optional[os.stat_result] = None) -> bool:
+        """
+        Store a parsed configuration.
+
+        Args:
+            config_path: Path to the configuration file
+            content: Raw file content the configuration was parsed from
+            config: Parsed configuration
+            st: Stat result taken when the content was read
+
+        Returns:
+            True if the entry was written, False if it could not be cached
+        """
+        try:
+            if st is None:
+                st = os.stat(config_path)
+            data = marshal.dumps({
+                "version": CACHE_FORMAT_VERSION,
+                "path": os.path.abspath(config_path),
+                "mtime_ns": st.st_mtime_ns,
+                "size": st.st_size,
+                "hash": self.content_hash(content),
+                "config": config,
+            })
+            atomic_write(self.entry_path(config_path), data)
+        except (OSError, ValueError):
+            # Unmarshallable values (e.g. YAML timestamps) or an unwritable
+            # cache directory simply mean the config is parsed every time.
+            return False
+        return True
+
+    def merged_entry_path(self, config_paths: List[str]) -> str:
+        """Return the cache entry path for the merged view of several config files."""
+        # A cheap checksum is enough: entries record the paths they belong to
+        import zlib
+
+        key = "\n".join(os.path.abspath(path) for path in config_paths)
+        return os.path.join(self.cache_dir, "merged-%08x.marshal" % zlib.crc32(key.encode("utf-8")))
+
+    def load_merged(self, config_paths: List[str]) -> Optional[Tuple[Any, Dict[str, str], List[str]]]:
+        """
+        Return a cached merged configuration if none of its files changed.
+
+        Args:
+            config_paths: The layered config files, lowest precedence first
+
+        Returns:
+            (config, sources, files) where sources maps selector names to
+            the file defining them and files lists every contributing file
+            (including includes), or None if missing or stale
+        """
+        try:
+            with open(self.merged_entry_path(config_paths), "rb") as f:
+                entry = marshal.loads(f.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if not isinstance(entry, dict) or entry.get("version") != CACHE_FORMAT_VERSION:
+            return None
+        if entry.get("paths") != [os.path.abspath(path) for path in config_paths]:
+            return None
+        for path, mtime_ns, size in entry["files"]:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+            if st.st_mtime_ns != mtime_ns or st.st_size != size:
+                return None
+        return entry["config"], entry["sources"], [path for path, _, _ in entry["files"]]
+
+    def store_merged(self, config_paths: List[str], files: List[Tuple[str, int, int]],
+                     config: Any, sources: Dict[str, str]) -> bool:
+        """
+        Store a merged configuration.
+
+        Args:
+            config_paths: The layered config files, lowest precedence first
+            files: (path, mtime_ns, size) of every file that contributed to
+                the merged view, taken when each was read
+            config: Merged configuration
+            sources: Selector name to defining file
+
+        Returns:
+            True if the entry was written, False if it could not be cached
+        """
+        try:
+            data = marshal.dumps({
+                "version": CACHE_FORMAT_VERSION,
+                "paths": [os.path.abspath(path) for path in config_paths],
+                "files": [(os.path.abspath(path), mtime_ns, size) for path, mtime_ns, size in files],
+                "config": config,
+                "sources": sources,
+            })
+            atomic_write(self.merged_entry_path(config_paths), data)
+        except (OSError, ValueError):
+            return False
+        return True
@@ -1,29 +1,467 @@
-"""Command-line interface for cli-commander."""
+"""Command-line interface for cli-commander.
+
+Only the daemon client is imported up front; argparse and the config
+parser follow once the invocation is known to run in-process. Everything
+else (the executor and subprocess, the --init generator, PyYAML on a
+config cache miss) is imported on the code path that needs it, because
+cmdr is often invoked from git hooks and shell loops where startup time
+dominates.
+"""
 
 import sys
-import argparse
-from cli_commander.config import ConfigParser
-from cli_commander.executor import CommandExecutor
-from cli_commander.generate_configs import main as generate_configs
+import time
+from cli_commander import client
+
+
+def run_parallel(selected, jobs, fail_fast, dependencies=None, force=False, report=None):
+    """
+    Run several selectors concurrently and return the aggregate exit code.
+    
+    The optional report callable receives the job results after the summary.
+    """
+    from cli_commander.executor import CommandExecutor
+    from cli_commander.parallel import ParallelExecutor
+    
+    executor = ParallelExecutor(
+        jobs=jobs,
+        fail_fast=fail_fast,
+        executor=CommandExecutor(force=force),
+    )
+    try:
+        results = executor.run(selected, dependencies)
+    except KeyboardInterrupt:
+        print("\nInterrupted", file=sys.stderr)
+        return 130
+    except Exception as e:
+        print(f"Error executing selectors: {e}", file=sys.stderr)
+        return 1
+    executor.print_summary(results)
+    if report is not None:
+        report(results)
+    return executor.aggregate_exit_code(results)
+
+
+def has_matrix(selector_config):
+    """Return whether a selector configuration has a matrix: to expand."""
+    return isinstance(selector_config, dict) and selector_config.get("matrix") is not None
+
+
+def expand_matrices(selected, dependencies, where):
+    """
+    Replace matrix selectors by their cells, filtered by --where terms.
+    
+    Returns:
+        (selected, dependencies) for the cells
+    
+    Raises:
+        ValueError: If a matrix or filter is invalid
+    """
+    from cli_commander.matrix import expand_graph, parse_where
+    
+    return expand_graph(selected, dependencies, parse_where(where))
+
+
+def parse_shard(value):
+    """Parse a --shard value such as "3/8" into (index, count)."""
+    import argparse
+    
+    index, sep, count = value.partition("/")
+    try:
+        shard = (int(index), int(count))
+    except ValueError:
+        shard = (0, 0)
+    if not sep or not 1 <= shard[0] <= shard[1]:
+        raise argparse.ArgumentTypeError(f"invalid shard {value!r}, expected I/N with 1 <= I <= N")
+    return shard
+
+
+def select_shard(selected, dependencies, requested, shard):
+    """
+    Narrow a run to one shard of the requested selectors.
+    
+    The requested selectors are split into duration-balanced shards using
+    the run history; each shard also runs the dependencies its selectors
+    need.
+    
+    Returns:
+        (selected, dependencies, share) where share lists the requested
+        selectors that fall into this shard
+    """
+    from cli_commander.executor import CommandExecutor
+    from cli_commander.scheduler import duration_weights, partition
+    
+    configs = dict(selected)
+    durations = CommandExecutor().expected_durations([(name, configs[name]) for name in requested])
+    index, count = shard
+    share = partition(duration_weights(requested, durations), count)[index - 1]
+    keep = set()
+    stack = list(share)
+    while stack:
+        node = stack.pop()
+        if node not in keep:
+            keep.add(node)
+            stack.extend(dependencies.get(node, []))
+    selected = [(name, config) for name, config in selected if name in keep]
+    dependencies = {name: depends_on for name, depends_on in dependencies.items() if name in keep}
+    return selected, dependencies, share
 
 
-def main():
-    """Main entry point for the cmdr command."""
+def run_all_projects(args):
+    """Run the requested selectors in every project below the current directory."""
+    import os
+    from cli_commander.config import ConfigParser
+    from cli_commander.parallel import SUCCESSFUL
+    from cli_commander.projects import CONFIG_NAME, discover_projects
+    from cli_commander.selection import is_expression
+    
+    root = os.getcwd()
+    names = list(dict.fromkeys(args.selectors))
+    selected = []
+    dependencies = {}
+    without = []
+    broken = []
+    for project in discover_projects(root):
+        directory = os.path.normpath(os.path.join(root, project))
+        config_parser = ConfigParser()
+        try:
+            config = config_parser.load_config_files([os.path.join(directory, CONFIG_NAME)])
+            selectors = config.get("selectors") or {}
+            terms = [name for name in names if is_expression(name) or name in selectors]
+            project_names = config_parser.select(terms, args.exclude) if terms else []
+            if not project_names:
+                without.append(project)
+                continue
+            excluded = config_parser.select(args.exclude) if args.exclude else None
+            graph = config_parser.get_dependencies(project_names, excluded)
+            nodes = [(name, selectors[name]) for name in graph]
+            if any(has_matrix(selector_config) for _, selector_config in nodes):
+                nodes, graph = expand_matrices(nodes, graph, args.where)
+        except Exception as e:
+            print(f"Error loading {os.path.join(project, CONFIG_NAME)}: {e}", file=sys.stderr)
+            broken.append(project)
+            continue
+        for name, selector_config in nodes:
+            depends_on = graph[name]
+            if isinstance(selector_config, dict):
+                selector_config = dict(selector_config, cwd=directory)
+            selected.append((f"{project}:{name}", selector_config))
+            dependencies[f"{project}:{name}"] = [f"{project}:{d}" for d in depends_on]
+    
+    if not selected:
+        print(f"Error: No project below {root} defines {' '.join(names)}", file=sys.stderr)
+        return 1
+    
+    def report(results):
+        failed = set(broken)
+        ran = set()
+        for result in results:
+            project = result.name.rsplit(":", 1)[0]
+            ran.add(project)
+            if result.status not in SUCCESSFUL:
+                failed.add(project)
+        print(
+            f"\nProjects: {len(ran - failed)} passed, {len(failed)} failed, "
+            f"{len(without)} without {' '.join(names)}"
+        )
+        for project in sorted(failed):
+            print(f"  failed: {project}")
+    
+    jobs = args.jobs if args.jobs is not None else 0
+    exit_code = run_parallel(selected, jobs, args.fail_fast, dependencies, args.force, report)
+    return exit_code or (1 if broken else 0)
+
+
+def format_size(size):
+    """Format a byte count for display."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def run_cache_command(arguments):
+    """Handle 'cmdr cache stats' and 'cmdr cache prune [SIZE]'."""
+    from cli_commander.artifacts import ArtifactStore
+    from cli_commander.config import parse_size
+    
+    action = arguments[0] if arguments else "stats"
+    try:
+        store = ArtifactStore()
+        if action == "stats":
+            stats = store.stats()
+            limit = format_size(stats["max_size"]) if stats["max_size"] else "unlimited"
+            print(f"Artifact cache: {store.root}")
+            print(f"  entries: {stats['entries']}")
+            print(f"  objects: {stats['objects']}")
+            print(f"  size:    {format_size(stats['size'])} (limit {limit})")
+            return 0
+        if action == "prune":
+            max_size = parse_size(arguments[1]) if len(arguments) > 1 else None
+            removed = store.prune(max_size)
+            print(
+                f"Removed {removed['entries']} entries and {removed['objects']} objects, "
+                f"freed {format_size(removed['freed'])}"
+            )
+            return 0
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"Error: unknown cache command '{action}' (expected 'stats' or 'prune')", file=sys.stderr)
+    return 1
+
+
+def run_completion_command(arguments):
+    """Handle 'cmdr completion bash|zsh|fish'."""
+    from cli_commander.completion import SHELLS, script
+    
+    if len(arguments) != 1:
+        print(f"Error: usage: cmdr completion {{{'|'.join(SHELLS)}}}", file=sys.stderr)
+        return 1
+    try:
+        sys.stdout.write(script(arguments[0]))
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def run_shims_command(arguments):
+    """Handle 'cmdr shims install [DIR]'."""
+    import os
+    from cli_commander.config import ConfigParser
+    from cli_commander.shims import install
+    
+    if not arguments or arguments[0] != "install" or len(arguments) > 2:
+        print("Error: usage: cmdr shims install [DIR]", file=sys.stderr)
+        return 1
+    bin_dir = os.path.abspath(arguments[1]) if len(arguments) > 1 else None
+    
+    config_parser = ConfigParser()
+    try:
+        config = config_parser.load_config()
+        path, static, dynamic = install(
+            config_parser.config_path, config_parser.config_files, config, bin_dir
+        )
+    except FileNotFoundError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except Exception as e:
+        print(f"Error installing shims: {e}", file=sys.stderr)
+        return 1
+    
+    print(f"Wrote shims for {len(static)} selectors to {path}")
+    if bin_dir is not None:
+        print(f"Wrote {len(static)} executables to {bin_dir}")
+    if dynamic:
+        print(f"Running through cmdr: {', '.join(dynamic)}")
+    print(f"\nLoad them into your shell with:\n  . {path}")
+    return 0
+
+
+def run_session_command(arguments, jobs, fail_fast, force):
+    """Handle 'cmdr session [FILE]', reading selector names from FILE or stdin."""
+    from cli_commander.config import ConfigParser
+    from cli_commander.executor import CommandExecutor
+    from cli_commander.session import Session, ShellPool, read_names
+    
+    if len(arguments) > 1:
+        print("Error: usage: cmdr session [FILE]", file=sys.stderr)
+        return 1
+    
+    config_parser = ConfigParser()
+    try:
+        config_parser.load_config()
+    except FileNotFoundError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except Exception as e:
+        print(f"Error loading configuration: {e}", file=sys.stderr)
+        return 1
+    
+    jobs = jobs or 1
+    try:
+        batch = open(arguments[0]) if arguments and arguments[0] != "-" else sys.stdin
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    try:
+        with ShellPool(jobs) as pool:
+            session = Session(config_parser, CommandExecutor(force=force), pool)
+            return session.run(read_names(batch), jobs, fail_fast)
+    except KeyboardInterrupt:
+        print("\nInterrupted", file=sys.stderr)
+        return 130
+    finally:
+        if batch is not sys.stdin:
+            batch.close()
+
+
+def format_duration(seconds):
+    """Format a duration for display."""
+    if seconds is None:
+        return "-"
+    if seconds < 1:
+        return f"{seconds * 1000:.0f}ms"
+    if seconds < 60:
+        return f"{seconds:.2f}s"
+    return f"{int(seconds // 60)}m{seconds % 60:04.1f}s"
+
+
+def run_stats_command(names):
+    """Handle 'cmdr --stats [selector...]' for the current directory."""
+    import os
+    from cli_commander.history import HistoryStore, short_hash, summarize
+    
+    store = HistoryStore()
+    stats = summarize(store.records(project=short_hash(os.getcwd()), selectors=names))
+    if not stats:
+        print("No recorded runs" + (f" of {', '.join(names)}" if names else "") + " in this directory")
+        return 0
+    
+    width = max(len("selector"), max(len(s.name) for s in stats))
+    print(f"{'selector'.ljust(width)}  {'runs':>5}  {'fail':>6}  {'p50':>8}  {'p95':>8}  {'max':>8}")
+    for s in stats:
+        line = (
+            f"{s.name.ljust(width)}  {s.runs:>5}  {s.failure_rate:>6.1%}  "
+            f"{format_duration(s.p50):>8}  {format_duration(s.p95):>8}  {format_duration(s.max):>8}"
+        )
+        if s.regressed:
+            change = (s.recent / s.baseline - 1) if s.baseline else 0.0
+            line += (
+                f"  REGRESSION: recent {format_duration(s.recent)} vs "
+                f"baseline {format_duration(s.baseline)} (+{change:.0%})"
+            )
+        print(line)
+    return 0
+
+
+def watch_spec(args):
+    """
+    Load the configuration and work out what a watch session reacts to.
+    
+    Raises:
+        ValueError: If the selectors no longer resolve
+        FileNotFoundError: If no configuration file is found
+    """
+    import os
+    from cli_commander.config import ConfigParser
+    from cli_commander.watch import WatchSpec
+    
+    config_parser = ConfigParser()
+    config_parser.load_config()
+    names = config_parser.select(args.selectors, args.exclude)
+    excluded = config_parser.select(args.exclude) if args.exclude else None
+    inputs, outputs = [], []
+    for name in config_parser.get_dependencies(names, excluded):
+        selector_config = config_parser.get_selector(name) or {}
+        if selector_config.get("command") is None and selector_config.get("argv") is None:
+            continue
+        if not selector_config.get("inputs"):
+            # Anything below the current directory may affect this selector
+            inputs = None
+        elif inputs is not None:
+            inputs.extend(selector_config["inputs"])
+        outputs.extend(selector_config.get("outputs") or [])
+    return WatchSpec(os.getcwd(), inputs, outputs, config_parser.config_files)
+
+
+def run_watch(args, argv):
+    """Handle 'cmdr --watch selector...'."""
+    from cli_commander.watch import watch
+    
+    arguments = [argument for argument in (sys.argv[1:] if argv is None else argv) if argument != "--watch"]
+    command = [sys.executable, "-m", "cli_commander.cli"] + arguments
+    return watch(command, lambda: watch_spec(args))
+
+
+def exit_with_signal(signum, resignal=True):
+    """
+    Exit the way a command killed by a signal did.
+    
+    When cmdr is the top-level process, it re-raises the signal on itself so
+    the caller (e.g. a shell loop reacting to Ctrl-C) sees the same cause of
+    death. Otherwise it exits with the shell's 128 + signum convention.
+    """
+    if resignal:
+        import os
+        import signal
+        from cli_commander import profiling
+        
+        # The process dies below, so report the profile first
+        profiling.tracer.finish()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        try:
+            signal.signal(signum, signal.SIG_DFL)
+            os.kill(os.getpid(), signum)
+        except (OSError, ValueError):
+            pass
+    sys.exit(128 + signum)
+
+
+def main(argv=None):
+    """
+    Main entry point for the cmdr command.
+    
+    Args:
+        argv: Command-line arguments; defaults to sys.argv[1:]. Invocations
+            using sys.argv are forwarded to a running daemon if there is one.
+    """
+    started = time.perf_counter()
+    
+    if argv is None and "--daemon" not in sys.argv[1:] and "--watch" not in sys.argv[1:]:
+        exit_code = client.forward(sys.argv[1:])
+        if exit_code is not None:
+            sys.exit(exit_code)
+    
+    import argparse
+    
     parser = argparse.ArgumentParser(
         prog="cmdr",
         description="A CLI tool for version controlled aliases inspired by dbt selectors"
     )
     
     parser.add_argument(
-        "selector",
-        nargs="?",
-        help="Name of the selector to execute from the configuration file"
+        "selectors",
+        nargs="*",
+        metavar="selector",
+        help="Name of the selector(s) to execute from the configuration file"
     )
     
     parser.add_argument(
         "--list",
         action="store_true",
-        help="List all available selectors"
+        help="List all available selectors, or those matching the given expressions"
+    )
+    
+    parser.add_argument(
+        "--which",
+        action="store_true",
+        help="Show the configuration file each given selector is defined in"
+    )
+    
+    parser.add_argument(
+        "--where",
+        action="append",
+        metavar="AXIS=VALUE",
+        default=[],
+        help="Only run the matrix cells whose AXIS has one of the given comma-separated values"
+    )
+    
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="I/N",
+        help="Run only the I-th of N duration-balanced shards of the selected selectors (e.g. on CI node I)"
+    )
+    
+    parser.add_argument(
+        "--exclude",
+        nargs="+",
+        metavar="selector",
+        default=[],
+        help="Selectors or expressions (e.g. tag:slow) to leave out of the selection"
     )
     
     # Add init subcommand support
@@ -33,10 +471,124 @@ def main():
         help="Initialize cli-commander by creating boilerplate config files"
     )
     
-    args = parser.parse_args()
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        nargs="?",
+        const=0,
+        default=None,
+        help="Run multiple selectors in parallel with up to N jobs (N defaults to the CPU count)"
+    )
+    
+    parser.add_argument(
+        "--all-projects",
+        action="store_true",
+        help="Run the selector(s) in every project below the current directory that has a config file"
+    )
+    
+    parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="When running multiple selectors, stop all jobs after the first failure"
+    )
+    
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Run selectors even if their declared inputs are unchanged, and recompute cached values"
+    )
+    
+    parser.add_argument(
+        "--exec",
+        dest="exec_mode",
+        action="store_true",
+        help="Replace cmdr with the selector's command instead of running it as a child"
+    )
+    
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Run the selector(s), then run them again whenever their inputs change"
+    )
+    
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Show duration statistics and failure rates of past runs in this directory"
+    )
+    
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Run a persistent cmdr daemon that later cmdr calls are forwarded to"
+    )
+    
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print a breakdown of where cmdr spent its time (also enabled by CMDR_TRACE=1)"
+    )
+    
+    parser.add_argument(
+        "--trace-file",
+        metavar="PATH",
+        help="Write a Chrome trace-event JSON file of the run (also CMDR_TRACE=PATH)"
+    )
+    
+    parser.add_argument(
+        "--cprofile",
+        metavar="PATH",
+        help="Run cmdr under cProfile and write the statistics to PATH"
+    )
+    
+    args = parser.parse_args(argv)
+    
+    from cli_commander import profiling
+    
+    enabled, trace_file = profiling.trace_settings(args.profile, args.trace_file)
+    if not enabled and not args.cprofile:
+        dispatch(args, argv)
+        return
+    
+    tracer = profiling.enable(trace_file, started=started) if enabled else None
+    profiler = None
+    if args.cprofile:
+        import cProfile
+        
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        dispatch(args, argv)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.cprofile)
+        if tracer is not None:
+            tracer.finish()
+            profiling.disable()
+
+
+def dispatch(args, argv=None):
+    """
+    Carry out a parsed cmdr invocation.
+    
+    Args:
+        args: Namespace from the argument parser
+        argv: The argv passed to main, None when running from sys.argv
+    """
+    from cli_commander import profiling
+    from cli_commander.config import ConfigParser
+    from cli_commander.selection import is_expression
+    
+    if args.daemon:
+        from cli_commander.daemon import serve
+        
+        sys.exit(serve())
     
     # Handle --init flag (or 'init' as selector)
-    if args.init or (args.selector and args.selector.lower() == "init"):
+    if args.init or (args.selectors and args.selectors[0].lower() == "init"):
+        from cli_commander.generate_configs import main as generate_configs
+        
         try:
             generate_configs()
             sys.exit(0)
@@ -44,6 +596,36 @@ def main():
             print(f"Error initializing configuration: {e}", file=sys.stderr)
             sys.exit(1)
     
+    # Handle 'cmdr cache stats|prune'
+    if args.selectors and args.selectors[0] == "cache":
+        sys.exit(run_cache_command(args.selectors[1:]))
+    
+    # Handle 'cmdr completion bash|zsh|fish'
+    if args.selectors and args.selectors[0] == "completion":
+        sys.exit(run_completion_command(args.selectors[1:]))
+    
+    # Handle 'cmdr shims install [DIR]'
+    if args.selectors and args.selectors[0] == "shims":
+        sys.exit(run_shims_command(args.selectors[1:]))
+    
+    # Handle 'cmdr session [FILE]'
+    if args.selectors and args.selectors[0] == "session":
+        sys.exit(run_session_command(args.selectors[1:], args.jobs, args.fail_fast, args.force))
+    
+    # Handle 'cmdr --stats [selector...]'
+    if args.stats:
+        sys.exit(run_stats_command(args.selectors))
+    
+    # Handle 'cmdr --all-projects selector...'
+    if args.all_projects:
+        if args.shard:
+            print("Error: --shard cannot be combined with --all-projects", file=sys.stderr)
+            sys.exit(1)
+        if not args.selectors:
+            print("Error: --all-projects needs a selector to run", file=sys.stderr)
+            sys.exit(1)
+        sys.exit(run_all_projects(args))
+    
     # Initialize config parser
     config_parser = ConfigParser()
     
@@ -56,6 +638,34 @@ def main():
         print(f"Error loading configuration: {e}", file=sys.stderr)
         sys.exit(1)
     
+    # Resolve expressions such as tag:ci or +deploy into selector names
+    names = list(dict.fromkeys(args.selectors))
+    if args.exclude or (names and args.list) or any(is_expression(name) for name in names):
+        with profiling.tracer.phase("selector lookup"):
+            try:
+                names = config_parser.select(names or ["*"], args.exclude)
+            except ValueError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                sys.exit(1)
+        if not names:
+            print("Error: No selectors match the given expressions", file=sys.stderr)
+            sys.exit(1)
+    
+    # Handle --which flag
+    if args.which:
+        if not names:
+            print("Error: --which needs a selector name", file=sys.stderr)
+            sys.exit(1)
+        exit_code = 0
+        for name in names:
+            source = config_parser.get_source(name)
+            if source is None:
+                print(f"Error: Selector '{name}' not found in configuration", file=sys.stderr)
+                exit_code = 1
+            else:
+                print(f"{name}: {source}")
+        sys.exit(exit_code)
+    
     # Handle --list flag
     if args.list:
         selectors = config.get("selectors", {})
@@ -63,7 +673,10 @@ def main():
             print("No selectors defined in configuration file")
             sys.exit(0)
         
-        print(f"Available selectors from {config_parser.config_path}:")
+        if args.selectors or args.exclude:
+            selectors = {name: selectors[name] for name in names}
+        
+        print(f"Available selectors from {', '.join(config_parser.config_files)}:")
         for name, selector_config in selectors.items():
             description = selector_config.get("description", "") if isinstance(selector_config, dict) else ""
             if description:
@@ -73,27 +686,77 @@ def main():
         sys.exit(0)
     
     # Check if selector argument is provided
-    if not args.selector:
+    if not args.selectors:
         print("Error: Selector name is required", file=sys.stderr)
         print("\nUse 'cmdr --list' to see available selectors", file=sys.stderr)
         sys.exit(1)
     
-    # Get the selector
-    selector_config = config_parser.get_selector(args.selector)
+    # Get the selectors, ignoring repeated names
+    with profiling.tracer.phase("selector lookup"):
+        selected = []
+        for name in names:
+            selector_config = config_parser.get_selector(name)
+            
+            if selector_config is None:
+                print(f"Error: Selector '{name}' not found in configuration", file=sys.stderr)
+                print(f"\nAvailable selectors:", file=sys.stderr)
+                selectors = config.get("selectors", {})
+                for available in selectors.keys():
+                    print(f"  {available}", file=sys.stderr)
+                sys.exit(1)
+            
+            selected.append((name, selector_config))
+        
+        # Pull in dependencies declared with depends_on
+        excluded = config_parser.select(args.exclude) if args.exclude else None
+        dependencies = config_parser.get_dependencies(names, excluded)
     
-    if selector_config is None:
-        print(f"Error: Selector '{args.selector}' not found in configuration", file=sys.stderr)
-        print(f"\nAvailable selectors:", file=sys.stderr)
-        selectors = config.get("selectors", {})
-        for name in selectors.keys():
-            print(f"  {name}", file=sys.stderr)
-        sys.exit(1)
+    if args.watch:
+        sys.exit(run_watch(args, argv))
+    
+    # Replace matrix selectors by their cells
+    selectors = config.get("selectors", {})
+    selected = [(name, selectors[name]) for name in dependencies]
+    matrix_run = any(has_matrix(selector_config) for _, selector_config in selected)
+    if matrix_run or args.where:
+        try:
+            selected, dependencies = expand_matrices(selected, dependencies, args.where)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+    
+    # Keep this CI node's share of the requested selectors (or cells)
+    if args.shard:
+        matrices = {name for name in names if has_matrix(selectors.get(name))}
+        requested = [
+            node for node, _ in selected
+            if node in names or (node not in selectors and node.partition("[")[0] in matrices)
+        ]
+        selected, dependencies, share = select_shard(selected, dependencies, requested, args.shard)
+        print(f"Shard {args.shard[0]}/{args.shard[1]}: {len(share)} of {len(requested)} selectors",
+              file=sys.stderr)
+        if not share:
+            sys.exit(0)
+    
+    if len(dependencies) > 1:
+        from cli_commander.resources import has_resources
+        
+        # Dependency graphs, matrix cells and selectors declaring resources
+        # run on all CPUs unless -j says otherwise
+        auto = matrix_run or any(dependencies.values()) or has_resources(selected)
+        jobs = args.jobs if args.jobs is not None else (0 if auto else 1)
+        sys.exit(run_parallel(selected, jobs, args.fail_fast, dependencies, args.force))
     
     # Execute the command
-    executor = CommandExecutor()
+    from cli_commander.executor import CommandExecutor
+    
+    selector_name, selector_config = selected[0]
+    executor = CommandExecutor(force=args.force, exec_mode=args.exec_mode)
     
     try:
-        exit_code = executor.execute_selector(selector_config)
+        exit_code = executor.execute_selector(selector_config, selector_name)
+        if exit_code < 0:
+            exit_with_signal(-exit_code, resignal=argv is None)
         sys.exit(exit_code)
     except ValueError as e:
         print(f"Error: {e}", file=sys.stderr)
@@ -0,0 +1,119 @@
+"""Thin client that forwards cmdr invocations to a running daemon.
+
+This module is imported on every cmdr call, so it only imports os at
+module level. Everything else is loaded once a daemon socket is found.
+"""
+
+import os
+
+
+SOCKET_ENV = "CMDR_DAEMON_SOCKET"
+DISABLE_ENV = "CMDR_NO_DAEMON"
+FORWARDED_SIGNALS = ("SIGINT", "SIGTERM", "SIGHUP", "SIGQUIT")
+
+
+def get_socket_path() -> str:
+    """
+    Get the path of the daemon's Unix domain socket.
+
+    Honours CMDR_DAEMON_SOCKET and otherwise uses daemon.sock in the cache
+    directory.
+
+    Returns:
+        Path to the socket
+    """
+    override = os.environ.get(SOCKET_ENV)
+    if override:
+        return override
+    from cli_commander.cache import get_cache_dir
+
+    return os.path.join(get_cache_dir(), "daemon.sock")
+
+
+def forward(argv):
+    """
+    Run a cmdr invocation through the daemon, if one is running.
+
+    The daemon receives argv, the working directory, the environment and
+    the client's stdin/stdout/stderr file descriptors, so the command
+    talks to the same terminal. Signals received by the client are relayed
+    to the command.
+
+    Args:
+        argv: Command-line arguments, without the program name
+
+    Returns:
+        The command's exit code, or None if no daemon is reachable and the
+        caller should run in-process
+    """
+    if os.environ.get(DISABLE_ENV):
+        return None
+    path = get_socket_path()
+    if not os.path.exists(path):
+        return None
+
+    import array
+    import json
+    import signal
+    import socket
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        # Stale socket left by a daemon that is no longer running
+        sock.close()
+        return None
+
+    std_fds = []
+    for fd in (0, 1, 2):
+        try:
+            os.fstat(fd)
+        except OSError:
+            continue
+        std_fds.append(fd)
+
+    request = json.dumps({
+        "argv": list(argv),
+        "cwd": os.getcwd(),
+        "env": dict(os.environ),
+        "fds": std_fds,
+    }).encode("utf-8") + b"\n"
+
+    def relay(signum, frame):
+        try:
+            sock.sendall(json.dumps({"signal": signum}).encode("utf-8") + b"\n")
+        except OSError:
+            pass
+
+    with sock:
+        try:
+            sock.sendmsg(
+                [request[:65536]],
+                [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array("i", std_fds))],
+            )
+            if len(request) > 65536:
+                sock.sendall(request[65536:])
+        except OSError:
+            return None
+
+        for name in FORWARDED_SIGNALS:
+            if hasattr(signal, name):
+                signal.signal(getattr(signal, name), relay)
+
+        response = b""
+        while True:
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            response += chunk
+
+    for line in reversed(response.splitlines()):
+        try:
+            return int(json.loads(line)["exit_code"])
+        except (ValueError, KeyError, TypeError):
+            continue
+    import sys
+
+    print("Error: cmdr daemon closed the connection unexpectedly", file=sys.stderr)
+    return 1
@@ -0,0 +1,356 @@
+"""Shell completion for cli-commander.
+
+``cmdr completion bash|zsh|fish`` prints a completion script. The scripts
+never start Python: they read a plain-text selector index that ConfigParser
+rewrites whenever it loads a configuration that changed. The index lives in
+the cache directory, named after the nearest config file, and looks like::
+
+    # cmdr completion index 1
+    @/home/me/.cli-commander/cli-commander.yml
+    @/home/me/project/cli-commander.yml
+    build<TAB>Build the project
+    test<TAB>Run all tests
+
+The ``@`` lines are the files the configuration was merged from. A script
+treats the index as stale when one of them is missing or newer than the
+index, and then falls back to parsing ``cmdr --list`` (which also rewrites
+the index for the next completion).
+"""
+
+import os
+from typing import Any, Dict, List, Optional
+
+from cli_commander.cache import atomic_write, get_cache_dir
+
+
+INDEX_HEADER = "# cmdr completion index 1"
+# Longest config path the scripts can map to an index file name
+MAX_KEY_LENGTH = 200
+SHELLS = ("bash", "zsh", "fish")
+
+OPTIONS = (
+    "--list", "--which", "--where", "--shard", "--exclude", "--init", "--jobs",
+    "--all-projects", "--fail-fast", "--force", "--exec", "--watch", "--stats", "--daemon",
+    "--profile", "--trace-file", "--cprofile", "--help",
+)
+FILE_OPTIONS = ("--trace-file", "--cprofile")
+
+
+def index_path(config_path: str, cache_dir: Optional[str] = None) -> Optional[str]:
+    """
+    Return the index file of the configuration whose nearest file is config_path.
+
+    The file name is the percent-encoded path (as for the config cache), so
+    the completion scripts can compute it without hashing.
+
+    Returns:
+        Path of the index, or None if config_path is too long to encode
+    """
+    key = os.path.abspath(config_path).replace("%", "%25").replace(os.sep, "%2F")
+    if len(key) > MAX_KEY_LENGTH:
+        return None
+    return os.path.join(cache_dir or get_cache_dir(), "completion", key)
+
+
+def read_sources(path: str) -> Optional[List[str]]:
+    """Return the config files listed in an index, or None if it cannot be read."""
+    sources = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if f.readline().rstrip("\n") != INDEX_HEADER:
+                return None
+            for line in f:
+                if not line.startswith("@"):
+                    break
+                sources.append(line[1:].rstrip("\n"))
+    except (OSError, UnicodeDecodeError):
+        return None
+    return sources
+
+
+def is_fresh(path: str, config_files: List[str]) -> bool:
+    """Return True if an index lists config_files and is newer than all of them."""
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+        if any(os.stat(source).st_mtime_ns > mtime_ns for source in config_files):
+            return False
+    except OSError:
+        return False
+    return read_sources(path) == config_files
+
+
+def format_index(config_files: List[str], config: Dict[str, Any]) -> str:
+    """Render the index of a loaded configuration."""
+    lines = [INDEX_HEADER]
+    lines.extend("@" + path for path in config_files)
+    for name, selector_config in (config.get("selectors") or {}).items():
+        name = str(name)
+        if any(char in name for char in "\t\n\r"):
+            continue
+        description = ""
+        if isinstance(selector_config, dict):
+            description = " ".join(str(selector_config.get("description") or "").split())
+        lines.append(f"{name}\t{description}")
+    return "\n".join(lines) + "\n"
+
+
+def update_index(config_path: str, config_files: List[str], config: Dict[str, Any],
+                 cache_dir: Optional[str] = None) -> bool:
+    """
+    Rewrite the index of a configuration unless it is already up to date.
+
+    Args:
+        config_path: Nearest config file, which names the index
+        config_files: Every file the configuration was merged from
+        config: The loaded configuration
+        cache_dir: Cache root; defaults to get_cache_dir()
+
+    Returns:
+        True if the index was rewritten
+    """
+    path = index_path(config_path, cache_dir)
+    if path is None or is_fresh(path, config_files):
+        return False
+    try:
+        atomic_write(path, format_index(config_files, config).encode("utf-8"))
+    except OSError:
+        return False
+    return True
+
+
+BASH_SCRIPT = r'''# cmdr completion for bash 4+
+# Add to ~/.bashrc:  eval "$(cmdr completion bash)"
+
+_cmdr_load() {
+    # Fill _cmdr_entries with "name<TAB>description" lines from the selector
+    # index, or from 'cmdr --list' when the index is missing or stale
+    local dir config="" index file i fresh=1
+    local -a lines
+    dir=$(pwd -P)
+    while :; do
+        if [[ -f ${dir%/}/cli-commander.yml ]]; then
+            config=${dir%/}/cli-commander.yml
+            break
+        fi
+        [[ -e $dir/.git || $dir == / ]] && break
+        dir=${dir%/*}
+        dir=${dir:-/}
+    done
+    if [[ -z $config && -f $HOME/.cli-commander/cli-commander.yml ]]; then
+        config=$HOME/.cli-commander/cli-commander.yml
+    fi
+    if [[ -n $config ]]; then
+        config=${config//%/%25}
+        index=${CMDR_CACHE_DIR:-$HOME/.cli-commander/cache}/completion/${config//\//%2F}
+        if [[ -f $index ]] && mapfile -t lines < "$index" && [[ ${lines[0]} == "__HEADER__" ]]; then
+            for ((i = 1; i < ${#lines[@]}; i++)); do
+                [[ ${lines[i]} == @* ]] || break
+                file=${lines[i]#@}
+                if [[ ! -f $file || $file -nt $index ]]; then
+                    fresh=
+                    break
+                fi
+            done
+            if [[ -n $fresh ]]; then
+                _cmdr_entries=("${lines[@]:i}")
+                return
+            fi
+        fi
+    fi
+    mapfile -t _cmdr_entries < <(_cmdr_list)
+}
+
+_cmdr_list() {
+    local line
+    command cmdr --list 2>/dev/null | while IFS= read -r line; do
+        [[ $line == "  "* ]] || continue
+        line=${line#  }
+        if [[ $line == *": "* ]]; then
+            printf '%s\t%s\n' "${line%%: *}" "${line#*: }"
+        else
+            printf '%s\t\n' "$line"
+        fi
+    done
+}
+
+_cmdr() {
+    local cur=${COMP_WORDS[COMP_CWORD]} prev=${COMP_WORDS[COMP_CWORD-1]}
+    local -a _cmdr_entries
+    COMPREPLY=()
+    case $prev in
+        completion) COMPREPLY=($(compgen -W "__SHELLS__" -- "$cur")); return ;;
+        cache) COMPREPLY=($(compgen -W "stats prune" -- "$cur")); return ;;
+        shims) COMPREPLY=($(compgen -W "install" -- "$cur")); return ;;
+        session) COMPREPLY=($(compgen -f -- "$cur")); return ;;
+        --trace-file|--cprofile) COMPREPLY=($(compgen -f -- "$cur")); return ;;
+    esac
+    if [[ $cur == -* ]]; then
+        COMPREPLY=($(compgen -W "__OPTIONS__" -- "$cur"))
+        return
+    fi
+    _cmdr_load
+    COMPREPLY=($(compgen -W "${_cmdr_entries[*]%%$'\t'*}" -- "$cur"))
+}
+
+complete -o default -F _cmdr cmdr
+'''
+
+ZSH_SCRIPT = r'''#compdef cmdr
+# cmdr completion for zsh
+# Add to ~/.zshrc:  eval "$(cmdr completion zsh)"
+# or save as _cmdr in a directory on $fpath
+
+_cmdr_index() {
+    # Print "name<TAB>description" lines from the selector index, or
+    # from 'cmdr --list' when the index is missing or stale
+    local dir=${PWD:A} config="" index line file i fresh=1
+    local -a lines
+    while :; do
+        if [[ -f ${dir%/}/cli-commander.yml ]]; then
+            config=${dir%/}/cli-commander.yml
+            break
+        fi
+        [[ -e $dir/.git || $dir == / ]] && break
+        dir=${dir:h}
+    done
+    if [[ -z $config && -f $HOME/.cli-commander/cli-commander.yml ]]; then
+        config=$HOME/.cli-commander/cli-commander.yml
+    fi
+    if [[ -n $config ]]; then
+        config=${config//\%/%25}
+        index=${CMDR_CACHE_DIR:-$HOME/.cli-commander/cache}/completion/${config//\//%2F}
+        if [[ -f $index ]]; then
+            lines=("${(@f)$(<$index)}")
+            if [[ ${lines[1]} == "__HEADER__" ]]; then
+                for ((i = 2; i <= ${#lines}; i++)); do
+                    [[ ${lines[i]} == @* ]] || break
+                    file=${lines[i]#@}
+                    if [[ ! -f $file || $file -nt $index ]]; then
+                        fresh=
+                        break
+                    fi
+                done
+                if [[ -n $fresh ]]; then
+                    (( i <= ${#lines} )) && print -rl -- "${(@)lines[i,-1]}"
+                    return
+                fi
+            fi
+        fi
+    fi
+    command cmdr --list 2>/dev/null | while IFS= read -r line; do
+        [[ $line == "  "* ]] || continue
+        line=${line#  }
+        if [[ $line == *": "* ]]; then
+            print -r -- "${line%%: *}"$'\t'"${line#*: }"
+        else
+            print -r -- "$line"$'\t'
+        fi
+    done
+}
+
+_cmdr() {
+    local -a entries
+    case ${words[CURRENT-1]} in
+        completion) compadd -- __SHELLS__; return ;;
+        cache) compadd -- stats prune; return ;;
+        shims) compadd -- install; return ;;
+        session) _files; return ;;
+        --trace-file|--cprofile) _files; return ;;
+    esac
+    if [[ $PREFIX == -* ]]; then
+        compadd -- __OPTIONS__
+        return
+    fi
+    entries=("${(@f)$(_cmdr_index)}")
+    entries=("${(@)entries//:/\\:}")
+    entries=("${(@)entries/$'\t'/:}")
+    _describe -t selectors 'selector' entries
+}
+
+if [[ $funcstack[1] == _cmdr ]]; then
+    _cmdr "$@"
+else
+    compdef _cmdr cmdr
+fi
+'''
+
+FISH_SCRIPT = r'''# cmdr completion for fish
+# Add to ~/.config/fish/config.fish:  cmdr completion fish | source
+# or save as ~/.config/fish/completions/cmdr.fish
+
+function __cmdr_index
+    # Print "name<TAB>description" lines from the selector index, or
+    # from 'cmdr --list' when the index is missing or stale
+    set -l dir (pwd -P)
+    set -l config
+    while true
+        set -l file (string replace -r '/$' '' -- $dir)/cli-commander.yml
+        if test -f $file
+            set config $file
+            break
+        end
+        if test -e $dir/.git; or test "$dir" = /
+            break
+        end
+        set dir (string replace -r '/[^/]*$' '' -- $dir)
+        test -n "$dir"; or set dir /
+    end
+    if test -z "$config"; and test -f $HOME/.cli-commander/cli-commander.yml
+        set config $HOME/.cli-commander/cli-commander.yml
+    end
+    if test -n "$config"
+        set -l cache $CMDR_CACHE_DIR
+        test -n "$cache"; or set cache $HOME/.cli-commander/cache
+        set -l index $cache/completion/(string replace -a % %25 -- $config | string replace -a / %2F)
+        if test -f $index
+            set -l lines (cat $index)
+            if test "$lines[1]" = "__HEADER__"
+                set -l fresh 1
+                set -l i 2
+                while test $i -le (count $lines); and string match -q '@*' -- $lines[$i]
+                    set -l file (string sub -s 2 -- $lines[$i])
+                    if not test -f $file; or command test $file -nt $index
+                        set fresh 0
+                        break
+                    end
+                    set i (math $i + 1)
+                end
+                if test $fresh = 1
+                    test $i -le (count $lines); and printf '%s\n' $lines[$i..-1]
+                    return
+                end
+            end
+        end
+    end
+    command cmdr --list 2>/dev/null | string match -r '^  .*' | string replace -r '^  (.*?)(?:: (.*))?$' '$1\t$2'
+end
+
+complete -c cmdr -f -a '(__cmdr_index)'
+complete -c cmdr -n '__fish_seen_subcommand_from completion' -a '__SHELLS__'
+complete -c cmdr -n '__fish_seen_subcommand_from cache' -a 'stats prune'
+complete -c cmdr -n '__fish_seen_subcommand_from shims' -a 'install'
+complete -c cmdr -n '__fish_seen_subcommand_from session' -F
+__FISH_OPTIONS__
+'''
+
+
+def script(shell: str) -> str:
+    """
+    Return the completion script for a shell.
+
+    Raises:
+        ValueError: If the shell is not supported
+    """
+    scripts = {"bash": BASH_SCRIPT, "zsh": ZSH_SCRIPT, "fish": FISH_SCRIPT}
+    if shell not in scripts:
+        raise ValueError(f"Unsupported shell '{shell}' (expected one of: {', '.join(SHELLS)})")
+    return (
+        scripts[shell]
+        .replace("__HEADER__", INDEX_HEADER)
+        .replace("__SHELLS__", " ".join(SHELLS))
+        .replace("__OPTIONS__", " ".join(OPTIONS))
+        .replace("__FISH_OPTIONS__", "\n".join(
+            f"complete -c cmdr -l {option[2:]}" + (" -r -F" if option in FILE_OPTIONS else "")
+            for option in OPTIONS
+        ))
+    )
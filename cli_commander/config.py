@@ -1,8 +1,107 @@
 """Configuration file parser for cli-commander."""
 
 import os
-import yaml
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+
+from cli_commander import profiling
+from cli_commander.cache import ConfigCache
+
+
+def parse_yaml(content: bytes) -> Any:
+    """
+    Parse YAML content with the fastest available safe loader.
+
+    PyYAML is imported here rather than at module level so that warm runs
+    served from the config cache never pay for importing it.
+
+    Args:
+        content: Raw YAML document
+
+    Returns:
+        The parsed document
+    """
+    import yaml
+
+    # Prefer the libyaml-backed loader, which is an order of magnitude faster
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return yaml.load(content, Loader=loader)
+
+
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def parse_size(value: Any) -> int:
+    """
+    Parse a size such as 512, "64K", "2G" or "1.5GB" into bytes.
+    
+    Args:
+        value: Integer byte count or string with an optional K/M/G/T suffix
+        
+    Returns:
+        Size in bytes
+        
+    Raises:
+        ValueError: If the value is not a valid size
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid size: {value!r}")
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip().upper()
+    if text.endswith("IB"):
+        text = text[:-2]
+    elif text.endswith("B"):
+        text = text[:-1]
+    unit = text[-1:] if text[-1:] in SIZE_UNITS else ""
+    number = text[:-1] if unit else text
+    try:
+        return int(float(number) * SIZE_UNITS[unit])
+    except ValueError:
+        raise ValueError(f"Invalid size: {value!r}") from None
+
+
+DURATION_UNITS = {"": 1, "S": 1, "M": 60, "H": 3600, "D": 86400}
+
+
+def parse_duration(value: Any) -> float:
+    """
+    Parse a duration such as 30, "90s", "5m", "1.5h" or "7d" into seconds.
+    
+    Args:
+        value: Number of seconds or string with an optional s/m/h/d suffix
+        
+    Returns:
+        Duration in seconds
+        
+    Raises:
+        ValueError: If the value is not a valid duration
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid duration: {value!r}")
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        text = str(value).strip().upper()
+        unit = text[-1:] if text[-1:] in DURATION_UNITS else ""
+        number = text[:-1] if unit else text
+        try:
+            seconds = float(number) * DURATION_UNITS[unit]
+        except ValueError:
+            raise ValueError(f"Invalid duration: {value!r}") from None
+    if seconds < 0:
+        raise ValueError(f"Invalid duration: {value!r}")
+    return seconds
+
+
+def scalar_text(value: Any) -> str:
+    """
+    Return the text of a YAML scalar as it would be written in a shell.
+    
+    Booleans become "true"/"false" rather than Python's "True"/"False".
+    """
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
 
 
 class ConfigParser:
@@ -12,38 +111,101 @@ class ConfigParser:
     HOME_CONFIG_DIR = ".cli-commander"
     HOME_CONFIG_NAME = "cli-commander.yml"
     
-    def __init__(self):
+    # In-memory configs keyed by path, enabled by long-running processes
+    # such as the cmdr daemon: {path: (mtime_ns, size, config)}
+    _memo: Optional[Dict[str, Any]] = None
+    
+    @classmethod
+    def enable_memo(cls) -> None:
+        """Keep loaded configurations in memory for the life of the process."""
+        if cls._memo is None:
+            cls._memo = {}
+    
+    @classmethod
+    def refresh_memo(cls) -> None:
+        """Reload memoized configurations whose files changed on disk."""
+        if not cls._memo:
+            return
+        for path, (mtime_ns, size, _) in list(cls._memo.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                del cls._memo[path]
+                continue
+            if (st.st_mtime_ns, st.st_size) != (mtime_ns, size):
+                del cls._memo[path]
+                try:
+                    cls().load_config_file(path)
+                except Exception:
+                    # Reported to the user on their next invocation
+                    pass
+    
+    def __init__(self, cache: Optional[ConfigCache] = None, use_cache: bool = True):
         self.config: Optional[Dict[str, Any]] = None
         self.config_path: Optional[str] = None
+        # Files merged into the config, lowest precedence first, and the
+        # file each selector came from; None for a single config file
+        self.config_files: List[str] = []
+        self.sources: Optional[Dict[str, str]] = None
+        self._index = None
+        self.cache: Optional[ConfigCache] = None
+        if use_cache:
+            self.cache = cache if cache is not None else ConfigCache()
     
-    def find_config_file(self) -> Optional[str]:
+    def find_config_files(self) -> List[str]:
         """
-        Find the configuration file by checking:
-        1. ./cli-commander.yml (local directory)
+        Find every configuration file that applies to the current directory:
+        1. cli-commander.yml in the current directory and each parent, up to
+           the repository root (the first directory containing .git)
         2. ~/.cli-commander/cli-commander.yml (home directory)
         
         Returns:
-            Path to the config file if found, None otherwise
+            Paths of the config files found, lowest precedence (home) first
+            and the nearest file last
         """
-        # Check local directory first
-        local_config = os.path.join(os.getcwd(), self.LOCAL_CONFIG_NAME)
-        if os.path.isfile(local_config):
-            return local_config
+        found = []
+        directory = os.getcwd()
+        while True:
+            local_config = os.path.join(directory, self.LOCAL_CONFIG_NAME)
+            if os.path.isfile(local_config):
+                found.append(local_config)
+            if os.path.exists(os.path.join(directory, ".git")):
+                break
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                break
+            directory = parent
         
-        # Check home directory
         home_config = os.path.join(
             os.path.expanduser("~"),
             self.HOME_CONFIG_DIR,
             self.HOME_CONFIG_NAME
         )
-        if os.path.isfile(home_config):
-            return home_config
+        if home_config not in found and os.path.isfile(home_config):
+            found.append(home_config)
+        
+        found.reverse()
+        return found
+    
+    def find_config_file(self) -> Optional[str]:
+        """
+        Find the nearest configuration file (see find_config_files).
         
-        return None
+        Returns:
+            Path to the config file if found, None otherwise
+        """
+        config_files = self.find_config_files()
+        return config_files[-1] if config_files else None
     
     def load_config(self) -> Dict[str, Any]:
         """
-        Load the configuration file.
+        Load the configuration for the current directory.
+        
+        When several config files apply, or the config includes others,
+        their selectors are merged, nearer files overriding farther ones.
+        A fresh entry in the compiled config cache is used when available;
+        otherwise the files are parsed and the cache entry rebuilt. The
+        shell completion index is rewritten if it is out of date.
         
         Returns:
             Parsed configuration as a dictionary
@@ -51,26 +213,235 @@ class ConfigParser:
         Raises:
             FileNotFoundError: If no configuration file is found
             yaml.YAMLError: If the YAML file is invalid
+            ValueError: If selector dependencies are invalid or cyclic
         """
-        config_path = self.find_config_file()
+        with profiling.tracer.phase("find_config_file"):
+            config_files = self.find_config_files()
         
-        if config_path is None:
+        if not config_files:
             raise FileNotFoundError(
                 f"No configuration file found. Please create either:\n"
-                f"  - {self.LOCAL_CONFIG_NAME} in the current directory, or\n"
+                f"  - {self.LOCAL_CONFIG_NAME} in the current directory or a parent, or\n"
                 f"  - ~/{self.HOME_CONFIG_DIR}/{self.HOME_CONFIG_NAME}"
             )
         
+        config = self.load_config_files(config_files)
+        
+        # Keep the shell completion index in step with the configuration
+        if self.cache is not None:
+            from cli_commander import completion
+            
+            completion.update_index(config_files[-1], self.config_files, config)
+        
+        return config
+    
+    def load_config_files(self, config_files: List[str]) -> Dict[str, Any]:
+        """
+        Load one or more configuration files as a single configuration.
+        
+        Args:
+            config_files: Config files, lowest precedence first
+            
+        Returns:
+            The configuration, merged if there are several files or includes
+        """
+        if len(config_files) == 1:
+            config = self.load_config_file(config_files[0])
+            if not isinstance(config, dict) or "include" not in config:
+                return config
+        
+        return self.load_layered(config_files)
+    
+    def load_layered(self, config_files: List[str]) -> Dict[str, Any]:
+        """
+        Load and merge several configuration files.
+        
+        Each file's includes are merged below the file itself, and later
+        files override earlier ones selector by selector. The merged view is
+        cached, keyed on every contributing file and its mtime.
+        
+        Args:
+            config_files: Config files, lowest precedence first
+            
+        Returns:
+            The merged configuration
+            
+        Raises:
+            FileNotFoundError: If an included file does not exist
+            ValueError: If includes are malformed or cyclic, or dependencies
+                are invalid
+        """
+        self.config_path = config_files[-1]
+        
+        cached = None
+        if self.cache is not None:
+            with profiling.tracer.phase("load_config: merged cache lookup"):
+                cached = self.cache.load_merged(config_files)
+        if cached is not None:
+            self.config, self.sources, self.config_files = cached
+            return self.config
+        
+        layers: List[Any] = []
+        for path in config_files:
+            self._collect_layers(path, layers, [])
+        
+        config: Dict[str, Any] = {}
+        selectors: Dict[str, Any] = {}
+        sources: Dict[str, str] = {}
+        for path, _, layer in layers:
+            for key, value in layer.items():
+                if key == "include":
+                    continue
+                if key == "selectors":
+                    if value is None:
+                        continue
+                    if not isinstance(value, dict):
+                        raise ValueError(f"{path}: 'selectors' must be a mapping")
+                    for name, selector_config in value.items():
+                        selectors[name] = selector_config
+                        sources[name] = path
+                else:
+                    config[key] = value
+        config["selectors"] = selectors
+        
+        with profiling.tracer.phase("load_config: validate"):
+            self.validate_dependencies(config)
+        
+        if self.cache is not None:
+            self.cache.store_merged(
+                config_files,
+                [(path, st.st_mtime_ns, st.st_size) for path, st, _ in layers],
+                config,
+                sources,
+            )
+        
+        self.config = config
+        self.sources = sources
+        self.config_files = [path for path, _, _ in layers]
+        return config
+    
+    def _collect_layers(self, config_path: str, layers: List[Any], chain: List[str]) -> None:
+        """Append (path, stat, config) for a file's includes and then the file itself."""
+        config_path = os.path.abspath(config_path)
+        if config_path in chain:
+            cycle = " -> ".join(chain[chain.index(config_path):] + [config_path])
+            raise ValueError(f"Include cycle detected: {cycle}")
+        if any(path == config_path for path, _, _ in layers):
+            return
+        
+        st = os.stat(config_path)
+        config = self._load_layer(config_path)
+        if config is None:
+            config = {}
+        if not isinstance(config, dict):
+            raise ValueError(f"{config_path}: configuration must be a mapping")
+        
+        includes = config.get("include") or []
+        if isinstance(includes, str):
+            includes = [includes]
+        if not isinstance(includes, list) or not all(isinstance(i, str) for i in includes):
+            raise ValueError(f"{config_path}: 'include' must be a file name or a list of file names")
+        
+        for include in includes:
+            path = os.path.join(os.path.dirname(config_path), os.path.expanduser(include))
+            if not os.path.isfile(path):
+                raise FileNotFoundError(f"{config_path}: included file not found: {include}")
+            self._collect_layers(path, layers, chain + [config_path])
+        layers.append((config_path, st, config))
+    
+    def _load_layer(self, config_path: str) -> Any:
+        """
+        Load one file of a layered configuration.
+        
+        A layer may depend on selectors defined in other layers, so it is
+        not validated on its own, and is therefore only read from (never
+        written to) the single-file cache.
+        """
+        if self.cache is not None:
+            cached = self.cache.load(config_path)
+            if cached is not None:
+                return cached
+        with open(config_path, 'rb') as f:
+            content = f.read()
+        with profiling.tracer.phase("load_config: YAML parse"):
+            return parse_yaml(content)
+    
+    def get_source(self, selector_name: str) -> Optional[str]:
+        """
+        Return the file a selector is defined in.
+        
+        Args:
+            selector_name: Name of the selector
+            
+        Returns:
+            Path of the defining config file, or None if the selector does
+            not exist
+        """
+        if self.get_selector(selector_name) is None:
+            return None
+        if self.sources is not None:
+            return self.sources.get(selector_name)
+        return self.config_path
+    
+    def load_config_file(self, config_path: str) -> Dict[str, Any]:
+        """
+        Load a specific configuration file.
+        
+        Args:
+            config_path: Path to the configuration file
+            
+        Returns:
+            Parsed configuration as a dictionary
+        """
         self.config_path = config_path
+        self.config_files = [config_path]
+        self.sources = None
         
-        with open(config_path, 'r') as f:
-            self.config = yaml.safe_load(f)
+        memo = type(self)._memo
+        if memo is not None:
+            st = os.stat(config_path)
+            entry = memo.get(config_path)
+            if entry is not None and entry[:2] == (st.st_mtime_ns, st.st_size):
+                self.config = entry[2]
+                return self.config
         
-        if self.config is None:
-            self.config = {}
+        self.config = self._load_uncached(config_path)
+        
+        if memo is not None:
+            memo[config_path] = (st.st_mtime_ns, st.st_size, self.config)
         
         return self.config
     
+    def _load_uncached(self, config_path: str) -> Dict[str, Any]:
+        """Load a configuration from the compiled cache or by parsing it."""
+        tracer = profiling.tracer
+        if self.cache is not None:
+            with tracer.phase("load_config: cache lookup"):
+                cached = self.cache.load(config_path)
+            if cached is not None:
+                return cached
+        
+        with open(config_path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            content = f.read()
+        
+        with tracer.phase("load_config: YAML parse"):
+            config = parse_yaml(content)
+        
+        if config is None:
+            config = {}
+        
+        # Files with includes are validated once merged (see load_layered)
+        if not isinstance(config, dict) or "include" not in config:
+            with tracer.phase("load_config: validate"):
+                self.validate_dependencies(config)
+        
+        if self.cache is not None:
+            with tracer.phase("load_config: cache store"):
+                self.cache.store(config_path, content, config, st)
+        
+        return config
+    
     def get_selector(self, selector_name: str) -> Optional[Dict[str, Any]]:
         """
         Get a selector configuration by name.
@@ -86,3 +457,111 @@ class ConfigParser:
         
         selectors = self.config.get("selectors", {})
         return selectors.get(selector_name)
+    
+    def get_index(self):
+        """
+        Return the SelectorIndex of the loaded configuration.
+        
+        The index is built on first use and reused until another
+        configuration is loaded.
+        
+        Returns:
+            SelectorIndex over the configuration's selectors
+        """
+        if self.config is None:
+            self.load_config()
+        
+        if self._index is None or self._index[0] is not self.config:
+            from cli_commander.selection import SelectorIndex
+            
+            self._index = (self.config, SelectorIndex(self.config.get("selectors") or {}))
+        return self._index[1]
+    
+    def select(self, terms: List[str], exclude: Optional[List[str]] = None) -> List[str]:
+        """
+        Resolve selector expressions such as "tag:ci" or "+deploy".
+        
+        Args:
+            terms: Expressions whose results are united
+            exclude: Expressions whose results are removed
+            
+        Returns:
+            Names of the selected selectors
+            
+        Raises:
+            SelectionError: If an expression is invalid or names an unknown selector
+        """
+        return self.get_index().select(terms, exclude or ())
+    
+    @staticmethod
+    def validate_dependencies(config: Dict[str, Any]) -> None:
+        """
+        Check the depends_on entries of every selector.
+        
+        Args:
+            config: Parsed configuration
+            
+        Raises:
+            ValueError: If a dependency is malformed, unknown, or part of a cycle
+        """
+        selectors = config.get("selectors") or {}
+        if not isinstance(selectors, dict):
+            return
+        
+        dependencies = {}
+        for name, selector_config in selectors.items():
+            if not isinstance(selector_config, dict) or "depends_on" not in selector_config:
+                continue
+            depends_on = selector_config["depends_on"]
+            if not isinstance(depends_on, list) or not all(isinstance(d, str) for d in depends_on):
+                raise ValueError(f"Selector '{name}': 'depends_on' must be a list of selector names")
+            for dependency in depends_on:
+                if dependency not in selectors:
+                    raise ValueError(
+                        f"Selector '{name}' depends on unknown selector '{dependency}'"
+                    )
+            dependencies[name] = depends_on
+        
+        if dependencies:
+            from cli_commander.scheduler import CycleError, find_cycle
+            
+            cycle = find_cycle(dependencies)
+            if cycle:
+                raise CycleError(cycle)
+    
+    def get_dependencies(self, selector_names: List[str],
+                         exclude: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """
+        Collect the dependency graph needed to run the given selectors.
+        
+        Args:
+            selector_names: Names of the requested selectors
+            exclude: Selectors to leave out; dependencies on them are
+                treated as already satisfied
+            
+        Returns:
+            Mapping of every requested selector and its transitive
+            dependencies to the selectors it depends on. Dependencies come
+            before their dependents.
+        """
+        if self.config is None:
+            self.load_config()
+        
+        selectors = self.config.get("selectors", {})
+        excluded = set(exclude or ())
+        graph: Dict[str, List[str]] = {}
+        stack = list(reversed(selector_names))
+        while stack:
+            name = stack.pop()
+            if name in graph:
+                continue
+            selector_config = selectors.get(name)
+            depends_on = []
+            if isinstance(selector_config, dict):
+                depends_on = [d for d in selector_config.get("depends_on") or [] if d not in excluded]
+            graph[name] = depends_on
+            stack.extend(d for d in reversed(depends_on) if d not in graph)
+        
+        from cli_commander.scheduler import topological_order
+        
+        return {name: graph[name] for name in topological_order(graph)}
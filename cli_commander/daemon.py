@@ -0,0 +1,258 @@
+"""Persistent cmdr daemon serving requests over a Unix domain socket.
+
+The daemon imports everything up front and keeps loaded configurations in
+memory (see ConfigParser.enable_memo). For each request it reads the
+client's argv, working directory, environment and standard file
+descriptors, warms the configuration for that directory, then forks a
+child that runs the normal cmdr entry point with the client's terminal
+attached and reports the exit code back.
+"""
+
+import array
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from cli_commander.client import get_socket_path
+from cli_commander.config import ConfigParser
+
+
+MAX_FDS = 3
+REQUEST_TIMEOUT = 5.0
+
+
+def receive_request(sock: socket.socket) -> Tuple[Dict[str, Any], List[int]]:
+    """
+    Read a client request and the file descriptors sent with it.
+
+    Args:
+        sock: Connected client socket
+
+    Returns:
+        (request, fds) where fds are in the order of request["fds"]
+
+    Raises:
+        ValueError: If the request is malformed
+    """
+    fds = array.array("i")
+    data, ancdata, _, _ = sock.recvmsg(65536, socket.CMSG_SPACE(MAX_FDS * fds.itemsize))
+    for level, kind, payload in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(payload[:len(payload) - (len(payload) % fds.itemsize)])
+    while not data.endswith(b"\n"):
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        data += chunk
+    try:
+        request = json.loads(data)
+        if len(request["fds"]) != len(fds):
+            raise ValueError("file descriptor count mismatch")
+    except (ValueError, KeyError, TypeError):
+        for fd in fds:
+            os.close(fd)
+        raise ValueError("malformed daemon request") from None
+    return request, list(fds)
+
+
+def relay_signals(sock: socket.socket) -> None:
+    """Deliver signals relayed by the client to this process group."""
+    buffer = b""
+    while True:
+        try:
+            chunk = sock.recv(4096)
+        except OSError:
+            return
+        if not chunk:
+            return
+        buffer += chunk
+        while b"\n" in buffer:
+            line, buffer = buffer.split(b"\n", 1)
+            try:
+                signum = int(json.loads(line)["signal"])
+            except (ValueError, KeyError, TypeError):
+                continue
+            try:
+                os.killpg(os.getpgrp(), signum)
+            except OSError:
+                pass
+
+
+def run_request(sock: socket.socket, request: Dict[str, Any], fds: List[int]) -> int:
+    """
+    Run a request in the current (forked) process as the client would.
+
+    Args:
+        sock: Connected client socket, used to receive relayed signals
+        request: Request from receive_request
+        fds: File descriptors from receive_request
+
+    Returns:
+        The exit code of the cmdr invocation
+    """
+    # Own process group, so relayed signals reach the command and this
+    # process the same way terminal signals would
+    os.setpgid(0, 0)
+    for target, fd in zip(request["fds"], fds):
+        os.dup2(fd, target)
+        os.close(fd)
+    sys.stdin = open(0, "r", closefd=False)
+    sys.stdout = open(1, "w", buffering=1 if os.isatty(1) else -1, closefd=False)
+    sys.stderr = open(2, "w", buffering=1, closefd=False)
+
+    os.chdir(request["cwd"])
+    os.environ.clear()
+    os.environ.update(request["env"])
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    for name in ("SIGTERM", "SIGHUP", "SIGQUIT"):
+        signal.signal(getattr(signal, name), signal.SIG_DFL)
+
+    threading.Thread(target=relay_signals, args=(sock,), daemon=True).start()
+
+    from cli_commander.cli import main
+
+    try:
+        main(request["argv"])
+        exit_code = 0
+    except SystemExit as e:
+        if e.code is None:
+            exit_code = 0
+        elif isinstance(e.code, int):
+            exit_code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    except KeyboardInterrupt:
+        exit_code = 130
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except OSError:
+                pass
+    return exit_code
+
+
+class RequestHandler(socketserver.BaseRequestHandler):
+    """Runs one forwarded cmdr invocation in a forked child."""
+
+    def handle(self):
+        request, fds = self.server.pending
+        exit_code = run_request(self.request, request, fds)
+        try:
+            self.request.sendall(json.dumps({"exit_code": exit_code}).encode("utf-8") + b"\n")
+        except OSError:
+            pass
+
+
+class DaemonServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server that forks a warm child per cmdr invocation."""
+
+    # Poll interval of serve_forever, i.e. how often configs are re-checked
+    poll_interval = 0.5
+    block_on_close = False
+
+    def __init__(self, socket_path: str):
+        self.pending: Optional[Tuple[Dict[str, Any], List[int]]] = None
+        super().__init__(socket_path, RequestHandler)
+
+    def warm(self, cwd: str) -> None:
+        """Load (or revalidate) the configuration used from a directory."""
+        original_dir = os.getcwd()
+        try:
+            os.chdir(cwd)
+            ConfigParser().load_config()
+        except Exception:
+            # Errors are reported by the child that runs the request
+            pass
+        finally:
+            os.chdir(original_dir)
+
+    def process_request(self, request, client_address):
+        # Read the request before forking so the configuration is loaded
+        # into this process's memo and inherited by every later child
+        try:
+            request.settimeout(REQUEST_TIMEOUT)
+            message, fds = receive_request(request)
+            request.settimeout(None)
+        except (OSError, ValueError):
+            self.shutdown_request(request)
+            return
+        self.warm(message["cwd"])
+        self.pending = (message, fds)
+        try:
+            super().process_request(request, client_address)
+        finally:
+            self.pending = None
+            for fd in fds:
+                os.close(fd)
+
+    def service_actions(self):
+        super().service_actions()
+        ConfigParser.refresh_memo()
+
+
+def preload() -> None:
+    """Import everything a request might need so children start warm."""
+    import argparse  # noqa: F401
+    import subprocess  # noqa: F401
+    import yaml  # noqa: F401
+    import cli_commander.artifacts  # noqa: F401
+    import cli_commander.cli  # noqa: F401
+    import cli_commander.executor  # noqa: F401
+    import cli_commander.parallel  # noqa: F401
+    import cli_commander.scheduler  # noqa: F401
+    import cli_commander.state  # noqa: F401
+
+
+def serve(socket_path: Optional[str] = None) -> int:
+    """
+    Run the daemon in the foreground until interrupted.
+
+    Args:
+        socket_path: Socket to listen on; defaults to get_socket_path()
+
+    Returns:
+        Exit code for the cmdr process
+    """
+    socket_path = socket_path or get_socket_path()
+    os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+
+    # Refuse to replace a socket that a live daemon is listening on
+    if os.path.exists(socket_path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(socket_path)
+            print(f"Error: a cmdr daemon is already listening on {socket_path}", file=sys.stderr)
+            return 1
+        except OSError:
+            os.unlink(socket_path)
+        finally:
+            probe.close()
+
+    preload()
+    ConfigParser.enable_memo()
+    server = DaemonServer(socket_path)
+    os.chmod(socket_path, 0o600)
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    print(f"cmdr daemon listening on {socket_path}", flush=True)
+    try:
+        server.serve_forever(poll_interval=server.poll_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.unlink(socket_path)
+        except OSError:
+            pass
+    return 0
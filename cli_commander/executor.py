@@ -1,25 +1,197 @@
 """Command executor for cli-commander."""
 
+import os
+import signal
 import subprocess
 import sys
-from typing import Dict, Any
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from cli_commander import profiling
+from cli_commander.retry import TIMEOUT_EXIT_CODE, Attempt, RetryPolicy, outcome, run_with_retries
+
+
+# Seconds between SIGTERM and SIGKILL when a command is stopped
+KILL_GRACE_SECONDS = 5.0
+
+
+def terminate_process_group(process: subprocess.Popen, sig: int = signal.SIGTERM) -> None:
+    """
+    Send a signal to the process group led by a spawned command.
+
+    Commands started with start_new_session=True lead their own process
+    group, so this also reaches any children the shell forked.
+
+    Args:
+        process: Process started by CommandExecutor.spawn
+        sig: Signal to send
+    """
+    if process.poll() is not None:
+        return
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, sig)
+        else:
+            process.terminate()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def signal_process_group(pgid: int, sig: int) -> bool:
+    """
+    Send a signal to a process group, whether or not its leader is still running.
+
+    Returns:
+        False if the group has no processes left
+    """
+    try:
+        os.killpg(pgid, sig)
+        return True
+    except (ProcessLookupError, PermissionError):
+        return False
+
+
+def process_group_alive(pgid: int) -> bool:
+    """
+    Return True while a process group has processes that are not zombies.
+
+    Killed children reparented to an init that reaps lazily (as in many
+    containers) linger as zombies, which signals still reach. Where /proc
+    is unavailable, they count as alive.
+    """
+    if not signal_process_group(pgid, 0):
+        return False
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return True
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # Fields after the parenthesized command name: state, ppid, pgrp
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if fields[0] != "Z" and int(fields[2]) == pgid:
+            return True
+    return False
+
+
+class ProcessGuard:
+    """
+    Stops a command running in its own session on timeout or interrupt.
+
+    The command's process group gets SIGTERM, and SIGKILL if any process
+    of it is still running after the grace period. The group outlives a
+    shell that exits on SIGTERM while its children do not, so those are
+    stopped too instead of being orphaned. Only signals are sent: the
+    command is still waited for by its owner.
+    """
+
+    def __init__(self, process: subprocess.Popen, timeout: Optional[float] = None,
+                 grace: float = KILL_GRACE_SECONDS):
+        import threading
+
+        self.pgid = process.pid
+        self.grace = grace
+        self.timed_out = False
+        self.interrupted = False
+        self._lock = threading.Lock()
+        self._stopped_at: Optional[float] = None
+        self._finished = False
+        self._timers = []
+        if timeout is not None:
+            self._schedule(timeout, self._expire)
+
+    def _schedule(self, delay: float, function) -> None:
+        import threading
+
+        timer = threading.Timer(delay, function)
+        timer.daemon = True
+        timer.start()
+        self._timers.append(timer)
+
+    def _expire(self) -> None:
+        with self._lock:
+            if self._finished:
+                return
+            self.timed_out = True
+        self.stop()
+
+    def interrupt(self) -> None:
+        """Stop the command because the user interrupted it or the run was cancelled."""
+        self.interrupted = True
+        self.stop()
+
+    def stop(self) -> None:
+        """Send SIGTERM to the process group and arm the SIGKILL that follows."""
+        with self._lock:
+            if self._stopped_at is not None or self._finished:
+                return
+            self._stopped_at = time.monotonic()
+        signal_process_group(self.pgid, signal.SIGTERM)
+        self._schedule(self.grace, lambda: signal_process_group(self.pgid, signal.SIGKILL))
+
+    def finish(self) -> None:
+        """
+        Disarm the guard once the command has been waited for.
+
+        If the command was stopped, whatever is left of its process group
+        gets until the end of the grace period to exit before it is killed.
+        """
+        with self._lock:
+            self._finished = True
+        for timer in self._timers:
+            timer.cancel()
+        if self._stopped_at is None:
+            return
+        while process_group_alive(self.pgid) and time.monotonic() < self._stopped_at + self.grace:
+            time.sleep(0.05)
+        signal_process_group(self.pgid, signal.SIGKILL)
 
 
 class CommandExecutor:
     """Executes commands defined in the configuration."""
     
-    def __init__(self):
-        pass
+    def __init__(self, state=None, force: bool = False, artifacts=None,
+                 use_artifacts: bool = True, exec_mode: bool = False,
+                 history=None, use_history: bool = True, values=None):
+        """
+        Args:
+            state: StateStore used for selectors with declared inputs;
+                created on first use if not given
+            force: Run selectors even when their inputs are unchanged
+            artifacts: ArtifactStore for selectors with inputs and outputs;
+                created on first use if not given
+            use_artifacts: Restore and store outputs via the artifact cache
+            exec_mode: Replace the current process with the command (as if
+                every selector set exec: true)
+            history: HistoryStore that runs are recorded in; created on
+                first use if not given
+            use_history: Record runs in the execution history
+            values: ValueCache for computed vars: and env: values; created
+                on first use if not given
+        """
+        self.state = state
+        self.force = force
+        self.artifacts = artifacts
+        self.use_artifacts = use_artifacts
+        self.exec_mode = exec_mode
+        self.history = history
+        self.use_history = use_history
+        self.values = values
     
-    def execute_selector(self, selector_config: Dict[str, Any]) -> int:
+    def get_command(self, selector_config: Dict[str, Any]) -> str:
         """
-        Execute a command from a selector configuration.
+        Validate a selector configuration and return its command.
         
         Args:
             selector_config: Dictionary containing the selector configuration
             
         Returns:
-            Exit code from the executed command
+            The command string to execute
             
         Raises:
             ValueError: If the selector configuration is invalid
@@ -27,26 +199,587 @@ class CommandExecutor:
         if not isinstance(selector_config, dict):
             raise ValueError("Selector configuration must be a dictionary")
         
+        if selector_config.get("argv") is not None:
+            import shlex
+            
+            return " ".join(shlex.quote(arg) for arg in self.get_argv(selector_config))
+        
         command = selector_config.get("command")
         
         if not command:
             raise ValueError("Selector must have a 'command' field")
         
+        return command
+    
+    def get_argv(self, selector_config: Dict[str, Any]) -> Optional[List[str]]:
+        """
+        Return the argument vector of a selector that bypasses the shell.
+        
+        Selectors either give an explicit argv list, or set shell: false to
+        have their command split like a shell would split it.
+        
+        Args:
+            selector_config: Dictionary containing the selector configuration
+            
+        Returns:
+            The argument vector, or None if the command runs through /bin/sh
+            
+        Raises:
+            ValueError: If the selector configuration is invalid
+        """
+        argv = selector_config.get("argv")
+        if argv is not None:
+            if (not isinstance(argv, list) or not argv
+                    or not all(isinstance(arg, (str, int, float)) for arg in argv)):
+                raise ValueError("Selector 'argv' must be a non-empty list of strings")
+            return [str(arg) for arg in argv]
+        
+        if selector_config.get("shell", True) is False:
+            import shlex
+            
+            argv = shlex.split(self.get_command(selector_config))
+            if not argv:
+                raise ValueError("Selector must have a 'command' field")
+            return argv
+        
+        return None
+    
+    @staticmethod
+    def get_env(selector_config: Dict[str, Any]) -> Optional[Dict[str, str]]:
+        """
+        Return the environment for a selector's command.
+        
+        Args:
+            selector_config: Dictionary containing the selector configuration
+            
+        Returns:
+            cmdr's environment with the selector's env: mapping applied, or
+            None if the selector sets no variables
+            
+        Raises:
+            ValueError: If env is not a mapping
+        """
+        env = selector_config.get("env") if isinstance(selector_config, dict) else None
+        if not env:
+            return None
+        if not isinstance(env, dict):
+            raise ValueError("Selector 'env' must be a mapping of variable names to values")
+        from cli_commander.config import scalar_text
+        
+        merged = dict(os.environ)
+        for name, value in env.items():
+            merged[str(name)] = "" if value is None else scalar_text(value)
+        return merged
+    
+    def resolve_values(self, selector_config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Fill in a selector's vars:, env_file: and computed env: values.
+        
+        Cached values are reused unless the executor was created with
+        force, which recomputes them.
+        
+        Args:
+            selector_config: Dictionary containing the selector configuration
+            
+        Returns:
+            The configuration with vars substituted and env: as plain
+            strings, or selector_config itself if it has no such values
+            
+        Raises:
+            ValueError: If a value is invalid or cannot be computed
+        """
+        from cli_commander.values import ValueCache, has_values, resolve_selector
+        
+        if not has_values(selector_config):
+            return selector_config
+        if self.values is None:
+            self.values = ValueCache()
+        with profiling.tracer.phase("resolve values"):
+            return resolve_selector(selector_config, self.values, refresh=self.force)
+    
+    @staticmethod
+    def working_directory(selector_config: Dict[str, Any]) -> str:
+        """
+        Return the directory a selector runs in.
+        
+        This is the current directory unless the selector sets cwd:, as
+        selectors run by --all-projects do.
+        """
+        cwd = selector_config.get("cwd") if isinstance(selector_config, dict) else None
+        return os.path.abspath(cwd) if cwd else os.getcwd()
+    
+    def check_inputs(self, selector_config: Dict[str, Any],
+                     selector_name: Optional[str] = None) -> Tuple[bool, Optional[Tuple[str, str]]]:
+        """
+        Fingerprint a selector's declared inputs.
+        
+        The configuration should come from resolve_values, so that the
+        results of computed env: values are part of the fingerprint.
+        
+        Args:
+            selector_config: Dictionary containing the selector configuration
+            selector_name: Name of the selector, used to key its state
+            
+        Returns:
+            (up_to_date, token) where up_to_date is True if the run can be
+            skipped and token is passed to record_success after a successful
+            run. Both are falsy for selectors without inputs.
+        """
+        if not isinstance(selector_config, dict) or not selector_config.get("inputs"):
+            return False, None
+        
+        if self.state is None:
+            from cli_commander.state import StateStore
+            
+            self.state = StateStore()
+        
+        cwd = self.working_directory(selector_config)
+        key = self.state.key(selector_name, selector_config, cwd)
+        with profiling.tracer.phase("fingerprint inputs"):
+            fingerprint = self.state.fingerprint(selector_config, cwd)
+        up_to_date = (
+            not self.force
+            and self.state.is_up_to_date(key, fingerprint)
+            and self.state.outputs_exist(selector_config, cwd)
+        )
+        return up_to_date, (key, fingerprint)
+    
+    def record_success(self, token: Optional[Tuple[str, str]]) -> None:
+        """Record the fingerprint returned by check_inputs after a successful run."""
+        if token is not None and self.state is not None:
+            self.state.record(*token)
+    
+    def artifact_store(self, selector_config: Dict[str, Any]):
+        """
+        Return the ArtifactStore to use for a selector, or None.
+        
+        Outputs are cached for selectors that declare both inputs and
+        outputs, unless they set cache: false.
+        """
+        if (not self.use_artifacts
+                or not selector_config.get("inputs")
+                or not selector_config.get("outputs")
+                or selector_config.get("cache") is False):
+            return None
+        if self.artifacts is None:
+            from cli_commander.artifacts import ArtifactStore
+            
+            self.artifacts = ArtifactStore()
+        return self.artifacts
+    
+    def restore_artifacts(self, selector_config: Dict[str, Any],
+                          token: Optional[Tuple[str, str]]) -> Optional[Dict[str, Any]]:
+        """
+        Restore a selector's outputs from the artifact cache.
+        
+        Args:
+            selector_config: Dictionary containing the selector configuration
+            token: Token returned by check_inputs
+            
+        Returns:
+            The restored manifest, whose logs the caller should replay, or
+            None on a cache miss
+        """
+        if token is None or self.force:
+            return None
+        store = self.artifact_store(selector_config)
+        if store is None:
+            return None
+        entry = store.lookup(store.cache_key(token[1]))
+        if entry is None:
+            return None
+        try:
+            store.restore(entry, self.working_directory(selector_config))
+        except OSError as e:
+            print(f"Warning: could not restore cached outputs: {e}", file=sys.stderr)
+            return None
+        self.record_success(token)
+        return entry
+    
+    def save_artifacts(self, selector_config: Dict[str, Any], token: Optional[Tuple[str, str]],
+                       stdout_path: Optional[str], stderr_path: Optional[str]) -> None:
+        """Store a successful run's outputs and captured logs in the artifact cache."""
+        if token is None:
+            return
+        store = self.artifact_store(selector_config)
+        if store is None:
+            return
+        try:
+            store.save(store.cache_key(token[1]), selector_config["outputs"],
+                       self.working_directory(selector_config),
+                       stdout_path, stderr_path)
+        except OSError as e:
+            print(f"Warning: could not cache outputs: {e}", file=sys.stderr)
+    
+    def log_settings(self, selector_config: Dict[str, Any], selector_name: Optional[str] = None):
+        """
+        Return a selector's parsed log: setting, or None if it has none.
+        
+        Raises:
+            ValueError: If the setting is invalid
+        """
+        if not isinstance(selector_config, dict) or not selector_config.get("log"):
+            return None
+        from cli_commander.logs import LogSettings
+        
+        return LogSettings.from_config(selector_config, selector_name,
+                                       self.working_directory(selector_config))
+    
+    def _run_captured(self, selector_config: Dict[str, Any], token: Optional[Tuple[str, str]],
+                      selector_name: Optional[str] = None, log=None,
+                      policy: Optional[RetryPolicy] = None) -> Attempt:
+        """
+        Run a command once, teeing its output to the terminal and keeping copies.
+        
+        Output is copied to the artifact cache when the selector's outputs
+        are cached, and to its log when it has a log: setting. Copies go
+        through fixed-size buffers, so memory use does not grow with the
+        amount of output.
+        
+        Args:
+            selector_config: Dictionary containing the selector configuration
+            token: Fingerprint token from check_inputs, or None
+            selector_name: Name of the selector
+            log: LogSettings of the selector, or None
+            policy: The selector's timeout and retry settings
+        """
+        import contextlib
+        import tempfile
+        import threading
+        from cli_commander.output import tee
+        
+        capture = token is not None and self.artifact_store(selector_config) is not None
+        with tempfile.TemporaryDirectory() as tmpdir:
+            stdout_path = os.path.join(tmpdir, "stdout")
+            stderr_path = os.path.join(tmpdir, "stderr")
+            with contextlib.ExitStack() as files:
+                sinks: List[List[Any]] = [[], []]
+                if capture:
+                    sinks[0].append(files.enter_context(open(stdout_path, "wb")))
+                    sinks[1].append(files.enter_context(open(stderr_path, "wb")))
+                selector_log = None
+                if log is not None:
+                    selector_log = log.open(self.get_command(selector_config))
+                    files.callback(selector_log.close)
+                    for streams in sinks:
+                        streams.append(selector_log)
+                
+                def start_pumps(process: subprocess.Popen) -> List[threading.Thread]:
+                    if log is not None:
+                        from cli_commander.logs import enlarge_pipe
+                        
+                        enlarge_pipe(process.stdout)
+                        enlarge_pipe(process.stderr)
+                    pumps = [
+                        threading.Thread(target=tee, args=(process.stdout, sys.stdout, *sinks[0])),
+                        threading.Thread(target=tee, args=(process.stderr, sys.stderr, *sinks[1])),
+                    ]
+                    for thread in pumps:
+                        thread.start()
+                    return pumps
+                
+                attempt = self._run_attempt(selector_config, selector_name, policy, start_pumps,
+                                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            if attempt.exit_code == 0 and not attempt.timed_out and capture:
+                self.save_artifacts(selector_config, token, stdout_path, stderr_path)
+        return attempt
+    
+    def _run_attempt(self, selector_config: Dict[str, Any], selector_name: Optional[str],
+                     policy: Optional[RetryPolicy] = None, start_pumps=None,
+                     **popen_kwargs: Any) -> Attempt:
+        """
+        Run a selector's command once and record the run.
+        
+        With a timeout or retries, the command runs in its own session so
+        that ProcessGuard can stop its whole process tree; Ctrl-C is then
+        forwarded to it. Other commands stay in the terminal's process
+        group, where interactive programs keep working.
+        
+        Args:
+            selector_config: Dictionary containing the selector configuration
+            selector_name: Name of the selector
+            policy: The selector's timeout and retry settings
+            start_pumps: Called with the process to start the threads
+                copying its output, which are joined before returning
+            **popen_kwargs: Extra keyword arguments for subprocess.Popen
+        """
+        guarded = policy is not None and policy.active
+        if guarded:
+            popen_kwargs["start_new_session"] = True
+        start, clock = time.time(), time.monotonic()
+        with profiling.tracer.phase("spawn"):
+            process = self.spawn(selector_config, **popen_kwargs)
+        guard = ProcessGuard(process, policy.timeout) if guarded else None
+        on_interrupt = guard.interrupt if guard is not None else None
+        try:
+            pumps = start_pumps(process) if start_pumps is not None else []
+            with profiling.tracer.phase("command runtime"):
+                exit_code, usage = self.wait_with_usage(process, on_interrupt)
+                for thread in pumps:
+                    while thread.is_alive():
+                        try:
+                            thread.join()
+                        except KeyboardInterrupt:
+                            if on_interrupt is None:
+                                raise
+                            on_interrupt()
+            duration = time.monotonic() - clock
+        finally:
+            if guard is not None:
+                guard.finish()
+        self.record_run(selector_name, selector_config, start, duration, exit_code, usage)
+        if guard is None:
+            return Attempt(exit_code, duration)
+        return Attempt(exit_code, duration, guard.timed_out, guard.interrupted)
+    
+    def spawn(self, selector_config: Dict[str, Any], **popen_kwargs: Any) -> subprocess.Popen:
+        """
+        Start a selector's command without waiting for it.
+        
+        Args:
+            selector_config: Dictionary containing the selector configuration
+            **popen_kwargs: Extra keyword arguments for subprocess.Popen
+            
+        Returns:
+            The running process
+            
+        Raises:
+            ValueError: If the selector configuration is invalid
+        """
+        command = self.get_command(selector_config)
+        argv = self.get_argv(selector_config)
+        if selector_config.get("cwd"):
+            popen_kwargs.setdefault("cwd", selector_config["cwd"])
+        if "env" not in popen_kwargs:
+            env = self.get_env(selector_config)
+            if env is not None:
+                popen_kwargs["env"] = env
+        if argv is not None:
+            return subprocess.Popen(argv, **popen_kwargs)
+        return subprocess.Popen(command, shell=True, **popen_kwargs)
+    
+    @staticmethod
+    def wait(process: subprocess.Popen) -> int:
+        """
+        Wait for a foreground command and return its exit status.
+        
+        Ctrl-C reaches the command through the terminal's process group as
+        well, so an interrupt only makes us wait for the command to react.
+        A command killed by a signal yields -signum, as with subprocess.
+        """
+        return CommandExecutor.wait_with_usage(process)[0]
+    
+    @staticmethod
+    def wait_with_usage(process: subprocess.Popen, on_interrupt=None) -> Tuple[int, Any]:
+        """
+        Wait for a command like wait() and collect its resource usage.
+        
+        Args:
+            process: The running command
+            on_interrupt: Called on Ctrl-C, for commands running in their
+                own session that the terminal's SIGINT does not reach
+            
+        Returns:
+            (exit_code, rusage) where rusage is the resource.struct_rusage
+            of the command and the children it waited for, or None where
+            wait4() is unavailable
+        """
+        while True:
+            try:
+                if not hasattr(os, "wait4") or process.returncode is not None:
+                    return process.wait(), None
+                try:
+                    _, status, usage = os.wait4(process.pid, 0)
+                except ChildProcessError:
+                    # Reaped concurrently, e.g. by Popen.poll() in cancel()
+                    return process.wait(), None
+                if os.WIFSIGNALED(status):
+                    process.returncode = -os.WTERMSIG(status)
+                else:
+                    process.returncode = os.WEXITSTATUS(status)
+                return process.returncode, usage
+            except KeyboardInterrupt:
+                if on_interrupt is not None:
+                    on_interrupt()
+                continue
+    
+    def record_run(self, selector_name: Optional[str], selector_config: Dict[str, Any],
+                   start: float, wall: float, exit_code: int, usage: Any = None) -> None:
+        """
+        Append a finished run to the execution history.
+        
+        Args:
+            selector_name: Name of the selector; its command is used if None
+            selector_config: Dictionary containing the selector configuration
+            start: Wall-clock time the command started at
+            wall: Elapsed seconds
+            exit_code: Exit status, negative for signal deaths
+            usage: Resource usage from wait_with_usage, if available
+        """
+        if not self.use_history:
+            return
+        from cli_commander.history import HistoryStore, RunRecord, short_hash
+        
+        if self.history is None:
+            self.history = HistoryStore()
+        command = self.get_command(selector_config)
+        record = RunRecord(
+            selector=selector_name if selector_name is not None else command,
+            command_hash=short_hash(command),
+            project=short_hash(self.working_directory(selector_config)),
+            start=start,
+            wall=wall,
+            exit_code=exit_code,
+        )
+        if usage is not None:
+            record.user = usage.ru_utime
+            record.sys = usage.ru_stime
+            record.max_rss = usage.ru_maxrss
+        try:
+            self.history.append(record)
+        except OSError:
+            pass
+    
+    def expected_durations(self, selectors: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, float]:
+        """
+        Look up how long selectors took in their recent successful runs.
+        
+        Only runs in each selector's own working directory count, so
+        selectors of the same name in other projects do not mix.
+        
+        Args:
+            selectors: (name, selector configuration) pairs
+            
+        Returns:
+            Mapping of selector name to expected seconds, for the selectors
+            that have a recorded successful run
+        """
+        if not self.use_history or not selectors:
+            return {}
+        from cli_commander.history import HistoryStore, expected_durations, short_hash
+        
+        if self.history is None:
+            self.history = HistoryStore()
+        projects = {name: short_hash(self.working_directory(config)) for name, config in selectors}
+        records = self.history.records(selectors=projects)
+        return expected_durations([r for r in records if r.project == projects[r.selector]])
+    
+    def exec_selector(self, selector_config: Dict[str, Any]) -> None:
+        """
+        Replace the current process with a selector's command.
+        
+        No Python process stays resident, and signals and the exit status
+        are those of the command itself. Does not return on success.
+        
+        Args:
+            selector_config: Dictionary containing the selector configuration
+            
+        Raises:
+            ValueError: If the selector configuration is invalid
+            OSError: If the command cannot be executed
+        """
+        command = self.get_command(selector_config)
+        argv = self.get_argv(selector_config)
+        env = self.get_env(selector_config)
+        if argv is None:
+            argv = ["/bin/sh", "-c", command]
+        if selector_config.get("cwd"):
+            os.chdir(selector_config["cwd"])
+        # Nothing runs after exec, so report the profile now
+        profiling.tracer.finish()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execvpe(argv[0], argv, env if env is not None else os.environ)
+    
+    def execute_selector(self, selector_config: Dict[str, Any],
+                         selector_name: Optional[str] = None) -> int:
+        """
+        Execute a command from a selector configuration.
+        
+        Selectors that declare inputs are skipped when their fingerprint
+        matches the last successful run. Selectors that also declare
+        outputs are restored from the artifact cache when a previous run
+        with the same fingerprint was stored. A command that exceeds the
+        selector's timeout is stopped, and failed runs are retried as its
+        retries: and retry_on: settings allow.
+        
+        Args:
+            selector_config: Dictionary containing the selector configuration
+            selector_name: Name of the selector, used to key incremental state
+            
+        Returns:
+            Exit code from the last run of the command, or TIMEOUT_EXIT_CODE
+            if it timed out
+            
+        Raises:
+            ValueError: If the selector configuration is invalid
+        """
+        selector_config = self.resolve_values(selector_config)
+        command = self.get_command(selector_config)
+        log = self.log_settings(selector_config, selector_name)
+        policy = RetryPolicy.from_config(selector_config)
+        
         description = selector_config.get("description", "")
         
+        try:
+            up_to_date, token = self.check_inputs(selector_config, selector_name)
+        except OSError as e:
+            print(f"Warning: could not fingerprint inputs: {e}", file=sys.stderr)
+            up_to_date, token = False, None
+        
+        if up_to_date:
+            print(f"Skipping: {description or command} (inputs unchanged)")
+            return 0
+        
+        entry = self.restore_artifacts(selector_config, token)
+        if entry is not None:
+            from cli_commander.output import tee
+            
+            print(f"Restored: {description or command} (cached outputs)")
+            for stream_name, stream in (("stdout", sys.stdout), ("stderr", sys.stderr)):
+                cached_log = self.artifacts.open_log(entry, stream_name)
+                if cached_log is not None:
+                    tee(cached_log, stream)
+            return 0
+        
         if description:
             print(f"Running: {description}")
         
         print(f"Command: {command}")
+        # Keep our messages ahead of the command's output when stdout is a pipe
+        sys.stdout.flush()
+        
+        captured = log is not None or (token is not None and self.artifact_store(selector_config) is not None)
+        if captured:
+            if log is not None and (self.exec_mode or selector_config.get("exec")):
+                print("Note: exec mode is not used for selectors with a log", file=sys.stderr)
+        elif self.exec_mode or selector_config.get("exec"):
+            if token is None and not policy.active:
+                self.exec_selector(selector_config)
+            reason = "inputs" if token is not None else "a timeout or retries"
+            print(f"Note: exec mode is not used for selectors with {reason}", file=sys.stderr)
+        
+        def attempt(number: int) -> Attempt:
+            if captured:
+                return self._run_captured(selector_config, token, selector_name, log, policy)
+            # Execute the command, through the shell unless it gives an argv
+            return self._run_attempt(selector_config, selector_name, policy)
         
-        # Execute the command using shell
         try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                check=False
-            )
-            return result.returncode
+            attempts = run_with_retries(policy, attempt, lambda message: print(message, file=sys.stderr))
         except Exception as e:
             print(f"Error executing command: {e}", file=sys.stderr)
             return 1
+        summary = outcome(attempts)
+        if summary is not None:
+            print(summary, file=sys.stderr)
+        last = attempts[-1]
+        if last.exit_code == 0 and not last.timed_out:
+            self.record_success(token)
+            return 0
+        if log is not None and log.path is not None:
+            # The output itself was just shown; point at where it is kept
+            print(f"Log: {log.path}", file=sys.stderr)
+        if last.interrupted:
+            return -signal.SIGINT
+        return TIMEOUT_EXIT_CODE if last.timed_out else last.exit_code
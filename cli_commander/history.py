@@ -0,0 +1,255 @@
+"""Execution history of selector runs for cli-commander.
+
+Every command run by cmdr appends a compact binary record to an
+append-only log under the cache directory::
+
+    history/runs.log      current log
+    history/runs.log.1    previous log, kept after rotation
+
+Each record is written with a single write() on a file opened with
+O_APPEND, so concurrent cmdr processes never interleave records and no
+locking is needed. Once the log exceeds its size limit it is renamed to
+runs.log.1, replacing the previous one, so the history stays bounded.
+"""
+
+import hashlib
+import math
+import os
+import struct
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from cli_commander.cache import get_cache_dir
+
+
+RECORD_VERSION = 1
+# version, command hash, project hash, start, wall, user, sys, max RSS (KiB),
+# exit code, selector name length; followed by the UTF-8 selector name
+RECORD_HEADER = struct.Struct("<B8s8sddddqiH")
+MAX_LOG_SIZE = 4 * 1024 * 1024
+
+# Regression detection: the median of the most recent runs is compared
+# with the median of the runs before them
+RECENT_RUNS = 5
+BASELINE_RUNS = 20
+REGRESSION_RATIO = 1.25
+# Slowdowns smaller than this are noise for short commands
+REGRESSION_MIN_SECONDS = 0.05
+
+
+@dataclass
+class RunRecord:
+    """One recorded run of a selector."""
+
+    selector: str
+    command_hash: bytes
+    project: bytes
+    start: float
+    wall: float
+    user: float = 0.0
+    sys: float = 0.0
+    max_rss: int = 0
+    exit_code: int = 0
+
+    def pack(self) -> bytes:
+        name = self.selector.encode("utf-8")[:0xFFFF]
+        return RECORD_HEADER.pack(
+            RECORD_VERSION, self.command_hash, self.project, self.start, self.wall,
+            self.user, self.sys, self.max_rss, self.exit_code, len(name),
+        ) + name
+
+
+def short_hash(text: str) -> bytes:
+    """Return an 8-byte digest identifying a command or directory."""
+    return hashlib.sha1(text.encode("utf-8")).digest()[:8]
+
+
+def parse_records(data: bytes) -> List[RunRecord]:
+    """
+    Decode the records of a history log.
+
+    Decoding stops at the first truncated or unknown record, such as one
+    left half-written by a crash.
+    """
+    records = []
+    offset = 0
+    size = RECORD_HEADER.size
+    while offset + size <= len(data):
+        fields = RECORD_HEADER.unpack_from(data, offset)
+        if fields[0] != RECORD_VERSION:
+            break
+        end = offset + size + fields[-1]
+        if end > len(data):
+            break
+        try:
+            name = data[offset + size:end].decode("utf-8")
+        except UnicodeDecodeError:
+            break
+        records.append(RunRecord(name, *fields[1:-1]))
+        offset = end
+    return records
+
+
+class HistoryStore:
+    """Append-only store of selector run records."""
+
+    def __init__(self, root: Optional[str] = None, max_size: int = MAX_LOG_SIZE):
+        """
+        Args:
+            root: Store directory; defaults to <cache dir>/history
+            max_size: Size in bytes at which the log is rotated
+        """
+        self.root = root or os.path.join(get_cache_dir(), "history")
+        self.max_size = max_size
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.root, "runs.log")
+
+    def append(self, record: RunRecord) -> None:
+        """
+        Append a record to the log.
+
+        Raises:
+            OSError: If the log cannot be written
+        """
+        data = record.pack()
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        except FileNotFoundError:
+            os.makedirs(self.root, exist_ok=True)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+            size = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+        if size > self.max_size:
+            try:
+                os.replace(self.path, self.path + ".1")
+            except OSError:
+                # Another process rotated it first
+                pass
+
+    def records(self, project: Optional[bytes] = None,
+                selectors: Optional[Iterable[str]] = None) -> List[RunRecord]:
+        """
+        Read recorded runs, oldest first.
+
+        Args:
+            project: Only return runs from this project (see short_hash)
+            selectors: Only return runs of these selectors
+
+        Returns:
+            The matching records
+        """
+        wanted = set(selectors) if selectors else None
+        records = []
+        for path in (self.path + ".1", self.path):
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                continue
+            records.extend(parse_records(data))
+        return [
+            record for record in records
+            if (project is None or record.project == project)
+            and (wanted is None or record.selector in wanted)
+        ]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+@dataclass
+class SelectorStats:
+    """Duration statistics of one selector's recorded runs."""
+
+    name: str
+    runs: int
+    failures: int
+    p50: Optional[float]
+    p95: Optional[float]
+    max: Optional[float]
+    recent: Optional[float] = None
+    baseline: Optional[float] = None
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failures / self.runs if self.runs else 0.0
+
+    @property
+    def regressed(self) -> bool:
+        """True if recent runs are markedly slower than the baseline."""
+        if self.recent is None or self.baseline is None:
+            return False
+        return (self.recent > self.baseline * REGRESSION_RATIO
+                and self.recent - self.baseline >= REGRESSION_MIN_SECONDS)
+
+
+def summarize(records: List[RunRecord]) -> List[SelectorStats]:
+    """
+    Compute per-selector statistics.
+
+    Durations are taken from successful runs only, since failing commands
+    often stop early. The rolling baseline is the median of up to
+    BASELINE_RUNS successful runs preceding the RECENT_RUNS most recent
+    ones.
+
+    Args:
+        records: Records from HistoryStore.records, oldest first
+
+    Returns:
+        Statistics per selector, sorted by name
+    """
+    by_name: Dict[str, List[RunRecord]] = {}
+    for record in records:
+        by_name.setdefault(record.selector, []).append(record)
+
+    stats = []
+    for name in sorted(by_name):
+        runs = by_name[name]
+        durations = [r.wall for r in runs if r.exit_code == 0]
+        result = SelectorStats(
+            name=name,
+            runs=len(runs),
+            failures=sum(1 for r in runs if r.exit_code != 0),
+            p50=percentile(durations, 0.5) if durations else None,
+            p95=percentile(durations, 0.95) if durations else None,
+            max=max(durations) if durations else None,
+        )
+        if len(durations) >= RECENT_RUNS * 2:
+            recent = durations[-RECENT_RUNS:]
+            baseline = durations[:-RECENT_RUNS][-BASELINE_RUNS:]
+            result.recent = percentile(recent, 0.5)
+            result.baseline = percentile(baseline, 0.5)
+        stats.append(result)
+    return stats
+
+
+def expected_durations(records: List[RunRecord]) -> Dict[str, float]:
+    """
+    Estimate how long each selector takes from its recorded runs.
+
+    The estimate is the median of up to BASELINE_RUNS most recent
+    successful runs; selectors that never succeeded have no estimate.
+
+    Args:
+        records: Records from HistoryStore.records, oldest first
+
+    Returns:
+        Mapping of selector name to expected seconds
+    """
+    durations: Dict[str, List[float]] = {}
+    for record in records:
+        if record.exit_code == 0:
+            durations.setdefault(record.selector, []).append(record.wall)
+    return {
+        name: percentile(walls[-BASELINE_RUNS:], 0.5)
+        for name, walls in durations.items()
+    }
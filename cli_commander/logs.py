@@ -0,0 +1,260 @@
+"""Per-selector output logs for cli-commander.
+
+A selector with a ``log:`` setting has its stdout and stderr teed to a log
+file while still being shown on the terminal::
+
+    selectors:
+      export:
+        command: ./export.sh
+        log:
+          path: logs/{selector}.log   # relative to the selector's directory
+          max_size: 100M              # rotate when the file would grow past this
+          keep: 5                     # rotated files to keep (export.log.1 ...)
+          compress: true              # gzip rotated files
+          tail: 64K                   # last output kept in memory for failures
+
+``log: logs/export.log`` is short for a path with the defaults. Output is
+copied in fixed-size chunks into fixed-size buffers, so memory use does not
+depend on how much a command prints.
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from cli_commander.config import parse_size
+
+
+DEFAULT_KEEP = 3
+DEFAULT_TAIL = 64 * 1024
+LOG_KEYS = frozenset(("path", "max_size", "keep", "compress", "tail"))
+# Capacity requested for command pipes, so each read moves more data
+PIPE_SIZE = 1024 * 1024
+# Buffer size of log files
+LOG_BUFFER_SIZE = 1024 * 1024
+
+
+class RingBuffer:
+    """
+    Keeps the last `size` bytes written to it in a preallocated buffer.
+
+    Writes may come from several threads (a command's stdout and stderr).
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.buffer = bytearray(size)
+        self.position = 0
+        self.total = 0
+        self.lock = threading.Lock()
+
+    def write(self, data) -> None:
+        if not self.size:
+            return
+        data = memoryview(data)
+        length = len(data)
+        with self.lock:
+            self.total += length
+            if length >= self.size:
+                self.buffer[:] = data[length - self.size:]
+                self.position = 0
+                return
+            first = min(length, self.size - self.position)
+            self.buffer[self.position:self.position + first] = data[:first]
+            self.buffer[:length - first] = data[first:]
+            self.position = (self.position + length) % self.size
+
+    @property
+    def truncated(self) -> bool:
+        """Whether more was written than the buffer holds."""
+        return self.total > self.size
+
+    def getvalue(self) -> bytes:
+        """Return the buffered bytes, oldest first."""
+        with self.lock:
+            if self.total < self.size:
+                return bytes(self.buffer[:self.position])
+            return bytes(self.buffer[self.position:] + self.buffer[:self.position])
+
+
+class RotatingLog:
+    """
+    An append-only log file that is rotated when it reaches a size limit.
+
+    Rotated files are named path.1 (the newest) to path.<keep>, with a .gz
+    suffix when compressed.
+    """
+
+    def __init__(self, path: str, max_size: int = 0, keep: int = DEFAULT_KEEP,
+                 compress: bool = False):
+        self.path = path
+        self.max_size = max_size
+        self.keep = keep
+        self.compress = compress
+        self.lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, "ab", buffering=LOG_BUFFER_SIZE)
+        self.size = self.file.tell()
+
+    def write(self, data) -> None:
+        with self.lock:
+            if self.max_size and self.size and self.size + len(data) > self.max_size:
+                self.rotate()
+            self.file.write(data)
+            self.size += len(data)
+
+    def rotate(self) -> None:
+        """Move the current file to path.1, shifting older files up."""
+        self.file.close()
+        for suffix in ("", ".gz"):
+            oldest = f"{self.path}.{self.keep}{suffix}"
+            if os.path.exists(oldest):
+                os.remove(oldest)
+        for index in range(self.keep - 1, 0, -1):
+            for suffix in ("", ".gz"):
+                source = f"{self.path}.{index}{suffix}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{index + 1}{suffix}")
+        if self.keep:
+            rotated = f"{self.path}.1"
+            os.replace(self.path, rotated)
+            if self.compress:
+                compress_file(rotated)
+        self.file = open(self.path, "wb", buffering=LOG_BUFFER_SIZE)
+        self.size = 0
+
+    def close(self) -> None:
+        with self.lock:
+            self.file.close()
+
+
+def compress_file(path: str) -> None:
+    """Replace a file with a gzip-compressed path.gz, streaming it in chunks."""
+    import gzip
+    import shutil
+
+    with open(path, "rb") as source, gzip.open(path + ".gz.tmp", "wb") as target:
+        shutil.copyfileobj(source, target, LOG_BUFFER_SIZE)
+    os.replace(path + ".gz.tmp", path + ".gz")
+    os.remove(path)
+
+
+@dataclass
+class LogSettings:
+    """
+    The parsed ``log:`` setting of a selector.
+
+    Attributes:
+        path: Log file, or None to only keep the in-memory tail
+        max_size: Size in bytes at which the file is rotated; 0 never rotates
+        keep: Number of rotated files to keep
+        compress: Whether rotated files are gzip-compressed
+        tail: Bytes of recent output to keep in memory
+    """
+
+    path: Optional[str] = None
+    max_size: int = 0
+    keep: int = DEFAULT_KEEP
+    compress: bool = False
+    tail: int = DEFAULT_TAIL
+
+    @classmethod
+    def from_config(cls, selector_config: Dict[str, Any], selector_name: Optional[str],
+                    cwd: str) -> Optional["LogSettings"]:
+        """
+        Parse a selector's log setting.
+
+        Args:
+            selector_config: Dictionary containing the selector configuration
+            selector_name: Name substituted for {selector} in the path
+            cwd: Directory a relative path is resolved against
+
+        Returns:
+            The settings, or None if the selector does not log
+
+        Raises:
+            ValueError: If the setting is invalid
+        """
+        value = selector_config.get("log") if isinstance(selector_config, dict) else None
+        if value is None or value is False:
+            return None
+        if isinstance(value, str):
+            value = {"path": value}
+        if not isinstance(value, dict):
+            raise ValueError("Selector 'log' must be a file name or a mapping")
+        unknown = sorted(set(value) - LOG_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown 'log' settings: {', '.join(unknown)}")
+
+        path = value.get("path")
+        if path is not None:
+            if not isinstance(path, str) or not path:
+                raise ValueError("Log 'path' must be a file name")
+            path = path.replace("{selector}", selector_name or "command")
+            path = os.path.join(cwd, os.path.expanduser(path))
+        keep = value.get("keep", DEFAULT_KEEP)
+        if isinstance(keep, bool) or not isinstance(keep, int) or keep < 0:
+            raise ValueError("Log 'keep' must be a non-negative integer")
+        return cls(
+            path=path,
+            max_size=parse_size(value.get("max_size", 0)),
+            keep=keep,
+            compress=bool(value.get("compress", False)),
+            tail=parse_size(value.get("tail", DEFAULT_TAIL)),
+        )
+
+    def open(self, command: Optional[str] = None) -> "SelectorLog":
+        """Open the log file and tail buffer for one run of `command`."""
+        return SelectorLog(self, command)
+
+
+class SelectorLog:
+    """The sinks of one logged run: the rotating file and the tail buffer."""
+
+    def __init__(self, settings: LogSettings, command: Optional[str] = None):
+        self.settings = settings
+        self.file = None
+        if settings.path is not None:
+            self.file = RotatingLog(settings.path, settings.max_size, settings.keep, settings.compress)
+            # Runs append to the same file, so mark where each one starts
+            started = time.strftime("%Y-%m-%d %H:%M:%S")
+            header = f"--- {started} {command}\n" if command else f"--- {started}\n"
+            self.file.write(header.encode("utf-8", errors="replace"))
+        self.tail = RingBuffer(settings.tail)
+
+    def write(self, data) -> None:
+        if self.file is not None:
+            self.file.write(data)
+        self.tail.write(data)
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+
+    def summary(self) -> str:
+        """Describe the end of the output, for reporting a failure."""
+        tail = self.tail.getvalue().decode("utf-8", errors="replace")
+        lines = []
+        if tail:
+            if self.tail.truncated:
+                # Drop the partial first line
+                tail = tail.split("\n", 1)[-1]
+            lines.append(f"Last {len(tail.encode('utf-8'))} bytes of output:")
+            lines.append(tail.rstrip("\n"))
+        if self.file is not None:
+            lines.append(f"Full log: {self.settings.path}")
+        return "\n".join(lines)
+
+
+def enlarge_pipe(pipe) -> None:
+    """Ask the kernel for a larger pipe buffer, where supported."""
+    try:
+        import fcntl
+
+        fcntl.fcntl(pipe.fileno(), getattr(fcntl, "F_SETPIPE_SZ", 1031), PIPE_SIZE)
+    except (ImportError, OSError, ValueError):
+        pass
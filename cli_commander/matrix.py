@@ -0,0 +1,257 @@
+"""Matrix selectors for cli-commander.
+
+A selector with a ``matrix:`` runs once per combination of its values::
+
+    selectors:
+      test:
+        command: tox -e py{python} -- --shard {shard}/4
+        env:
+          PYTHON: python{python}
+        matrix:
+          python: ["3.8", "3.9", "3.10"]
+          shard: [1..4]
+
+``cmdr test`` runs the 12 cells ``test[python=3.8,shard=1]`` to
+``test[python=3.10,shard=4]``, substituting ``{axis}`` in the command, argv,
+env and vars values, description and cwd. ``a..b`` is an inclusive integer range.
+``--where python=3.10`` narrows an axis before the cells are generated, so
+filtering a large matrix never produces the cells it leaves out.
+"""
+
+import re
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from cli_commander.config import scalar_text
+
+
+AXIS_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_-]*$")
+RANGE = re.compile(r"^\s*(-?\d+)\s*\.\.\s*(-?\d+)\s*$")
+# Keys substituted in a cell's configuration
+SUBSTITUTED_KEYS = ("command", "description", "cwd")
+
+
+class Axis:
+    """
+    One dimension of a matrix: literal values and lazy integer ranges.
+
+    Args:
+        name: Axis name, used as {name} in the selector
+        segments: Values, each a string or a range of integers
+    """
+
+    def __init__(self, name: str, segments: List[Any]):
+        self.name = name
+        self.segments = segments
+
+    @classmethod
+    def parse(cls, name: str, value: Any) -> "Axis":
+        """
+        Parse an axis from the configuration.
+
+        Raises:
+            ValueError: If the name or values are invalid
+        """
+        if not isinstance(name, str) or not AXIS_NAME.match(name):
+            raise ValueError(f"Invalid matrix axis name: {name!r}")
+        values = value if isinstance(value, list) else [value]
+        segments: List[Any] = []
+        for item in values:
+            match = RANGE.match(item) if isinstance(item, str) else None
+            if match:
+                start, stop = int(match.group(1)), int(match.group(2))
+                step = 1 if stop >= start else -1
+                segments.append(range(start, stop + step, step))
+            elif isinstance(item, (list, dict)) or item is None:
+                raise ValueError(f"Matrix axis '{name}' values must be scalars or ranges like 1..8")
+            else:
+                segments.append(scalar_text(item))
+        if not segments:
+            raise ValueError(f"Matrix axis '{name}' has no values")
+        return cls(name, segments)
+
+    def __iter__(self) -> Iterator[str]:
+        for segment in self.segments:
+            if isinstance(segment, range):
+                for number in segment:
+                    yield str(number)
+            else:
+                yield segment
+
+    def __len__(self) -> int:
+        return sum(len(segment) if isinstance(segment, range) else 1 for segment in self.segments)
+
+    def index(self, value: str) -> Optional[int]:
+        """Return the position of a value on the axis, or None if it is not on it."""
+        offset = 0
+        for segment in self.segments:
+            if isinstance(segment, range):
+                try:
+                    number = int(value)
+                except ValueError:
+                    number = None
+                if number is not None and str(number) == value and number in segment:
+                    return offset + segment.index(number)
+                offset += len(segment)
+            else:
+                if segment == value:
+                    return offset
+                offset += 1
+        return None
+
+    def only(self, values: Set[str]) -> "Axis":
+        """Return the axis narrowed to the given values, in axis order."""
+        positions = []
+        for value in values:
+            position = self.index(value)
+            if position is not None:
+                positions.append((position, value))
+        return Axis(self.name, [value for _, value in sorted(positions)])
+
+
+def parse_matrix(matrix: Any) -> List[Axis]:
+    """
+    Parse a selector's matrix: mapping.
+
+    Raises:
+        ValueError: If the matrix is invalid
+    """
+    if not isinstance(matrix, dict) or not matrix:
+        raise ValueError("Selector 'matrix' must be a mapping of axis names to values")
+    return [Axis.parse(name, value) for name, value in matrix.items()]
+
+
+def parse_where(terms: List[str]) -> Dict[str, Set[str]]:
+    """
+    Parse --where filters such as "python=3.10" or "shard=1,2".
+
+    Repeating an axis, or listing values separated by commas, selects any
+    of them; different axes must all match.
+
+    Raises:
+        ValueError: If a filter is not of the form AXIS=VALUE
+    """
+    where: Dict[str, Set[str]] = {}
+    for term in terms:
+        name, sep, values = term.partition("=")
+        name = name.strip()
+        if not sep or not name or not values:
+            raise ValueError(f"Invalid --where filter {term!r}, expected AXIS=VALUE")
+        where.setdefault(name, set()).update(value.strip() for value in values.split(","))
+    return where
+
+
+def cells(axes: List[Axis], where: Optional[Dict[str, Set[str]]] = None) -> Iterator[Dict[str, str]]:
+    """
+    Generate the cells of a matrix, filtered by --where values.
+
+    Filters narrow each axis before combining them, so cells that do not
+    match are never generated.
+    """
+    where = where or {}
+    axes = [axis.only(where[axis.name]) if axis.name in where else axis for axis in axes]
+    names = [axis.name for axis in axes]
+    for values in product(axes):
+        yield dict(zip(names, values))
+
+
+def product(axes: List[Axis]) -> Iterator[Tuple[str, ...]]:
+    """
+    Like itertools.product, but iterating each axis as it goes.
+
+    itertools.product reads every axis into memory first, which a range
+    of millions of values would not survive.
+    """
+    if not axes:
+        yield ()
+        return
+    for value in axes[0]:
+        for rest in product(axes[1:]):
+            yield (value,) + rest
+
+
+def cell_name(name: str, cell: Dict[str, str]) -> str:
+    """Return the name of a matrix cell, e.g. test[python=3.10,shard=1]."""
+    return f"{name}[{','.join(f'{axis}={value}' for axis, value in cell.items())}]"
+
+
+def substitute(text: str, cell: Dict[str, str]) -> str:
+    """Replace {axis} placeholders in a string with the cell's values."""
+    for axis, value in cell.items():
+        text = text.replace("{" + axis + "}", value)
+    return text
+
+
+def cell_config(selector_config: Dict[str, Any], cell: Dict[str, str]) -> Dict[str, Any]:
+    """Return the configuration of one cell of a matrix selector."""
+    config = {key: value for key, value in selector_config.items() if key != "matrix"}
+    for key in SUBSTITUTED_KEYS:
+        if isinstance(config.get(key), str):
+            config[key] = substitute(config[key], cell)
+    if isinstance(config.get("argv"), list):
+        config["argv"] = [substitute(arg, cell) if isinstance(arg, str) else arg for arg in config["argv"]]
+    for section in ("env", "vars"):
+        if isinstance(config.get(section), dict):
+            config[section] = {
+                name: substitute_value(value, cell) for name, value in config[section].items()
+            }
+    return config
+
+
+def substitute_value(value: Any, cell: Dict[str, str]) -> Any:
+    """Substitute a cell into an env: or vars: value, including a computed value's run."""
+    if isinstance(value, str):
+        return substitute(value, cell)
+    if isinstance(value, dict) and isinstance(value.get("run"), str):
+        return dict(value, run=substitute(value["run"], cell))
+    return value
+
+
+def expand_graph(selectors: List[Tuple[str, Any]], dependencies: Dict[str, List[str]],
+                 where: Optional[Dict[str, Set[str]]] = None
+                 ) -> Tuple[List[Tuple[str, Any]], Dict[str, List[str]]]:
+    """
+    Replace matrix selectors in a run by their cells.
+
+    Each cell depends on what its selector depends on, and selectors that
+    depend on a matrix selector wait for all of its cells.
+
+    Args:
+        selectors: (name, selector configuration) pairs to run
+        dependencies: Mapping of selector name to the selectors it depends on
+        where: Parsed --where filters, applied to every matrix with that axis
+
+    Returns:
+        (name, configuration) pairs and the dependency mapping of the cells
+
+    Raises:
+        ValueError: If a matrix is invalid, a filter names no axis of any
+            matrix in the run, or leaves a matrix without cells
+    """
+    where = where or {}
+    unused = set(where)
+    nodes: List[Tuple[str, Any]] = []
+    expanded: Dict[str, List[str]] = {}
+    for name, selector_config in selectors:
+        matrix = selector_config.get("matrix") if isinstance(selector_config, dict) else None
+        if matrix is None:
+            nodes.append((name, selector_config))
+            expanded[name] = [name]
+            continue
+        axes = parse_matrix(matrix)
+        unused -= {axis.name for axis in axes}
+        expanded[name] = []
+        for cell in cells(axes, where):
+            nodes.append((cell_name(name, cell), cell_config(selector_config, cell)))
+            expanded[name].append(nodes[-1][0])
+        if not expanded[name]:
+            raise ValueError(f"No cells of matrix selector '{name}' match --where")
+    if unused:
+        raise ValueError(f"--where names no matrix axis of the selected selectors: {', '.join(sorted(unused))}")
+
+    graph = {}
+    for name, _ in selectors:
+        depends_on = [node for dependency in dependencies.get(name, [])
+                      for node in expanded.get(dependency, [dependency])]
+        for node in expanded[name]:
+            graph[node] = depends_on
+    return nodes, graph
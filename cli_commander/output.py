@@ -0,0 +1,45 @@
+"""Output handling helpers for cli-commander."""
+
+from typing import Any, BinaryIO, Optional, TextIO
+
+
+# Large enough that a busy command is copied in few system calls, and
+# allocated once per copy so memory use does not grow with the output
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def write_bytes(stream: TextIO, data: Any) -> None:
+    """Write raw bytes (or a memoryview) to a text stream, using its binary buffer if it has one."""
+    buffer = getattr(stream, "buffer", None)
+    if buffer is not None:
+        stream.flush()
+        buffer.write(data)
+        buffer.flush()
+    else:
+        stream.write(bytes(data).decode("utf-8", errors="replace"))
+        stream.flush()
+
+
+def tee(source: BinaryIO, stream: TextIO, *captures: Optional[Any]) -> None:
+    """
+    Copy a pipe to a stream until EOF, optionally keeping copies.
+
+    Args:
+        source: Readable binary pipe, closed when done
+        stream: Destination text stream, e.g. sys.stdout
+        *captures: Binary files or other objects with a write() method
+            receiving the same bytes; None entries are ignored
+    """
+    sinks = [capture for capture in captures if capture is not None]
+    buffer = bytearray(COPY_CHUNK_SIZE)
+    view = memoryview(buffer)
+    with source:
+        read = getattr(source, "readinto1", None) or source.readinto
+        while True:
+            count = read(buffer)
+            if not count:
+                return
+            chunk = view[:count]
+            write_bytes(stream, chunk)
+            for sink in sinks:
+                sink.write(chunk)
@@ -0,0 +1,394 @@
+"""Parallel execution of multiple selectors for cli-commander."""
+
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple, TextIO
+
+from cli_commander import profiling
+from cli_commander.executor import KILL_GRACE_SECONDS, CommandExecutor, ProcessGuard
+from cli_commander.output import COPY_CHUNK_SIZE
+from cli_commander.resources import ResourceRequest, detect_capacity, has_resources
+from cli_commander.retry import TIMEOUT_EXIT_CODE, Attempt, RetryPolicy, run_with_retries
+from cli_commander.scheduler import DependencyScheduler, duration_weights
+
+
+PASSED = "passed"
+FAILED = "failed"
+UP_TO_DATE = "up-to-date"
+RESTORED = "restored"
+CANCELLED = "cancelled"
+SKIPPED = "skipped"
+TIMED_OUT = "timed-out"
+
+SUCCESSFUL = (PASSED, UP_TO_DATE, RESTORED)
+
+
+@dataclass
+class JobResult:
+    """Outcome of one selector run by the ParallelExecutor."""
+
+    name: str
+    status: str
+    exit_code: Optional[int] = None
+    duration: float = 0.0
+    # End of the output of a failed job with a log: setting
+    tail: Optional[str] = None
+    # Every run of the command, when it timed out or was retried
+    attempts: List[Attempt] = field(default_factory=list)
+
+
+class _Cancelled(Exception):
+    """Raised when a job is cancelled before its command starts."""
+
+
+class PrefixedOutput:
+    """
+    Line-buffered writer that prefixes every line with its selector name.
+
+    Writes from all jobs go through a single lock and are only emitted as
+    whole lines, so output from concurrent jobs never interleaves within a
+    line.
+    """
+
+    def __init__(self, names: List[str], stdout: Optional[TextIO] = None,
+                 stderr: Optional[TextIO] = None):
+        self.width = max((len(name) for name in names), default=0)
+        self.stdout = stdout
+        self.stderr = stderr
+        self.lock = threading.Lock()
+
+    def prefix(self, name: str) -> str:
+        """Return the padded prefix for a selector name."""
+        return f"[{name}]".ljust(self.width + 2) + " "
+
+    def write_line(self, name: str, line: bytes, error: bool = False) -> None:
+        """Write one line of a job's output."""
+        text = line.decode("utf-8", errors="replace")
+        if not text.endswith("\n"):
+            text += "\n"
+        with self.lock:
+            stream = (self.stderr or sys.stderr) if error else (self.stdout or sys.stdout)
+            stream.write(self.prefix(name) + text)
+            stream.flush()
+
+    def pump(self, name: str, pipe, error: bool = False, *captures) -> None:
+        """
+        Copy a job's pipe to the output until EOF, optionally keeping copies.
+
+        Lines longer than COPY_CHUNK_SIZE are split, so a command printing
+        without newlines cannot make the pump buffer its whole output.
+        """
+        sinks = [capture for capture in captures if capture is not None]
+        with pipe:
+            while True:
+                line = pipe.readline(COPY_CHUNK_SIZE)
+                if not line:
+                    return
+                self.write_line(name, line, error)
+                for sink in sinks:
+                    sink.write(line)
+
+
+class ParallelExecutor:
+    """
+    Runs several selectors concurrently with a bounded worker pool.
+
+    Selectors are dispatched by a DependencyScheduler, so dependencies
+    between them are honoured and independent branches run side by side.
+    Each selector's command runs in its own process group with stdout and
+    stderr piped through a PrefixedOutput. With fail_fast, the first
+    failure stops the process groups of all running siblings and skips
+    selectors that have not started yet. Commands that exceed their
+    timeout: are stopped the same way, and failed ones are retried as
+    their retries: setting allows.
+
+    If any selector declares resources:, selectors are also admitted
+    against the machine's CPU and memory budget and their exclusive
+    resources. Without an explicit job count, the budget alone then
+    bounds how many run at once.
+    """
+
+    def __init__(self, jobs: Optional[int] = None, fail_fast: bool = False,
+                 executor: Optional[CommandExecutor] = None,
+                 stdout: Optional[TextIO] = None, stderr: Optional[TextIO] = None):
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
+        self.auto_jobs = not jobs
+        self.fail_fast = fail_fast
+        self.executor = executor or CommandExecutor()
+        self.stdout = stdout
+        self.stderr = stderr
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._running: Dict[str, ProcessGuard] = {}
+
+    def cancel(self) -> None:
+        """Stop starting new jobs and stop the process tree of every running one."""
+        self._cancelled.set()
+        with self._lock:
+            running = list(self._running.values())
+        for guard in running:
+            guard.interrupt()
+
+    def run_job(self, name: str, selector_config: Dict[str, Any],
+                output: PrefixedOutput) -> JobResult:
+        """
+        Run a single selector with prefixed output.
+
+        Args:
+            name: Selector name, used as the output prefix
+            selector_config: Dictionary containing the selector configuration
+            output: Shared output multiplexer
+
+        Returns:
+            The job's result
+        """
+        if self._cancelled.is_set():
+            return JobResult(name, SKIPPED)
+
+        if (isinstance(selector_config, dict) and selector_config.get("command") is None
+                and selector_config.get("argv") is None and selector_config.get("depends_on")):
+            # A selector that only groups its dependencies has nothing to run
+            return JobResult(name, PASSED, 0)
+
+        start = time.monotonic()
+        try:
+            selector_config = self.executor.resolve_values(selector_config)
+            settings = self.executor.log_settings(selector_config, name)
+            policy = RetryPolicy.from_config(selector_config)
+        except ValueError as e:
+            output.write_line(name, f"Error executing command: {e}".encode(), error=True)
+            return JobResult(name, FAILED, 1, time.monotonic() - start)
+        try:
+            up_to_date, token = self.executor.check_inputs(selector_config, name)
+        except OSError as e:
+            output.write_line(name, f"Warning: could not fingerprint inputs: {e}".encode(), error=True)
+            up_to_date, token = False, None
+        if up_to_date:
+            output.write_line(name, b"Skipping (inputs unchanged)")
+            return JobResult(name, UP_TO_DATE, 0, time.monotonic() - start)
+
+        entry = self.executor.restore_artifacts(selector_config, token)
+        if entry is not None:
+            output.write_line(name, b"Restored (cached outputs)")
+            for stream_name, error in (("stdout", False), ("stderr", True)):
+                log = self.executor.artifacts.open_log(entry, stream_name)
+                if log is not None:
+                    output.pump(name, log, error)
+            return JobResult(name, RESTORED, 0, time.monotonic() - start)
+
+        # Keep copies of the logs for selectors cached in the artifact store
+        captures = None
+        capture_paths = [None, None]
+        if token is not None and self.executor.artifact_store(selector_config) is not None:
+            captures = tempfile.TemporaryDirectory()
+            capture_paths = [os.path.join(captures.name, "stdout"), os.path.join(captures.name, "stderr")]
+        logs = []
+        made: List[Attempt] = []
+
+        def attempt(number: int) -> Attempt:
+            started, clock = time.time(), time.monotonic()
+            with self._lock:
+                # Checked again under the lock so cancel() cannot miss a
+                # process that is being registered concurrently
+                if self._cancelled.is_set():
+                    raise _Cancelled()
+                with profiling.tracer.phase("spawn", track=name):
+                    process = self.executor.spawn(
+                        selector_config,
+                        stdin=subprocess.DEVNULL,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.PIPE,
+                        start_new_session=True,
+                    )
+                guard = ProcessGuard(process, policy.timeout)
+                self._running[name] = guard
+
+            capture_files = [open(path, "wb") if path else None for path in capture_paths]
+            selector_log = None
+            if settings is not None:
+                from cli_commander.logs import enlarge_pipe
+
+                try:
+                    selector_log = settings.open(self.executor.get_command(selector_config))
+                    logs.append(selector_log)
+                except OSError as e:
+                    output.write_line(name, f"Warning: could not open log: {e}".encode(), error=True)
+                enlarge_pipe(process.stdout)
+                enlarge_pipe(process.stderr)
+            pumps = [
+                threading.Thread(target=output.pump,
+                                 args=(name, process.stdout, False, capture_files[0], selector_log)),
+                threading.Thread(target=output.pump,
+                                 args=(name, process.stderr, True, capture_files[1], selector_log)),
+            ]
+            for thread in pumps:
+                thread.start()
+            try:
+                with profiling.tracer.phase("command runtime", track=name):
+                    exit_code, usage = self.executor.wait_with_usage(process)
+                    for thread in pumps:
+                        thread.join()
+                duration = time.monotonic() - clock
+            finally:
+                guard.finish()
+                with self._lock:
+                    self._running.pop(name, None)
+            for capture in capture_files:
+                if capture is not None:
+                    capture.close()
+            if selector_log is not None:
+                selector_log.close()
+
+            result = Attempt(exit_code, duration, guard.timed_out, guard.interrupted)
+            made.append(result)
+            if not result.interrupted:
+                self.executor.record_run(name, selector_config, started, duration, exit_code, usage)
+            return result
+
+        def notify(message: str) -> None:
+            output.write_line(name, message.encode(), error=True)
+
+        try:
+            attempts = run_with_retries(policy, attempt, notify, sleep=self._cancelled.wait)
+            last = attempts[-1]
+            passed = last.exit_code == 0 and not last.timed_out
+            if passed and captures is not None:
+                self.executor.save_artifacts(selector_config, token, *capture_paths)
+        except _Cancelled:
+            # Cancelled between two attempts
+            attempts = made
+            if not attempts:
+                return JobResult(name, SKIPPED)
+            last, passed = attempts[-1], False
+            last.interrupted = True
+        except Exception as e:
+            output.write_line(name, f"Error executing command: {e}".encode(), error=True)
+            return JobResult(name, FAILED, 1, time.monotonic() - start)
+        finally:
+            if captures is not None:
+                captures.cleanup()
+
+        duration = time.monotonic() - start
+        if last.interrupted:
+            return JobResult(name, CANCELLED, last.exit_code, duration, attempts=attempts)
+        if passed:
+            self.executor.record_success(token)
+            return JobResult(name, PASSED, 0, duration, attempts=attempts)
+        if self.fail_fast:
+            self.cancel()
+        tail = logs[-1].summary() if logs else None
+        if last.timed_out:
+            # Reported like the foreground run; the attempts keep the signal
+            return JobResult(name, TIMED_OUT, TIMEOUT_EXIT_CODE, duration, tail or None, attempts)
+        return JobResult(name, FAILED, last.exit_code, duration, tail or None, attempts)
+
+    def run(self, selectors: List[Tuple[str, Dict[str, Any]]],
+            dependencies: Optional[Dict[str, List[str]]] = None) -> List[JobResult]:
+        """
+        Run selectors concurrently.
+
+        Args:
+            selectors: (name, selector configuration) pairs, in the order
+                they should be preferred when several are ready
+            dependencies: Optional mapping of selector name to the selectors
+                it depends on; a selector starts as soon as all of them pass
+
+        Returns:
+            One JobResult per selector, in the same order
+
+        Raises:
+            CycleError: If the dependencies contain a cycle
+            ValueError: If a selector's resources: setting is invalid
+        """
+        dependencies = dependencies or {}
+        configs = dict(selectors)
+        # Start the selectors that usually take longest (or head the
+        # longest chain of dependents) first
+        with profiling.tracer.phase("history lookup"):
+            durations = self.executor.expected_durations(selectors)
+        jobs = self.jobs
+        resources = capacity = None
+        if has_resources(selectors):
+            resources = {name: ResourceRequest.from_config(config) for name, config in configs.items()}
+            capacity = detect_capacity()
+            if self.auto_jobs:
+                # Enough workers for the smallest selectors to fill the budget
+                smallest = min(request.cpus for request in resources.values())
+                jobs = math.ceil(capacity.cpus / smallest) if smallest > 0 else len(configs)
+        scheduler = DependencyScheduler(
+            {name: dependencies.get(name, []) for name in configs},
+            jobs=jobs,
+            weights=duration_weights(configs, durations),
+            resources=resources,
+            capacity=capacity,
+        )
+        output = PrefixedOutput(list(configs), self.stdout, self.stderr)
+        results: Dict[str, JobResult] = {}
+
+        def run_node(name: str) -> bool:
+            # Each selector gets its own track in the profile
+            with profiling.tracer.phase(name, track=name):
+                result = self.run_job(name, configs[name], output)
+            results[name] = result
+            return result.status in SUCCESSFUL
+
+        try:
+            with profiling.tracer.phase("run selectors"):
+                scheduler.run(run_node)
+        except KeyboardInterrupt:
+            # Jobs run in their own sessions and do not see the terminal's
+            # SIGINT, so forward the interruption to them explicitly, and
+            # wait for their process trees to be gone before exiting
+            self.cancel()
+            deadline = time.monotonic() + KILL_GRACE_SECONDS + 1
+            while self._running and time.monotonic() < deadline:
+                time.sleep(0.05)
+            raise
+
+        return [results.get(name) or JobResult(name, SKIPPED) for name in configs]
+
+    @staticmethod
+    def aggregate_exit_code(results: List[JobResult]) -> int:
+        """
+        Combine job results into a single exit code.
+
+        Returns 0 if every job passed, otherwise the exit code of the first
+        failed job (TIMEOUT_EXIT_CODE if it timed out, or 1 if jobs were
+        only cancelled or skipped).
+        """
+        for result in results:
+            if result.status == TIMED_OUT:
+                return TIMEOUT_EXIT_CODE
+            if result.status == FAILED:
+                code = result.exit_code if result.exit_code is not None else 1
+                # Signal deaths are reported the way a shell would
+                return 128 - code if code < 0 else code
+        if all(result.status in SUCCESSFUL for result in results):
+            return 0
+        return 1
+
+    def print_summary(self, results: List[JobResult]) -> None:
+        """Print a table with the status, exit code, duration and attempts of each job."""
+        stream = self.stdout or sys.stdout
+        width = max((len(result.name) for result in results), default=0)
+        stream.write("\nSummary:\n")
+        for result in results:
+            code = "-" if result.exit_code is None else str(result.exit_code)
+            stream.write(
+                f"  {result.name.ljust(width)}  {result.status:<9}  "
+                f"{code:>4}  {result.duration:8.2f}s"
+                + (f"  ({len(result.attempts)} attempts)" if len(result.attempts) > 1 else "")
+                + "\n"
+            )
+        for result in results:
+            if result.tail:
+                # Output of parallel jobs is interleaved, so repeat the end
+                # of each failed job's output in one piece
+                stream.write(f"\n[{result.name}] {result.tail}\n")
+        stream.flush()
@@ -0,0 +1,255 @@
+"""Per-phase timing instrumentation for cli-commander.
+
+Code marks phases with::
+
+    with profiling.tracer.phase("config.parse"):
+        ...
+
+While profiling is disabled, ``profiling.tracer`` is a NullTracer whose
+phase() returns a shared no-op context manager, so the hooks cost one
+attribute lookup and call each and can stay in place permanently.
+
+Profiling is enabled by ``cmdr --profile`` or the CMDR_TRACE environment
+variable: ``CMDR_TRACE=1`` prints a phase breakdown to stderr, and any
+other value is taken as the path of a Chrome trace-event JSON file to
+write in addition (open it in chrome://tracing or Perfetto).
+"""
+
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, TextIO
+
+
+TRACE_ENV = "CMDR_TRACE"
+MAIN_TRACK = "cmdr"
+
+
+class _NullPhase:
+    """Context manager that does nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class NullTracer:
+    """Tracer used while profiling is disabled."""
+
+    enabled = False
+
+    def phase(self, name: str, track: str = MAIN_TRACK, **args: Any) -> _NullPhase:
+        return _NULL_PHASE
+
+    def finish(self) -> None:
+        pass
+
+
+class _Phase:
+    """Context manager recording one complete event."""
+
+    __slots__ = ("tracer", "name", "track", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, track: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.track = track
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.record(self.name, self.start, time.perf_counter(), self.track, self.args)
+        return False
+
+
+def process_age() -> Optional[float]:
+    """
+    Return how long ago this process started, in seconds.
+
+    Reads /proc, so it is only available on Linux, and has the resolution
+    of the kernel clock tick (usually 10ms).
+    """
+    try:
+        with open("/proc/self/stat", "rb") as f:
+            stat = f.read()
+        with open("/proc/uptime", "rb") as f:
+            uptime = float(f.read().split()[0])
+        # Fields after the parenthesised command name; starttime is field 22
+        start_ticks = int(stat.rsplit(b")", 1)[1].split()[19])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class Tracer:
+    """Records timed phases and reports them as a table or a Chrome trace."""
+
+    enabled = True
+
+    def __init__(self, trace_file: Optional[str] = None, stream: Optional[TextIO] = None,
+                 started: Optional[float] = None):
+        """
+        Args:
+            trace_file: Optional path of a Chrome trace-event JSON file to
+                write when finishing
+            stream: Where to print the phase breakdown; defaults to stderr
+            started: perf_counter() time at which cmdr's entry point was
+                called, used to split interpreter start-up from cmdr's own
+                start-up
+        """
+        self.trace_file = trace_file
+        self.stream = stream
+        self.origin = time.perf_counter()
+        self.events: List[Dict[str, Any]] = []
+        self._finished = False
+        import threading
+
+        self._lock = threading.Lock()
+
+        started = self.origin if started is None else started
+        age = process_age()
+        if age is not None:
+            # Interpreter start-up and the imports leading to cmdr's entry point
+            self.record("interpreter start", self.origin - age, started)
+        if started < self.origin:
+            self.record("argument parsing", started, self.origin)
+
+    def phase(self, name: str, track: str = MAIN_TRACK, **args: Any) -> _Phase:
+        """
+        Time a phase.
+
+        Args:
+            name: Phase name; phases with the same name are summed
+            track: Timeline the phase belongs to, e.g. a selector name
+            **args: Extra details shown in the Chrome trace
+
+        Returns:
+            A context manager covering the phase
+        """
+        return _Phase(self, name, track, args)
+
+    def record(self, name: str, start: float, end: float, track: str = MAIN_TRACK,
+               args: Optional[Dict[str, Any]] = None) -> None:
+        """Record a phase from perf_counter() start and end times."""
+        event = {"name": name, "start": start, "end": end, "track": track, "args": args or {}}
+        with self._lock:
+            self.events.append(event)
+
+    def breakdown(self) -> List[Dict[str, Any]]:
+        """
+        Summarise the main-track phases in the order they first started.
+
+        Returns:
+            Dicts with the phase name, call count and total seconds
+        """
+        totals: Dict[str, Dict[str, Any]] = {}
+        for event in sorted(self.events, key=lambda e: e["start"]):
+            if event["track"] != MAIN_TRACK:
+                continue
+            total = totals.setdefault(event["name"], {"name": event["name"], "count": 0, "seconds": 0.0})
+            total["count"] += 1
+            total["seconds"] += event["end"] - event["start"]
+        return list(totals.values())
+
+    def report(self, stream: Optional[TextIO] = None) -> None:
+        """Print the phase breakdown and a per-track summary."""
+        stream = stream or self.stream or sys.stderr
+        stream.write("\ncmdr profile:\n")
+        for total in self.breakdown():
+            count = f" (x{total['count']})" if total["count"] > 1 else ""
+            stream.write(f"  {total['name'] + count:<32} {total['seconds'] * 1000:10.2f} ms\n")
+        tracks: Dict[str, List[float]] = {}
+        for event in self.events:
+            if event["track"] != MAIN_TRACK:
+                span = tracks.setdefault(event["track"], [event["start"], event["end"]])
+                span[0] = min(span[0], event["start"])
+                span[1] = max(span[1], event["end"])
+        for track, (start, end) in sorted(tracks.items(), key=lambda item: item[1][0]):
+            stream.write(
+                f"  {'[' + track + ']':<32} {(end - start) * 1000:10.2f} ms"
+                f"  (starts at +{(start - self.origin) * 1000:.1f} ms)\n"
+            )
+        stream.flush()
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Return the recorded phases in Chrome trace-event format."""
+        pid = os.getpid()
+        events = sorted(self.events, key=lambda e: e["start"])
+        # Timestamps start at zero, i.e. at process start when it is known
+        base = events[0]["start"] if events else self.origin
+        track_ids: Dict[str, int] = {MAIN_TRACK: 0}
+        trace_events = []
+        for event in events:
+            tid = track_ids.setdefault(event["track"], len(track_ids))
+            trace_events.append({
+                "name": event["name"],
+                "ph": "X",
+                "pid": pid,
+                "tid": tid,
+                "ts": (event["start"] - base) * 1e6,
+                "dur": (event["end"] - event["start"]) * 1e6,
+                "args": {key: str(value) for key, value in event["args"].items()},
+            })
+        for track, tid in track_ids.items():
+            trace_events.append({
+                "name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                "args": {"name": track},
+            })
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def finish(self) -> None:
+        """Report once: print the breakdown and write the trace file if requested."""
+        if self._finished:
+            return
+        self._finished = True
+        self.report()
+        if self.trace_file:
+            import json
+
+            try:
+                with open(self.trace_file, "w") as f:
+                    json.dump(self.chrome_trace(), f)
+            except OSError as e:
+                print(f"Warning: could not write trace file: {e}", file=sys.stderr)
+
+
+tracer = NullTracer()
+
+
+def enable(trace_file: Optional[str] = None, stream: Optional[TextIO] = None,
+           started: Optional[float] = None) -> Tracer:
+    """Replace the no-op tracer with a recording one and return it."""
+    global tracer
+    tracer = Tracer(trace_file, stream, started)
+    return tracer
+
+
+def disable() -> None:
+    """Restore the no-op tracer."""
+    global tracer
+    tracer = NullTracer()
+
+
+def trace_settings(profile: bool = False, trace_file: Optional[str] = None):
+    """
+    Combine command-line options with CMDR_TRACE.
+
+    Returns:
+        (enabled, trace_file)
+    """
+    value = os.environ.get(TRACE_ENV, "")
+    if value and value.lower() not in ("0", "false", "no", "off"):
+        profile = True
+        if value.lower() not in ("1", "true", "yes", "on") and not trace_file:
+            trace_file = value
+    return profile or bool(trace_file), trace_file
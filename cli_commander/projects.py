@@ -0,0 +1,275 @@
+"""Monorepo project discovery for cli-commander.
+
+``cmdr --all-projects`` treats every directory below the current one that
+contains a cli-commander.yml as a project. Directories are walked with
+os.scandir, skipping anything excluded by the .gitignore files found on
+the way (and version-control directories).
+
+The discovered project list is cached per root together with the mtime of
+every directory walked and every .gitignore read. Adding, removing or
+renaming an entry changes its directory's mtime, so the cache stays valid
+until the tree's layout actually changes, and revalidating it costs one
+stat() per directory instead of a full directory listing.
+"""
+
+import json
+import os
+import re
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from cli_commander.cache import atomic_write, get_cache_dir
+
+
+CONFIG_NAME = "cli-commander.yml"
+IGNORE_FILE = ".gitignore"
+ALWAYS_SKIPPED = frozenset((".git", ".hg", ".svn"))
+PROJECT_CACHE_VERSION = 1
+
+
+def translate_glob(pattern: str) -> str:
+    """Translate a gitignore glob into a regular expression body."""
+    result = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            result.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("/**", i) and i + 3 == len(pattern):
+            result.append("(?:/.*)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            result.append(".*")
+            i += 2
+            continue
+        if char == "*":
+            result.append("[^/]*")
+        elif char == "?":
+            result.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                result.append(re.escape(char))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                result.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end
+        elif char == "\\" and i + 1 < len(pattern):
+            i += 1
+            result.append(re.escape(pattern[i]))
+        else:
+            result.append(re.escape(char))
+        i += 1
+    return "".join(result)
+
+
+class IgnoreRules:
+    """The patterns of one .gitignore file, relative to its directory."""
+
+    def __init__(self, base: str, lines: Sequence[str]):
+        """
+        Args:
+            base: Directory of the ignore file, relative to the walk root
+                ("" for the root itself)
+            lines: Lines of the ignore file
+        """
+        self.base = base
+        self.patterns: List[Tuple["re.Pattern", bool, bool]] = []
+        for line in lines:
+            line = line.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            anchored = "/" in line
+            body = translate_glob(line.lstrip("/"))
+            if not anchored:
+                body = "(?:.*/)?" + body
+            self.patterns.append((re.compile(body + r"\Z"), negate, dir_only))
+
+    @classmethod
+    def read(cls, path: str, base: str) -> "IgnoreRules":
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return cls(base, f.readlines())
+
+    def match(self, relpath: str, is_dir: bool) -> Optional[bool]:
+        """
+        Return True if the path is ignored, False if it is re-included by a
+        negated pattern, or None if no pattern matches.
+
+        Args:
+            relpath: Path relative to the walk root, with / separators
+            is_dir: Whether the path is a directory
+        """
+        if self.base:
+            if not relpath.startswith(self.base + "/"):
+                return None
+            relpath = relpath[len(self.base) + 1:]
+        result = None
+        for regex, negate, dir_only in self.patterns:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(relpath):
+                result = not negate
+        return result
+
+
+def is_ignored(rules: Sequence[IgnoreRules], relpath: str, is_dir: bool) -> bool:
+    """Apply ignore files from the outermost to the innermost; the last match wins."""
+    ignored = False
+    for rule in rules:
+        result = rule.match(relpath, is_dir)
+        if result is not None:
+            ignored = result
+    return ignored
+
+
+def walk_directories(root: str) -> Iterator[Tuple[str, int, List[os.DirEntry], List[IgnoreRules]]]:
+    """
+    Walk the directories below root that are not ignored.
+
+    The walk skips VCS directories and anything excluded by the .gitignore
+    files found along the way. Each directory is listed exactly once.
+
+    Args:
+        root: Directory to walk
+
+    Yields:
+        (relative, mtime_ns, entries, rules) for each directory, where
+        relative is its path relative to root ("" for root itself),
+        mtime_ns its mtime taken before listing it, entries its os.scandir
+        entries, and rules the ignore files that apply inside it
+    """
+    # (relative directory, ignore rules that apply inside it)
+    stack: List[Tuple[str, List[IgnoreRules]]] = [("", [])]
+    while stack:
+        relative, rules = stack.pop()
+        path = os.path.join(root, relative) if relative else root
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+            entries = list(os.scandir(path))
+        except OSError:
+            continue
+
+        if any(entry.name == IGNORE_FILE for entry in entries):
+            try:
+                rules = rules + [IgnoreRules.read(os.path.join(path, IGNORE_FILE), relative)]
+            except OSError:
+                pass
+        yield relative, mtime_ns, entries, rules
+
+        for entry in entries:
+            if entry.name in ALWAYS_SKIPPED:
+                continue
+            try:
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+            except OSError:
+                continue
+            child = f"{relative}/{entry.name}" if relative else entry.name
+            if not is_ignored(rules, child, True):
+                stack.append((child, rules))
+
+
+def walk_projects(root: str) -> Tuple[List[str], Dict[str, int]]:
+    """
+    Find every directory below root that contains a cli-commander.yml.
+
+    Args:
+        root: Directory to search
+
+    Returns:
+        (projects, stamps) where projects are paths relative to root ("."
+        for root itself), sorted, and stamps maps every directory walked and
+        ignore file read (relative to root) to its mtime in nanoseconds
+    """
+    projects = []
+    stamps: Dict[str, int] = {}
+    for relative, mtime_ns, entries, _ in walk_directories(root):
+        stamps[relative or "."] = mtime_ns
+        for entry in entries:
+            if entry.name == IGNORE_FILE:
+                try:
+                    stamps[f"{relative}/{IGNORE_FILE}" if relative else IGNORE_FILE] = \
+                        entry.stat().st_mtime_ns
+                except OSError:
+                    pass
+            elif entry.name == CONFIG_NAME:
+                projects.append(relative or ".")
+    projects.sort()
+    return projects, stamps
+
+
+class ProjectCache:
+    """On-disk cache of discovered projects, keyed on the walk root."""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = os.path.join(cache_dir or get_cache_dir(), "projects")
+
+    def entry_path(self, root: str) -> str:
+        import hashlib
+
+        digest = hashlib.sha1(os.path.abspath(root).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest + ".json")
+
+    def load(self, root: str) -> Optional[List[str]]:
+        """Return the cached projects of root if no walked directory changed since."""
+        try:
+            with open(self.entry_path(root), "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("version") != PROJECT_CACHE_VERSION or entry.get("root") != os.path.abspath(root):
+            return None
+        for relative, mtime_ns in entry["stamps"].items():
+            try:
+                if os.stat(os.path.join(root, relative)).st_mtime_ns != mtime_ns:
+                    return None
+            except OSError:
+                return None
+        return entry["projects"]
+
+    def store(self, root: str, projects: List[str], stamps: Dict[str, int]) -> None:
+        entry = {
+            "version": PROJECT_CACHE_VERSION,
+            "root": os.path.abspath(root),
+            "projects": projects,
+            "stamps": stamps,
+        }
+        try:
+            atomic_write(self.entry_path(root), json.dumps(entry).encode("utf-8"))
+        except OSError:
+            pass
+
+
+def discover_projects(root: str, cache: Optional[ProjectCache] = None,
+                      use_cache: bool = True) -> List[str]:
+    """
+    Return the projects below root, using the project cache when it is fresh.
+
+    Args:
+        root: Directory to search
+        cache: ProjectCache to use; defaults to one in the cache directory
+        use_cache: Whether to read and update the cache
+
+    Returns:
+        Project directories relative to root, sorted
+    """
+    if use_cache:
+        cache = cache if cache is not None else ProjectCache()
+        projects = cache.load(root)
+        if projects is not None:
+            return projects
+    projects, stamps = walk_projects(root)
+    if use_cache:
+        cache.store(root, projects, stamps)
+    return projects
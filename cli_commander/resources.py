@@ -0,0 +1,199 @@
+"""Resource declarations and machine capacity for cli-commander.
+
+Selectors can declare what they use while running::
+
+    selectors:
+      test:
+        command: pytest -n 4
+        resources:
+          cpus: 4           # CPUs the command keeps busy (default 1)
+          memory: 2G        # peak memory (default 0, i.e. not counted)
+          exclusive: [db]   # named resources only one selector may hold at a time
+
+When a parallel run contains such selectors, a selector only starts while
+the CPUs and memory of the running ones plus its own fit the machine's
+capacity, and while none of its exclusive resources is held.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from cli_commander.config import parse_size
+
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+PROC_CGROUP = "/proc/self/cgroup"
+RESOURCE_KEYS = frozenset(("cpus", "memory", "exclusive"))
+# cgroup v1 reports "no limit" as a huge page-aligned number
+UNLIMITED_MEMORY = 1 << 60
+
+
+@dataclass
+class ResourceRequest:
+    """What a selector uses while it runs."""
+
+    cpus: float = 1.0
+    memory: int = 0
+    exclusive: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_config(cls, selector_config: Dict[str, Any]) -> "ResourceRequest":
+        """
+        Parse a selector's resources: setting.
+
+        Selectors without one use a single CPU.
+
+        Raises:
+            ValueError: If the setting is invalid
+        """
+        value = selector_config.get("resources") if isinstance(selector_config, dict) else None
+        if value is None:
+            return cls()
+        if not isinstance(value, dict):
+            raise ValueError("Selector 'resources' must be a mapping")
+        unknown = sorted(set(value) - RESOURCE_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown 'resources' settings: {', '.join(unknown)}")
+        cpus = value.get("cpus", 1)
+        if isinstance(cpus, bool) or not isinstance(cpus, (int, float)) or cpus < 0:
+            raise ValueError("Resource 'cpus' must be a non-negative number")
+        memory = parse_size(value.get("memory", 0))
+        if memory < 0:
+            raise ValueError("Resource 'memory' must not be negative")
+        exclusive = value.get("exclusive", [])
+        if isinstance(exclusive, str):
+            exclusive = [exclusive]
+        if not isinstance(exclusive, list) or not all(isinstance(name, str) for name in exclusive):
+            raise ValueError("Resource 'exclusive' must be a list of names")
+        return cls(float(cpus), memory, tuple(exclusive))
+
+
+@dataclass
+class Capacity:
+    """The CPUs and memory available to selectors run by cmdr."""
+
+    cpus: float
+    memory: Optional[int] = None
+
+
+def has_resources(selectors: List[Tuple[str, Any]]) -> bool:
+    """Return whether any selector of a run declares resources."""
+    return any(isinstance(config, dict) and config.get("resources") is not None
+               for _, config in selectors)
+
+
+def cgroup_paths(proc_cgroup: str = PROC_CGROUP) -> Dict[str, str]:
+    """
+    Read the cgroup of this process per controller.
+
+    Returns:
+        Mapping of controller name to cgroup path; the unified (v2)
+        hierarchy is under the key ""
+    """
+    paths = {}
+    try:
+        with open(proc_cgroup) as f:
+            for line in f:
+                parts = line.rstrip("\n").split(":", 2)
+                if len(parts) == 3:
+                    for controller in parts[1].split(","):
+                        paths[controller] = parts[2]
+    except OSError:
+        pass
+    return paths
+
+
+def cgroup_dirs(mount: str, path: Optional[str]) -> Iterator[str]:
+    """
+    Yield the directories that may hold limits for a cgroup.
+
+    These are the cgroup and its ancestors below the mount point. In a
+    container the mount point itself is often the container's cgroup
+    while /proc still shows the host path, so it is always included.
+    """
+    seen = set()
+    parts = [part for part in (path or "").split("/") if part]
+    for depth in range(len(parts), -1, -1):
+        directory = os.path.join(mount, *parts[:depth])
+        if directory not in seen and os.path.isdir(directory):
+            seen.add(directory)
+            yield directory
+
+
+def read_first_line(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.readline().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit(root: str = CGROUP_ROOT, proc_cgroup: str = PROC_CGROUP) -> Optional[float]:
+    """Return the CPU quota of this process's cgroups in CPUs, or None if unlimited."""
+    paths = cgroup_paths(proc_cgroup)
+    limits = []
+    # cgroup v2: cpu.max holds "<quota> <period>" or "max <period>"
+    for directory in cgroup_dirs(root, paths.get("")):
+        fields = (read_first_line(os.path.join(directory, "cpu.max")) or "").split()
+        if len(fields) == 2 and fields[0] != "max":
+            limits.append(int(fields[0]) / int(fields[1]))
+    # cgroup v1: a quota of -1 means no limit
+    v1_path = paths.get("cpu", paths.get("cpuacct"))
+    for mount in (os.path.join(root, "cpu"), os.path.join(root, "cpu,cpuacct")):
+        for directory in cgroup_dirs(mount, v1_path):
+            quota = read_first_line(os.path.join(directory, "cpu.cfs_quota_us"))
+            period = read_first_line(os.path.join(directory, "cpu.cfs_period_us"))
+            if quota and period and int(quota) > 0 and int(period) > 0:
+                limits.append(int(quota) / int(period))
+    return min(limits) if limits else None
+
+
+def cgroup_memory_limit(root: str = CGROUP_ROOT, proc_cgroup: str = PROC_CGROUP) -> Optional[int]:
+    """Return the memory limit of this process's cgroups in bytes, or None if unlimited."""
+    paths = cgroup_paths(proc_cgroup)
+    limits = []
+    for directory in cgroup_dirs(root, paths.get("")):
+        value = read_first_line(os.path.join(directory, "memory.max"))
+        if value and value != "max":
+            limits.append(int(value))
+    for directory in cgroup_dirs(os.path.join(root, "memory"), paths.get("memory")):
+        value = read_first_line(os.path.join(directory, "memory.limit_in_bytes"))
+        if value and int(value) < UNLIMITED_MEMORY:
+            limits.append(int(value))
+    return min(limits) if limits else None
+
+
+def detect_capacity(root: str = CGROUP_ROOT, proc_cgroup: str = PROC_CGROUP) -> Capacity:
+    """
+    Work out how many CPUs and how much memory selectors may use.
+
+    CPUs are those this process may run on (sched_getaffinity), capped
+    by a cgroup CPU quota. Memory is the physical memory, capped by a
+    cgroup memory limit. CMDR_CPUS and CMDR_MEMORY override both.
+
+    Returns:
+        The capacity; memory is None if it cannot be determined
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cpus = float(len(os.sched_getaffinity(0)))
+    else:
+        cpus = float(os.cpu_count() or 1)
+    quota = cgroup_cpu_limit(root, proc_cgroup)
+    if quota is not None:
+        cpus = min(cpus, quota)
+
+    memory = None
+    try:
+        memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        pass
+    limit = cgroup_memory_limit(root, proc_cgroup)
+    if limit is not None:
+        memory = limit if memory is None else min(memory, limit)
+
+    if os.environ.get("CMDR_CPUS"):
+        cpus = float(os.environ["CMDR_CPUS"])
+    if os.environ.get("CMDR_MEMORY"):
+        memory = parse_size(os.environ["CMDR_MEMORY"])
+    return Capacity(cpus, memory)
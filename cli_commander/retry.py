@@ -0,0 +1,163 @@
+"""Timeouts and retries for selectors.
+
+Selectors can bound how long their command may run and retry it when it
+fails::
+
+    selectors:
+      integration:
+        command: pytest tests/integration
+        timeout: 10m              # stop the command after 10 minutes
+        retries: 2                # run it up to 3 times
+        retry_on: [1, timeout]    # only retry these outcomes (default: any failure)
+        retry_delay: 5s           # first backoff (default 1s), doubling per retry
+
+Commands with a timeout or retries run in their own session. On timeout
+or Ctrl-C their whole process group gets SIGTERM, and SIGKILL if anything
+is left after a grace period. Retries wait for a jittered, exponentially
+growing delay, so many selectors failing at once do not retry in lockstep.
+"""
+
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Union
+
+from cli_commander.config import parse_duration
+
+
+# retry_on entry matching attempts stopped by their timeout
+TIMEOUT = "timeout"
+# Exit status cmdr reports for a timed-out selector, as timeout(1) does
+TIMEOUT_EXIT_CODE = 124
+# First retry delay in seconds, doubled for every further retry
+DEFAULT_RETRY_DELAY = 1.0
+# Upper bound of a single retry delay in seconds
+MAX_RETRY_DELAY = 60.0
+
+
+@dataclass
+class Attempt:
+    """One run of a selector's command."""
+
+    exit_code: int
+    duration: float
+    timed_out: bool = False
+    # Stopped by Ctrl-C or cancellation; never retried
+    interrupted: bool = False
+
+    def describe(self) -> str:
+        """Return how the attempt ended, e.g. "timed out after 10.0s"."""
+        if self.timed_out:
+            return f"timed out after {self.duration:.1f}s"
+        if self.interrupted:
+            return f"was interrupted after {self.duration:.1f}s"
+        return f"exited with {self.exit_code} after {self.duration:.1f}s"
+
+
+@dataclass
+class RetryPolicy:
+    """A selector's timeout: and retry settings."""
+
+    timeout: Optional[float] = None
+    retries: int = 0
+    retry_on: Optional[FrozenSet[Union[int, str]]] = None
+    retry_delay: float = DEFAULT_RETRY_DELAY
+
+    @classmethod
+    def from_config(cls, selector_config: Dict[str, Any]) -> "RetryPolicy":
+        """
+        Parse a selector's timeout:, retries:, retry_on: and retry_delay:.
+
+        Raises:
+            ValueError: If a setting is invalid
+        """
+        if not isinstance(selector_config, dict):
+            return cls()
+        timeout = selector_config.get("timeout")
+        if timeout is not None:
+            timeout = parse_duration(timeout)
+            if timeout <= 0:
+                raise ValueError("Selector 'timeout' must be positive")
+        retries = selector_config.get("retries", 0) or 0
+        if isinstance(retries, bool) or not isinstance(retries, int) or retries < 0:
+            raise ValueError("Selector 'retries' must be a non-negative integer")
+        retry_on = selector_config.get("retry_on")
+        if retry_on is not None:
+            if not isinstance(retry_on, list):
+                retry_on = [retry_on]
+            for entry in retry_on:
+                if entry != TIMEOUT and (isinstance(entry, bool) or not isinstance(entry, int)):
+                    raise ValueError(f"Selector 'retry_on' must list exit codes or '{TIMEOUT}'")
+            retry_on = frozenset(retry_on)
+        retry_delay = parse_duration(selector_config.get("retry_delay", DEFAULT_RETRY_DELAY))
+        return cls(timeout, retries, retry_on, retry_delay)
+
+    @property
+    def active(self) -> bool:
+        """Whether runs need a process group of their own to be stopped or retried."""
+        return self.timeout is not None or self.retries > 0
+
+    def should_retry(self, attempts: List[Attempt]) -> bool:
+        """Return True if another attempt should follow the last one."""
+        last = attempts[-1]
+        if last.interrupted or len(attempts) > self.retries:
+            return False
+        if last.exit_code == 0 and not last.timed_out:
+            return False
+        if self.retry_on is None:
+            return True
+        return (TIMEOUT in self.retry_on) if last.timed_out else (last.exit_code in self.retry_on)
+
+    def delay(self, retry: int, rng: Any = random) -> float:
+        """
+        Return the seconds to wait before a retry (1 for the first).
+
+        The delay doubles with every retry up to MAX_RETRY_DELAY, and a
+        random half of it is jitter.
+        """
+        ceiling = min(MAX_RETRY_DELAY, self.retry_delay * 2 ** (retry - 1))
+        return ceiling / 2 + rng.uniform(0, ceiling / 2)
+
+
+def run_with_retries(policy: RetryPolicy, attempt: Callable[[int], Attempt],
+                     notify: Callable[[str], None],
+                     sleep: Callable[[float], Any] = time.sleep) -> List[Attempt]:
+    """
+    Run attempts until one succeeds or the policy gives up.
+
+    Args:
+        policy: The selector's retry policy
+        attempt: Runs attempt number n (starting at 1) and returns it
+        notify: Receives a message before each retry
+        sleep: Waits between attempts; returning True stops retrying, so a
+            threading.Event's wait can cancel the backoff
+
+    Returns:
+        Every attempt made, the last one deciding the outcome
+    """
+    attempts = [attempt(1)]
+    while policy.should_retry(attempts):
+        delay = policy.delay(len(attempts))
+        notify(f"Attempt {len(attempts)}/{policy.retries + 1} {attempts[-1].describe()}; "
+               f"retrying in {delay:.1f}s")
+        try:
+            if sleep(delay) is True:
+                break
+        except KeyboardInterrupt:
+            attempts[-1].interrupted = True
+            break
+        attempts.append(attempt(len(attempts) + 1))
+    return attempts
+
+
+def outcome(attempts: List[Attempt]) -> Optional[str]:
+    """
+    Summarize the retries and timeout of a run, or None for a plain single attempt.
+    """
+    last = attempts[-1]
+    if len(attempts) == 1:
+        return f"Timed out after {last.duration:.1f}s" if last.timed_out else None
+    total = sum(attempt.duration for attempt in attempts)
+    if last.exit_code == 0 and not last.timed_out:
+        return f"Passed on attempt {len(attempts)} ({total:.1f}s in total)"
+    return f"Failed after {len(attempts)} attempts ({total:.1f}s in total); the last {last.describe()}"
@@ -0,0 +1,391 @@
+"""Dependency-aware parallel scheduler for cli-commander."""
+
+import heapq
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+from cli_commander.resources import Capacity, ResourceRequest
+
+
+PENDING = "pending"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+class CycleError(ValueError):
+    """Raised when a dependency graph contains a cycle."""
+
+    def __init__(self, cycle: List[str]):
+        self.cycle = cycle
+        super().__init__("Dependency cycle detected: " + " -> ".join(cycle))
+
+
+def find_cycle(dependencies: Dict[str, Iterable[str]]) -> Optional[List[str]]:
+    """
+    Find a cycle in a dependency graph.
+
+    Uses an iterative depth-first search, so very deep graphs do not hit
+    the recursion limit. Dependencies on nodes missing from the mapping
+    are treated as leaves.
+
+    Args:
+        dependencies: Mapping of node to the nodes it depends on
+
+    Returns:
+        The nodes of a cycle (first node repeated at the end), or None
+    """
+    visiting, done = 1, 2
+    state: Dict[str, int] = {}
+
+    for root in dependencies:
+        if state.get(root):
+            continue
+        state[root] = visiting
+        path = [root]
+        stack = [iter(dependencies.get(root, ()))]
+        while stack:
+            for parent in stack[-1]:
+                parent_state = state.get(parent)
+                if parent_state == visiting:
+                    return path[path.index(parent):] + [parent]
+                if parent_state is None:
+                    state[parent] = visiting
+                    path.append(parent)
+                    stack.append(iter(dependencies.get(parent, ())))
+                    break
+            else:
+                state[path.pop()] = done
+                stack.pop()
+    return None
+
+
+def topological_order(dependencies: Dict[str, Iterable[str]]) -> List[str]:
+    """
+    Order nodes so that every node comes after its dependencies.
+
+    Args:
+        dependencies: Mapping of node to the nodes it depends on
+
+    Returns:
+        Nodes in dependency order, ties broken by mapping order
+
+    Raises:
+        CycleError: If the graph contains a cycle
+    """
+    remaining = {node: 0 for node in dependencies}
+    dependents: Dict[str, List[str]] = {node: [] for node in dependencies}
+    for node, parents in dependencies.items():
+        for parent in parents:
+            if parent in remaining:
+                remaining[node] += 1
+                dependents[parent].append(node)
+
+    order = [node for node, count in remaining.items() if count == 0]
+    for node in order:
+        for child in dependents[node]:
+            remaining[child] -= 1
+            if remaining[child] == 0:
+                order.append(child)
+
+    if len(order) != len(remaining):
+        cycle = find_cycle(dependencies)
+        raise CycleError(cycle or [])
+    return order
+
+
+def critical_path_lengths(dependencies: Dict[str, Iterable[str]],
+                          weights: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """
+    Compute the longest weighted path from each node to the end of the graph.
+
+    A node's value is its own weight plus the largest value among the
+    nodes that depend on it, i.e. the minimum time still needed after the
+    node starts. Unknown weights default to 1.
+
+    Args:
+        dependencies: Mapping of node to the nodes it depends on
+        weights: Optional per-node cost, e.g. expected duration
+
+    Returns:
+        Mapping of node to its critical path length
+    """
+    weights = weights or {}
+    lengths: Dict[str, float] = {}
+    dependents: Dict[str, List[str]] = {node: [] for node in dependencies}
+    for node, parents in dependencies.items():
+        for parent in parents:
+            if parent in dependents:
+                dependents[parent].append(node)
+
+    for node in reversed(topological_order(dependencies)):
+        tail = max((lengths[child] for child in dependents[node]), default=0.0)
+        lengths[node] = weights.get(node, 1.0) + tail
+    return lengths
+
+
+def duration_weights(nodes: Iterable[str], durations: Dict[str, float]) -> Dict[str, float]:
+    """
+    Turn recorded durations into scheduling weights.
+
+    Nodes without a recorded duration are assumed to take as long as the
+    median node that has one. Without any durations every node weighs 1,
+    so priorities fall back to the number of nodes on the critical path,
+    and then to input order.
+
+    Args:
+        nodes: Nodes to weigh
+        durations: Expected seconds of the nodes that have run before
+
+    Returns:
+        Mapping of node to weight
+    """
+    nodes = list(nodes)
+    known = sorted(durations[node] for node in nodes if node in durations)
+    if not known:
+        return {node: 1.0 for node in nodes}
+    default = known[(len(known) - 1) // 2]
+    return {node: durations.get(node, default) for node in nodes}
+
+
+def partition(weights: Dict[str, float], count: int) -> List[List[str]]:
+    """
+    Split nodes into `count` groups of similar total weight.
+
+    Nodes are assigned heaviest first, each to the currently lightest
+    group (longest-processing-time first), breaking ties by name and by
+    group number. The result only depends on the weights, so machines
+    that see the same weights compute the same groups.
+
+    Args:
+        weights: Mapping of node to weight, e.g. from duration_weights
+        count: Number of groups
+
+    Returns:
+        The groups, each listing its nodes in the mapping's order
+    """
+    totals = [(0.0, index) for index in range(count)]
+    assigned: Dict[str, int] = {}
+    for node in sorted(weights, key=lambda node: (-weights[node], node)):
+        total, index = heapq.heappop(totals)
+        assigned[node] = index
+        heapq.heappush(totals, (total + weights[node], index))
+    groups: List[List[str]] = [[] for _ in range(count)]
+    for node in weights:
+        groups[assigned[node]].append(node)
+    return groups
+
+
+class DependencyScheduler:
+    """
+    Runs the nodes of a dependency graph with bounded concurrency.
+
+    A node becomes ready as soon as all of its dependencies have succeeded,
+    independently of other nodes at the same depth. Among ready nodes, the
+    one with the longest critical path is started first; with expected
+    durations as weights, that is the longest job among independent ones.
+    When a node fails, everything that depends on it is skipped while
+    unrelated branches keep running.
+
+    With a capacity, a ready node is only started while its CPUs and
+    memory fit next to those of the running nodes and none of its
+    exclusive resources is held. A node that does not fit lets smaller
+    ready nodes behind it start instead of idling the machine.
+    """
+
+    def __init__(self, dependencies: Dict[str, Iterable[str]], jobs: int = 1,
+                 weights: Optional[Dict[str, float]] = None,
+                 resources: Optional[Dict[str, ResourceRequest]] = None,
+                 capacity: Optional[Capacity] = None):
+        """
+        Args:
+            dependencies: Mapping of node to the nodes it depends on; every
+                dependency must itself be a key of the mapping
+            jobs: Maximum number of nodes to run at once
+            weights: Optional per-node cost used for critical path priority
+            resources: Optional per-node resource requests; nodes without
+                one use a single CPU
+            capacity: Resources available to all running nodes; without it
+                only `jobs` limits concurrency
+
+        Raises:
+            CycleError: If the graph contains a cycle
+            ValueError: If a dependency is not part of the graph
+        """
+        self.dependencies = {node: list(parents) for node, parents in dependencies.items()}
+        for node, parents in self.dependencies.items():
+            for parent in parents:
+                if parent not in self.dependencies:
+                    raise ValueError(f"'{node}' depends on unknown node '{parent}'")
+        self.jobs = max(1, jobs)
+        self.priorities = critical_path_lengths(self.dependencies, weights)
+        self.order = {node: index for index, node in enumerate(self.dependencies)}
+        self.status: Dict[str, str] = {node: PENDING for node in self.dependencies}
+        self.errors: Dict[str, Exception] = {}
+
+        self._dependents: Dict[str, List[str]] = {node: [] for node in self.dependencies}
+        self._remaining: Dict[str, int] = {}
+        for node, parents in self.dependencies.items():
+            self._remaining[node] = len(set(parents))
+            for parent in set(parents):
+                self._dependents[parent].append(node)
+
+        self.capacity = capacity
+        self.resources: Dict[str, ResourceRequest] = {}
+        if capacity is not None:
+            for node in self.dependencies:
+                self.resources[node] = self._clamp((resources or {}).get(node) or ResourceRequest())
+
+        self._ready: List = []
+        self._active = 0
+        self._cpus = 0.0
+        self._memory = 0
+        self._held: Dict[str, str] = {}
+        self._stopped = False
+        self._condition = threading.Condition()
+
+    def _push_ready(self, node: str) -> None:
+        heapq.heappush(self._ready, (-self.priorities[node], self.order[node], node))
+
+    def _skip_descendants(self, node: str) -> None:
+        stack = [node]
+        while stack:
+            for child in self._dependents[stack.pop()]:
+                if self.status[child] == PENDING:
+                    self.status[child] = SKIPPED
+                    stack.append(child)
+
+    def stop(self) -> None:
+        """Stop starting new nodes; running nodes are left to finish."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def _clamp(self, request: ResourceRequest) -> ResourceRequest:
+        # A node asking for more than the machine has runs on its own
+        # rather than never
+        memory = request.memory
+        if self.capacity.memory is not None:
+            memory = min(memory, self.capacity.memory)
+        return ResourceRequest(min(request.cpus, self.capacity.cpus), memory, request.exclusive)
+
+    def _fits(self, node: str) -> bool:
+        if self.capacity is None:
+            return True
+        request = self.resources[node]
+        if any(name in self._held for name in request.exclusive):
+            return False
+        if self._cpus + request.cpus > self.capacity.cpus + 1e-9:
+            return False
+        if self.capacity.memory is not None and self._memory + request.memory > self.capacity.memory:
+            return False
+        return True
+
+    def _acquire(self, node: str) -> None:
+        self._active += 1
+        if self.capacity is not None:
+            request = self.resources[node]
+            self._cpus += request.cpus
+            self._memory += request.memory
+            for name in request.exclusive:
+                self._held[name] = node
+
+    def _release(self, node: str) -> None:
+        self._active -= 1
+        if self.capacity is not None:
+            request = self.resources[node]
+            self._cpus -= request.cpus
+            self._memory -= request.memory
+            for name in request.exclusive:
+                self._held.pop(name, None)
+
+    def _admit(self) -> Optional[str]:
+        # Start the highest priority ready node that fits, keeping the
+        # ones passed over in the queue
+        passed = []
+        node = None
+        while self._ready:
+            entry = heapq.heappop(self._ready)
+            if self.status[entry[2]] != PENDING:
+                continue
+            if self._fits(entry[2]):
+                node = entry[2]
+                break
+            passed.append(entry)
+        for entry in passed:
+            heapq.heappush(self._ready, entry)
+        if node is not None:
+            self._acquire(node)
+        return node
+
+    def _next(self) -> Optional[str]:
+        with self._condition:
+            while True:
+                if self._stopped:
+                    return None
+                node = self._admit()
+                if node is not None:
+                    return node
+                if self._active == 0:
+                    return None
+                self._condition.wait()
+
+    def _finish(self, node: str, succeeded: bool) -> None:
+        with self._condition:
+            self._release(node)
+            self.status[node] = SUCCEEDED if succeeded else FAILED
+            if succeeded:
+                for child in self._dependents[node]:
+                    self._remaining[child] -= 1
+                    if self._remaining[child] == 0 and self.status[child] == PENDING:
+                        self._push_ready(child)
+            else:
+                self._skip_descendants(node)
+            self._condition.notify_all()
+
+    def _worker(self, run_node: Callable[[str], bool]) -> None:
+        while True:
+            node = self._next()
+            if node is None:
+                return
+            succeeded = False
+            try:
+                succeeded = bool(run_node(node))
+            except Exception as e:
+                # A crashing node is a failed node; keep the worker alive
+                self.errors[node] = e
+            self._finish(node, succeeded)
+
+    def run(self, run_node: Callable[[str], bool]) -> Dict[str, str]:
+        """
+        Run every node of the graph.
+
+        Args:
+            run_node: Called with a node name from a worker thread; returns
+                True if the node succeeded
+
+        Returns:
+            Mapping of node to its final status. Nodes never started because
+            the scheduler was stopped remain pending. Exceptions raised by
+            run_node mark the node as failed and are kept in self.errors.
+        """
+        with self._condition:
+            for node in self.dependencies:
+                if self._remaining[node] == 0:
+                    self._push_ready(node)
+
+        workers = [
+            threading.Thread(target=self._worker, args=(run_node,), daemon=True)
+            for _ in range(min(self.jobs, len(self.dependencies)))
+        ]
+        for thread in workers:
+            thread.start()
+        try:
+            for thread in workers:
+                # Join with a timeout so Ctrl-C reaches the main thread
+                while thread.is_alive():
+                    thread.join(0.1)
+        except KeyboardInterrupt:
+            self.stop()
+            raise
+        return dict(self.status)
@@ -0,0 +1,163 @@
+"""dbt-style selector expressions for cli-commander.
+
+A selection is a list of terms whose results are combined as a union.
+Each term is one or more comma-separated criteria whose results are
+intersected. A criterion is:
+
+    build         a selector name (may contain * ? [...] wildcards)
+    tag:ci        every selector tagged ci
+    +deploy       deploy and everything it depends on
+    build+        build and everything that depends on it
+    2+deploy      deploy and its dependencies up to two levels up
+    build+1       build and its direct dependents
+    @build        build, its dependents, and their dependencies
+
+Exclusions use the same syntax and are removed from the union.
+"""
+
+import fnmatch
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+
+EXPRESSION_CHARS = frozenset(":+@,*?[")
+
+CRITERION = re.compile(
+    r"^(?P<at>@)?(?:(?P<up_depth>\d*)(?P<up>\+))?(?P<body>[^+@]+?)(?:(?P<down>\+)(?P<down_depth>\d*))?$"
+)
+
+
+class SelectionError(ValueError):
+    """Raised for an invalid selector expression or an unknown selector."""
+
+
+def is_expression(text: str) -> bool:
+    """Return True if text uses selector expression syntax rather than a plain name."""
+    return any(char in EXPRESSION_CHARS for char in text)
+
+
+class SelectorIndex:
+    """
+    Tag and adjacency indexes over a configuration's selectors.
+
+    The indexes are built once, after which resolving an expression only
+    touches the selectors it selects.
+    """
+
+    def __init__(self, selectors: Dict[str, Any]):
+        """
+        Args:
+            selectors: The configuration's selectors mapping
+
+        Raises:
+            SelectionError: If a selector's tags are malformed
+        """
+        self.position: Dict[str, int] = {}
+        self.tags: Dict[str, Set[str]] = {}
+        self.parents: Dict[str, List[str]] = {}
+        self.children: Dict[str, List[str]] = {}
+
+        for position, (name, selector_config) in enumerate(selectors.items()):
+            self.position[name] = position
+            if not isinstance(selector_config, dict):
+                continue
+            tags = selector_config.get("tags")
+            if tags is not None:
+                if isinstance(tags, str):
+                    tags = [tags]
+                if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+                    raise SelectionError(f"Selector '{name}': 'tags' must be a list of strings")
+                for tag in tags:
+                    self.tags.setdefault(tag, set()).add(name)
+            depends_on = selector_config.get("depends_on")
+            if isinstance(depends_on, list) and depends_on:
+                self.parents[name] = depends_on
+                for parent in depends_on:
+                    self.children.setdefault(parent, []).append(name)
+
+    def _closure(self, start: Set[str], edges: Dict[str, List[str]],
+                 depth: Optional[int]) -> Set[str]:
+        """Return start plus the nodes reachable from it within depth steps."""
+        result = set(start)
+        frontier = list(start)
+        level = 0
+        while frontier and (depth is None or level < depth):
+            level += 1
+            next_frontier = []
+            for name in frontier:
+                for neighbour in edges.get(name, ()):
+                    if neighbour not in result:
+                        result.add(neighbour)
+                        next_frontier.append(neighbour)
+            frontier = next_frontier
+        return result
+
+    def _match(self, body: str) -> Set[str]:
+        method, value = body.split(":", 1) if ":" in body else ("", body)
+        if method == "tag":
+            return set(self.tags.get(value, ()))
+        if method:
+            raise SelectionError(f"Unknown selector method '{method}:' in '{body}'")
+        if any(char in value for char in "*?["):
+            return {name for name in self.position if fnmatch.fnmatchcase(name, value)}
+        if value not in self.position:
+            raise SelectionError(f"Selector '{value}' not found in configuration")
+        return {value}
+
+    def resolve_criterion(self, criterion: str) -> Set[str]:
+        """
+        Resolve a single criterion such as "tag:ci" or "+deploy".
+
+        Raises:
+            SelectionError: If the criterion is invalid or names an unknown selector
+        """
+        match = CRITERION.match(criterion)
+        if not match or (match.group("at") and (match.group("up") or match.group("down"))):
+            raise SelectionError(f"Invalid selector expression '{criterion}'")
+        selected = self._match(match.group("body"))
+        if match.group("at"):
+            descendants = self._closure(selected, self.children, None)
+            return self._closure(descendants, self.parents, None)
+        result = set(selected)
+        if match.group("up"):
+            depth = int(match.group("up_depth")) if match.group("up_depth") else None
+            result |= self._closure(selected, self.parents, depth)
+        if match.group("down"):
+            depth = int(match.group("down_depth")) if match.group("down_depth") else None
+            result |= self._closure(selected, self.children, depth)
+        return result
+
+    def resolve(self, term: str) -> Set[str]:
+        """Resolve a term, intersecting its comma-separated criteria."""
+        result: Optional[Set[str]] = None
+        for criterion in term.split(","):
+            criterion = criterion.strip()
+            if not criterion:
+                raise SelectionError(f"Invalid selector expression '{term}'")
+            selected = self.resolve_criterion(criterion)
+            result = selected if result is None else result & selected
+        return result or set()
+
+    def select(self, terms: Iterable[str], exclude: Iterable[str] = ()) -> List[str]:
+        """
+        Resolve a selection into selector names.
+
+        Plain names keep the order they were given in; selectors matched by
+        an expression follow the order of the configuration file.
+
+        Args:
+            terms: Terms whose results are united
+            exclude: Terms whose results are removed
+
+        Returns:
+            The selected selector names
+        """
+        excluded: Set[str] = set()
+        for term in exclude:
+            excluded |= self.resolve(term)
+        selected: Dict[str, None] = {}
+        for term in terms:
+            for name in sorted(self.resolve(term), key=self.position.__getitem__):
+                if name not in excluded:
+                    selected[name] = None
+        return list(selected)
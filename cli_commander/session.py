@@ -0,0 +1,351 @@
+"""Batch sessions of selectors run by long-lived shells.
+
+``cmdr session`` reads selector names, one per line, from stdin (or from a
+batch file given as its argument) and runs them in order. Instead of
+starting a new /bin/sh for every command, a small pool of shells is
+started once and each command is written to one of them over a pipe.
+
+Every command runs in a subshell of its worker, so its cwd, environment
+variables, shell options and traps are discarded when it ends and cannot
+leak into the next command. After the subshell exits, the worker writes a
+sentinel line holding a per-worker token and the exit status to a FIFO it
+holds open as fd 3, which the commands themselves do not inherit. Command
+output goes straight to cmdr's stdout and stderr.
+"""
+
+import os
+import queue
+import re
+import secrets
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from cli_commander.executor import CommandExecutor
+
+
+DEFAULT_SHELL = "/bin/sh"
+# Selector keys a shared shell can honour; selectors using anything else
+# (inputs, log, argv, ...) run through CommandExecutor as usual
+SESSION_KEYS = frozenset(("command", "description", "tags", "exec", "env", "cwd", "depends_on"))
+ENV_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+# Exit status of a command whose worker shell died under it
+WORKER_DIED = 1
+# Seconds a new worker may take to start
+STARTUP_TIMEOUT = 10.0
+
+
+class ShellWorker:
+    """
+    A long-lived /bin/sh that runs one command at a time.
+
+    Args:
+        shell: Shell to start
+    """
+
+    def __init__(self, shell: str = DEFAULT_SHELL):
+        self.token = secrets.token_hex(8)
+        # The status channel is a FIFO the shell opens as fd 3, since the
+        # shell cannot move an inherited descriptor above 9 into place
+        directory = tempfile.mkdtemp(prefix="cmdr-session-")
+        fifo = os.path.join(directory, "status")
+        try:
+            os.mkfifo(fifo, 0o600)
+            # Opening the read end first keeps the shell's open from blocking
+            status = os.open(fifo, os.O_RDONLY | os.O_NONBLOCK)
+            try:
+                self.process = subprocess.Popen([shell], stdin=subprocess.PIPE)
+                self._send(f"exec 3>{shlex.quote(fifo)}\necho {self.token} >&3\n")
+                self._wait_ready(status)
+            except BaseException:
+                os.close(status)
+                if getattr(self, "process", None) is not None:
+                    self.process.kill()
+                    self.process.wait()
+                raise
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        os.set_blocking(status, True)
+        self.status = os.fdopen(status, "rb")
+
+    def _wait_ready(self, status: int) -> None:
+        # Until the shell has opened the FIFO, reads see end of file
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        received = b""
+        while not received.endswith(b"\n"):
+            try:
+                received += os.read(status, 64)
+            except BlockingIOError:
+                pass
+            if self.process.poll() is not None or time.monotonic() > deadline:
+                raise OSError("shell worker did not start")
+            if not received.endswith(b"\n"):
+                time.sleep(0.001)
+        if received.strip() != self.token.encode("ascii"):
+            raise OSError("unexpected output from shell worker")
+
+    def _send(self, script: str) -> None:
+        self.process.stdin.write(script.encode("utf-8"))
+        self.process.stdin.flush()
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None and not self.status.closed
+
+    def run(self, command: str, cwd: Optional[str] = None,
+            env: Optional[Dict[str, str]] = None) -> int:
+        """
+        Run a command in a fresh subshell of the worker.
+
+        Args:
+            command: Shell command
+            cwd: Directory to run it in; the worker's own directory if None
+            env: Variables to set for this command only
+
+        Returns:
+            The command's exit status, as reported by the shell
+
+        Raises:
+            OSError: If the worker has died
+        """
+        lines = ["("]
+        if cwd:
+            lines.append(f"cd -- {shlex.quote(cwd)} || exit 1")
+        for name, value in (env or {}).items():
+            lines.append(f"export {name}={shlex.quote(value)}")
+        # eval keeps syntax errors in the command from derailing the worker
+        lines.append(f"eval {shlex.quote(command)}")
+        lines.append(") </dev/null 3>&-")
+        lines.append(f"echo \"{self.token} $?\" >&3\n")
+        try:
+            self._send("\n".join(lines))
+            while True:
+                line = self.status.readline()
+                if not line:
+                    break
+                token, _, status = line.decode("ascii", "replace").strip().partition(" ")
+                if token == self.token:
+                    return int(status)
+        except (BrokenPipeError, ValueError):
+            pass
+        self.close()
+        raise OSError("shell worker exited")
+
+    def close(self) -> None:
+        """Stop the shell."""
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+            try:
+                self.process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        if not self.status.closed:
+            self.status.close()
+
+
+class ShellPool:
+    """
+    Up to `size` ShellWorkers, started on demand and shared between threads.
+
+    Args:
+        size: Maximum number of workers
+        shell: Shell the workers run
+    """
+
+    def __init__(self, size: int = 1, shell: str = DEFAULT_SHELL):
+        self.size = max(1, size)
+        self.shell = shell
+        self._idle: "queue.LifoQueue[ShellWorker]" = queue.LifoQueue()
+        self._workers: List[ShellWorker] = []
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> ShellWorker:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            self._workers = [worker for worker in self._workers if worker.alive]
+            if len(self._workers) < self.size:
+                worker = ShellWorker(self.shell)
+                self._workers.append(worker)
+                return worker
+        return self._idle.get()
+
+    def run(self, command: str, cwd: Optional[str] = None,
+            env: Optional[Dict[str, str]] = None) -> int:
+        """
+        Run a command on an idle worker, starting one if the pool has room.
+
+        A worker that dies is replaced for the next command.
+
+        Raises:
+            OSError: If the worker cannot be started or dies
+        """
+        worker = self._acquire()
+        try:
+            return worker.run(command, cwd, env)
+        finally:
+            if worker.alive:
+                self._idle.put(worker)
+
+    def close(self) -> None:
+        """Stop every worker."""
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.close()
+
+    def __enter__(self) -> "ShellPool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def read_names(stream: TextIO) -> Iterator[str]:
+    """
+    Yield selector names from a batch, one per line.
+
+    Blank lines and lines starting with # are skipped. Lines are read as
+    they arrive, so a session can be fed from a pipe.
+    """
+    for line in stream:
+        name = line.strip()
+        if name and not name.startswith("#"):
+            yield name
+
+
+def shares_shell(selector_config: Any) -> bool:
+    """Return True if a selector can run in a session's shared shells."""
+    if not isinstance(selector_config, dict) or not isinstance(selector_config.get("command"), str):
+        return False
+    if not all(key in SESSION_KEYS for key in selector_config):
+        return False
+    env = selector_config.get("env") or {}
+    return isinstance(env, dict) and all(ENV_NAME.match(str(name)) for name in env)
+
+
+class Session:
+    """
+    Runs a batch of selectors through a ShellPool.
+
+    Selectors that need more than a shell command (inputs, logs, argv, ...)
+    run through the CommandExecutor instead. depends_on is not followed;
+    list dependencies in the batch where they should run.
+
+    Args:
+        config_parser: ConfigParser with the configuration loaded
+        executor: CommandExecutor for recording runs and other selectors
+        pool: ShellPool the commands run in
+    """
+
+    def __init__(self, config_parser, executor: CommandExecutor, pool: ShellPool):
+        self.config_parser = config_parser
+        self.executor = executor
+        self.pool = pool
+        self._print_lock = threading.Lock()
+
+    def run_one(self, name: str) -> int:
+        """Run one selector of the batch and return its exit status."""
+        selector_config = self.config_parser.get_selector(name)
+        if selector_config is None:
+            print(f"Error: Selector '{name}' not found in configuration", file=sys.stderr)
+            return 1
+        if isinstance(selector_config, dict) and selector_config.get("matrix") is not None:
+            print(f"Error: matrix selector '{name}' cannot run in a session", file=sys.stderr)
+            return 1
+        try:
+            selector_config = self.executor.resolve_values(selector_config)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        if (selector_config.get("command") is None and selector_config.get("argv") is None
+                and selector_config.get("depends_on")):
+            # Dependencies are not followed; a group has nothing of its own to run
+            with self._print_lock:
+                print(f"Skipping: {name} (only groups its dependencies)")
+            return 0
+        if not shares_shell(selector_config):
+            try:
+                return self.executor.execute_selector(selector_config, name)
+            except ValueError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                return 1
+
+        from cli_commander.config import scalar_text
+
+        command = selector_config["command"]
+        env = {
+            str(key): "" if value is None else scalar_text(value)
+            for key, value in (selector_config.get("env") or {}).items()
+        }
+        with self._print_lock:
+            if selector_config.get("description"):
+                print(f"Running: {selector_config['description']}")
+            print(f"Command: {command}")
+            sys.stdout.flush()
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            exit_code = self.pool.run(command, selector_config.get("cwd"), env)
+        except OSError as e:
+            print(f"Error executing command: {e}", file=sys.stderr)
+            return WORKER_DIED
+        self.executor.record_run(name, selector_config, started, time.perf_counter() - start, exit_code)
+        return exit_code
+
+    def run(self, names: Iterable[str], jobs: int = 1, fail_fast: bool = False) -> int:
+        """
+        Run a batch of selectors.
+
+        Args:
+            names: Selector names, consumed as the batch proceeds
+            jobs: Number of selectors to run at once; 1 runs them in order
+            fail_fast: Stop at the first failure
+
+        Returns:
+            0 if every selector passed, otherwise the exit status of the
+            first one that failed
+        """
+        if jobs <= 1:
+            exit_code = 0
+            for name in names:
+                code = self.run_one(name)
+                if code != 0 and exit_code == 0:
+                    exit_code = code
+                if code != 0 and fail_fast:
+                    break
+            return exit_code
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        failures: List[int] = []
+        slots = threading.BoundedSemaphore(jobs)
+
+        def run_slot(name: str) -> None:
+            try:
+                code = self.run_one(name)
+                if code != 0:
+                    failures.append(code)
+            finally:
+                slots.release()
+
+        with ThreadPoolExecutor(max_workers=jobs) as threads:
+            for name in names:
+                # Read no further ahead than there are free slots
+                slots.acquire()
+                if fail_fast and failures:
+                    slots.release()
+                    break
+                threads.submit(run_slot, name)
+        return failures[0] if failures else 0
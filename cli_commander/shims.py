@@ -0,0 +1,193 @@
+"""Native shell shims for cli-commander.
+
+``cmdr shims install`` compiles the current configuration into a shell
+function file that defines a ``cmdr`` function. Sourced into an interactive
+shell, the function runs static selectors (a plain ``command`` string and
+nothing that needs Python, such as inputs or dependencies) directly with
+/bin/sh, and hands everything else to the real cmdr. ``cmdr shims install
+DIR`` also writes one tiny executable per static selector into DIR, for
+scripts and git hooks.
+
+Every shim checks that none of the config files it was built from is newer
+than the shim itself, and dispatches through cmdr if one is. The function
+file additionally checks that the nearest config file is the one it was
+built from, so it is inert in other projects.
+"""
+
+import os
+import shlex
+from typing import Any, Dict, List, Optional, Tuple
+
+from cli_commander.cache import atomic_write, get_cache_dir
+
+
+# Selector keys a shim can honour without Python; any other key (inputs,
+# depends_on, argv, ...) means the selector keeps running through cmdr
+STATIC_KEYS = frozenset(("command", "description", "tags", "exec"))
+# First arguments cmdr handles itself rather than as selector names
+BUILTIN_COMMANDS = frozenset(("init", "cache", "completion", "shims", "session"))
+
+HEADER = "# Generated by 'cmdr shims install' from {config} -- do not edit"
+
+
+def is_static(name: str, selector_config: Any) -> bool:
+    """Return True if a selector can run from a shim."""
+    return (
+        name not in BUILTIN_COMMANDS
+        and not name.startswith("-")
+        and isinstance(selector_config, dict)
+        and isinstance(selector_config.get("command"), str)
+        and bool(selector_config["command"])
+        and all(key in STATIC_KEYS for key in selector_config)
+    )
+
+
+def functions_path(config_path: str, cache_dir: Optional[str] = None) -> str:
+    """Return the function file generated for a configuration."""
+    key = os.path.abspath(config_path).replace("%", "%25").replace(os.sep, "%2F")
+    if len(key) > 200:
+        import hashlib
+
+        key = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir or get_cache_dir(), "shims", key + ".sh")
+
+
+def announce(selector_config: Dict[str, Any]) -> str:
+    """Return the printf command echoing what cmdr prints before running a command."""
+    lines = []
+    if selector_config.get("description"):
+        lines.append(f"Running: {selector_config['description']}")
+    lines.append(f"Command: {selector_config['command']}")
+    return "printf '%s\\n' " + " ".join(shlex.quote(line) for line in lines)
+
+
+def stale_test(config_files: List[str], target: str) -> str:
+    """Return a shell condition that is true when a config file is newer than target."""
+    return " || ".join(
+        f"[ ! -f {shlex.quote(path)} ] || [ {shlex.quote(path)} -nt {target} ]"
+        for path in config_files
+    )
+
+
+def render_functions(path: str, config_path: str, config_files: List[str],
+                     selectors: Dict[str, Dict[str, Any]]) -> str:
+    """
+    Render the function file for the static selectors of a configuration.
+
+    Args:
+        path: Where the file will be written
+        config_path: Nearest config file the shims were built from
+        config_files: Every file the configuration was merged from
+        selectors: Static selectors by name
+
+    Returns:
+        Shell source defining cmdr()
+    """
+    quoted_path = shlex.quote(path)
+    lines = [
+        HEADER.format(config=config_path),
+        f"# Load it with:  . {quoted_path}",
+        "",
+        "_cmdr_shims_apply() {",
+        "    # The shims apply below the directory of the config they were built",
+        "    # from, while none of the config files changed",
+        "    local _cmdr_dir=$PWD",
+        "    while [ ! -f \"$_cmdr_dir/cli-commander.yml\" ]; do",
+        "        if [ -e \"$_cmdr_dir/.git\" ] || [ -z \"$_cmdr_dir\" ]; then",
+        "            _cmdr_dir=$HOME/.cli-commander",
+        "            break",
+        "        fi",
+        "        _cmdr_dir=${_cmdr_dir%/*}",
+        "    done",
+        f"    [ \"$_cmdr_dir/cli-commander.yml\" -ef {shlex.quote(config_path)} ] || return 1",
+        f"    if {stale_test(config_files, quoted_path)}; then",
+        "        return 1",
+        "    fi",
+        "}",
+        "",
+        "cmdr() {",
+        "    if [ $# -eq 1 ] && _cmdr_shims_apply; then",
+        "        case $1 in",
+    ]
+    for name, selector_config in selectors.items():
+        lines.extend([
+            f"            {shlex.quote(name)})",
+            f"                {announce(selector_config)}",
+            f"                /bin/sh -c {shlex.quote(selector_config['command'])}",
+            "                return",
+            "                ;;",
+        ])
+    lines.extend([
+        "        esac",
+        "    fi",
+        "    command cmdr \"$@\"",
+        "}",
+    ])
+    return "\n".join(lines) + "\n"
+
+
+def render_executable(name: str, config_path: str, config_files: List[str],
+                      selector_config: Dict[str, Any]) -> str:
+    """Render the executable shim of one static selector."""
+    self_path = '"$0"'
+    return "\n".join([
+        "#!/bin/sh",
+        HEADER.format(config=config_path),
+        f"if [ $# -gt 0 ] || {stale_test(config_files, self_path)}; then",
+        f"    exec cmdr {shlex.quote(name)} \"$@\"",
+        "fi",
+        announce(selector_config),
+        f"exec /bin/sh -c {shlex.quote(selector_config['command'])}",
+    ]) + "\n"
+
+
+def install(config_path: str, config_files: List[str], config: Dict[str, Any],
+            bin_dir: Optional[str] = None, cache_dir: Optional[str] = None) -> Tuple[str, List[str], List[str]]:
+    """
+    Generate the shims of a configuration.
+
+    Executables in bin_dir that were generated earlier but whose selectors
+    are gone or no longer static are removed.
+
+    Args:
+        config_path: Nearest config file, which names the function file
+        config_files: Every file the configuration was merged from
+        config: The loaded configuration
+        bin_dir: Directory to write one executable per static selector to
+        cache_dir: Cache root; defaults to get_cache_dir()
+
+    Returns:
+        (functions_file, static, dynamic) where static and dynamic are the
+        names of the selectors with and without a shim
+    """
+    selectors = config.get("selectors") or {}
+    static = {str(name): value for name, value in selectors.items() if is_static(str(name), value)}
+    dynamic = [str(name) for name in selectors if str(name) not in static]
+
+    path = functions_path(config_path, cache_dir)
+    atomic_write(path, render_functions(path, config_path, config_files, static).encode("utf-8"))
+
+    if bin_dir is not None:
+        os.makedirs(bin_dir, exist_ok=True)
+        for entry in os.scandir(bin_dir):
+            if entry.name not in static and is_generated(entry.path):
+                os.remove(entry.path)
+        for name, selector_config in static.items():
+            if "/" in name or name in (".", ".."):
+                continue
+            target = os.path.join(bin_dir, name)
+            if os.path.exists(target) and not is_generated(target):
+                raise FileExistsError(f"{target} exists and was not generated by cmdr")
+            atomic_write(target, render_executable(name, config_path, config_files, selector_config).encode("utf-8"))
+            os.chmod(target, 0o755)
+    return path, list(static), dynamic
+
+
+def is_generated(path: str) -> bool:
+    """Return True if path is a shim written by install."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(256)
+    except OSError:
+        return False
+    return b"Generated by 'cmdr shims install'" in head
@@ -0,0 +1,186 @@
+"""Incremental execution state for cli-commander.
+
+Selectors that declare ``inputs:`` are fingerprinted before they run. The
+fingerprint covers the command, the content of every input file and the
+values of any environment variables listed in ``input_env:``. When it
+matches the fingerprint recorded after the last successful run (and all
+declared ``outputs:`` still exist), the run is skipped.
+"""
+
+import glob
+import hashlib
+import json
+import marshal
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from cli_commander.cache import atomic_write, get_cache_dir
+
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def expand_globs(patterns: Iterable[str], root: str) -> List[str]:
+    """
+    Expand glob patterns into a sorted list of files.
+
+    Patterns are relative to root and support ``**``. A pattern matching a
+    directory includes every file below it.
+
+    Args:
+        patterns: Glob patterns
+        root: Directory the patterns are relative to
+
+    Returns:
+        Sorted absolute paths of the matching files
+    """
+    files = set()
+    for pattern in patterns:
+        for match in glob.glob(os.path.join(root, pattern), recursive=True):
+            if os.path.isdir(match):
+                for dirpath, _, filenames in os.walk(match):
+                    files.update(os.path.join(dirpath, name) for name in filenames)
+            elif os.path.isfile(match):
+                files.add(match)
+    return sorted(os.path.abspath(path) for path in files)
+
+
+class FileHasher:
+    """
+    Content hasher with a persistent mtime/size fast path.
+
+    A file is only re-read when its mtime or size differs from the values
+    recorded the last time its digest was computed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: Optional[Dict[str, Tuple[int, int, str]]] = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Tuple[int, int, str]]:
+        if self._entries is None:
+            try:
+                with open(self.path, "rb") as f:
+                    self._entries = marshal.loads(f.read())
+            except (OSError, EOFError, ValueError, TypeError):
+                self._entries = {}
+        return self._entries
+
+    def hash_file(self, path: str) -> str:
+        """
+        Return the SHA-256 digest of a file's content.
+
+        Args:
+            path: Absolute path of the file
+
+        Returns:
+            Hex digest of the content
+        """
+        st = os.stat(path)
+        with self._lock:
+            entry = self._load().get(path)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            return entry[2]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        value = digest.hexdigest()
+        with self._lock:
+            self._load()[path] = (st.st_mtime_ns, st.st_size, value)
+            self._dirty = True
+        return value
+
+    def save(self) -> None:
+        """Persist newly computed digests."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = marshal.dumps(self._load())
+            self._dirty = False
+        try:
+            atomic_write(self.path, data)
+        except OSError:
+            pass
+
+
+class StateStore:
+    """
+    Local store of the fingerprints of successful selector runs.
+
+    Each selector's fingerprint lives in its own small file, so concurrent
+    runs of different selectors never contend for the same file.
+    """
+
+    def __init__(self, state_dir: Optional[str] = None):
+        self.state_dir = state_dir or os.path.join(get_cache_dir(), "state")
+        self.hasher = FileHasher(os.path.join(self.state_dir, "file-hashes.marshal"))
+
+    @staticmethod
+    def key(selector_name: Optional[str], selector_config: Dict[str, Any], cwd: str) -> str:
+        """Return the state key identifying a selector in a directory."""
+        name = selector_name if selector_name is not None else selector_config.get("command", "")
+        return json.dumps([os.path.abspath(cwd), name])
+
+    def _entry_path(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.state_dir, "fingerprints", digest)
+
+    def fingerprint(self, selector_config: Dict[str, Any], cwd: str) -> str:
+        """
+        Compute the fingerprint of a selector's command, inputs and environment.
+
+        The environment covers the variables named by input_env and the
+        selector's own env: values, and the directory the command runs in.
+
+        Args:
+            selector_config: Dictionary containing the selector configuration
+            cwd: Directory the selector runs in
+
+        Returns:
+            Hex digest identifying the current state of the inputs
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps({
+            "command": selector_config.get("command"),
+            "argv": selector_config.get("argv"),
+            "shell": selector_config.get("shell", True),
+            "outputs": selector_config.get("outputs") or [],
+            "env": {
+                name: os.environ.get(name)
+                for name in sorted(selector_config.get("input_env") or [])
+            },
+            "selector_env": selector_config.get("env") or {},
+            "cwd": os.path.abspath(cwd),
+        }, sort_keys=True, default=str).encode("utf-8"))
+        for path in expand_globs(selector_config.get("inputs") or [], cwd):
+            digest.update(os.path.relpath(path, cwd).encode("utf-8") + b"\0")
+            digest.update(self.hasher.hash_file(path).encode("ascii"))
+        self.hasher.save()
+        return digest.hexdigest()
+
+    def outputs_exist(self, selector_config: Dict[str, Any], cwd: str) -> bool:
+        """Return True if every declared output pattern matches something."""
+        for pattern in selector_config.get("outputs") or []:
+            if not glob.glob(os.path.join(cwd, pattern), recursive=True):
+                return False
+        return True
+
+    def is_up_to_date(self, key: str, fingerprint: str) -> bool:
+        """Return True if the fingerprint matches the last successful run."""
+        try:
+            with open(self._entry_path(key), "r") as f:
+                return f.read() == fingerprint
+        except OSError:
+            return False
+
+    def record(self, key: str, fingerprint: str) -> None:
+        """Record the fingerprint of a successful run."""
+        try:
+            atomic_write(self._entry_path(key), fingerprint.encode("ascii"))
+        except OSError:
+            pass
@@ -0,0 +1,311 @@
+"""Computed and file-based values for selectors.
+
+Selectors can take values from commands and dotenv files instead of
+running lookups in every shell::
+
+    selectors:
+      deploy:
+        command: ./deploy --image app:{version}
+        env_file: .env               # or a list of files
+        vars:                        # substituted as {name}, not exported
+          version:
+            run: cat VERSION
+            key: [VERSION]           # recomputed when these files change
+        env:
+          GIT_SHA:
+            run: git rev-parse HEAD
+            key: [.git/HEAD, .git/refs/**]
+          REGISTRY_TOKEN:
+            run: ./scripts/fetch-token
+            ttl: 15m                 # recomputed after 15 minutes
+          STAGE: production
+
+A computed value is the stdout of its ``run`` command, without trailing
+newlines. With ``ttl`` and/or ``key`` it is cached on disk until it expires,
+the content of a key file changes or an env_file: value changes; without
+either it is computed on every run. Other environment variables are not
+part of the cache key. vars: are resolved first and can be used as {name} in the
+command, argv, description and env values (including their ``run``). The
+values of each section are computed in parallel. env_file: values are
+overridden by env: and, like them, passed to the command's environment.
+"""
+
+import hashlib
+import json
+import os
+import re
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from cli_commander.cache import atomic_write, get_cache_dir
+from cli_commander.config import parse_duration, scalar_text
+from cli_commander.matrix import substitute
+
+
+VALUE_KEYS = frozenset(("run", "ttl", "key"))
+ENV_FILE_LINE = re.compile(r"^\s*(?:export\s+)?([A-Za-z_][A-Za-z0-9_]*)\s*=\s*(.*?)\s*$")
+# Most values wait on git, the network or other processes, not on CPU
+MAX_PARALLEL = 16
+# Keys whose text gets {var} substituted
+SUBSTITUTED_KEYS = ("command", "description")
+
+
+@dataclass
+class ValueSpec:
+    """A value computed by a command."""
+
+    run: str
+    ttl: Optional[float] = None
+    key: Tuple[str, ...] = ()
+
+    @property
+    def cached(self) -> bool:
+        return self.ttl is not None or bool(self.key)
+
+    @classmethod
+    def parse(cls, section: str, name: str, value: Dict[str, Any]) -> "ValueSpec":
+        """
+        Parse a computed value such as {run: ..., ttl: 5m, key: [...]}.
+
+        Raises:
+            ValueError: If the value is invalid
+        """
+        unknown = sorted(set(value) - VALUE_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown settings for {section} value '{name}': {', '.join(unknown)}")
+        if not isinstance(value.get("run"), str) or not value["run"]:
+            raise ValueError(f"{section} value '{name}' needs a 'run' command")
+        ttl = parse_duration(value["ttl"]) if value.get("ttl") is not None else None
+        key = value.get("key") or []
+        if isinstance(key, str):
+            key = [key]
+        if not isinstance(key, list) or not all(isinstance(pattern, str) for pattern in key):
+            raise ValueError(f"{section} value '{name}': 'key' must be a list of file patterns")
+        return cls(value["run"], ttl, tuple(key))
+
+
+def has_values(selector_config: Any) -> bool:
+    """Return True if a selector has vars:, env_file: or computed env: values."""
+    if not isinstance(selector_config, dict):
+        return False
+    if selector_config.get("vars") or selector_config.get("env_file"):
+        return True
+    env = selector_config.get("env")
+    return isinstance(env, dict) and any(isinstance(value, dict) for value in env.values())
+
+
+def read_env_file(path: str) -> Dict[str, str]:
+    """
+    Read a dotenv file of NAME=value lines.
+
+    Blank lines, comments and an ``export`` prefix are allowed. Values may
+    be single-quoted (literal) or double-quoted (with \\n, \\" and \\\\
+    escapes); unquoted values end at a `` #`` comment.
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If a line is not a valid assignment
+    """
+    values = {}
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            match = ENV_FILE_LINE.match(line.rstrip("\n"))
+            if not match:
+                raise ValueError(f"{path}:{number}: expected NAME=value")
+            name, value = match.groups()
+            if len(value) >= 2 and value[0] == value[-1] == "'":
+                value = value[1:-1]
+            elif len(value) >= 2 and value[0] == value[-1] == '"':
+                value = re.sub(r'\\([n"\\])', lambda m: "\n" if m.group(1) == "n" else m.group(1), value[1:-1])
+            else:
+                value = re.split(r"\s+#", value, 1)[0]
+            values[name] = value
+    return values
+
+
+class ValueCache:
+    """
+    On-disk cache of computed values.
+
+    An entry is keyed by the command, the directory it runs in, the
+    env_file: values it sees and the content of its key files, and expires
+    after its ttl.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        from cli_commander.state import FileHasher
+
+        self.cache_dir = cache_dir or os.path.join(get_cache_dir(), "values")
+        self.hasher = FileHasher(os.path.join(self.cache_dir, "file-hashes.marshal"))
+
+    def key(self, spec: ValueSpec, cwd: str, file_env: Optional[Dict[str, str]] = None) -> str:
+        """Return the cache key of a value, covering its key files' content."""
+        from cli_commander.state import expand_globs
+
+        digest = hashlib.sha256(json.dumps(
+            [cwd, spec.run, sorted(spec.key), sorted((file_env or {}).items())]
+        ).encode("utf-8"))
+        for path in expand_globs(spec.key, cwd):
+            digest.update(os.path.relpath(path, cwd).encode("utf-8") + b"\0")
+            digest.update(self.hasher.hash_file(path).encode("ascii"))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key[2:])
+
+    def get(self, key: str, ttl: Optional[float]) -> Optional[str]:
+        """Return a cached value, or None if it is missing or older than ttl."""
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if ttl is not None and time.time() - entry.get("created", 0) >= ttl:
+            return None
+        return entry.get("value")
+
+    def put(self, key: str, value: str) -> None:
+        """Store a computed value."""
+        data = json.dumps({"value": value, "created": time.time()}).encode("utf-8")
+        try:
+            atomic_write(self._path(key), data)
+        except OSError:
+            pass
+
+
+def compute(section: str, name: str, spec: ValueSpec, cwd: str, env: Dict[str, str]) -> str:
+    """
+    Run a value's command and return its output.
+
+    Raises:
+        ValueError: If the command fails
+    """
+    try:
+        result = subprocess.run(
+            spec.run, shell=True, cwd=cwd, env=env,
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+    except OSError as e:
+        raise ValueError(f"Could not compute {section} value '{name}': {e}") from None
+    if result.returncode != 0:
+        detail = result.stderr.decode("utf-8", "replace").strip().splitlines()
+        raise ValueError(
+            f"Computing {section} value '{name}' failed with exit code {result.returncode}"
+            + (f": {detail[-1]}" if detail else "")
+        )
+    return result.stdout.decode("utf-8", "replace").rstrip("\n")
+
+
+def resolve(section: str, values: Any, cwd: str, env: Dict[str, str],
+            cache: Optional[ValueCache], variables: Dict[str, str],
+            refresh: bool = False, file_env: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Resolve the values of one section, computing missing ones in parallel.
+
+    Args:
+        section: "vars" or "env", used in error messages
+        values: Mapping of name to a scalar or a computed value
+        cwd: Directory the commands run in
+        env: Environment of the commands
+        cache: Cache for values with a ttl or key
+        variables: Resolved vars substituted as {name} into the values
+        refresh: Recompute cached values
+        file_env: env_file: values, which are part of the cache keys
+
+    Returns:
+        Mapping of name to value
+
+    Raises:
+        ValueError: If a value is invalid or its command fails
+    """
+    if not isinstance(values, dict):
+        raise ValueError(f"Selector '{section}' must be a mapping of names to values")
+    resolved: Dict[str, str] = {}
+    pending: List[Tuple[str, ValueSpec, Optional[str]]] = []
+    for name, value in values.items():
+        name = str(name)
+        if isinstance(value, dict):
+            spec = ValueSpec.parse(section, name, value)
+            spec.run = substitute(spec.run, variables)
+            key = cache.key(spec, cwd, file_env) if cache is not None and spec.cached else None
+            cached = cache.get(key, spec.ttl) if key is not None and not refresh else None
+            if cached is not None:
+                resolved[name] = cached
+            else:
+                pending.append((name, spec, key))
+        elif isinstance(value, list):
+            raise ValueError(f"{section} value '{name}' must be a scalar or a mapping with 'run'")
+        else:
+            resolved[name] = substitute("" if value is None else scalar_text(value), variables)
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=min(len(pending), MAX_PARALLEL)) as pool:
+            futures = [
+                (name, key, pool.submit(compute, section, name, spec, cwd, env))
+                for name, spec, key in pending
+            ]
+            for name, key, future in futures:
+                resolved[name] = future.result()
+                if key is not None:
+                    cache.put(key, resolved[name])
+    if cache is not None:
+        cache.hasher.save()
+    # Keep the configured order
+    return {str(name): resolved[str(name)] for name in values}
+
+
+def resolve_selector(selector_config: Dict[str, Any], cache: Optional[ValueCache] = None,
+                     refresh: bool = False) -> Dict[str, Any]:
+    """
+    Return a selector configuration with its values filled in.
+
+    vars: are substituted into the command, argv, description and env, and
+    env_file: and env: are merged into a plain env: mapping of strings.
+
+    Args:
+        selector_config: Dictionary containing the selector configuration
+        cache: Cache for values with a ttl or key
+        refresh: Recompute cached values
+
+    Returns:
+        The resolved configuration, without vars: and env_file:
+
+    Raises:
+        ValueError: If a value is invalid, an env file cannot be read or a
+            command fails
+    """
+    cwd = os.path.abspath(selector_config.get("cwd") or os.getcwd())
+    config = {key: value for key, value in selector_config.items() if key not in ("vars", "env_file")}
+
+    file_env: Dict[str, str] = {}
+    env_files = selector_config.get("env_file") or []
+    if isinstance(env_files, str):
+        env_files = [env_files]
+    if not isinstance(env_files, list) or not all(isinstance(path, str) for path in env_files):
+        raise ValueError("Selector 'env_file' must be a path or a list of paths")
+    for path in env_files:
+        try:
+            file_env.update(read_env_file(os.path.join(cwd, path)))
+        except OSError as e:
+            raise ValueError(f"Could not read env_file {path}: {e.strerror}") from None
+    command_env = dict(os.environ)
+    command_env.update(file_env)
+
+    variables = resolve("vars", selector_config.get("vars") or {}, cwd, command_env, cache, {},
+                        refresh, file_env)
+    for key in SUBSTITUTED_KEYS:
+        if isinstance(config.get(key), str):
+            config[key] = substitute(config[key], variables)
+    if isinstance(config.get("argv"), list):
+        config["argv"] = [substitute(arg, variables) if isinstance(arg, str) else arg for arg in config["argv"]]
+
+    env = dict(file_env)
+    env.update(resolve("env", selector_config.get("env") or {}, cwd, command_env, cache, variables,
+                       refresh, file_env))
+    config["env"] = env
+    return config
@@ -0,0 +1,404 @@
+"""Watch mode for cli-commander.
+
+``cmdr --watch`` runs the selected selectors, then re-runs them whenever a
+file they depend on changes: the files matched by their ``inputs:``, or
+everything below the current directory for selectors without inputs.
+Version-control directories, .gitignore'd paths and declared ``outputs:``
+never trigger a run.
+
+On Linux, changes are reported by inotify (through ctypes), with one watch
+per directory added once up front; new directories are watched as they
+appear, so the tree is never rescanned. Elsewhere a polling watcher
+compares file stats at a fixed interval.
+
+Bursts of changes (a save touching several files, a branch switch) are
+coalesced: a run starts once no change has been seen for the debounce
+window. A change during a run cancels it and starts over. When a config
+file changes, the configuration is reloaded before the next run.
+"""
+
+import os
+import select
+import struct
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, TextIO, Tuple
+
+from cli_commander.executor import terminate_process_group
+from cli_commander.projects import ALWAYS_SKIPPED, IgnoreRules, is_ignored, translate_glob, walk_directories
+
+
+DEBOUNCE_SECONDS = 0.2
+POLL_INTERVAL = 0.5
+# How long a cancelled run gets to exit after SIGTERM before SIGKILL
+CANCEL_GRACE_SECONDS = 5.0
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+                 | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+INOTIFY_EVENT = struct.Struct("iIII")
+
+# Returned by Watcher.wait when changes may have been lost
+OVERFLOW = "*"
+
+
+class WatchSpec:
+    """
+    The files a watch session reacts to.
+
+    Args:
+        root: Directory paths are relative to (the current directory)
+        inputs: Input glob patterns, or None to watch everything below root
+        outputs: Output glob patterns, whose changes are ignored
+        config_files: Config files whose changes trigger a reload
+    """
+
+    def __init__(self, root: str, inputs: Optional[List[str]] = None,
+                 outputs: Iterable[str] = (), config_files: Iterable[str] = ()):
+        import re
+
+        self.root = os.path.abspath(root)
+        self.inputs = inputs
+        self.config_files = {os.path.abspath(path) for path in config_files}
+        self._inputs = [re.compile(translate_glob(p.lstrip("./")) + r"\Z") for p in inputs or []]
+        self._outputs = [re.compile(translate_glob(p.lstrip("./")) + r"\Z") for p in outputs]
+        self._rules: Dict[str, List[IgnoreRules]] = {}
+
+    def directories(self) -> List[Tuple[str, bool]]:
+        """
+        Return the directories to watch as (path, recursive) pairs.
+
+        Each input pattern is watched from its longest literal directory
+        prefix; a literal file name only needs its own directory.
+        """
+        watched: Dict[str, bool] = {}
+        for path in self.config_files:
+            watched.setdefault(os.path.dirname(path), False)
+        if self.inputs is None:
+            watched[self.root] = True
+            return sorted(watched.items())
+        for pattern in self.inputs:
+            parts = pattern.split("/")
+            literal = []
+            for part in parts:
+                if any(char in part for char in "*?["):
+                    break
+                literal.append(part)
+            path = os.path.normpath(os.path.join(self.root, *literal)) if literal else self.root
+            if len(literal) == len(parts) and not os.path.isdir(path):
+                watched[os.path.dirname(path)] = watched.get(os.path.dirname(path), False)
+                continue
+            while not os.path.isdir(path) and path != self.root:
+                path = os.path.dirname(path)
+            watched[path] = True
+        return sorted(watched.items())
+
+    def is_config(self, path: str) -> bool:
+        return path in self.config_files
+
+    def _ignore_rules(self, directory: str) -> List[IgnoreRules]:
+        """Return the ignore files that apply inside a directory below root."""
+        rules = self._rules.get(directory)
+        if rules is None:
+            if directory == self.root:
+                parent: List[IgnoreRules] = []
+            else:
+                parent = self._ignore_rules(os.path.dirname(directory))
+            rules = parent
+            ignore_file = os.path.join(directory, ".gitignore")
+            if os.path.isfile(ignore_file):
+                try:
+                    relative = os.path.relpath(directory, self.root)
+                    rules = parent + [IgnoreRules.read(ignore_file, "" if relative == "." else relative)]
+                except OSError:
+                    pass
+            self._rules[directory] = rules
+        return rules
+
+    def matches(self, path: str) -> bool:
+        """Return True if a change to path should trigger a run."""
+        if path == OVERFLOW or path in self.config_files:
+            return True
+        relative = os.path.relpath(path, self.root)
+        if relative.startswith(".."):
+            return False
+        parts = relative.split(os.sep)
+        if any(part in ALWAYS_SKIPPED for part in parts):
+            return False
+        relative = "/".join(parts)
+        if os.path.basename(path) == ".gitignore":
+            self._rules.clear()
+        prefixes = ["/".join(parts[:i]) for i in range(1, len(parts) + 1)]
+        rules = self._ignore_rules(os.path.dirname(path))
+        if any(is_ignored(rules, prefix, prefix != relative) for prefix in prefixes):
+            return False
+        if any(regex.match(prefix) for regex in self._outputs for prefix in prefixes):
+            return False
+        if self.inputs is None:
+            return True
+        # A pattern matching a directory covers every file below it
+        return any(regex.match(prefix) for regex in self._inputs for prefix in prefixes)
+
+
+class PollingWatcher:
+    """Detects changes by comparing file stats at a fixed interval."""
+
+    def __init__(self, directories: List[Tuple[str, bool]], interval: float = POLL_INTERVAL):
+        self.directories = directories
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for directory, recursive in self.directories:
+            if recursive:
+                for relative, _, entries, _ in walk_directories(directory):
+                    self._add_entries(snapshot, entries)
+            else:
+                try:
+                    self._add_entries(snapshot, os.scandir(directory))
+                except OSError:
+                    pass
+        return snapshot
+
+    @staticmethod
+    def _add_entries(snapshot, entries) -> None:
+        for entry in entries:
+            try:
+                if entry.is_file(follow_symlinks=False):
+                    st = entry.stat(follow_symlinks=False)
+                    snapshot[entry.path] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                continue
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """Return the paths changed since the last call, waiting up to timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self._scan()
+            changed = {
+                path for path in set(snapshot) | set(self.snapshot)
+                if snapshot.get(path) != self.snapshot.get(path)
+            }
+            self.snapshot = snapshot
+            if changed:
+                return changed
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return set()
+            time.sleep(self.interval if remaining is None else min(self.interval, remaining))
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Detects changes with Linux inotify, watching each directory once."""
+
+    def __init__(self, directories: List[Tuple[str, bool]]):
+        """
+        Raises:
+            OSError: If inotify is unavailable
+        """
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        # watch descriptor -> (directory, recursive)
+        self.watches: Dict[int, Tuple[str, bool]] = {}
+        self.watched: Set[str] = set()
+        for directory, recursive in directories:
+            if recursive:
+                self.add_tree(directory)
+            else:
+                self.add_watch(directory, False)
+
+    def add_watch(self, directory: str, recursive: bool) -> None:
+        if directory in self.watched:
+            return
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), IN_WATCH_MASK)
+        if wd >= 0:
+            self.watches[wd] = (directory, recursive)
+            self.watched.add(directory)
+
+    def add_tree(self, directory: str) -> List[str]:
+        """Watch a directory and everything below it; return the files found."""
+        files = []
+        for relative, _, entries, _ in walk_directories(directory):
+            self.add_watch(os.path.join(directory, relative) if relative else directory, True)
+            files.extend(entry.path for entry in entries if not entry.is_dir(follow_symlinks=False))
+        return files
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """Return the paths changed since the last call, waiting up to timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            readable, _, _ = select.select([self.fd], [], [], remaining)
+            if not readable:
+                return set()
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            changed = self._parse(data)
+            if changed:
+                return changed
+
+    def _parse(self, data: bytes) -> Set[str]:
+        changed = set()
+        offset = 0
+        while offset + INOTIFY_EVENT.size <= len(data):
+            wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                changed.add(OVERFLOW)
+                continue
+            watch = self.watches.get(wd)
+            if watch is None:
+                continue
+            directory, recursive = watch
+            if mask & IN_IGNORED:
+                del self.watches[wd]
+                self.watched.discard(directory)
+                continue
+            path = os.path.join(directory, name) if name else directory
+            if mask & IN_ISDIR:
+                if recursive and mask & (IN_CREATE | IN_MOVED_TO):
+                    # Files may have been created before the watch was added
+                    changed.update(self.add_tree(path))
+                continue
+            changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def create_watcher(directories: List[Tuple[str, bool]]):
+    """Return an InotifyWatcher where available, otherwise a PollingWatcher."""
+    if sys.platform.startswith("linux") and not os.environ.get("CMDR_WATCH_POLL"):
+        try:
+            return InotifyWatcher(directories)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(directories)
+
+
+def stop_run(process: Optional[subprocess.Popen]) -> None:
+    """Terminate a run's process group, escalating to SIGKILL after a grace period."""
+    if process is None or process.poll() is not None:
+        return
+    terminate_process_group(process)
+    try:
+        process.wait(timeout=CANCEL_GRACE_SECONDS)
+    except subprocess.TimeoutExpired:
+        import signal
+
+        terminate_process_group(process, signal.SIGKILL)
+        process.wait()
+
+
+def watch(command: List[str], load_spec: Callable[[], WatchSpec],
+          debounce: float = DEBOUNCE_SECONDS, stream: Optional[TextIO] = None,
+          stop: Optional[threading.Event] = None) -> int:
+    """
+    Run a command now and again after every relevant change.
+
+    Args:
+        command: Argument vector of each run
+        load_spec: Loads the configuration and returns what to watch; called
+            at start and after a config file changes
+        debounce: Quiet period that ends a burst of changes, in seconds
+        stream: Where progress messages go; defaults to stderr
+        stop: Event that ends the session, checked between changes
+
+    Returns:
+        Exit code for the cmdr process (130 when interrupted)
+    """
+    stream = stream or sys.stderr
+
+    def note(message: str) -> None:
+        stream.write(f"[watch] {message}\n")
+        stream.flush()
+
+    spec = load_spec()
+    watcher = create_watcher(spec.directories())
+    process: Optional[subprocess.Popen] = None
+    reported = False
+
+    def start() -> subprocess.Popen:
+        # Own session, so a cancelled run's whole process tree can be stopped
+        return subprocess.Popen(command, start_new_session=True)
+
+    try:
+        process = start()
+        while stop is None or not stop.is_set():
+            if process is not None and process.poll() is not None and not reported:
+                note(f"Exit code {process.returncode}. Waiting for changes...")
+                reported = True
+
+            changed = {path for path in watcher.wait(0.1 if process is not None else 0.5)
+                       if spec.matches(path)}
+            if not changed:
+                continue
+
+            # Coalesce the rest of the burst
+            while True:
+                more = watcher.wait(debounce)
+                if not more:
+                    break
+                changed.update(path for path in more if spec.matches(path))
+
+            if process is not None and process.poll() is None:
+                note("Change detected during run; cancelling it")
+            stop_run(process)
+            process = None
+
+            if any(spec.is_config(path) or path == OVERFLOW for path in changed):
+                try:
+                    new_spec = load_spec()
+                except Exception as e:
+                    note(f"Error reloading configuration: {e}")
+                    continue
+                note("Configuration reloaded")
+                if new_spec.directories() != spec.directories():
+                    watcher.close()
+                    watcher = create_watcher(new_spec.directories())
+                spec = new_spec
+
+            shown = sorted(os.path.relpath(path, spec.root) for path in changed if path != OVERFLOW)
+            more_text = f" (+{len(shown) - 3} more)" if len(shown) > 3 else ""
+            note(f"Changed: {', '.join(shown[:3]) or 'files'}{more_text}")
+            process = start()
+            reported = False
+    except KeyboardInterrupt:
+        stop_run(process)
+        return 130
+    finally:
+        watcher.close()
+    stop_run(process)
+    return 0
@@ -0,0 +1,11 @@
+"""Shared pytest fixtures for cli-commander tests."""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    """Keep every test's caches out of the real home directory."""
+    cache_dir = tmp_path / "cmdr-cache"
+    monkeypatch.setenv("CMDR_CACHE_DIR", str(cache_dir))
+    return cache_dir
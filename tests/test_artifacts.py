@@ -0,0 +1,197 @@
+"""Tests for the content-addressed artifact cache."""
+
+import io
+import os
+import sys
+import tempfile
+import pytest
+from cli_commander.artifacts import ArtifactStore
+from cli_commander.cli import main
+from cli_commander.executor import CommandExecutor
+from cli_commander.parallel import ParallelExecutor, RESTORED
+from cli_commander.state import StateStore
+
+
+class TestArtifactStore:
+    """Test suite for ArtifactStore class."""
+    
+    def _write(self, path, content):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+    
+    def test_save_lookup_restore(self):
+        """Test that saved outputs are restored with their modes."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = ArtifactStore(os.path.join(tmpdir, "store"))
+            work = os.path.join(tmpdir, "work")
+            self._write(os.path.join(work, "out", "a.txt"), "alpha")
+            self._write(os.path.join(work, "out", "run.sh"), "#!/bin/sh\n")
+            os.chmod(os.path.join(work, "out", "run.sh"), 0o755)
+            log = os.path.join(tmpdir, "stdout")
+            self._write(log, "log line\n")
+            
+            store.save("key", ["out"], work, stdout_path=log)
+            entry = store.lookup("key")
+            assert entry is not None
+            
+            restored = os.path.join(tmpdir, "restored")
+            store.restore(entry, restored)
+            with open(os.path.join(restored, "out", "a.txt")) as f:
+                assert f.read() == "alpha"
+            assert os.stat(os.path.join(restored, "out", "run.sh")).st_mode & 0o777 == 0o755
+            with store.open_log(entry, "stdout") as f:
+                assert f.read() == b"log line\n"
+            assert store.open_log(entry, "stderr") is None
+    
+    def test_identical_content_stored_once(self):
+        """Test that objects are deduplicated by content."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = ArtifactStore(os.path.join(tmpdir, "store"))
+            self._write(os.path.join(tmpdir, "a"), "same")
+            self._write(os.path.join(tmpdir, "b"), "same")
+            store.save("k1", ["a"], tmpdir)
+            store.save("k2", ["b"], tmpdir)
+            stats = store.stats()
+            assert stats["entries"] == 2
+            assert stats["objects"] == 1
+    
+    def test_lookup_missing(self):
+        """Test that unknown keys and entries with missing objects miss."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = ArtifactStore(os.path.join(tmpdir, "store"))
+            assert store.lookup("missing") is None
+            self._write(os.path.join(tmpdir, "a"), "content")
+            entry = store.save("key", ["a"], tmpdir)
+            os.unlink(store._object_path(entry["files"][0][1]))
+            assert store.lookup("key") is None
+    
+    def test_prune_evicts_least_recently_used(self):
+        """Test LRU eviction down to the size limit."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = ArtifactStore(os.path.join(tmpdir, "store"), max_size=0)
+            for i, key in enumerate(["old", "used", "new"]):
+                self._write(os.path.join(tmpdir, key), key * 100)
+                store.save(key, [key], tmpdir)
+                entry_path = store._entry_path(key)
+                os.utime(entry_path, (1000 + i, 1000 + i))
+            # Touch "used" so it becomes the most recently used entry
+            store.lookup("used")
+            
+            removed = store.prune(max_size=700)
+            assert removed["entries"] == 1
+            assert store.lookup("old") is None
+            assert store.lookup("used") is not None
+            assert store.lookup("new") is not None
+            assert store.stats()["size"] == 700
+    
+    def test_save_enforces_size_limit(self):
+        """Test that saving prunes when the store grows past its limit."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = ArtifactStore(os.path.join(tmpdir, "store"), max_size="1K")
+            for i in range(5):
+                self._write(os.path.join(tmpdir, f"f{i}"), str(i) * 400)
+                store.save(f"k{i}", [f"f{i}"], tmpdir)
+            assert store.stats()["size"] <= 1024
+            assert store.lookup("k4") is not None
+    
+    def test_executor_restores_instead_of_running(self, capsys):
+        """Test that a cache hit restores outputs and replays the logs."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self._write(os.path.join(tmpdir, "in.txt"), "v1")
+            config = {
+                "command": "echo building; echo ran >> runs.log; cp in.txt out.txt",
+                "inputs": ["in.txt"],
+                "outputs": ["out.txt"],
+            }
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                executor = CommandExecutor(
+                    state=StateStore(os.path.join(tmpdir, "state")),
+                    artifacts=ArtifactStore(os.path.join(tmpdir, "store")),
+                )
+                assert executor.execute_selector(config, "gen") == 0
+                self._write(os.path.join(tmpdir, "in.txt"), "v2")
+                assert executor.execute_selector(config, "gen") == 0
+                self._write(os.path.join(tmpdir, "in.txt"), "v1")
+                capsys.readouterr()
+                assert executor.execute_selector(config, "gen") == 0
+                
+                captured = capsys.readouterr()
+                assert "Restored" in captured.out
+                assert "building" in captured.out
+                with open("out.txt") as f:
+                    assert f.read() == "v1"
+                with open("runs.log") as f:
+                    assert f.read().count("ran") == 2
+            finally:
+                os.chdir(original_dir)
+    
+    def test_failed_run_not_cached(self):
+        """Test that outputs of failed runs are not stored."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self._write(os.path.join(tmpdir, "in.txt"), "v1")
+            config = {
+                "command": "cp in.txt out.txt; exit 1",
+                "inputs": ["in.txt"],
+                "outputs": ["out.txt"],
+            }
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                store = ArtifactStore(os.path.join(tmpdir, "store"))
+                executor = CommandExecutor(
+                    state=StateStore(os.path.join(tmpdir, "state")),
+                    artifacts=store,
+                )
+                assert executor.execute_selector(config, "gen") == 1
+                assert store.stats()["entries"] == 0
+            finally:
+                os.chdir(original_dir)
+    
+    def test_parallel_restore(self):
+        """Test that parallel runs also restore from the artifact cache."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self._write(os.path.join(tmpdir, "in.txt"), "v1")
+            config = {
+                "command": "echo building; cp in.txt out.txt",
+                "inputs": ["in.txt"],
+                "outputs": ["out.txt"],
+            }
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                executor = CommandExecutor(
+                    state=StateStore(os.path.join(tmpdir, "state")),
+                    artifacts=ArtifactStore(os.path.join(tmpdir, "store")),
+                )
+                out = io.StringIO()
+                runner = ParallelExecutor(jobs=2, executor=executor, stdout=out, stderr=io.StringIO())
+                runner.run([("gen", config), ("other", {"command": "true"})])
+                os.unlink("out.txt")
+                results = runner.run([("gen", config)])
+                assert results[0].status == RESTORED
+                assert out.getvalue().count("building") == 2
+                assert os.path.exists("out.txt")
+            finally:
+                os.chdir(original_dir)
+    
+    def test_cli_cache_commands(self, capsys, monkeypatch):
+        """Test the cmdr cache stats and prune commands."""
+        monkeypatch.setattr(sys, 'argv', ['cmdr', 'cache', 'stats'])
+        with pytest.raises(SystemExit) as exc_info:
+            main()
+        assert exc_info.value.code == 0
+        assert "entries: 0" in capsys.readouterr().out
+        
+        monkeypatch.setattr(sys, 'argv', ['cmdr', 'cache', 'prune', '1G'])
+        with pytest.raises(SystemExit) as exc_info:
+            main()
+        assert exc_info.value.code == 0
+        assert "Removed 0 entries" in capsys.readouterr().out
+        
+        monkeypatch.setattr(sys, 'argv', ['cmdr', 'cache', 'bogus'])
+        with pytest.raises(SystemExit) as exc_info:
+            main()
+        assert exc_info.value.code == 1
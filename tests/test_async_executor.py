@@ -0,0 +1,187 @@
+"""Tests for the asyncio API."""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import pytest
+import yaml
+from cli_commander.async_executor import (
+    CANCELLED, FAILED, PASSED, SKIPPED, TIMED_OUT, UP_TO_DATE, AsyncCommandExecutor, OutputLine,
+)
+
+
+SELECTORS = {
+    "hello": {"command": "echo hello; echo oops >&2; exit 3", "tags": ["quick"]},
+    "argv": {"argv": [sys.executable, "-c", "print('from argv')"], "tags": ["quick"]},
+    "many": {"command": "for i in $(seq 1 2000); do echo line $i; done"},
+    "sleep": {"command": "echo started; exec sleep 30"},
+    "stubborn": {"command": "trap '' TERM; echo started; while true; do sleep 0.05; done"},
+    "build": {"command": "touch built"},
+    "test": {"command": "test -f built", "depends_on": ["build"]},
+    "broken": {"command": "exit 1"},
+    "after-broken": {"command": "true", "depends_on": ["broken"]},
+    "gen": {"command": "echo generated", "inputs": ["*.txt"]},
+    "group": {"depends_on": ["build"]},
+    "bad-value": {"command": "echo $SHA", "env": {"SHA": {"run": "echo nope >&2; exit 3"}}},
+    "bad-retries": {"command": "true", "retries": "often"},
+    "no-binary": {"argv": ["/nonexistent/bin"]},
+    "bad-cwd": {"command": "true", "cwd": "/nonexistent/dir"},
+}
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class TestAsyncCommandExecutor:
+    """Test suite for AsyncCommandExecutor."""
+
+    def setup_method(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        config_path = os.path.join(self.tmpdir.name, "cli-commander.yml")
+        with open(config_path, 'w') as f:
+            yaml.dump({"selectors": SELECTORS}, f)
+        self.original_dir = os.getcwd()
+        os.chdir(self.tmpdir.name)
+        self.executor = AsyncCommandExecutor.from_file(config_path, kill_grace=0.5)
+
+    def teardown_method(self):
+        os.chdir(self.original_dir)
+        self.tmpdir.cleanup()
+
+    def test_result_carries_output_and_timing(self):
+        """Test that results carry the exit code, duration and captured output."""
+        result = run(self.executor.run("hello"))
+        assert (result.status, result.exit_code) == (FAILED, 3)
+        assert result.stdout == b"hello\n" and result.stderr == b"oops\n"
+        assert result.duration > 0 and abs(result.start - time.time()) < 60
+        assert not result.ok
+
+        result = run(self.executor.run("argv"))
+        assert result.ok and result.stdout == b"from argv\n"
+        with pytest.raises(KeyError):
+            run(self.executor.run("missing"))
+
+    def test_streaming_with_backpressure(self):
+        """Test iterating over output lines while the command is paused by a slow reader."""
+        async def consume():
+            started = self.executor.start("many", stream=True)
+            lines = []
+            async for line in started:
+                if len(lines) == 0:
+                    # The command cannot run far ahead of the consumer
+                    await asyncio.sleep(0.2)
+                    assert not started.done()
+                lines.append(line)
+            return lines, await started
+
+        lines, result = run(consume())
+        assert len(lines) == 2000
+        assert lines[0] == OutputLine("stdout", b"line 1\n")
+        assert result.status == PASSED and result.stdout.count(b"\n") == 2000
+
+    def test_timeout_escalates_to_sigkill(self):
+        """Test that timeouts stop the process group, with SIGKILL if SIGTERM is ignored."""
+        start = time.monotonic()
+        result = run(self.executor.run("sleep", timeout=0.3))
+        assert result.status == TIMED_OUT and result.exit_code == -15
+        assert result.stdout == b"started\n"
+
+        result = run(self.executor.run("stubborn", timeout=0.3))
+        assert result.status == TIMED_OUT and result.exit_code == -9
+        assert time.monotonic() - start < 10
+
+    def test_cancellation(self):
+        """Test cancelling a run and cancelling the task awaiting it."""
+        async def cancel_run():
+            started = self.executor.start("sleep", stream=True)
+            async for line in started:
+                started.cancel()
+            return await started
+
+        result = run(cancel_run())
+        assert result.status == CANCELLED and result.exit_code == -15
+
+        async def cancel_task():
+            task = asyncio.ensure_future(self.executor.run("sleep"))
+            await asyncio.sleep(0.3)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        start = time.monotonic()
+        run(cancel_task())
+        assert time.monotonic() - start < 5
+
+    def test_streaming_ends_without_a_command(self):
+        """Test that streams end for dependency-only selectors and runs cancelled before starting."""
+        async def stream(name, cancel=False):
+            started = self.executor.start(name, stream=True)
+            if cancel:
+                started.cancel()
+            lines = [line async for line in started]
+            return lines, await started
+
+        lines, result = run(asyncio.wait_for(stream("group"), 5))
+        assert lines == [] and result.status == PASSED
+        lines, result = run(asyncio.wait_for(stream("sleep", cancel=True), 5))
+        assert lines == [] and result.status == CANCELLED
+
+    def test_invalid_settings_fail_the_run(self):
+        """Test that failing values and invalid settings fail only their own run."""
+        async def stream(name):
+            started = self.executor.start(name, stream=True)
+            lines = [line async for line in started]
+            return lines, await started
+
+        lines, result = run(asyncio.wait_for(stream("bad-value"), 5))
+        assert result.status == FAILED and result.exit_code == 1
+        assert b"'SHA' failed with exit code 3: nope" in result.stderr
+        assert lines == [OutputLine("stderr", result.stderr)]
+
+        results = run(self.executor.run_many(["bad-retries", "argv"], jobs=2))
+        assert [result.status for result in results] == [FAILED, PASSED]
+        assert b"retries" in results[0].stderr
+
+    def test_spawn_failures_fail_the_run(self):
+        """Test that commands that cannot start fail their run without stopping the others."""
+        results = run(self.executor.run_many(["argv", "no-binary", "bad-cwd"], jobs=3))
+        assert [(result.status, result.exit_code) for result in results] == [
+            (PASSED, 0), (FAILED, 1), (FAILED, 1),
+        ]
+        assert results[1].stderr.startswith(b"Error executing command: ")
+        assert b"/nonexistent/bin" in results[1].stderr
+
+    def test_run_many(self):
+        """Test concurrent runs with dependencies, skipping and selection."""
+        names = self.executor.select(["test", "after-broken", "tag:quick"])
+        results = run(self.executor.run_many(names, jobs=4))
+        statuses = {result.name: result.status for result in results}
+        assert statuses == {
+            "build": PASSED, "test": PASSED, "broken": FAILED, "after-broken": SKIPPED,
+            "hello": FAILED, "argv": PASSED,
+        }
+
+        results = run(self.executor.run_many(["sleep", "broken"], jobs=2, fail_fast=True))
+        assert [result.status for result in results] == [CANCELLED, FAILED]
+
+    def test_many_runs_on_one_loop(self):
+        """Test driving a hundred runs from one event loop."""
+        async def hundred():
+            return await asyncio.gather(*(self.executor.run("argv") for _ in range(100)))
+
+        results = run(hundred())
+        assert all(result.ok and result.stdout == b"from argv\n" for result in results)
+
+    def test_unchanged_inputs_are_skipped(self):
+        """Test that selectors with unchanged inputs are not run again."""
+        with open("a.txt", 'w') as f:
+            f.write("x")
+        assert run(self.executor.run("gen")).status == PASSED
+        assert run(self.executor.run("gen")).status == UP_TO_DATE
@@ -0,0 +1,114 @@
+"""Tests for the compiled configuration cache."""
+
+import os
+import tempfile
+import yaml
+from cli_commander.cache import ConfigCache
+from cli_commander.config import ConfigParser
+
+
+class TestConfigCache:
+    """Test suite for ConfigCache class."""
+    
+    def _write_config(self, tmpdir, data):
+        config_path = os.path.join(tmpdir, "cli-commander.yml")
+        with open(config_path, 'w') as f:
+            yaml.dump(data, f)
+        return config_path
+    
+    def test_store_and_load(self):
+        """Test that a stored config is returned while the file is unchanged."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            data = {"selectors": {"test": {"command": "pytest"}}}
+            config_path = self._write_config(tmpdir, data)
+            cache = ConfigCache(os.path.join(tmpdir, "cache"))
+            with open(config_path, 'rb') as f:
+                content = f.read()
+            assert cache.store(config_path, content, data)
+            assert cache.load(config_path) == data
+    
+    def test_load_missing_entry(self):
+        """Test that a missing entry is a cache miss."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config_path = self._write_config(tmpdir, {})
+            cache = ConfigCache(os.path.join(tmpdir, "cache"))
+            assert cache.load(config_path) is None
+    
+    def test_stale_entry_after_edit(self):
+        """Test that editing the config invalidates the entry."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config_path = self._write_config(tmpdir, {"selectors": {"a": {"command": "a"}}})
+            cache = ConfigCache(os.path.join(tmpdir, "cache"))
+            with open(config_path, 'rb') as f:
+                cache.store(config_path, f.read(), {"selectors": {"a": {"command": "a"}}})
+            self._write_config(tmpdir, {"selectors": {"bb": {"command": "bb"}}})
+            assert cache.load(config_path) is None
+    
+    def test_touch_with_same_content_hits(self):
+        """Test that a changed mtime with identical content is still a hit."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            data = {"selectors": {"a": {"command": "a"}}}
+            config_path = self._write_config(tmpdir, data)
+            cache = ConfigCache(os.path.join(tmpdir, "cache"))
+            with open(config_path, 'rb') as f:
+                cache.store(config_path, f.read(), data)
+            st = os.stat(config_path)
+            os.utime(config_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+            assert cache.load(config_path) == data
+    
+    def test_corrupt_entry_is_miss(self):
+        """Test that an unreadable entry is treated as a miss."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config_path = self._write_config(tmpdir, {})
+            cache = ConfigCache(os.path.join(tmpdir, "cache"))
+            os.makedirs(cache.cache_dir)
+            with open(cache.entry_path(config_path), 'wb') as f:
+                f.write(b"not marshal data")
+            assert cache.load(config_path) is None
+    
+    def test_parser_uses_cache(self):
+        """Test that ConfigParser serves warm loads from the cache."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            data = {"selectors": {"test": {"command": "pytest"}}}
+            self._write_config(tmpdir, data)
+            cache = ConfigCache(os.path.join(tmpdir, "cache"))
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                assert ConfigParser(cache=cache).load_config() == data
+                config_path = os.path.join(tmpdir, "cli-commander.yml")
+                assert os.path.isfile(cache.entry_path(config_path))
+                assert ConfigParser(cache=cache).load_config() == data
+            finally:
+                os.chdir(original_dir)
+    
+    def test_parser_reparses_stale_cache(self):
+        """Test that ConfigParser picks up edits to the config file."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self._write_config(tmpdir, {"selectors": {"old": {"command": "old"}}})
+            cache = ConfigCache(os.path.join(tmpdir, "cache"))
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                ConfigParser(cache=cache).load_config()
+                new_data = {"selectors": {"new": {"command": "new command"}}}
+                self._write_config(tmpdir, new_data)
+                assert ConfigParser(cache=cache).load_config() == new_data
+            finally:
+                os.chdir(original_dir)
+    
+    def test_unmarshallable_config_not_cached(self):
+        """Test that configs containing YAML timestamps are parsed but not cached."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config_path = os.path.join(tmpdir, "cli-commander.yml")
+            with open(config_path, 'w') as f:
+                f.write("released: 2024-01-01\nselectors: {}\n")
+            cache = ConfigCache(os.path.join(tmpdir, "cache"))
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                config = ConfigParser(cache=cache).load_config()
+                assert config["selectors"] == {}
+                assert not os.path.exists(cache.entry_path(config_path))
+            finally:
+                os.chdir(original_dir)
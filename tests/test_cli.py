@@ -137,3 +137,148 @@ class TestCLI:
                 assert exc_info.value.code == 0
             finally:
                 os.chdir(original_dir)
+    
+    def test_execute_multiple_selectors(self, capsys, monkeypatch):
+        """Test running several selectors in parallel with a summary."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config_data = {
+                "selectors": {
+                    "lint": {
+                        "command": "echo linted"
+                    },
+                    "test": {
+                        "command": "echo tested; exit 3"
+                    }
+                }
+            }
+            config_path = os.path.join(tmpdir, "cli-commander.yml")
+            with open(config_path, 'w') as f:
+                yaml.dump(config_data, f)
+            
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                monkeypatch.setattr(sys, 'argv', ['cmdr', 'lint', 'test', '-j', '2'])
+                with pytest.raises(SystemExit) as exc_info:
+                    main()
+                assert exc_info.value.code == 3
+                
+                captured = capsys.readouterr()
+                assert "[lint] linted" in captured.out
+                assert "[test] tested" in captured.out
+                assert "Summary:" in captured.out
+            finally:
+                os.chdir(original_dir)
+    
+    def test_execute_selector_with_dependencies(self, capsys, monkeypatch):
+        """Test that a selector's dependencies run before it."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config_data = {
+                "selectors": {
+                    "build": {
+                        "command": "echo built > artifact"
+                    },
+                    "release": {
+                        "command": "cat artifact",
+                        "depends_on": ["build"]
+                    }
+                }
+            }
+            config_path = os.path.join(tmpdir, "cli-commander.yml")
+            with open(config_path, 'w') as f:
+                yaml.dump(config_data, f)
+            
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                monkeypatch.setattr(sys, 'argv', ['cmdr', 'release'])
+                with pytest.raises(SystemExit) as exc_info:
+                    main()
+                assert exc_info.value.code == 0
+                
+                captured = capsys.readouterr()
+                assert "[release] built" in captured.out
+            finally:
+                os.chdir(original_dir)
+    
+    def test_argv_selector_with_dependencies(self, capsys, monkeypatch):
+        """Test that an argv selector with dependencies runs its own command too."""
+        monkeypatch.setenv("CMDR_NO_DAEMON", "1")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config_data = {
+                "selectors": {
+                    "a": {"command": "echo A-ran"},
+                    "b": {"argv": ["echo", "B-ran"], "depends_on": ["a"]},
+                }
+            }
+            with open(os.path.join(tmpdir, "cli-commander.yml"), 'w') as f:
+                yaml.dump(config_data, f)
+            
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                with pytest.raises(SystemExit) as exc_info:
+                    main(["b"])
+                assert exc_info.value.code == 0
+                
+                captured = capsys.readouterr()
+                assert "[a] A-ran" in captured.out
+                assert "[b] B-ran" in captured.out
+            finally:
+                os.chdir(original_dir)
+    
+    def test_dependency_graph_runs_in_parallel_by_default(self, capsys, monkeypatch):
+        """Test that independent dependencies run at once without -j."""
+        monkeypatch.setenv("CMDR_NO_DAEMON", "1")
+        monkeypatch.setattr(os, "cpu_count", lambda: 2)
+        # Each side only passes once it sees the other one running
+        wait_for = "touch {0}; for i in $(seq 50); do [ -e {1} ] && exit 0; sleep 0.1; done; exit 1"
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config_data = {
+                "selectors": {
+                    "a": {"command": wait_for.format("a", "b")},
+                    "b": {"command": wait_for.format("b", "a")},
+                    "all": {"depends_on": ["a", "b"]},
+                }
+            }
+            with open(os.path.join(tmpdir, "cli-commander.yml"), 'w') as f:
+                yaml.dump(config_data, f)
+            
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                with pytest.raises(SystemExit) as exc_info:
+                    main(["all"])
+                assert exc_info.value.code == 0
+            finally:
+                os.chdir(original_dir)
+    
+    def test_which_shows_defining_file(self, capsys, monkeypatch):
+        """Test that --which reports the file a selector comes from."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            monkeypatch.setenv("HOME", os.path.join(tmpdir, "home"))
+            monkeypatch.setenv("CMDR_NO_DAEMON", "1")
+            os.makedirs(os.path.join(tmpdir, ".git"))
+            os.makedirs(os.path.join(tmpdir, "pkg"))
+            root_config = os.path.join(tmpdir, "cli-commander.yml")
+            with open(root_config, 'w') as f:
+                yaml.dump({"selectors": {"build": {"command": "make"}}}, f)
+            package_config = os.path.join(tmpdir, "pkg", "cli-commander.yml")
+            with open(package_config, 'w') as f:
+                yaml.dump({"selectors": {"test": {"command": "pytest"}}}, f)
+            
+            original_dir = os.getcwd()
+            try:
+                os.chdir(os.path.join(tmpdir, "pkg"))
+                with pytest.raises(SystemExit) as exc_info:
+                    main(["--which", "build", "test"])
+                assert exc_info.value.code == 0
+                captured = capsys.readouterr()
+                assert f"build: {root_config}" in captured.out
+                assert f"test: {package_config}" in captured.out
+                
+                with pytest.raises(SystemExit) as exc_info:
+                    main(["--which", "missing"])
+                assert exc_info.value.code == 1
+            finally:
+                os.chdir(original_dir)
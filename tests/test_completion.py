@@ -0,0 +1,132 @@
+"""Tests for shell completion and the selector index."""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import pytest
+import yaml
+from cli_commander.cli import main
+from cli_commander.completion import INDEX_HEADER, index_path, script
+from cli_commander.config import ConfigParser
+
+
+def write_config(directory, selectors):
+    path = os.path.join(directory, "cli-commander.yml")
+    with open(path, 'w') as f:
+        yaml.dump({"selectors": selectors}, f)
+    return path
+
+
+def bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+
+class TestCompletion:
+    """Test suite for the completion index and scripts."""
+
+    def test_index_follows_config(self):
+        """Test that loading a config writes the index, and rewrites it only when stale."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                config_path = os.path.realpath(write_config(tmpdir, {
+                    "test": {"command": "pytest", "description": "Run\tall\ntests"},
+                    "lint": {"command": "ruff"},
+                }))
+                os.mkdir(".git")
+                ConfigParser().load_config()
+                path = index_path(config_path)
+                with open(path) as f:
+                    assert f.read() == f"{INDEX_HEADER}\n@{config_path}\nlint\t\ntest\tRun all tests\n"
+
+                mtime_ns = os.stat(path).st_mtime_ns
+                ConfigParser().load_config()
+                assert os.stat(path).st_mtime_ns == mtime_ns
+
+                write_config(tmpdir, {"build": {"command": "make"}})
+                bump_mtime(config_path)
+                ConfigParser().load_config()
+                with open(path) as f:
+                    assert f.read().splitlines()[2:] == ["build\t"]
+            finally:
+                os.chdir(original_dir)
+
+    def test_index_lists_layered_sources(self):
+        """Test that the index of a subproject covers its parent configs."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = os.path.realpath(tmpdir)
+            os.mkdir(os.path.join(root, ".git"))
+            os.mkdir(os.path.join(root, "sub"))
+            parent = write_config(root, {"lint": {"command": "ruff"}})
+            child = write_config(os.path.join(root, "sub"), {"test": {"command": "pytest"}})
+            original_dir = os.getcwd()
+            try:
+                os.chdir(os.path.join(root, "sub"))
+                ConfigParser().load_config()
+            finally:
+                os.chdir(original_dir)
+            with open(index_path(child)) as f:
+                assert f.read().splitlines() == [INDEX_HEADER, "@" + parent, "@" + child, "lint\t", "test\t"]
+
+    def test_completion_command(self, capsys, monkeypatch):
+        """Test printing completion scripts."""
+        monkeypatch.setenv("CMDR_NO_DAEMON", "1")
+        for shell in ("bash", "zsh", "fish"):
+            with pytest.raises(SystemExit) as exc_info:
+                main(["completion", shell])
+            assert exc_info.value.code == 0
+            out = capsys.readouterr().out
+            assert INDEX_HEADER in out and "__" + "HEADER" not in out
+        with pytest.raises(SystemExit) as exc_info:
+            main(["completion", "tcsh"])
+        assert exc_info.value.code == 1
+        assert "Unsupported shell" in capsys.readouterr().err
+
+    @pytest.mark.skipif(shutil.which("bash") is None, reason="bash is not installed")
+    def test_bash_completion(self):
+        """Test the bash script against a fresh and a stale index."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = os.path.realpath(tmpdir)
+            project = os.path.join(root, "project")
+            os.makedirs(os.path.join(project, ".git"))
+            config_path = write_config(project, {"test": {"command": "pytest"}, "lint": {"command": "ruff"}})
+
+            # A stand-in for the installed cmdr entry point
+            bin_dir = os.path.join(root, "bin")
+            os.mkdir(bin_dir)
+            with open(os.path.join(bin_dir, "cmdr"), 'w') as f:
+                f.write(f"#!/bin/sh\nexec {sys.executable} -m cli_commander.cli \"$@\"\n")
+            os.chmod(os.path.join(bin_dir, "cmdr"), 0o755)
+            with open(os.path.join(root, "completion.bash"), 'w') as f:
+                f.write(script("bash"))
+
+            env = dict(
+                os.environ,
+                PATH=bin_dir + os.pathsep + os.environ["PATH"],
+                PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                CMDR_NO_DAEMON="1",
+            )
+
+            def complete(word):
+                result = subprocess.run(
+                    ["bash", "-c", f'source {root}/completion.bash; COMP_WORDS=(cmdr "{word}"); '
+                                   'COMP_CWORD=1; _cmdr; printf "%s\\n" "${COMPREPLY[@]}"'],
+                    cwd=project, env=env, stdout=subprocess.PIPE, universal_newlines=True, check=True,
+                )
+                return result.stdout.split()
+
+            # No index yet: falls back to 'cmdr --list', which writes one
+            assert complete("") == ["lint", "test"]
+            assert os.path.exists(index_path(config_path, env["CMDR_CACHE_DIR"]))
+            assert complete("te") == ["test"]
+            assert complete("--wa") == ["--watch"]
+            assert complete("--whe") == ["--where"]
+            assert complete("--sh") == ["--shard"]
+
+            write_config(project, {"test": {"command": "pytest"}, "typecheck": {"command": "mypy"}})
+            bump_mtime(config_path)
+            assert complete("t") == ["test", "typecheck"]
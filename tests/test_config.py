@@ -198,3 +198,173 @@ class TestConfigParser:
                 assert config == {}
             finally:
                 os.chdir(original_dir)
+    
+    def _load(self, config_data):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config_path = os.path.join(tmpdir, "cli-commander.yml")
+            with open(config_path, 'w') as f:
+                yaml.dump(config_data, f)
+            
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                parser = ConfigParser()
+                parser.load_config()
+                return parser
+            finally:
+                os.chdir(original_dir)
+    
+    def test_dependency_cycle_rejected(self):
+        """Test that a depends_on cycle is reported when loading."""
+        config_data = {
+            "selectors": {
+                "a": {"command": "a", "depends_on": ["b"]},
+                "b": {"command": "b", "depends_on": ["a"]},
+            }
+        }
+        with pytest.raises(ValueError, match="Dependency cycle detected"):
+            self._load(config_data)
+    
+    def test_unknown_dependency_rejected(self):
+        """Test that depending on an undefined selector is reported when loading."""
+        config_data = {"selectors": {"a": {"command": "a", "depends_on": ["missing"]}}}
+        with pytest.raises(ValueError, match="unknown selector 'missing'"):
+            self._load(config_data)
+    
+    def test_malformed_dependency_rejected(self):
+        """Test that depends_on must be a list of names."""
+        config_data = {"selectors": {"a": {"command": "a", "depends_on": "b"}, "b": {"command": "b"}}}
+        with pytest.raises(ValueError, match="must be a list"):
+            self._load(config_data)
+    
+    def test_get_dependencies(self):
+        """Test collecting the transitive dependency graph of a selector."""
+        config_data = {
+            "selectors": {
+                "build": {"command": "make"},
+                "lint": {"command": "flake8"},
+                "test": {"command": "pytest", "depends_on": ["build"]},
+                "release": {"command": "twine upload", "depends_on": ["test", "lint"]},
+                "unrelated": {"command": "true"},
+            }
+        }
+        parser = self._load(config_data)
+        graph = parser.get_dependencies(["release"])
+        assert graph == {
+            "build": [],
+            "lint": [],
+            "test": ["build"],
+            "release": ["test", "lint"],
+        }
+        order = list(graph)
+        assert order.index("build") < order.index("test") < order.index("release")
+        assert parser.get_dependencies(["lint"]) == {"lint": []}
+    
+    def _write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            yaml.dump(data, f)
+        return path
+    
+    def test_find_config_files_walks_up_to_repository_root(self, monkeypatch):
+        """Test that parent configs up to the .git directory are layered under local ones."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            monkeypatch.setenv("HOME", os.path.join(tmpdir, "home"))
+            home = self._write(os.path.join(tmpdir, "home", ".cli-commander", "cli-commander.yml"), {})
+            self._write(os.path.join(tmpdir, "cli-commander.yml"), {})
+            os.makedirs(os.path.join(tmpdir, "repo", ".git"))
+            root = self._write(os.path.join(tmpdir, "repo", "cli-commander.yml"), {})
+            package = self._write(os.path.join(tmpdir, "repo", "pkg", "cli-commander.yml"), {})
+            subdir = os.path.join(tmpdir, "repo", "pkg", "src", "deep")
+            os.makedirs(subdir)
+            
+            original_dir = os.getcwd()
+            try:
+                os.chdir(subdir)
+                parser = ConfigParser()
+                assert parser.find_config_files() == [home, root, package]
+                assert parser.find_config_file() == package
+            finally:
+                os.chdir(original_dir)
+    
+    def test_layered_selectors_and_includes(self, monkeypatch):
+        """Test that nearer files and includers override what they build on."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            monkeypatch.setenv("HOME", os.path.join(tmpdir, "home"))
+            home = self._write(os.path.join(tmpdir, "home", ".cli-commander", "cli-commander.yml"), {
+                "selectors": {"greet": {"command": "echo home"}, "shared": {"command": "echo home"}},
+            })
+            os.makedirs(os.path.join(tmpdir, "repo", ".git"))
+            common = self._write(os.path.join(tmpdir, "repo", "ci", "common.yml"), {
+                "selectors": {"build": {"command": "make"}, "shared": {"command": "echo common"}},
+            })
+            root = self._write(os.path.join(tmpdir, "repo", "cli-commander.yml"), {
+                "include": "ci/common.yml",
+                "selectors": {"test": {"command": "pytest", "depends_on": ["build"]}},
+            })
+            package = self._write(os.path.join(tmpdir, "repo", "pkg", "cli-commander.yml"), {
+                "selectors": {"test": {"command": "pytest -x", "depends_on": ["build"]}},
+            })
+            
+            original_dir = os.getcwd()
+            try:
+                os.chdir(os.path.join(tmpdir, "repo", "pkg"))
+                parser = ConfigParser()
+                config = parser.load_config()
+                assert config["selectors"]["test"]["command"] == "pytest -x"
+                assert config["selectors"]["shared"]["command"] == "echo common"
+                assert "include" not in config
+                assert parser.config_files == [home, common, root, package]
+                assert parser.get_source("test") == package
+                assert parser.get_source("build") == common
+                assert parser.get_source("greet") == home
+                assert parser.get_source("missing") is None
+                assert parser.get_dependencies(["test"]) == {"build": [], "test": ["build"]}
+            finally:
+                os.chdir(original_dir)
+    
+    def test_merged_view_is_cached_until_a_file_changes(self, monkeypatch):
+        """Test that the merged configuration is reused and invalidated by edits."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            monkeypatch.setenv("HOME", os.path.join(tmpdir, "home"))
+            os.makedirs(os.path.join(tmpdir, "repo", ".git"))
+            included = self._write(os.path.join(tmpdir, "repo", "extra.yml"),
+                                   {"selectors": {"a": {"command": "a"}}})
+            self._write(os.path.join(tmpdir, "repo", "cli-commander.yml"), {"include": ["extra.yml"]})
+            self._write(os.path.join(tmpdir, "repo", "sub", "cli-commander.yml"),
+                        {"selectors": {"b": {"command": "b"}}})
+            
+            original_dir = os.getcwd()
+            try:
+                os.chdir(os.path.join(tmpdir, "repo", "sub"))
+                assert set(ConfigParser().load_config()["selectors"]) == {"a", "b"}
+                
+                parser = ConfigParser()
+                parse_calls = []
+                monkeypatch.setattr(parser, "_load_layer", lambda path: parse_calls.append(path))
+                assert set(parser.load_config()["selectors"]) == {"a", "b"}
+                assert parse_calls == []
+                
+                self._write(included, {"selectors": {"a": {"command": "a"}, "c": {"command": "c"}}})
+                assert set(ConfigParser().load_config()["selectors"]) == {"a", "b", "c"}
+            finally:
+                os.chdir(original_dir)
+    
+    def test_include_errors(self, monkeypatch):
+        """Test that missing and cyclic includes are reported."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            monkeypatch.setenv("HOME", os.path.join(tmpdir, "home"))
+            os.makedirs(os.path.join(tmpdir, ".git"))
+            config_path = self._write(os.path.join(tmpdir, "cli-commander.yml"), {"include": "missing.yml"})
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                with pytest.raises(FileNotFoundError, match="missing.yml"):
+                    ConfigParser().load_config()
+                
+                self._write(config_path, {"include": "other.yml"})
+                self._write(os.path.join(tmpdir, "other.yml"), {"include": "cli-commander.yml"})
+                with pytest.raises(ValueError, match="Include cycle"):
+                    ConfigParser().load_config()
+            finally:
+                os.chdir(original_dir)
@@ -0,0 +1,110 @@
+"""Tests for the cmdr daemon and its thin client."""
+
+import os
+import signal
+import subprocess
+import sys
+import time
+import yaml
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def cmdr_env(socket_path):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = REPO_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    env["CMDR_DAEMON_SOCKET"] = str(socket_path)
+    return env
+
+
+def run_cmdr(args, cwd, socket_path, extra_env=None, **kwargs):
+    env = cmdr_env(socket_path)
+    env.update(extra_env or {})
+    return subprocess.run(
+        [sys.executable, "-m", "cli_commander.cli"] + args,
+        cwd=str(cwd), env=env, capture_output=True, text=True, **kwargs
+    )
+
+
+def write_config(directory, selectors):
+    with open(os.path.join(str(directory), "cli-commander.yml"), 'w') as f:
+        yaml.dump({"selectors": selectors}, f)
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    """A running daemon listening on a socket in tmp_path."""
+    socket_path = tmp_path / "d.sock"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "cli_commander.cli", "--daemon"],
+        cwd=str(tmp_path), env=cmdr_env(socket_path),
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    assert "listening" in process.stdout.readline()
+    yield socket_path
+    process.send_signal(signal.SIGTERM)
+    process.wait(timeout=5)
+    assert not socket_path.exists()
+
+
+class TestDaemon:
+    """Test suite for the daemon and client."""
+    
+    def test_forwarded_run(self, tmp_path, daemon):
+        """Test that output, cwd, environment and exit code pass through."""
+        project = tmp_path / "project"
+        project.mkdir()
+        write_config(project, {"show": {"command": "echo $PWD $CMDR_TEST_VALUE; exit 5"}})
+        result = run_cmdr(["show"], project, daemon,
+                          extra_env={"CMDR_TEST_VALUE": "from-client"})
+        assert result.returncode == 5
+        assert f"{project} from-client" in result.stdout
+    
+    def test_config_change_invalidates(self, tmp_path, daemon):
+        """Test that edits to the config are seen by the next call."""
+        write_config(tmp_path, {"one": {"command": "true"}})
+        assert "one" in run_cmdr(["--list"], tmp_path, daemon).stdout
+        time.sleep(0.01)
+        write_config(tmp_path, {"two": {"command": "true"}})
+        output = run_cmdr(["--list"], tmp_path, daemon).stdout
+        assert "two" in output and "one" not in output
+    
+    def test_signal_relayed(self, tmp_path, daemon):
+        """Test that SIGINT to the client interrupts the command."""
+        write_config(tmp_path, {"wait": {"command": "sleep 30"}})
+        process = subprocess.Popen(
+            [sys.executable, "-m", "cli_commander.cli", "wait"],
+            cwd=str(tmp_path), env=cmdr_env(daemon),
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+        time.sleep(1)
+        start = time.monotonic()
+        process.send_signal(signal.SIGINT)
+        assert process.wait(timeout=10) == 130
+        assert time.monotonic() - start < 5
+    
+    def test_fallback_without_daemon(self, tmp_path):
+        """Test that cmdr runs in-process when no daemon is listening."""
+        write_config(tmp_path, {"hello": {"command": "echo in-process"}})
+        result = run_cmdr(["hello"], tmp_path, tmp_path / "missing.sock")
+        assert result.returncode == 0
+        assert "in-process" in result.stdout
+    
+    def test_fallback_with_stale_socket(self, tmp_path):
+        """Test that a socket file without a daemon behind it is ignored."""
+        import socket
+        stale = tmp_path / "stale.sock"
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(str(stale))
+        sock.close()
+        write_config(tmp_path, {"hello": {"command": "echo in-process"}})
+        result = run_cmdr(["hello"], tmp_path, stale)
+        assert result.returncode == 0
+        assert "in-process" in result.stdout
+    
+    def test_second_daemon_refused(self, tmp_path, daemon):
+        """Test that a second daemon does not steal a live socket."""
+        result = run_cmdr(["--daemon"], tmp_path, daemon, timeout=10)
+        assert result.returncode == 1
+        assert "already listening" in result.stderr
@@ -1,8 +1,14 @@
 """Tests for the command executor."""
 
+import os
+import signal
+import subprocess
+import sys
 import pytest
 from cli_commander.executor import CommandExecutor
 
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 
 class TestCommandExecutor:
     """Test suite for CommandExecutor class."""
@@ -67,3 +73,75 @@ class TestCommandExecutor:
         }
         with pytest.raises(ValueError, match="Selector must have a 'command' field"):
             executor.execute_selector(selector_config)
+    
+    def test_argv_selector(self, tmp_path):
+        """Test that argv selectors run without a shell."""
+        executor = CommandExecutor()
+        target = tmp_path / "out.txt"
+        selector_config = {
+            "argv": ["python", "-c", "import sys; open(sys.argv[1], 'w').write(sys.argv[2])",
+                     str(target), "$HOME; echo not a shell"]
+        }
+        assert executor.execute_selector(selector_config) == 0
+        assert target.read_text() == "$HOME; echo not a shell"
+    
+    def test_shell_false_splits_command(self):
+        """Test that shell: false splits the command instead of using /bin/sh."""
+        executor = CommandExecutor()
+        selector_config = {"command": "printf '%s' 'a b' $NOT_EXPANDED", "shell": False}
+        assert executor.get_argv(selector_config) == ["printf", "%s", "a b", "$NOT_EXPANDED"]
+        assert executor.execute_selector(selector_config) == 0
+    
+    def test_shell_selector_has_no_argv(self):
+        """Test that ordinary selectors keep running through the shell."""
+        executor = CommandExecutor()
+        assert executor.get_argv({"command": "echo hi"}) is None
+    
+    def test_invalid_argv(self):
+        """Test that argv must be a non-empty list."""
+        executor = CommandExecutor()
+        with pytest.raises(ValueError, match="'argv' must be a non-empty list"):
+            executor.execute_selector({"argv": "echo hi"})
+        with pytest.raises(ValueError, match="'argv' must be a non-empty list"):
+            executor.execute_selector({"argv": []})
+    
+    def test_argv_exit_code(self):
+        """Test that exit codes of argv selectors pass through."""
+        executor = CommandExecutor()
+        assert executor.execute_selector({"argv": ["sh", "-c", "exit 7"]}) == 7
+    
+    def test_signal_exit_status(self):
+        """Test that a command killed by a signal reports -signum."""
+        executor = CommandExecutor()
+        assert executor.execute_selector({"command": "kill -TERM $$"}) == -signal.SIGTERM
+    
+    def test_exec_mode_replaces_process(self, tmp_path):
+        """Test that exec mode leaves no Python process behind the command."""
+        script = (
+            "from cli_commander.executor import CommandExecutor; "
+            "CommandExecutor(exec_mode=True).execute_selector("
+            "{'command': 'echo $$ $PPID; exit 3'}); "
+            "print('not reached')"
+        )
+        process = subprocess.Popen(
+            [sys.executable, "-c", script],
+            cwd=REPO_ROOT, stdout=subprocess.PIPE, text=True,
+        )
+        output, _ = process.communicate()
+        assert process.returncode == 3
+        assert "not reached" not in output
+        # The shell took over the Python process's pid
+        assert output.split()[-2] == str(process.pid)
+    
+    def test_env(self, monkeypatch):
+        """Test that env: variables are set for the command on top of cmdr's environment."""
+        monkeypatch.setenv("CMDR_TEST_INHERITED", "kept")
+        executor = CommandExecutor()
+        env = executor.get_env({"command": "true", "env": {"DEBUG": True, "LEVEL": 3, "EMPTY": None}})
+        assert (env["DEBUG"], env["LEVEL"], env["EMPTY"]) == ("true", "3", "")
+        assert env["CMDR_TEST_INHERITED"] == "kept"
+        assert executor.get_env({"command": "true"}) is None
+        command = '[ "$GREETING" = hello ] && [ "$CMDR_TEST_INHERITED" = kept ]'
+        assert executor.execute_selector({"command": command, "env": {"GREETING": "hello"}}) == 0
+        with pytest.raises(ValueError, match="'env' must be a mapping"):
+            executor.get_env({"command": "true", "env": ["A=1"]})
@@ -0,0 +1,199 @@
+"""Tests for the execution history store."""
+
+import os
+import shutil
+import tempfile
+import threading
+import pytest
+import yaml
+from cli_commander.cli import main
+from cli_commander.executor import CommandExecutor
+from cli_commander.history import (
+    HistoryStore,
+    RunRecord,
+    expected_durations,
+    parse_records,
+    percentile,
+    short_hash,
+    summarize,
+)
+
+
+def make_record(name, wall, exit_code=0, start=0.0):
+    return RunRecord(name, short_hash("cmd"), short_hash("/project"), start, wall, exit_code=exit_code)
+
+
+class TestHistoryStore:
+    """Test suite for HistoryStore and the statistics built on it."""
+
+    def test_append_and_read(self):
+        """Test that records round-trip through the log in order."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = HistoryStore(tmpdir)
+            first = make_record("build", 1.5, start=10.0)
+            second = RunRecord("tëst", short_hash("pytest"), short_hash("/other"), 11.0, 0.25,
+                               user=0.2, sys=0.05, max_rss=51200, exit_code=-15)
+            store.append(first)
+            store.append(second)
+            assert store.records() == [first, second]
+            assert store.records(project=short_hash("/other")) == [second]
+            assert store.records(selectors=["build"]) == [first]
+
+    def test_truncated_record_is_ignored(self):
+        """Test that a half-written trailing record does not break reading."""
+        data = make_record("a", 1.0).pack() + make_record("b", 2.0).pack()[:-3]
+        assert [r.selector for r in parse_records(data)] == ["a"]
+
+    def test_rotation_keeps_previous_log(self):
+        """Test that the log is rotated once it exceeds its size limit."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            record_size = len(make_record("a", 1.0).pack())
+            store = HistoryStore(tmpdir, max_size=record_size * 3)
+            for i in range(10):
+                store.append(make_record("a", float(i)))
+            assert os.path.exists(store.path + ".1")
+            walls = [r.wall for r in store.records()]
+            assert walls == sorted(walls)
+            assert walls[-1] == 9.0
+            assert len(walls) < 10
+
+    def test_concurrent_appends(self):
+        """Test that records appended from many threads stay intact."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = HistoryStore(tmpdir)
+
+            def worker(n):
+                for i in range(50):
+                    store.append(make_record(f"selector-{n}", float(i)))
+
+            threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            records = store.records()
+            assert len(records) == 400
+            for n in range(8):
+                assert [r.wall for r in records if r.selector == f"selector-{n}"] == \
+                    [float(i) for i in range(50)]
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        values = [float(v) for v in range(1, 21)]
+        assert percentile(values, 0.5) == 10.0
+        assert percentile(values, 0.95) == 19.0
+        assert percentile([3.0], 0.95) == 3.0
+
+    def test_summarize_flags_regression(self):
+        """Test that recent runs slower than the rolling baseline are flagged."""
+        records = [make_record("slow", 1.0) for _ in range(15)]
+        records += [make_record("slow", 2.0) for _ in range(5)]
+        records += [make_record("steady", 1.0) for _ in range(20)]
+        records += [make_record("steady", 0.1, exit_code=1)]
+        stats = {s.name: s for s in summarize(records)}
+        assert stats["slow"].regressed
+        assert stats["slow"].baseline == 1.0
+        assert stats["slow"].recent == 2.0
+        assert not stats["steady"].regressed
+        assert stats["steady"].failures == 1
+        assert stats["steady"].p50 == 1.0
+        assert stats["steady"].failure_rate == pytest.approx(1 / 21)
+
+    def test_summarize_needs_enough_runs_for_baseline(self):
+        """Test that no regression is reported from a handful of runs."""
+        records = [make_record("new", 1.0), make_record("new", 5.0)]
+        stats = summarize(records)[0]
+        assert stats.baseline is None
+        assert not stats.regressed
+        assert stats.max == 5.0
+
+    def test_expected_durations(self):
+        """Test estimating durations from recent successful runs."""
+        records = [make_record("build", 100.0) for _ in range(30)]
+        records += [make_record("build", 10.0) for _ in range(15)]
+        records += [make_record("flaky", 5.0), make_record("flaky", 0.1, exit_code=1)]
+        records += [make_record("broken", 1.0, exit_code=1)]
+        assert expected_durations(records) == {"build": 10.0, "flaky": 5.0}
+
+    def test_executor_records_runs(self):
+        """Test that execute_selector records duration, usage and exit code."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = HistoryStore(os.path.join(tmpdir, "history"))
+            executor = CommandExecutor(history=store)
+            assert executor.execute_selector({"command": "exit 3"}, "fails") == 3
+            executor.execute_selector({"argv": ["python", "-c", "sum(range(10**6))"]}, "works")
+            records = store.records(project=short_hash(os.getcwd()))
+            assert [(r.selector, r.exit_code) for r in records] == [("fails", 3), ("works", 0)]
+            assert records[1].wall > 0
+            assert records[1].user + records[1].sys > 0
+            assert records[1].max_rss > 0
+
+    def test_stats_command(self, capsys, monkeypatch):
+        """Test that cmdr --stats reports the runs made in a directory."""
+        monkeypatch.setenv("CMDR_NO_DAEMON", "1")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, "cli-commander.yml"), 'w') as f:
+                yaml.dump({"selectors": {"ok": {"command": "true"}, "bad": {"command": "false"}}}, f)
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                for name in ("ok", "ok", "bad"):
+                    with pytest.raises(SystemExit):
+                        main([name])
+                capsys.readouterr()
+                with pytest.raises(SystemExit) as exc_info:
+                    main(["--stats"])
+                assert exc_info.value.code == 0
+                out = capsys.readouterr().out
+                lines = {line.split()[0]: line.split() for line in out.splitlines()[1:]}
+                assert lines["ok"][1:3] == ["2", "0.0%"]
+                assert lines["bad"][1:3] == ["1", "100.0%"]
+
+                with pytest.raises(SystemExit):
+                    main(["--stats", "ok"])
+                out = capsys.readouterr().out
+                assert "bad" not in out
+            finally:
+                os.chdir(original_dir)
+
+    def test_shard_command(self, capfd, monkeypatch):
+        """Test that --shard splits selectors by recorded duration."""
+        monkeypatch.setenv("CMDR_NO_DAEMON", "1")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            selectors = {name: {"command": f"echo ran {name}"} for name in ("a", "b", "c", "d")}
+            selectors["setup"] = {"command": "echo ran setup"}
+            selectors["d"]["depends_on"] = ["setup"]
+            with open(os.path.join(tmpdir, "cli-commander.yml"), 'w') as f:
+                yaml.dump({"selectors": selectors}, f)
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+
+                def shard(spec, timings=()):
+                    # Every shard must see the same history, so reset it
+                    store = HistoryStore()
+                    shutil.rmtree(store.root, ignore_errors=True)
+                    for name, wall in timings:
+                        store.append(RunRecord(name, short_hash("cmd"), short_hash(os.getcwd()), 0.0, wall))
+                    with pytest.raises(SystemExit) as exc_info:
+                        main(["a", "b", "c", "d", "--shard", spec])
+                    assert exc_info.value.code == 0
+                    out, err = capfd.readouterr()
+                    ran = [line.split()[-1] for line in out.splitlines() if "ran " in line and "Command:" not in line]
+                    return sorted(ran), err
+
+                # Without timings, selectors are dealt out by name
+                assert shard("1/2") == (["a", "c"], "Shard 1/2: 2 of 4 selectors\n")
+                assert shard("2/2")[0] == ["b", "d", "setup"]
+
+                timings = (("a", 50.0), ("b", 20.0), ("c", 20.0), ("d", 10.0))
+                assert shard("1/2", timings)[0] == ["a"]
+                assert shard("2/2", timings)[0] == ["b", "c", "d", "setup"]
+                assert shard("2/3", timings)[0] == ["b", "d", "setup"]
+                assert shard("3/3", timings)[0] == ["c"]
+
+                with pytest.raises(SystemExit) as exc_info:
+                    main(["a", "--shard", "3/2"])
+                assert exc_info.value.code == 2
+            finally:
+                os.chdir(original_dir)
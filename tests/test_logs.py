@@ -0,0 +1,154 @@
+"""Tests for per-selector output logs."""
+
+import gzip
+import os
+import subprocess
+import sys
+import tempfile
+import pytest
+import yaml
+from cli_commander.cli import main
+from cli_commander.logs import LogSettings, RingBuffer, RotatingLog
+from cli_commander.parallel import FAILED, ParallelExecutor
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_config(directory, selectors):
+    with open(os.path.join(directory, "cli-commander.yml"), 'w') as f:
+        yaml.dump({"selectors": selectors}, f)
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class TestLogs:
+    """Test suite for log files and the output tail."""
+
+    def test_ring_buffer(self):
+        """Test that the ring buffer keeps the last bytes written, in order."""
+        ring = RingBuffer(8)
+        ring.write(b"abc")
+        assert ring.getvalue() == b"abc"
+        assert not ring.truncated
+        ring.write(memoryview(b"defghij"))
+        assert ring.getvalue() == b"cdefghij"
+        assert ring.truncated
+        ring.write(b"0123456789xyz")
+        assert ring.getvalue() == b"56789xyz"
+        assert RingBuffer(0).getvalue() == b""
+
+    def test_settings(self):
+        """Test parsing the log setting."""
+        assert LogSettings.from_config({"command": "true"}, "build", "/work") is None
+        settings = LogSettings.from_config({"log": "logs/{selector}.log"}, "build", "/work")
+        assert settings == LogSettings(path="/work/logs/build.log")
+        settings = LogSettings.from_config(
+            {"log": {"max_size": "1K", "keep": 2, "compress": True, "tail": "4K"}}, "build", "/work",
+        )
+        assert settings == LogSettings(path=None, max_size=1024, keep=2, compress=True, tail=4096)
+        for value in (["a.log"], {"path": "a.log", "rotate": True}, {"keep": -1}, {"tail": "lots"}):
+            with pytest.raises(ValueError):
+                LogSettings.from_config({"log": value}, "build", "/work")
+
+    def test_rotation(self):
+        """Test rotating, compressing and pruning old log files."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "logs", "run.log")
+            log = RotatingLog(path, max_size=10, keep=2, compress=True)
+            for chunk in (b"first-", b"run\n", b"second\n", b"third\n"):
+                log.write(chunk)
+            log.close()
+            assert read(path) == b"third\n"
+            assert gzip.decompress(read(path + ".1.gz")) == b"second\n"
+            assert gzip.decompress(read(path + ".2.gz")) == b"first-run\n"
+            assert sorted(os.listdir(os.path.dirname(path))) == ["run.log", "run.log.1.gz", "run.log.2.gz"]
+
+            log = RotatingLog(path, max_size=10, keep=2)
+            log.write(b"fourth\n")
+            log.close()
+            assert read(path) == b"fourth\n"
+            assert read(path + ".1") == b"third\n"
+            assert gzip.decompress(read(path + ".2.gz")) == b"second\n"
+
+    def test_cli_writes_log(self, capfd, monkeypatch):
+        """Test that a selector's output is shown and appended to its log."""
+        monkeypatch.setenv("CMDR_NO_DAEMON", "1")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write_config(tmpdir, {
+                "build": {"command": "echo out; echo err >&2", "log": "logs/{selector}.log"},
+                "broken": {"command": "echo oops; exit 2", "log": "broken.log"},
+            })
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                for _ in range(2):
+                    with pytest.raises(SystemExit) as exc_info:
+                        main(["build"])
+                    assert exc_info.value.code == 0
+                out, err = capfd.readouterr()
+                assert out.count("out\n") == 2
+                assert err == "err\nerr\n"
+                lines = read(os.path.join(tmpdir, "logs", "build.log")).decode().splitlines()
+                assert sorted(line for line in lines if not line.startswith("--- ")) == ["err", "err", "out", "out"]
+                assert lines[0].endswith("echo out; echo err >&2")
+
+                with pytest.raises(SystemExit) as exc_info:
+                    main(["broken"])
+                assert exc_info.value.code == 2
+                assert f"Log: {os.path.join(os.getcwd(), 'broken.log')}" in capfd.readouterr().err
+            finally:
+                os.chdir(original_dir)
+
+    def test_parallel_summary_shows_tail(self):
+        """Test that failed parallel jobs report the end of their output."""
+        import io
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            stdout, stderr = io.StringIO(), io.StringIO()
+            executor = ParallelExecutor(jobs=2, stdout=stdout, stderr=stderr)
+            command = "for i in $(seq 1 200); do echo line-$i; done; exit 1"
+            results = executor.run([
+                ("noisy", {"command": command, "log": {"path": "noisy.log", "tail": 64}, "cwd": tmpdir}),
+                ("quiet", {"command": "true"}),
+            ])
+            assert results[0].status == FAILED
+            assert results[0].tail.splitlines()[1:] == [
+                "line-194", "line-195", "line-196", "line-197", "line-198", "line-199", "line-200",
+                f"Full log: {os.path.join(tmpdir, 'noisy.log')}",
+            ]
+            assert results[1].tail is None
+            executor.print_summary(results)
+            assert "[noisy] Last " in stdout.getvalue()
+            assert read(os.path.join(tmpdir, "noisy.log")).count(b"\nline-") == 200
+
+    def test_memory_stays_flat(self):
+        """Test that logging a lot of output does not grow the process."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write_config(tmpdir, {
+                "flood": {
+                    "command": "head -c 300000000 /dev/zero",
+                    "log": {"path": "flood.log", "max_size": "64M", "keep": 1},
+                },
+            })
+            # Measure a fresh interpreter, so nothing else counts towards its peak
+            script = (
+                "import resource, subprocess, sys\n"
+                "subprocess.run([sys.executable, '-m', 'cli_commander.cli', 'flood'],"
+                " stdout=subprocess.DEVNULL, check=True)\n"
+                "print(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)\n"
+            )
+            env = dict(os.environ, CMDR_NO_DAEMON="1", PYTHONPATH=REPO_ROOT)
+            result = subprocess.run(
+                [sys.executable, "-c", script], cwd=tmpdir, env=env,
+                stdout=subprocess.PIPE, universal_newlines=True, check=True,
+            )
+            # ru_maxrss is in kilobytes on Linux and bytes on macOS
+            peak = int(result.stdout) * (1 if sys.platform == "darwin" else 1024)
+            assert peak < 100 * 1024 * 1024
+            total = sum(os.path.getsize(os.path.join(tmpdir, name))
+                        for name in ("flood.log", "flood.log.1"))
+            assert total > 64 * 1024 * 1024
@@ -0,0 +1,111 @@
+"""Tests for matrix selectors."""
+
+import os
+import tempfile
+import pytest
+import yaml
+from cli_commander.cli import main
+from cli_commander.matrix import Axis, cell_config, cells, expand_graph, parse_matrix, parse_where
+
+
+class TestMatrix:
+    """Test suite for matrix expansion and running matrix selectors."""
+
+    def test_axis_values(self):
+        """Test literal values, ranges and YAML scalars on an axis."""
+        axis = Axis.parse("shard", ["1..3", 7, "9..8"])
+        assert list(axis) == ["1", "2", "3", "7", "9", "8"]
+        assert len(axis) == 6
+        assert list(Axis.parse("debug", [True, "x"])) == ["true", "x"]
+        assert list(Axis.parse("n", "2..4")) == ["2", "3", "4"]
+        for name, value in (("bad name", [1]), ("n", []), ("n", [[1]]), ("n", [None])):
+            with pytest.raises(ValueError):
+                Axis.parse(name, value)
+        with pytest.raises(ValueError):
+            parse_matrix(["python"])
+
+    def test_where_filters_lazily(self):
+        """Test that --where narrows axes without generating other cells."""
+        axes = parse_matrix({"python": ["3.8", "3.9", "3.10"], "n": "1..1000000000000"})
+        where = parse_where(["python=3.10,3.8", "n=42", "n=042"])
+        assert where == {"python": {"3.8", "3.10"}, "n": {"42", "042"}}
+        assert list(cells(axes, where)) == [{"python": "3.8", "n": "42"}, {"python": "3.10", "n": "42"}]
+        assert list(cells(axes, {"python": {"4.0"}})) == []
+        with pytest.raises(ValueError):
+            parse_where(["python"])
+
+    def test_cell_config(self):
+        """Test substituting cell values into the command, argv and env."""
+        selector = {
+            "command": "tox -e py{python} {other}",
+            "argv": ["run", "--shard={shard}"],
+            "env": {"PY": "{python}", "N": 1},
+            "matrix": {"python": ["3.8"], "shard": [2]},
+        }
+        config = cell_config(selector, {"python": "3.8", "shard": "2"})
+        assert config == {
+            "command": "tox -e py3.8 {other}",
+            "argv": ["run", "--shard=2"],
+            "env": {"PY": "3.8", "N": 1},
+        }
+        assert "matrix" in selector
+
+    def test_expand_graph(self):
+        """Test that cells inherit dependencies and dependents wait for all cells."""
+        selectors = [
+            ("build", {"command": "make"}),
+            ("test", {"command": "pytest", "depends_on": ["build"], "matrix": {"shard": "1..2"}}),
+            ("report", {"command": "combine", "depends_on": ["test"]}),
+        ]
+        dependencies = {"build": [], "test": ["build"], "report": ["test"]}
+        nodes, graph = expand_graph(selectors, dependencies)
+        assert [name for name, _ in nodes] == ["build", "test[shard=1]", "test[shard=2]", "report"]
+        assert graph == {
+            "build": [],
+            "test[shard=1]": ["build"],
+            "test[shard=2]": ["build"],
+            "report": ["test[shard=1]", "test[shard=2]"],
+        }
+        with pytest.raises(ValueError, match="no matrix axis"):
+            expand_graph(selectors, dependencies, {"python": {"3.8"}})
+        with pytest.raises(ValueError, match="No cells"):
+            expand_graph(selectors, dependencies, {"shard": {"3"}})
+
+    def test_cli_runs_cells(self, capfd, monkeypatch):
+        """Test running all cells in parallel and a single filtered cell."""
+        monkeypatch.setenv("CMDR_NO_DAEMON", "1")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, "cli-commander.yml"), 'w') as f:
+                yaml.dump({"selectors": {
+                    "test": {
+                        "command": "echo \"$PY-{shard}\"; [ {shard} != 3 ]",
+                        "env": {"PY": "py{python}"},
+                        "matrix": {"python": ["3.9", "3.10"], "shard": "1..3"},
+                    },
+                }}, f)
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                with pytest.raises(SystemExit) as exc_info:
+                    main(["test", "--where", "shard=2,3"])
+                assert exc_info.value.code == 1
+                out = capfd.readouterr().out
+                lines = out.splitlines()
+                for python in ("3.9", "3.10"):
+                    prefix = f"[test[python={python},shard=2]]"
+                    assert any(line.startswith(prefix) and line.endswith(f" py{python}-2") for line in lines)
+                    summary = [line.split() for line in lines if line.startswith("  test[")]
+                    assert [f"test[python={python},shard=3]", "failed", "1"] in [row[:3] for row in summary]
+                assert "shard=1" not in out
+
+                with pytest.raises(SystemExit) as exc_info:
+                    main(["test", "--where", "python=3.10", "--where", "shard=1"])
+                assert exc_info.value.code == 0
+                assert capfd.readouterr().out.splitlines() == ["Command: echo \"$PY-1\"; [ 1 != 3 ]", "py3.10-1"]
+
+                with pytest.raises(SystemExit) as exc_info:
+                    main(["test", "--where", "os=linux"])
+                assert exc_info.value.code == 1
+                assert "no matrix axis of the selected selectors: os" in capfd.readouterr().err
+            finally:
+                os.chdir(original_dir)
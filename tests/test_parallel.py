@@ -0,0 +1,130 @@
+"""Tests for the parallel selector executor."""
+
+import io
+import time
+from cli_commander.parallel import (
+    ParallelExecutor, JobResult, PASSED, FAILED, CANCELLED, SKIPPED
+)
+
+
+class TestParallelExecutor:
+    """Test suite for ParallelExecutor class."""
+    
+    def _executor(self, **kwargs):
+        self.out = io.StringIO()
+        self.err = io.StringIO()
+        return ParallelExecutor(stdout=self.out, stderr=self.err, **kwargs)
+    
+    def test_runs_all_selectors(self):
+        """Test that every selector runs and reports its result in order."""
+        executor = self._executor(jobs=4)
+        results = executor.run([
+            ("one", {"command": "echo first"}),
+            ("two", {"command": "exit 2"}),
+        ])
+        assert [r.name for r in results] == ["one", "two"]
+        assert [r.status for r in results] == [PASSED, FAILED]
+        assert results[1].exit_code == 2
+        assert executor.aggregate_exit_code(results) == 2
+    
+    def test_output_is_prefixed(self):
+        """Test that stdout and stderr lines carry the selector prefix."""
+        executor = self._executor(jobs=2)
+        executor.run([
+            ("a", {"command": "echo out-a; echo err-a >&2"}),
+            ("bb", {"command": "printf 'no newline'"}),
+        ])
+        out_lines = self.out.getvalue().splitlines()
+        assert "[a]  out-a" in out_lines
+        assert "[bb] no newline" in out_lines
+        assert self.err.getvalue().splitlines() == ["[a]  err-a"]
+    
+    def test_lines_do_not_interleave(self):
+        """Test that concurrent output only ever contains whole lines."""
+        executor = self._executor(jobs=4)
+        selectors = [
+            (f"s{i}", {"command": f"for n in $(seq 50); do echo line-{i}-$n; done"})
+            for i in range(4)
+        ]
+        executor.run(selectors)
+        lines = self.out.getvalue().splitlines()
+        assert len(lines) == 200
+        for line in lines:
+            prefix, text = line.split(None, 1)
+            assert text.startswith(f"line-{prefix[2:-1]}-")
+    
+    def test_runs_concurrently(self):
+        """Test that jobs overlap in time when jobs > 1."""
+        executor = self._executor(jobs=3)
+        start = time.monotonic()
+        executor.run([(f"s{i}", {"command": "sleep 0.3"}) for i in range(3)])
+        assert time.monotonic() - start < 0.8
+    
+    def test_fail_fast_cancels_siblings(self):
+        """Test that fail-fast terminates running jobs and skips pending ones."""
+        executor = self._executor(jobs=2, fail_fast=True)
+        start = time.monotonic()
+        results = executor.run([
+            ("slow", {"command": "sleep 5; echo done"}),
+            ("fail", {"command": "sleep 0.1; exit 4"}),
+            ("pending", {"command": "echo pending"}),
+        ])
+        assert time.monotonic() - start < 3
+        assert [r.status for r in results] == [CANCELLED, FAILED, SKIPPED]
+        assert executor.aggregate_exit_code(results) == 4
+        assert "pending" not in self.out.getvalue()
+    
+    def test_fail_fast_kills_process_group(self, tmp_path):
+        """Test that fail-fast also terminates children forked by the shell."""
+        marker = tmp_path / "marker"
+        executor = self._executor(jobs=2, fail_fast=True)
+        executor.run([
+            ("tree", {"command": f"(sleep 1; touch {marker}) & wait"}),
+            ("fail", {"command": "exit 1"}),
+        ])
+        time.sleep(1.5)
+        assert not marker.exists()
+    
+    def test_invalid_selector_fails_job(self):
+        """Test that an invalid selector is reported as a failed job."""
+        executor = self._executor(jobs=2)
+        results = executor.run([("bad", {"description": "no command"})])
+        assert results[0].status == FAILED
+        assert "Selector must have a 'command' field" in self.err.getvalue()
+    
+    def test_aggregate_exit_code(self):
+        """Test aggregation of exit codes across results."""
+        assert ParallelExecutor.aggregate_exit_code([JobResult("a", PASSED, 0)]) == 0
+        assert ParallelExecutor.aggregate_exit_code([
+            JobResult("a", PASSED, 0), JobResult("b", FAILED, -15)
+        ]) == 143
+        assert ParallelExecutor.aggregate_exit_code([JobResult("a", SKIPPED)]) == 1
+    
+    def test_print_summary(self):
+        """Test the summary table lists every job."""
+        executor = self._executor()
+        executor.print_summary([
+            JobResult("lint", PASSED, 0, 1.5),
+            JobResult("test", SKIPPED),
+        ])
+        summary = self.out.getvalue()
+        assert "Summary:" in summary
+        assert "lint" in summary and "passed" in summary
+        assert "test" in summary and "skipped" in summary
+    
+    def test_longest_recorded_selector_starts_first(self, tmp_path):
+        """Test that recorded durations order independent selectors with one job."""
+        import os
+        from cli_commander.executor import CommandExecutor
+        from cli_commander.history import HistoryStore, RunRecord, short_hash
+        
+        store = HistoryStore(str(tmp_path))
+        project = short_hash(os.getcwd())
+        for name, wall in (("short", 1.0), ("long", 60.0), ("mid", 10.0)):
+            store.append(RunRecord(name, short_hash("cmd"), project, 0.0, wall))
+        executor = self._executor(jobs=1, executor=CommandExecutor(history=store))
+        names = ["short", "new", "long", "mid"]
+        executor.run([(name, {"command": f"echo {name}"}) for name in names])
+        # The selector without history is assumed to take the median time
+        started = [line.split()[1] for line in self.out.getvalue().splitlines()]
+        assert started == ["long", "new", "mid", "short"]
@@ -0,0 +1,114 @@
+"""Tests for the profiling instrumentation."""
+
+import io
+import json
+import os
+import tempfile
+import pytest
+import yaml
+from cli_commander import profiling
+from cli_commander.cli import main
+
+
+class TestProfiling:
+    """Test suite for the Tracer and the --profile option."""
+
+    def _write_config(self, tmpdir, selectors):
+        with open(os.path.join(tmpdir, "cli-commander.yml"), 'w') as f:
+            yaml.dump({"selectors": selectors}, f)
+
+    def _run(self, tmpdir, argv, monkeypatch):
+        monkeypatch.setenv("CMDR_NO_DAEMON", "1")
+        original_dir = os.getcwd()
+        try:
+            os.chdir(tmpdir)
+            with pytest.raises(SystemExit) as exc_info:
+                main(argv)
+        finally:
+            os.chdir(original_dir)
+        return exc_info.value.code
+
+    def test_disabled_tracer_is_noop(self):
+        """Test that phases are not recorded while profiling is disabled."""
+        assert not profiling.tracer.enabled
+        with profiling.tracer.phase("anything") as phase:
+            pass
+        assert phase is profiling.tracer.phase("other")
+
+    def test_breakdown_sums_phases(self):
+        """Test that repeated main-track phases are summed in start order."""
+        tracer = profiling.Tracer(stream=io.StringIO())
+        tracer.events = []
+        tracer.record("parse", 0.0, 1.0)
+        tracer.record("spawn", 1.0, 1.5)
+        tracer.record("parse", 2.0, 2.5)
+        tracer.record("spawn", 3.0, 4.0, track="build")
+        breakdown = tracer.breakdown()
+        assert [(t["name"], t["count"], t["seconds"]) for t in breakdown] == [
+            ("parse", 2, 1.5),
+            ("spawn", 1, 0.5),
+        ]
+
+    def test_chrome_trace_has_track_per_selector(self):
+        """Test that each track becomes its own named thread in the trace."""
+        tracer = profiling.Tracer()
+        with tracer.phase("find_config_file"):
+            pass
+        with tracer.phase("a", track="a"):
+            pass
+        with tracer.phase("b", track="b"):
+            pass
+        trace = tracer.chrome_trace()
+        names = {e["args"]["name"]: e["tid"] for e in trace["traceEvents"] if e["ph"] == "M"}
+        assert set(names) == {profiling.MAIN_TRACK, "a", "b"}
+        assert len(set(names.values())) == 3
+        complete = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+        assert all(e["ts"] >= 0 and e["dur"] >= 0 for e in complete)
+
+    def test_trace_settings_from_environment(self, monkeypatch):
+        """Test that CMDR_TRACE enables profiling and may name a trace file."""
+        monkeypatch.delenv(profiling.TRACE_ENV, raising=False)
+        assert profiling.trace_settings() == (False, None)
+        monkeypatch.setenv(profiling.TRACE_ENV, "1")
+        assert profiling.trace_settings() == (True, None)
+        monkeypatch.setenv(profiling.TRACE_ENV, "/tmp/trace.json")
+        assert profiling.trace_settings() == (True, "/tmp/trace.json")
+        monkeypatch.setenv(profiling.TRACE_ENV, "0")
+        assert profiling.trace_settings(profile=True) == (True, None)
+
+    def test_profile_option_prints_breakdown(self, capsys, monkeypatch):
+        """Test that --profile reports the config and execution phases."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self._write_config(tmpdir, {"hello": {"command": "true"}})
+            assert self._run(tmpdir, ["hello", "--profile"], monkeypatch) == 0
+            err = capsys.readouterr().err
+            assert "cmdr profile:" in err
+            for phase in ("find_config_file", "load_config: YAML parse",
+                          "selector lookup", "spawn", "command runtime"):
+                assert phase in err
+            assert not profiling.tracer.enabled
+
+    def test_trace_file_for_parallel_run(self, capsys, monkeypatch):
+        """Test that a parallel run writes one track per selector."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self._write_config(tmpdir, {
+                "a": {"command": "true"},
+                "b": {"command": "true", "depends_on": ["a"]},
+            })
+            trace_path = os.path.join(tmpdir, "trace.json")
+            monkeypatch.setenv(profiling.TRACE_ENV, trace_path)
+            assert self._run(tmpdir, ["b", "-j", "2"], monkeypatch) == 0
+            with open(trace_path) as f:
+                trace = json.load(f)
+            tracks = {e["args"]["name"] for e in trace["traceEvents"] if e["ph"] == "M"}
+            assert {"a", "b"} <= tracks
+
+    def test_cprofile_writes_stats(self, capsys, monkeypatch):
+        """Test that --cprofile dumps loadable statistics."""
+        import pstats
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self._write_config(tmpdir, {"hello": {"command": "true"}})
+            stats_path = os.path.join(tmpdir, "cmdr.prof")
+            assert self._run(tmpdir, ["hello", "--cprofile", stats_path], monkeypatch) == 0
+            assert pstats.Stats(stats_path).total_calls > 0
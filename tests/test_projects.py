@@ -0,0 +1,101 @@
+"""Tests for monorepo project discovery."""
+
+import os
+import tempfile
+import pytest
+import yaml
+from cli_commander.cli import main
+from cli_commander.projects import IgnoreRules, ProjectCache, discover_projects, walk_projects
+
+
+def write_config(directory, selectors):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "cli-commander.yml"), 'w') as f:
+        yaml.dump({"selectors": selectors}, f)
+
+
+class TestProjects:
+    """Test suite for project discovery and --all-projects."""
+
+    def test_ignore_rules(self):
+        """Test gitignore pattern semantics."""
+        rules = IgnoreRules("", [
+            "# comment", "", "build/", "*.log", "/dist", "docs/**/tmp", "vendor", "!vendor/keep",
+        ])
+        assert rules.match("build", True)
+        assert rules.match("pkg/build", True)
+        assert rules.match("build", False) is None
+        assert rules.match("pkg/debug.log", False)
+        assert rules.match("dist", True)
+        assert rules.match("pkg/dist", True) is None
+        assert rules.match("docs/a/b/tmp", True)
+        assert rules.match("docs/tmp", True)
+        assert rules.match("vendor/keep", True) is False
+
+    def test_nested_ignore_file_is_relative(self):
+        """Test that a nested .gitignore only applies below its directory."""
+        rules = IgnoreRules("packages", ["/generated"])
+        assert rules.match("packages/generated", True)
+        assert rules.match("generated", True) is None
+        assert rules.match("packages/a/generated", True) is None
+
+    def test_walk_honours_ignores(self):
+        """Test that ignored and VCS directories are not searched."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write_config(tmpdir, {})
+            write_config(os.path.join(tmpdir, "packages", "a"), {})
+            write_config(os.path.join(tmpdir, "packages", "b", "nested"), {})
+            write_config(os.path.join(tmpdir, "node_modules", "dep"), {})
+            write_config(os.path.join(tmpdir, "packages", "out", "gen"), {})
+            write_config(os.path.join(tmpdir, ".git", "x"), {})
+            with open(os.path.join(tmpdir, ".gitignore"), 'w') as f:
+                f.write("node_modules/\n")
+            with open(os.path.join(tmpdir, "packages", ".gitignore"), 'w') as f:
+                f.write("out\n")
+            projects, stamps = walk_projects(tmpdir)
+            assert projects == [".", "packages/a", "packages/b/nested"]
+            assert "node_modules" not in stamps
+            assert "packages/.gitignore" in stamps
+
+    def test_cache_invalidated_by_directory_change(self):
+        """Test that the cached list is reused until the tree changes."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = os.path.join(tmpdir, "repo")
+            write_config(os.path.join(root, "a"), {})
+            cache = ProjectCache(os.path.join(tmpdir, "cache"))
+            assert discover_projects(root, cache) == ["a"]
+            assert cache.load(root) == ["a"]
+
+            write_config(os.path.join(root, "a", "sub"), {})
+            assert cache.load(root) is None
+            assert discover_projects(root, cache) == ["a", "a/sub"]
+
+            with open(os.path.join(root, ".gitignore"), 'w') as f:
+                f.write("sub/\n")
+            assert discover_projects(root, cache) == ["a"]
+
+    def test_all_projects(self, capsys, monkeypatch):
+        """Test running a selector in every project with a per-project summary."""
+        monkeypatch.setenv("CMDR_NO_DAEMON", "1")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name in ("a", "b"):
+                write_config(os.path.join(tmpdir, name), {
+                    "prep": {"command": "touch prepared"},
+                    "test": {"command": "test -f prepared && pwd", "depends_on": ["prep"]},
+                })
+            write_config(os.path.join(tmpdir, "broken"), {"test": {"command": "exit 3"}})
+            write_config(os.path.join(tmpdir, "other"), {"lint": {"command": "true"}})
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                with pytest.raises(SystemExit) as exc_info:
+                    main(["--all-projects", "test", "-j", "2"])
+                assert exc_info.value.code == 3
+                out = capsys.readouterr().out
+                for name in ("a", "b"):
+                    assert os.path.exists(os.path.join(tmpdir, name, "prepared"))
+                    assert os.path.realpath(os.path.join(tmpdir, name)) in out
+                assert "Projects: 2 passed, 1 failed, 1 without test" in out
+                assert "failed: broken" in out
+            finally:
+                os.chdir(original_dir)
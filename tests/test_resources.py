@@ -0,0 +1,112 @@
+"""Tests for resource declarations and capacity detection."""
+
+import os
+import tempfile
+import pytest
+import yaml
+from cli_commander.cli import main
+from cli_commander.resources import (
+    ResourceRequest, cgroup_cpu_limit, cgroup_memory_limit, detect_capacity
+)
+
+
+def write_file(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+class TestResources:
+    """Test suite for resources: settings and the machine's budget."""
+
+    def test_from_config(self):
+        """Test parsing resources: settings and their defaults."""
+        assert ResourceRequest.from_config({"command": "true"}) == ResourceRequest(1.0, 0, ())
+        request = ResourceRequest.from_config(
+            {"resources": {"cpus": 4, "memory": "2G", "exclusive": ["db", "port-5432"]}})
+        assert request == ResourceRequest(4.0, 2 * 1024 ** 3, ("db", "port-5432"))
+        assert ResourceRequest.from_config({"resources": {"exclusive": "db"}}).exclusive == ("db",)
+        assert ResourceRequest.from_config({"resources": {"cpus": 0.5}}).cpus == 0.5
+
+    @pytest.mark.parametrize("resources", [
+        "4",
+        {"cpu": 4},
+        {"cpus": -1},
+        {"cpus": "many"},
+        {"memory": "lots"},
+        {"exclusive": [1]},
+    ])
+    def test_from_config_invalid(self, resources):
+        """Test that invalid resources: settings are rejected."""
+        with pytest.raises(ValueError):
+            ResourceRequest.from_config({"resources": resources})
+
+    def test_cgroup_v2_limits(self):
+        """Test reading cpu.max and memory.max of the process's cgroup and its parents."""
+        with tempfile.TemporaryDirectory() as root:
+            proc = os.path.join(root, "proc-cgroup")
+            write_file(proc, "0::/user.slice/app.scope\n")
+            write_file(os.path.join(root, "user.slice", "cpu.max"), "250000 100000\n")
+            write_file(os.path.join(root, "user.slice", "app.scope", "cpu.max"), "max 100000\n")
+            write_file(os.path.join(root, "user.slice", "app.scope", "memory.max"), "1073741824\n")
+            write_file(os.path.join(root, "user.slice", "memory.max"), "max\n")
+            assert cgroup_cpu_limit(root, proc) == 2.5
+            assert cgroup_memory_limit(root, proc) == 1024 ** 3
+
+    def test_cgroup_v1_limits(self):
+        """Test reading CFS quotas and memory limits, including from the container's mount root."""
+        with tempfile.TemporaryDirectory() as root:
+            proc = os.path.join(root, "proc-cgroup")
+            write_file(proc, "4:cpu,cpuacct:/docker/abc\n3:memory:/docker/abc\n")
+            # Inside a container the mount root is the container's own cgroup
+            write_file(os.path.join(root, "cpu,cpuacct", "cpu.cfs_quota_us"), "150000\n")
+            write_file(os.path.join(root, "cpu,cpuacct", "cpu.cfs_period_us"), "100000\n")
+            write_file(os.path.join(root, "memory", "memory.limit_in_bytes"), "536870912\n")
+            assert cgroup_cpu_limit(root, proc) == 1.5
+            assert cgroup_memory_limit(root, proc) == 512 * 1024 ** 2
+
+            write_file(os.path.join(root, "cpu,cpuacct", "cpu.cfs_quota_us"), "-1\n")
+            write_file(os.path.join(root, "memory", "memory.limit_in_bytes"), "9223372036854771712\n")
+            assert cgroup_cpu_limit(root, proc) is None
+            assert cgroup_memory_limit(root, proc) is None
+
+    def test_detect_capacity(self, monkeypatch):
+        """Test that the quota caps the CPUs and that environment overrides win."""
+        with tempfile.TemporaryDirectory() as root:
+            proc = os.path.join(root, "proc-cgroup")
+            write_file(proc, "0::/\n")
+            write_file(os.path.join(root, "cpu.max"), "50000 100000\n")
+            write_file(os.path.join(root, "memory.max"), "1048576\n")
+            capacity = detect_capacity(root, proc)
+            assert capacity.cpus == 0.5
+            assert capacity.memory == 1024 ** 2
+
+            monkeypatch.setenv("CMDR_CPUS", "8")
+            monkeypatch.setenv("CMDR_MEMORY", "16G")
+            capacity = detect_capacity(root, proc)
+            assert capacity.cpus == 8
+            assert capacity.memory == 16 * 1024 ** 3
+
+    def test_exclusive_selectors_do_not_overlap(self, monkeypatch, capsys):
+        """Test that selectors sharing an exclusive resource run one at a time."""
+        monkeypatch.setenv("CMDR_NO_DAEMON", "1")
+        monkeypatch.setenv("CMDR_CPUS", "4")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            # Each selector fails if another one holds the lock directory
+            command = "mkdir lock || exit 1; sleep 0.2; rmdir lock"
+            selectors = {
+                name: {"command": command, "resources": {"exclusive": ["db"]}}
+                for name in ("a", "b", "c")
+            }
+            selectors["all"] = {"command": "true", "depends_on": ["a", "b", "c"]}
+            with open(os.path.join(tmpdir, "cli-commander.yml"), "w") as f:
+                yaml.dump({"selectors": selectors}, f)
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                with pytest.raises(SystemExit) as exc_info:
+                    main(["all"])
+            finally:
+                os.chdir(original_dir)
+        assert exc_info.value.code == 0
+        assert capsys.readouterr().out.count(" passed ") == 4
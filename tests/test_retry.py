@@ -0,0 +1,187 @@
+"""Tests for selector timeouts, retries and process-group cleanup."""
+
+import asyncio
+import os
+import subprocess
+import tempfile
+import time
+import pytest
+import yaml
+from cli_commander.async_executor import AsyncCommandExecutor
+from cli_commander.cli import main
+from cli_commander.executor import CommandExecutor, ProcessGuard
+from cli_commander.parallel import FAILED, PASSED, TIMED_OUT, ParallelExecutor
+from cli_commander.retry import MAX_RETRY_DELAY, Attempt, RetryPolicy, run_with_retries
+
+
+SELECTORS = {
+    "slow": {"command": "echo started; sleep 30", "timeout": 0.3},
+    # Fails twice, then passes; counts its runs in a file
+    "flaky": {"command": "echo x >> runs; test $(wc -l < runs) -ge 3",
+              "retries": 3, "retry_delay": 0.01},
+    "only-2": {"command": "echo x >> only; exit 1", "retries": 3, "retry_on": [2], "retry_delay": 0.01},
+    "always": {"command": "exit 4", "retries": 1, "retry_delay": 0.01},
+}
+
+
+class Bounds:
+    """Random source returning the lower or upper end of every range."""
+
+    def __init__(self, upper):
+        self.upper = upper
+
+    def uniform(self, low, high):
+        return high if self.upper else low
+
+
+def alive(pid):
+    """Return True if a process exists and is not a zombie."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except OSError:
+        return False
+
+
+def lines(path):
+    with open(path) as f:
+        return len(f.readlines())
+
+
+class TestRetry:
+    """Test suite for RetryPolicy, ProcessGuard and their use by the executors."""
+
+    def setup_method(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.config_path = os.path.join(self.tmpdir.name, "cli-commander.yml")
+        with open(self.config_path, "w") as f:
+            yaml.dump({"selectors": SELECTORS}, f)
+        self.original_dir = os.getcwd()
+        os.chdir(self.tmpdir.name)
+
+    def teardown_method(self):
+        os.chdir(self.original_dir)
+        self.tmpdir.cleanup()
+
+    def test_policy_from_config(self):
+        """Test parsing timeout:, retries:, retry_on: and retry_delay:."""
+        policy = RetryPolicy.from_config({"command": "make", "timeout": "2m", "retries": 2,
+                                          "retry_on": [1, "timeout"], "retry_delay": "5s"})
+        assert policy == RetryPolicy(120, 2, frozenset((1, "timeout")), 5)
+        assert policy.active
+        assert not RetryPolicy.from_config({"command": "make"}).active
+        assert RetryPolicy.from_config({"retry_on": 75}).retry_on == frozenset((75,))
+        for settings in ({"timeout": 0}, {"timeout": "soon"}, {"retries": -1}, {"retries": "2"},
+                         {"retries": True}, {"retry_on": ["flaky"]}):
+            with pytest.raises(ValueError):
+                RetryPolicy.from_config(settings)
+
+    def test_should_retry(self):
+        """Test which outcomes are retried, and how often."""
+        policy = RetryPolicy(retries=2)
+        assert policy.should_retry([Attempt(1, 0)])
+        assert policy.should_retry([Attempt(-15, 0, timed_out=True)])
+        assert not policy.should_retry([Attempt(0, 0)])
+        assert not policy.should_retry([Attempt(-15, 0, interrupted=True)])
+        assert not policy.should_retry([Attempt(1, 0)] * 3)
+
+        policy = RetryPolicy(retries=2, retry_on=frozenset((75, "timeout")))
+        assert policy.should_retry([Attempt(75, 0)])
+        assert policy.should_retry([Attempt(-15, 0, timed_out=True)])
+        assert not policy.should_retry([Attempt(1, 0)])
+        assert not RetryPolicy(retries=2, retry_on=frozenset((1,))).should_retry(
+            [Attempt(-15, 0, timed_out=True)])
+
+    def test_backoff_is_jittered_and_capped(self):
+        """Test that delays double per retry, jitter within their upper half and are capped."""
+        policy = RetryPolicy(retries=20, retry_delay=2)
+        for retry, ceiling in ((1, 2), (2, 4), (3, 8)):
+            assert policy.delay(retry, Bounds(False)) == ceiling / 2
+            assert policy.delay(retry, Bounds(True)) == ceiling
+        assert policy.delay(20, Bounds(True)) == MAX_RETRY_DELAY
+        assert len({policy.delay(3) for _ in range(20)}) > 1
+
+    def test_run_with_retries(self):
+        """Test retrying until success, reporting each retry and stopping on request."""
+        codes = iter([1, 1, 0])
+        messages = []
+        attempts = run_with_retries(RetryPolicy(retries=5, retry_delay=0.01),
+                                    lambda number: Attempt(next(codes), 0.1),
+                                    messages.append)
+        assert [attempt.exit_code for attempt in attempts] == [1, 1, 0]
+        assert messages[0].startswith("Attempt 1/6 exited with 1 after 0.1s; retrying in")
+
+        attempts = run_with_retries(RetryPolicy(retries=5), lambda number: Attempt(1, 0),
+                                    messages.append, sleep=lambda delay: True)
+        assert len(attempts) == 1
+
+    def test_guard_stops_the_whole_tree(self):
+        """Test that a timeout stops the shell and, after the grace period, children ignoring SIGTERM."""
+        process = subprocess.Popen(
+            "sh -c 'trap \"\" TERM; echo $$ > child; exec sleep 30' & sleep 30",
+            shell=True, start_new_session=True,
+        )
+        guard = ProcessGuard(process, timeout=0.2, grace=0.5)
+        start = time.monotonic()
+        exit_code, _ = CommandExecutor.wait_with_usage(process)
+        guard.finish()
+        with open("child") as f:
+            child = int(f.read())
+        assert exit_code == -15 and guard.timed_out and not guard.interrupted
+        assert not alive(child)
+        assert 0.5 < time.monotonic() - start < 5
+
+        process = subprocess.Popen("true", shell=True, start_new_session=True)
+        guard = ProcessGuard(process, timeout=0.2)
+        assert CommandExecutor.wait_with_usage(process)[0] == 0
+        guard.finish()
+        time.sleep(0.3)
+        assert not guard.timed_out
+
+    def test_cli_timeout_and_retries(self, monkeypatch, capfd):
+        """Test cmdr's exit status, messages and attempts for timeouts and retries."""
+        monkeypatch.setenv("CMDR_NO_DAEMON", "1")
+        expected = {"slow": 124, "flaky": 0, "only-2": 1, "always": 4}
+        for name, code in expected.items():
+            start = time.monotonic()
+            with pytest.raises(SystemExit) as exc_info:
+                main([name])
+            assert exc_info.value.code == code
+            assert time.monotonic() - start < 5
+        err = capfd.readouterr().err
+        assert "Timed out after 0.3s" in err
+        assert "Attempt 2/4 exited with 1" in err and "Passed on attempt 3" in err
+        assert "Failed after 2 attempts" in err
+        assert lines("runs") == 3 and lines("only") == 1
+
+    def test_parallel_results(self, capfd):
+        """Test that parallel runs report timeouts and attempts."""
+        executor = ParallelExecutor(jobs=4, executor=CommandExecutor(use_history=False))
+        results = executor.run([(name, SELECTORS[name]) for name in ("slow", "flaky", "always")])
+        statuses = {result.name: (result.status, len(result.attempts)) for result in results}
+        assert statuses == {"slow": (TIMED_OUT, 1), "flaky": (PASSED, 3), "always": (FAILED, 2)}
+        assert results[0].exit_code == 124
+        assert results[0].attempts[0].timed_out and results[0].attempts[0].exit_code == -15
+        assert ParallelExecutor.aggregate_exit_code(results) == 124
+        executor.print_summary(results)
+        out = capfd.readouterr().out
+        assert "timed-out   124" in out and "(3 attempts)" in out
+
+    def test_async_uses_selector_settings(self):
+        """Test that the asyncio API applies the selector's timeout and retries."""
+        executor = AsyncCommandExecutor.from_file(self.config_path, use_history=False, kill_grace=0.5)
+
+        async def scenario():
+            slow, flaky = await asyncio.gather(executor.run("slow"), executor.run("flaky"))
+            # An explicit timeout overrides the selector's
+            quick = await executor.run("slow", timeout=0.1)
+            return slow, flaky, quick
+
+        loop = asyncio.new_event_loop()
+        try:
+            slow, flaky, quick = loop.run_until_complete(scenario())
+        finally:
+            loop.close()
+        assert slow.status == TIMED_OUT and slow.stdout == b"started\n"
+        assert flaky.ok and [attempt.exit_code for attempt in flaky.attempts] == [1, 1, 0]
+        assert quick.attempts[0].duration < 0.3
@@ -0,0 +1,303 @@
+"""Tests for the dependency scheduler."""
+
+import random
+import threading
+import time
+import pytest
+from cli_commander.scheduler import (
+    DependencyScheduler, CycleError, find_cycle, topological_order,
+    critical_path_lengths, duration_weights, partition, SUCCEEDED, FAILED, SKIPPED, PENDING
+)
+from cli_commander.resources import Capacity, ResourceRequest
+
+
+def random_dag(size, max_parents=3, seed=0):
+    """Build a random DAG where nodes only depend on earlier nodes."""
+    rng = random.Random(seed)
+    graph = {}
+    for i in range(size):
+        parents = rng.sample(range(i), min(i, rng.randint(0, max_parents)))
+        graph[f"n{i}"] = [f"n{p}" for p in parents]
+    return graph
+
+
+class RecordingWorker:
+    """Records the order nodes run in and fails selected ones."""
+    
+    def __init__(self, fail=(), delay=0.0):
+        self.fail = set(fail)
+        self.delay = delay
+        self.finished = set()
+        self.started = []
+        self.lock = threading.Lock()
+        self.violations = []
+    
+    def __call__(self, graph):
+        def run(node):
+            with self.lock:
+                for parent in graph[node]:
+                    if parent not in self.finished:
+                        self.violations.append((node, parent))
+                self.started.append(node)
+            if self.delay:
+                time.sleep(self.delay)
+            with self.lock:
+                self.finished.add(node)
+            return node not in self.fail
+        return run
+
+
+class TestDependencyScheduler:
+    """Test suite for DependencyScheduler class."""
+    
+    def test_find_cycle(self):
+        """Test cycle detection on cyclic and acyclic graphs."""
+        assert find_cycle({"a": ["b"], "b": ["c"], "c": []}) is None
+        cycle = find_cycle({"a": ["b"], "b": ["c"], "c": ["a"]})
+        assert cycle[0] == cycle[-1]
+        assert set(cycle) == {"a", "b", "c"}
+        assert find_cycle({"a": ["a"]}) == ["a", "a"]
+    
+    def test_find_cycle_deep_graph(self):
+        """Test that a very deep chain does not hit the recursion limit."""
+        graph = {f"n{i}": [f"n{i + 1}"] for i in range(20000)}
+        assert find_cycle(graph) is None
+        graph["n20000"] = ["n0"]
+        assert find_cycle(graph) is not None
+    
+    def test_topological_order(self):
+        """Test that dependencies come before dependents."""
+        graph = random_dag(2000)
+        position = {node: i for i, node in enumerate(topological_order(graph))}
+        for node, parents in graph.items():
+            for parent in parents:
+                assert position[parent] < position[node]
+    
+    def test_topological_order_cycle(self):
+        """Test that ordering a cyclic graph raises CycleError."""
+        with pytest.raises(CycleError, match="Dependency cycle detected"):
+            topological_order({"a": ["b"], "b": ["a"]})
+    
+    def test_critical_path_lengths(self):
+        """Test weighted critical path lengths."""
+        graph = {"a": [], "b": ["a"], "c": ["a"], "d": ["b", "c"]}
+        lengths = critical_path_lengths(graph, {"a": 1, "b": 5, "c": 1, "d": 2})
+        assert lengths == {"a": 8, "b": 7, "c": 3, "d": 2}
+    
+    def test_unknown_dependency(self):
+        """Test that depending on a node outside the graph is rejected."""
+        with pytest.raises(ValueError, match="unknown node"):
+            DependencyScheduler({"a": ["missing"]})
+    
+    def test_cycle_rejected(self):
+        """Test that constructing a scheduler on a cycle raises CycleError."""
+        with pytest.raises(CycleError):
+            DependencyScheduler({"a": ["b"], "b": ["a"]})
+    
+    @pytest.mark.parametrize("jobs", [1, 8])
+    def test_large_graph_respects_dependencies(self, jobs):
+        """Test that thousands of nodes all run after their dependencies."""
+        graph = random_dag(5000)
+        worker = RecordingWorker()
+        status = DependencyScheduler(graph, jobs=jobs).run(worker(graph))
+        assert worker.violations == []
+        assert len(worker.started) == 5000
+        assert set(status.values()) == {SUCCEEDED}
+    
+    def test_failure_skips_descendants_only(self):
+        """Test that a failure skips its descendants but not other branches."""
+        graph = {
+            "root": [],
+            "bad": ["root"],
+            "child": ["bad"],
+            "grandchild": ["child"],
+            "other": ["root"],
+            "join": ["other", "child"],
+        }
+        worker = RecordingWorker(fail={"bad"})
+        status = DependencyScheduler(graph, jobs=4).run(worker(graph))
+        assert status == {
+            "root": SUCCEEDED,
+            "bad": FAILED,
+            "child": SKIPPED,
+            "grandchild": SKIPPED,
+            "other": SUCCEEDED,
+            "join": SKIPPED,
+        }
+    
+    def test_nodes_start_without_waiting_for_level(self):
+        """Test that a node starts as soon as its own parents finish."""
+        graph = {"slow": [], "fast": [], "after-fast": ["fast"]}
+        timings = {}
+        
+        def run(node):
+            timings[node] = time.monotonic()
+            time.sleep(0.5 if node == "slow" else 0.01)
+            return True
+        
+        DependencyScheduler(graph, jobs=3).run(run)
+        assert timings["after-fast"] - timings["slow"] < 0.3
+    
+    def test_critical_path_first(self):
+        """Test that the ready node heading the longest chain starts first."""
+        graph = {"short": [], "head": [], "mid": ["head"], "tail": ["mid"]}
+        worker = RecordingWorker()
+        DependencyScheduler(graph, jobs=1).run(worker(graph))
+        assert worker.started == ["head", "mid", "short", "tail"]
+    
+    def test_longest_duration_first(self):
+        """Test that expected durations put the longest independent job first."""
+        graph = {"quick": [], "slow": [], "medium": [], "after-quick": ["quick"]}
+        weights = {"quick": 1.0, "slow": 30.0, "medium": 5.0, "after-quick": 2.0}
+        worker = RecordingWorker()
+        DependencyScheduler(graph, jobs=1, weights=weights).run(worker(graph))
+        assert worker.started == ["slow", "medium", "quick", "after-quick"]
+    
+    def test_duration_weights(self):
+        """Test the fallbacks for nodes without recorded durations."""
+        assert duration_weights(["a", "b"], {}) == {"a": 1.0, "b": 1.0}
+        weights = duration_weights(["a", "b", "c", "d"], {"a": 10.0, "b": 2.0, "c": 4.0, "x": 99.0})
+        assert weights == {"a": 10.0, "b": 2.0, "c": 4.0, "d": 4.0}
+    
+    def test_partition(self):
+        """Test that shards are balanced by weight and deterministic."""
+        weights = {"a": 8.0, "b": 7.0, "c": 6.0, "d": 5.0, "e": 4.0, "f": 1.0}
+        groups = partition(weights, 2)
+        assert groups == [["a", "d", "e"], ["b", "c", "f"]]
+        assert partition(dict(reversed(list(weights.items()))), 2) == [
+            list(reversed(group)) for group in groups
+        ]
+        # Without timings, equal weights deal nodes out by name
+        assert partition({name: 1.0 for name in "dcba"}, 3) == [["d", "a"], ["b"], ["c"]]
+        assert partition({"a": 1.0}, 3) == [["a"], [], []]
+    
+    def test_input_order_breaks_ties(self):
+        """Test that independent nodes run in input order with one job."""
+        graph = {name: [] for name in ["c", "a", "b"]}
+        worker = RecordingWorker()
+        DependencyScheduler(graph, jobs=1).run(worker(graph))
+        assert worker.started == ["c", "a", "b"]
+    
+    def test_concurrency_is_bounded(self):
+        """Test that no more than `jobs` nodes run at once."""
+        graph = {f"n{i}": [] for i in range(20)}
+        active = [0]
+        peak = [0]
+        lock = threading.Lock()
+        
+        def run(node):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.01)
+            with lock:
+                active[0] -= 1
+            return True
+        
+        DependencyScheduler(graph, jobs=3).run(run)
+        assert peak[0] == 3
+    
+    def test_resource_budget_limits_admission(self):
+        """Test that running nodes never use more CPUs or memory than the capacity."""
+        graph = {f"n{i}": [] for i in range(12)}
+        resources = {
+            node: ResourceRequest(cpus=2 if i % 2 else 1, memory=(i % 3) * 1024)
+            for i, node in enumerate(graph)
+        }
+        capacity = Capacity(cpus=4, memory=2048)
+        used = {"cpus": 0.0, "memory": 0}
+        peak = {"cpus": 0.0, "memory": 0}
+        lock = threading.Lock()
+        
+        def run(node):
+            with lock:
+                for key in used:
+                    used[key] += getattr(resources[node], key)
+                    peak[key] = max(peak[key], used[key])
+            time.sleep(0.01)
+            with lock:
+                for key in used:
+                    used[key] -= getattr(resources[node], key)
+            return True
+        
+        status = DependencyScheduler(graph, jobs=12, resources=resources, capacity=capacity).run(run)
+        assert set(status.values()) == {SUCCEEDED}
+        assert peak["cpus"] == 4
+        assert peak["memory"] <= 2048
+    
+    def test_oversized_node_runs_alone(self):
+        """Test that a node asking for more than the capacity still runs, by itself."""
+        graph = {"big": [], "small": []}
+        resources = {"big": ResourceRequest(cpus=16, memory=1 << 40)}
+        worker = RecordingWorker(delay=0.01)
+        run = worker(graph)
+        overlaps = []
+        
+        def checked(node):
+            overlaps.append(len(worker.started) - len(worker.finished))
+            return run(node)
+        
+        status = DependencyScheduler(graph, jobs=2, resources=resources,
+                                     capacity=Capacity(cpus=2, memory=1 << 30)).run(checked)
+        assert status == {"big": SUCCEEDED, "small": SUCCEEDED}
+        assert overlaps == [0, 0]
+    
+    def test_exclusive_resources_serialize(self):
+        """Test that nodes sharing an exclusive resource never overlap, while others do."""
+        graph = {"db-a": [], "db-b": [], "db-c": [], "lint": []}
+        resources = {node: ResourceRequest(exclusive=("db",)) for node in graph if node.startswith("db")}
+        holders = []
+        overlaps = []
+        lock = threading.Lock()
+        
+        def run(node):
+            with lock:
+                if node.startswith("db"):
+                    if holders:
+                        overlaps.append((holders[0], node))
+                    holders.append(node)
+            time.sleep(0.02)
+            with lock:
+                if node in holders:
+                    holders.remove(node)
+            return True
+        
+        scheduler = DependencyScheduler(graph, jobs=4, resources=resources, capacity=Capacity(cpus=4))
+        start = time.monotonic()
+        scheduler.run(run)
+        assert overlaps == []
+        # lint ran next to the database selectors rather than after them
+        assert time.monotonic() - start < 0.08 + 0.05
+    
+    def test_blocked_node_lets_smaller_ones_start(self):
+        """Test backfilling: a ready node that does not fit does not hold up smaller ones."""
+        graph = {"a": [], "wide": [], "b": []}
+        resources = {"a": ResourceRequest(cpus=1), "wide": ResourceRequest(cpus=2),
+                     "b": ResourceRequest(cpus=1)}
+        worker = RecordingWorker(delay=0.01)
+        DependencyScheduler(graph, jobs=3, resources=resources, capacity=Capacity(cpus=2)).run(worker(graph))
+        assert worker.started == ["a", "b", "wide"]
+    
+    def test_stop_leaves_nodes_pending(self):
+        """Test that stopping the scheduler prevents new nodes from starting."""
+        graph = {"a": [], "b": ["a"]}
+        scheduler = DependencyScheduler(graph, jobs=1)
+        
+        def run(node):
+            scheduler.stop()
+            return True
+        
+        status = scheduler.run(run)
+        assert status == {"a": SUCCEEDED, "b": PENDING}
+    
+    def test_worker_exception_marks_failure(self):
+        """Test that an exception in a node counts as a failure."""
+        graph = {"a": [], "b": ["a"]}
+        
+        def run(node):
+            raise RuntimeError("boom")
+        
+        scheduler = DependencyScheduler(graph, jobs=1)
+        status = scheduler.run(run)
+        assert status == {"a": FAILED, "b": SKIPPED}
+        assert isinstance(scheduler.errors["a"], RuntimeError)
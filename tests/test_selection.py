@@ -0,0 +1,139 @@
+"""Tests for selector expressions."""
+
+import os
+import tempfile
+import time
+import pytest
+import yaml
+from cli_commander.cli import main
+from cli_commander.config import ConfigParser
+from cli_commander.selection import SelectionError, SelectorIndex, is_expression
+
+
+SELECTORS = {
+    "lint": {"command": "true", "tags": ["ci", "fast"]},
+    "unit": {"command": "true", "tags": ["ci", "fast"]},
+    "build": {"command": "true", "tags": "ci", "depends_on": ["lint"]},
+    "integration": {"command": "true", "tags": ["ci", "slow"], "depends_on": ["build"]},
+    "package": {"command": "true", "depends_on": ["build"]},
+    "deploy": {"command": "true", "depends_on": ["package", "integration"]},
+    "docs": {"command": "true"},
+}
+
+
+class TestSelectorIndex:
+    """Test suite for SelectorIndex and expression-based selection."""
+
+    def setup_method(self):
+        self.index = SelectorIndex(SELECTORS)
+
+    def test_is_expression(self):
+        """Test that plain names are not treated as expressions."""
+        assert not is_expression("build")
+        assert not is_expression("build-docs")
+        for text in ("tag:ci", "+deploy", "build+", "a,b", "@build", "unit*"):
+            assert is_expression(text)
+
+    def test_tag(self):
+        """Test selecting by tag, with tags given as a list or a string."""
+        assert self.index.select(["tag:ci"]) == ["lint", "unit", "build", "integration"]
+        assert self.index.select(["tag:missing"]) == []
+
+    def test_ancestors_and_descendants(self):
+        """Test the + graph operators on either side of a name."""
+        assert self.index.select(["+package"]) == ["lint", "build", "package"]
+        assert self.index.select(["build+"]) == ["build", "integration", "package", "deploy"]
+        assert self.index.select(["1+deploy"]) == ["integration", "package", "deploy"]
+        assert self.index.select(["lint+1"]) == ["lint", "build"]
+
+    def test_at_operator(self):
+        """Test that @ adds descendants and all of their ancestors."""
+        assert self.index.select(["@integration"]) == ["lint", "build", "integration", "package", "deploy"]
+
+    def test_intersection_union_and_exclusion(self):
+        """Test comma intersection, term union and exclusion."""
+        assert self.index.select(["tag:ci,tag:fast"]) == ["lint", "unit"]
+        assert self.index.select(["docs", "tag:fast"]) == ["docs", "lint", "unit"]
+        assert self.index.select(["tag:ci"], exclude=["tag:slow", "lint"]) == ["unit", "build"]
+        assert self.index.select(["+deploy,tag:ci"]) == ["lint", "build", "integration"]
+
+    def test_wildcards(self):
+        """Test shell-style wildcards in names."""
+        assert self.index.select(["*"]) == list(SELECTORS)
+        assert self.index.select(["[ud]*"]) == ["unit", "deploy", "docs"]
+
+    def test_errors(self):
+        """Test that unknown names, methods and malformed expressions are rejected."""
+        with pytest.raises(SelectionError, match="not found"):
+            self.index.select(["+missing"])
+        with pytest.raises(SelectionError, match="Unknown selector method"):
+            self.index.select(["path:src"])
+        for expression in ("@+build", "a,,b", "++build"):
+            with pytest.raises(SelectionError):
+                self.index.select([expression])
+        with pytest.raises(SelectionError, match="tags"):
+            SelectorIndex({"bad": {"command": "x", "tags": {"a": 1}}})
+
+    def test_index_built_once_per_load(self):
+        """Test that ConfigParser reuses its index until a config is reloaded."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config_path = os.path.join(tmpdir, "cli-commander.yml")
+            with open(config_path, 'w') as f:
+                yaml.dump({"selectors": SELECTORS}, f)
+            parser = ConfigParser(use_cache=False)
+            parser.load_config_file(config_path)
+            index = parser.get_index()
+            assert parser.get_index() is index
+            parser.load_config_file(config_path)
+            assert parser.get_index() is not index
+
+    def test_large_config_resolves_quickly(self):
+        """Test that resolving against a 10k-selector index is sub-millisecond."""
+        selectors = {
+            f"s{i}": {"command": "true", "tags": [f"group{i % 100}"],
+                      "depends_on": [f"s{i - 1}"] if i % 10 else []}
+            for i in range(10000)
+        }
+        index = SelectorIndex(selectors)
+        start = time.perf_counter()
+        for _ in range(100):
+            result = index.resolve("tag:group97,+s9997")
+        elapsed = (time.perf_counter() - start) / 100
+        assert result == {"s9997"}
+        assert elapsed < 0.001
+
+    def test_cli_runs_expression(self, capsys, monkeypatch):
+        """Test running and listing selectors through expressions on the command line."""
+        monkeypatch.setenv("CMDR_NO_DAEMON", "1")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            selectors = {name: dict(config, command=f"echo ran-{name}") for name, config in SELECTORS.items()}
+            with open(os.path.join(tmpdir, "cli-commander.yml"), 'w') as f:
+                yaml.dump({"selectors": selectors}, f)
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                with pytest.raises(SystemExit) as exc_info:
+                    main(["tag:ci", "--exclude", "tag:slow"])
+                assert exc_info.value.code == 0
+                out = capsys.readouterr().out
+                assert "ran-lint" in out and "ran-unit" in out and "ran-build" in out
+                assert "ran-integration" not in out
+
+                with pytest.raises(SystemExit) as exc_info:
+                    main(["deploy", "--exclude", "integration"])
+                assert exc_info.value.code == 0
+                out = capsys.readouterr().out
+                assert "ran-deploy" in out and "ran-package" in out and "ran-lint" in out
+                assert "ran-integration" not in out
+
+                with pytest.raises(SystemExit) as exc_info:
+                    main(["--list", "tag:fast"])
+                out = capsys.readouterr().out
+                assert "lint" in out and "unit" in out and "docs" not in out
+
+                with pytest.raises(SystemExit) as exc_info:
+                    main(["tag:nothing"])
+                assert exc_info.value.code == 1
+                assert "No selectors match" in capsys.readouterr().err
+            finally:
+                os.chdir(original_dir)
@@ -0,0 +1,134 @@
+"""Tests for batch sessions run by shared shell workers."""
+
+import io
+import os
+import tempfile
+import pytest
+import yaml
+from cli_commander.cli import main
+from cli_commander.session import ShellPool, ShellWorker, read_names, shares_shell
+
+
+SELECTORS = {
+    "leaky": {"command": "cd /; export LEAKED=1; umask 077; set -e; trap 'echo trapped' EXIT"},
+    "probe": {"command": "echo \"leaked=${LEAKED:-no} cwd=$(pwd) umask=$(umask) greeting=${GREETING:-unset}\""},
+    "greet": {"command": "echo $GREETING", "env": {"GREETING": "hello world"}},
+    "fail": {"command": "exit 3"},
+    "argv": {"argv": ["echo", "from", "argv"]},
+    "group": {"depends_on": ["greet", "argv"]},
+    "bad-argv": {"argv": "notalist"},
+}
+
+
+def run_session(batch, monkeypatch, extra=()):
+    """Run 'cmdr session' on a batch fed through stdin and return the exit code."""
+    monkeypatch.setenv("CMDR_NO_DAEMON", "1")
+    monkeypatch.setattr("sys.stdin", io.StringIO(batch))
+    with pytest.raises(SystemExit) as exc_info:
+        main(["session"] + list(extra))
+    return exc_info.value.code
+
+
+class TestSession:
+    """Test suite for ShellWorker, ShellPool and 'cmdr session'."""
+
+    def test_worker_exit_status(self):
+        """Test that exit statuses are reported and syntax errors stay contained."""
+        worker = ShellWorker()
+        try:
+            assert worker.run("true") == 0
+            assert worker.run("exit 7") == 7
+            assert worker.run("echo 'unterminated") == 2
+            assert worker.run("(exit 5)") == 5
+            assert worker.run("true") == 0
+        finally:
+            worker.close()
+
+    def test_commands_are_isolated(self, capfd):
+        """Test that cwd, variables, umask and traps do not leak between commands."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with ShellPool() as pool:
+                assert pool.run(SELECTORS["leaky"]["command"]) == 0
+                assert pool.run("echo $GREETING", env={"GREETING": "it's here"}) == 0
+                assert pool.run("pwd", cwd=tmpdir) == 0
+                assert pool.run(SELECTORS["probe"]["command"]) == 0
+                assert pool.run("exit 0", cwd=os.path.join(tmpdir, "missing")) == 1
+            lines = capfd.readouterr().out.splitlines()
+        umask = "%04o" % os.umask(0o022)
+        os.umask(int(umask, 8))
+        assert lines == [
+            "trapped",
+            "it's here",
+            os.path.realpath(tmpdir),
+            f"leaked=no cwd={os.getcwd()} umask={umask} greeting=unset",
+        ]
+
+    def test_dead_worker_is_replaced(self):
+        """Test that a worker killed by its command fails that command only."""
+        with ShellPool() as pool:
+            with pytest.raises(OSError):
+                pool.run("kill -9 $$")
+            assert pool.run("exit 4") == 4
+
+    def test_read_names(self):
+        """Test parsing a batch with comments and blank lines."""
+        batch = io.StringIO("build\n\n# setup first\n  test  \n")
+        assert list(read_names(batch)) == ["build", "test"]
+
+    def test_shares_shell(self):
+        """Test which selectors run in the shared shells."""
+        assert shares_shell(SELECTORS["greet"])
+        assert shares_shell({"command": "make", "cwd": "sub", "description": "Build"})
+        assert not shares_shell(SELECTORS["argv"])
+        assert not shares_shell({"command": "make", "inputs": ["src/**"]})
+        assert not shares_shell({"command": "make", "env": {"NOT-A-NAME": "1"}})
+
+    def test_session_command(self, monkeypatch, capfd):
+        """Test running a batch from stdin, falling back to the executor where needed."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, "cli-commander.yml"), "w") as f:
+                yaml.dump({"selectors": SELECTORS}, f)
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                code = run_session("greet\n# comment\nleaky\nprobe\nargv\nfail\ngreet\n", monkeypatch)
+                out = capfd.readouterr().out
+                assert code == 3
+                assert out.count("hello world\n") == 2
+                assert f"leaked=no cwd={os.getcwd()}" in out
+                assert "from argv\n" in out
+
+                code = run_session("fail\ngreet\n", monkeypatch, ["--fail-fast"])
+                assert code == 3
+                assert "hello world" not in capfd.readouterr().out
+
+                assert run_session("nope\n", monkeypatch) == 1
+                assert "Selector 'nope' not found" in capfd.readouterr().err
+
+                assert run_session("group\n", monkeypatch) == 0
+                assert "Skipping: group (only groups its dependencies)" in capfd.readouterr().out
+
+                assert run_session("bad-argv\ngreet\n", monkeypatch) == 1
+                captured = capfd.readouterr()
+                assert "Error: " in captured.err and "Traceback" not in captured.err
+                assert "hello world" in captured.out
+            finally:
+                os.chdir(original_dir)
+
+    def test_session_batch_file_in_parallel(self, monkeypatch, capfd):
+        """Test reading the batch from a file and running it on several workers."""
+        monkeypatch.setenv("CMDR_NO_DAEMON", "1")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, "cli-commander.yml"), "w") as f:
+                yaml.dump({"selectors": SELECTORS}, f)
+            with open(os.path.join(tmpdir, "batch"), "w") as f:
+                f.write("greet\n" * 20)
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                with pytest.raises(SystemExit) as exc_info:
+                    main(["session", "batch", "-j", "4"])
+            finally:
+                os.chdir(original_dir)
+        assert exc_info.value.code == 0
+        assert capfd.readouterr().out.count("hello world\n") == 20
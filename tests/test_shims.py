@@ -0,0 +1,141 @@
+"""Tests for native shell shims."""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import pytest
+import yaml
+from cli_commander.cli import main
+from cli_commander.shims import functions_path, install, is_generated, is_static
+
+
+SELECTORS = {
+    "hello": {"command": "echo \"hello 'shim'\"; exit 3", "description": "Greet", "tags": ["fast"]},
+    "gen": {"command": "make", "inputs": ["src/*"]},
+    "release": {"command": "twine upload", "depends_on": ["gen"]},
+    "serve": {"argv": ["python", "-m", "http.server"]},
+    "init": {"command": "true"},
+}
+
+
+def make_project(root):
+    os.makedirs(os.path.join(root, ".git"))
+    os.makedirs(os.path.join(root, "sub"))
+    path = os.path.join(root, "cli-commander.yml")
+    with open(path, 'w') as f:
+        yaml.dump({"selectors": SELECTORS}, f)
+    # Stands in for the real cmdr, to show when a call is dispatched to it
+    bin_dir = os.path.join(root, "fake-bin")
+    os.mkdir(bin_dir)
+    with open(os.path.join(bin_dir, "cmdr"), 'w') as f:
+        f.write("#!/bin/sh\necho \"real cmdr $*\"\n")
+    os.chmod(os.path.join(bin_dir, "cmdr"), 0o755)
+    return path, dict(os.environ, PATH=bin_dir + os.pathsep + os.environ["PATH"])
+
+
+def bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+
+class TestShims:
+    """Test suite for shim generation and the generated shims."""
+
+    def test_is_static(self):
+        """Test that only plain command selectors get shims."""
+        assert is_static("hello", SELECTORS["hello"])
+        for name in ("gen", "release", "serve", "init"):
+            assert not is_static(name, SELECTORS[name])
+        assert not is_static("-x", {"command": "true"})
+        assert not is_static("fmt", {"command": "black .", "shell": False})
+
+    def test_install_writes_executables(self):
+        """Test writing and pruning executables without touching foreign files."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = os.path.realpath(tmpdir)
+            config_path, _ = make_project(root)
+            bin_dir = os.path.join(root, "bin")
+            config = {"selectors": SELECTORS}
+            path, static, dynamic = install(config_path, [config_path], config, bin_dir)
+            assert static == ["hello"]
+            assert dynamic == ["gen", "release", "serve", "init"]
+            assert path == functions_path(config_path)
+            assert os.listdir(bin_dir) == ["hello"]
+            assert is_generated(os.path.join(bin_dir, "hello"))
+
+            install(config_path, [config_path], {"selectors": {"other": {"command": "true"}}}, bin_dir)
+            assert os.listdir(bin_dir) == ["other"]
+
+            with open(os.path.join(bin_dir, "mine"), 'w') as f:
+                f.write("#!/bin/sh\n")
+            with pytest.raises(FileExistsError):
+                install(config_path, [config_path], {"selectors": {"mine": {"command": "true"}}}, bin_dir)
+
+    @pytest.mark.skipif(shutil.which("bash") is None, reason="bash is not installed")
+    def test_function_file(self):
+        """Test that the cmdr function runs static selectors and dispatches the rest."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = os.path.realpath(tmpdir)
+            config_path, env = make_project(root)
+            path, _, _ = install(config_path, [config_path], {"selectors": SELECTORS})
+
+            def call(arguments, cwd=root):
+                result = subprocess.run(
+                    ["bash", "-c", f". '{path}'; cmdr {arguments}; echo \"exit $?\""],
+                    cwd=cwd, env=env, stdout=subprocess.PIPE, universal_newlines=True,
+                )
+                return result.stdout.splitlines()
+
+            assert call("hello") == [
+                "Running: Greet", "Command: echo \"hello 'shim'\"; exit 3", "hello 'shim'", "exit 3",
+            ]
+            assert call("hello", cwd=os.path.join(root, "sub"))[2] == "hello 'shim'"
+            assert call("gen") == ["real cmdr gen", "exit 0"]
+            assert call("hello --force") == ["real cmdr hello --force", "exit 0"]
+            assert call("hello", cwd=tmpdir + "/..")[0] == "real cmdr hello"
+
+            bump_mtime(config_path)
+            assert call("hello") == ["real cmdr hello", "exit 0"]
+
+    def test_executable(self):
+        """Test the executable shim and its staleness check."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = os.path.realpath(tmpdir)
+            config_path, env = make_project(root)
+            bin_dir = os.path.join(root, "bin")
+            install(config_path, [config_path], {"selectors": SELECTORS}, bin_dir)
+            shim = os.path.join(bin_dir, "hello")
+
+            result = subprocess.run([shim], env=env, stdout=subprocess.PIPE, universal_newlines=True)
+            assert result.returncode == 3
+            assert result.stdout.splitlines()[-1] == "hello 'shim'"
+
+            result = subprocess.run([shim, "--force"], env=env, stdout=subprocess.PIPE, universal_newlines=True)
+            assert result.stdout == "real cmdr hello --force\n"
+
+            bump_mtime(config_path)
+            result = subprocess.run([shim], env=env, stdout=subprocess.PIPE, universal_newlines=True)
+            assert result.stdout == "real cmdr hello\n"
+
+    def test_cli_install(self, capsys, monkeypatch):
+        """Test 'cmdr shims install DIR'."""
+        monkeypatch.setenv("CMDR_NO_DAEMON", "1")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            make_project(tmpdir)
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                with pytest.raises(SystemExit) as exc_info:
+                    main(["shims", "install", "bin"])
+                assert exc_info.value.code == 0
+                out = capsys.readouterr().out
+                assert "Wrote shims for 1 selectors" in out
+                assert "Running through cmdr: gen, init, release, serve" in out
+                assert os.path.exists(os.path.join(tmpdir, "bin", "hello"))
+
+                with pytest.raises(SystemExit) as exc_info:
+                    main(["shims"])
+                assert exc_info.value.code == 1
+            finally:
+                os.chdir(original_dir)
@@ -0,0 +1,94 @@
+"""Startup regression tests for the cmdr fast paths."""
+
+import os
+import subprocess
+import sys
+import time
+import yaml
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Extra wall-clock time cmdr may add on top of a bare interpreter start.
+# Generous enough for slow CI machines, tight enough to catch an eager
+# import of PyYAML or similar creeping back in.
+STARTUP_BUDGET_SECONDS = 0.25
+
+
+def run_cmdr(args, cwd, importtime=False):
+    """Run cmdr in a fresh interpreter and return the completed process."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = REPO_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-m", "cli_commander.cli"] + args
+    return subprocess.run(command, cwd=cwd, env=env, capture_output=True, text=True)
+
+
+def imported_modules(stderr):
+    """Parse the module names out of `python -X importtime` output."""
+    modules = set()
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            modules.add(line.rsplit("|", 1)[1].strip())
+    return modules
+
+
+def best_wall_time(func, repeat=5):
+    """Return the fastest of `repeat` timed calls, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+@pytest.fixture
+def project_dir(tmp_path):
+    """A project directory with a config and a warm config cache."""
+    config_data = {
+        "selectors": {
+            "test": {
+                "description": "Run tests",
+                "command": "true"
+            }
+        }
+    }
+    with open(tmp_path / "cli-commander.yml", 'w') as f:
+        yaml.dump(config_data, f)
+    assert run_cmdr(["--list"], cwd=str(tmp_path)).returncode == 0
+    return str(tmp_path)
+
+
+class TestStartup:
+    """Test suite for cmdr startup cost."""
+    
+    def test_list_imports(self, project_dir):
+        """Test that --list with a warm cache imports neither PyYAML nor the executor."""
+        result = run_cmdr(["--list"], cwd=project_dir, importtime=True)
+        assert result.returncode == 0
+        modules = imported_modules(result.stderr)
+        assert "cli_commander.config" in modules
+        for module in ("yaml", "subprocess", "cli_commander.executor",
+                       "cli_commander.generate_configs", "pathlib"):
+            assert module not in modules
+    
+    def test_run_imports(self, project_dir):
+        """Test that running a selector imports the executor but not --init code."""
+        result = run_cmdr(["test"], cwd=project_dir, importtime=True)
+        assert result.returncode == 0
+        modules = imported_modules(result.stderr)
+        assert "cli_commander.executor" in modules
+        for module in ("yaml", "cli_commander.generate_configs", "pathlib"):
+            assert module not in modules
+    
+    @pytest.mark.parametrize("args", [["--list"], ["test"]])
+    def test_wall_clock_budget(self, project_dir, args):
+        """Test that cmdr adds little wall-clock time over a bare interpreter."""
+        baseline = best_wall_time(
+            lambda: subprocess.run([sys.executable, "-c", "pass"], check=True)
+        )
+        elapsed = best_wall_time(lambda: run_cmdr(args, cwd=project_dir))
+        assert elapsed - baseline < STARTUP_BUDGET_SECONDS
@@ -0,0 +1,189 @@
+"""Tests for incremental execution state."""
+
+import os
+import tempfile
+from cli_commander.executor import CommandExecutor
+from cli_commander.state import FileHasher, StateStore, expand_globs
+
+
+class TestStateStore:
+    """Test suite for StateStore and input fingerprinting."""
+    
+    def _write(self, path, content):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+    
+    def test_expand_globs(self):
+        """Test recursive globs and directory patterns."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self._write(os.path.join(tmpdir, "src", "a.py"), "a")
+            self._write(os.path.join(tmpdir, "src", "pkg", "b.py"), "b")
+            self._write(os.path.join(tmpdir, "docs", "c.md"), "c")
+            assert expand_globs(["src/**/*.py"], tmpdir) == [
+                os.path.join(tmpdir, "src", "a.py"),
+                os.path.join(tmpdir, "src", "pkg", "b.py"),
+            ]
+            assert expand_globs(["docs"], tmpdir) == [os.path.join(tmpdir, "docs", "c.md")]
+            assert expand_globs(["missing/*"], tmpdir) == []
+    
+    def test_file_hasher_fast_path(self):
+        """Test that files with unchanged mtime and size are not re-read."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "input.txt")
+            self._write(path, "content")
+            hasher = FileHasher(os.path.join(tmpdir, "hashes"))
+            digest = hasher.hash_file(path)
+            hasher.save()
+            
+            # Same size and restored mtime: the persisted digest is trusted
+            st = os.stat(path)
+            self._write(path, "CONTENT")
+            os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+            reloaded = FileHasher(os.path.join(tmpdir, "hashes"))
+            assert reloaded.hash_file(path) == digest
+    
+    def test_file_hasher_detects_change(self):
+        """Test that a changed file is re-hashed."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "input.txt")
+            self._write(path, "one")
+            hasher = FileHasher(os.path.join(tmpdir, "hashes"))
+            first = hasher.hash_file(path)
+            self._write(path, "two!")
+            assert hasher.hash_file(path) != first
+    
+    def test_fingerprint_covers_command_inputs_and_env(self, monkeypatch):
+        """Test that the fingerprint changes with command, inputs and env."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self._write(os.path.join(tmpdir, "in.txt"), "one")
+            store = StateStore(os.path.join(tmpdir, "state"))
+            config = {"command": "build", "inputs": ["*.txt"], "input_env": ["MODE"]}
+            monkeypatch.setenv("MODE", "debug")
+            base = store.fingerprint(config, tmpdir)
+            assert store.fingerprint(config, tmpdir) == base
+            assert store.fingerprint(dict(config, command="other"), tmpdir) != base
+            monkeypatch.setenv("MODE", "release")
+            assert store.fingerprint(config, tmpdir) != base
+            monkeypatch.setenv("MODE", "debug")
+            self._write(os.path.join(tmpdir, "in.txt"), "two")
+            assert store.fingerprint(config, tmpdir) != base
+    
+    def test_fingerprint_covers_selector_env_and_cwd(self):
+        """Test that the fingerprint changes with the selector's env: values and cwd."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self._write(os.path.join(tmpdir, "in.txt"), "one")
+            os.makedirs(os.path.join(tmpdir, "sub"))
+            store = StateStore(os.path.join(tmpdir, "state"))
+            config = {"command": "build", "inputs": ["*.txt"], "env": {"FOO": "one"}}
+            base = store.fingerprint(config, tmpdir)
+            assert store.fingerprint(dict(config, env={"FOO": "two"}), tmpdir) != base
+            assert store.fingerprint(config, os.path.join(tmpdir, "sub")) != base
+    
+    def test_executor_reruns_when_env_changes(self, capsys):
+        """Test that a selector with unchanged inputs runs again after its env: changes."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self._write(os.path.join(tmpdir, "in.txt"), "one")
+            config = {
+                "command": "echo $FOO >> runs.log",
+                "inputs": ["in.txt"],
+                "env": {"FOO": "one"},
+            }
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                executor = CommandExecutor(state=StateStore(os.path.join(tmpdir, "state")))
+                assert executor.execute_selector(config, "build") == 0
+                assert executor.execute_selector(dict(config, env={"FOO": "two"}), "build") == 0
+                assert "inputs unchanged" not in capsys.readouterr().out
+                with open("runs.log") as f:
+                    assert f.read() == "one\ntwo\n"
+            finally:
+                os.chdir(original_dir)
+    
+    def test_record_and_check(self):
+        """Test recording a fingerprint and checking it later."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = StateStore(os.path.join(tmpdir, "state"))
+            key = store.key("build", {}, tmpdir)
+            assert not store.is_up_to_date(key, "abc")
+            store.record(key, "abc")
+            assert store.is_up_to_date(key, "abc")
+            assert not store.is_up_to_date(key, "def")
+    
+    def test_executor_skips_unchanged_inputs(self, capsys):
+        """Test that a selector is skipped until its inputs change."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self._write(os.path.join(tmpdir, "in.txt"), "one")
+            config = {
+                "command": "echo ran >> runs.log",
+                "inputs": ["in.txt"],
+            }
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                executor = CommandExecutor(state=StateStore(os.path.join(tmpdir, "state")))
+                assert executor.execute_selector(config, "build") == 0
+                assert executor.execute_selector(config, "build") == 0
+                assert "inputs unchanged" in capsys.readouterr().out
+                self._write(os.path.join(tmpdir, "in.txt"), "two")
+                assert executor.execute_selector(config, "build") == 0
+                with open("runs.log") as f:
+                    assert f.read().count("ran") == 2
+            finally:
+                os.chdir(original_dir)
+    
+    def test_executor_reruns_when_outputs_missing(self):
+        """Test that a missing output forces a re-run."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self._write(os.path.join(tmpdir, "in.txt"), "one")
+            config = {
+                "command": "cp in.txt out.txt && echo ran >> runs.log",
+                "inputs": ["in.txt"],
+                "outputs": ["out.txt"],
+            }
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                executor = CommandExecutor(
+                    state=StateStore(os.path.join(tmpdir, "state")),
+                    use_artifacts=False,
+                )
+                executor.execute_selector(config, "build")
+                os.unlink("out.txt")
+                executor.execute_selector(config, "build")
+                assert os.path.exists("out.txt")
+                with open("runs.log") as f:
+                    assert f.read().count("ran") == 2
+            finally:
+                os.chdir(original_dir)
+    
+    def test_executor_failure_not_recorded(self):
+        """Test that a failed run is not recorded as up to date."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self._write(os.path.join(tmpdir, "in.txt"), "one")
+            config = {"command": "echo ran >> runs.log; exit 1", "inputs": ["in.txt"]}
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                executor = CommandExecutor(state=StateStore(os.path.join(tmpdir, "state")))
+                assert executor.execute_selector(config, "build") == 1
+                assert executor.execute_selector(config, "build") == 1
+            finally:
+                os.chdir(original_dir)
+    
+    def test_executor_force(self):
+        """Test that force re-runs a selector with unchanged inputs."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self._write(os.path.join(tmpdir, "in.txt"), "one")
+            config = {"command": "echo ran >> runs.log", "inputs": ["in.txt"]}
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                state = StateStore(os.path.join(tmpdir, "state"))
+                CommandExecutor(state=state).execute_selector(config, "build")
+                CommandExecutor(state=state, force=True).execute_selector(config, "build")
+                with open("runs.log") as f:
+                    assert f.read().count("ran") == 2
+            finally:
+                os.chdir(original_dir)
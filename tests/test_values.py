@@ -0,0 +1,196 @@
+"""Tests for vars:, env_file: and computed env: values."""
+
+import os
+import tempfile
+import time
+import pytest
+import yaml
+from cli_commander.cli import main
+from cli_commander.config import parse_duration
+from cli_commander.executor import CommandExecutor
+from cli_commander.values import ValueCache, read_env_file, resolve_selector
+
+
+def write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def counted(name):
+    """Return a command that prints a value and counts its runs in a file."""
+    return f"echo x >> {name}.count; echo computed-{name}"
+
+
+def runs(directory, name):
+    try:
+        with open(os.path.join(directory, f"{name}.count")) as f:
+            return len(f.readlines())
+    except OSError:
+        return 0
+
+
+class TestValues:
+    """Test suite for selector values computed by commands and read from files."""
+
+    def test_parse_duration(self):
+        """Test parsing durations with and without units."""
+        assert parse_duration(30) == 30
+        assert parse_duration("90s") == 90
+        assert parse_duration("5m") == 300
+        assert parse_duration("1.5h") == 5400
+        assert parse_duration("7d") == 7 * 86400
+        for value in ("soon", "-1", True):
+            with pytest.raises(ValueError):
+                parse_duration(value)
+
+    def test_read_env_file(self):
+        """Test dotenv syntax: comments, export, quotes and inline comments."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, ".env")
+            write(path, "# comment\n\nexport A=1\nB = two words # note\n"
+                        "C='$literal #'\nD=\"line\\nbreak \\\"q\\\"\"\nE=\n")
+            assert read_env_file(path) == {
+                "A": "1", "B": "two words", "C": "$literal #", "D": 'line\nbreak "q"', "E": "",
+            }
+            write(path, "not an assignment\n")
+            with pytest.raises(ValueError, match=":1:"):
+                read_env_file(path)
+
+    def test_resolve_selector(self):
+        """Test vars substitution, computed env values and env_file precedence."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write(os.path.join(tmpdir, ".env"), "FROM_FILE=file\nOVERRIDDEN=file\n")
+            config = resolve_selector({
+                "command": "deploy {version}",
+                "argv": ["deploy", "--version={version}"],
+                "cwd": tmpdir,
+                "env_file": ".env",
+                "vars": {"version": {"run": "echo 1.2.3"}, "stage": "prod"},
+                "env": {
+                    "OVERRIDDEN": "env",
+                    "TAG": {"run": "echo app:{version}-$FROM_FILE"},
+                    "STAGE": "{stage}",
+                    "FLAG": True,
+                },
+            })
+        assert config["command"] == "deploy 1.2.3"
+        assert config["argv"] == ["deploy", "--version=1.2.3"]
+        assert "vars" not in config and "env_file" not in config
+        assert config["env"] == {
+            "FROM_FILE": "file", "OVERRIDDEN": "env", "TAG": "app:1.2.3-file",
+            "STAGE": "prod", "FLAG": "true",
+        }
+
+    def test_invalid_values(self):
+        """Test errors for failing commands, bad settings and missing env files."""
+        with pytest.raises(ValueError, match="'SHA' failed with exit code 3: nope"):
+            resolve_selector({"command": "true", "env": {"SHA": {"run": "echo nope >&2; exit 3"}}})
+        with pytest.raises(ValueError, match="Unknown settings"):
+            resolve_selector({"command": "true", "env": {"SHA": {"run": "true", "every": "1m"}}})
+        with pytest.raises(ValueError, match="needs a 'run' command"):
+            resolve_selector({"command": "true", "vars": {"v": {"ttl": 60}}})
+        with pytest.raises(ValueError, match="env_file"):
+            resolve_selector({"command": "true", "env_file": "missing.env"})
+
+    def test_ttl_cache(self):
+        """Test that values with a ttl are reused until they expire or are refreshed."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ValueCache(os.path.join(tmpdir, "cache"))
+            config = {"command": "true", "cwd": tmpdir, "env": {
+                "CACHED": {"run": counted("cached"), "ttl": "1h"},
+                "EXPIRED": {"run": counted("expired"), "ttl": 0},
+                "UNCACHED": {"run": counted("uncached")},
+            }}
+            for _ in range(3):
+                env = resolve_selector(config, cache)["env"]
+            assert env["CACHED"] == "computed-cached"
+            assert (runs(tmpdir, "cached"), runs(tmpdir, "expired"), runs(tmpdir, "uncached")) == (1, 3, 3)
+            resolve_selector(config, cache, refresh=True)
+            assert runs(tmpdir, "cached") == 2
+
+    def test_key_files_invalidate(self):
+        """Test that a value with key files is recomputed when their content changes."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ValueCache(os.path.join(tmpdir, "cache"))
+            write(os.path.join(tmpdir, "VERSION"), "1.0\n")
+            config = {"command": "echo {version}", "cwd": tmpdir, "vars": {
+                "version": {"run": "echo x >> version.count; cat VERSION", "key": ["VERSION"]},
+            }}
+            assert resolve_selector(config, cache)["command"] == "echo 1.0"
+            assert resolve_selector(config, cache)["command"] == "echo 1.0"
+            assert runs(tmpdir, "version") == 1
+            write(os.path.join(tmpdir, "VERSION"), "2.0\n")
+            assert resolve_selector(config, cache)["command"] == "echo 2.0"
+            assert runs(tmpdir, "version") == 2
+
+    def test_env_file_changes_invalidate(self):
+        """Test that a cached value is recomputed when the env_file: values it sees change."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ValueCache(os.path.join(tmpdir, "cache"))
+            write(os.path.join(tmpdir, ".env"), "FROM_FILE=one\n")
+            config = {"command": "true", "cwd": tmpdir, "env_file": ".env",
+                      "env": {"V": {"run": "echo $FROM_FILE", "ttl": "1h"}}}
+            assert resolve_selector(config, cache)["env"]["V"] == "one"
+            write(os.path.join(tmpdir, ".env"), "FROM_FILE=two\n")
+            assert resolve_selector(config, cache)["env"]["V"] == "two"
+
+    def test_values_computed_in_parallel(self):
+        """Test that independent values are computed at the same time."""
+        env = {f"V{i}": {"run": f"sleep 0.3; echo {i}"} for i in range(4)}
+        start = time.monotonic()
+        config = resolve_selector({"command": "true", "env": env})
+        assert time.monotonic() - start < 0.9
+        assert config["env"] == {f"V{i}": str(i) for i in range(4)}
+
+    def test_cli_runs_with_computed_env(self, monkeypatch, capfd):
+        """Test that cmdr passes computed values to the command and caches them."""
+        monkeypatch.setenv("CMDR_NO_DAEMON", "1")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            selectors = {"show": {
+                "command": "echo sha=$SHA",
+                "env": {"SHA": {"run": counted("sha"), "ttl": "10m"}},
+            }}
+            with open(os.path.join(tmpdir, "cli-commander.yml"), "w") as f:
+                yaml.dump({"selectors": selectors}, f)
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                for _ in range(2):
+                    with pytest.raises(SystemExit) as exc_info:
+                        main(["show"])
+                    assert exc_info.value.code == 0
+                assert runs(tmpdir, "sha") == 1
+            finally:
+                os.chdir(original_dir)
+        assert capfd.readouterr().out.count("sha=computed-sha\n") == 2
+
+    def test_executor_force_recomputes(self):
+        """Test that a forced executor refreshes cached values."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ValueCache(os.path.join(tmpdir, "cache"))
+            config = {"command": "true", "cwd": tmpdir,
+                      "env": {"V": {"run": counted("v"), "ttl": "1h"}}}
+            CommandExecutor(values=cache).resolve_values(config)
+            CommandExecutor(values=cache).resolve_values(config)
+            CommandExecutor(values=cache, force=True).resolve_values(config)
+            assert runs(tmpdir, "v") == 2
+        static = {"command": "true", "env": {"A": "1"}}
+        assert CommandExecutor().resolve_values(static) is static
+
+    def test_computed_values_invalidate_inputs(self, capsys):
+        """Test that a changed computed value reruns a selector whose inputs are unchanged."""
+        from cli_commander.state import StateStore
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write(os.path.join(tmpdir, "in.txt"), "same")
+            write(os.path.join(tmpdir, "HEAD"), "abc\n")
+            config = {"command": "echo $SHA >> runs.log", "cwd": tmpdir, "inputs": ["in.txt"],
+                      "env": {"SHA": {"run": "cat HEAD"}}}
+            executor = CommandExecutor(state=StateStore(os.path.join(tmpdir, "state")))
+            assert executor.execute_selector(config, "build") == 0
+            assert executor.execute_selector(config, "build") == 0
+            assert "inputs unchanged" in capsys.readouterr().out
+            write(os.path.join(tmpdir, "HEAD"), "def\n")
+            assert executor.execute_selector(config, "build") == 0
+            with open(os.path.join(tmpdir, "runs.log")) as f:
+                assert f.read() == "abc\ndef\n"
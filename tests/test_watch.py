@@ -0,0 +1,165 @@
+"""Tests for watch mode."""
+
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import pytest
+from cli_commander.watch import InotifyWatcher, PollingWatcher, WatchSpec, watch
+
+
+def write(path, text="x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+def wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+class TestWatch:
+    """Test suite for watchers, watch specs and the watch loop."""
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux-only")
+    def test_inotify_watches_new_directories(self):
+        """Test that inotify reports changes, including in directories created later."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write(os.path.join(tmpdir, "src", "a.py"))
+            write(os.path.join(tmpdir, "ignored", "b.py"))
+            write(os.path.join(tmpdir, ".gitignore"), "ignored/\n")
+            watcher = InotifyWatcher([(tmpdir, True)])
+            try:
+                assert os.path.join(tmpdir, "ignored") not in watcher.watched
+                write(os.path.join(tmpdir, "src", "a.py"), "changed")
+                assert os.path.join(tmpdir, "src", "a.py") in watcher.wait(2)
+
+                os.makedirs(os.path.join(tmpdir, "src", "pkg"))
+                watcher.wait(0.2)
+                assert os.path.join(tmpdir, "src", "pkg") in watcher.watched
+                write(os.path.join(tmpdir, "src", "pkg", "new.py"))
+                assert os.path.join(tmpdir, "src", "pkg", "new.py") in watcher.wait(2)
+                assert watcher.wait(0.05) == set()
+            finally:
+                watcher.close()
+
+    def test_polling_watcher(self):
+        """Test the stat-polling fallback."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "a.txt")
+            write(path)
+            watcher = PollingWatcher([(tmpdir, True)], interval=0.01)
+            assert watcher.wait(0.05) == set()
+            write(path, "longer content")
+            assert watcher.wait(1) == {path}
+            os.remove(path)
+            assert watcher.wait(1) == {path}
+
+    def test_spec_filters_changes(self):
+        """Test that only inputs trigger runs, minus outputs and ignored files."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config = os.path.join(tmpdir, "cli-commander.yml")
+            write(config)
+            write(os.path.join(tmpdir, ".gitignore"), "*.pyc\n")
+            os.makedirs(os.path.join(tmpdir, "src", "gen"))
+            spec = WatchSpec(tmpdir, ["src/**/*.py", "setup.cfg"], ["src/gen"], [config])
+            assert spec.matches(os.path.join(tmpdir, "src", "pkg", "a.py"))
+            assert not spec.matches(os.path.join(tmpdir, "src", "a.txt"))
+            assert not spec.matches(os.path.join(tmpdir, "src", "gen", "out.py"))
+            assert not spec.matches(os.path.join(tmpdir, "src", "x.pyc"))
+            assert spec.matches(os.path.join(tmpdir, "setup.cfg"))
+            assert spec.matches(config) and spec.is_config(config)
+            assert spec.directories() == [(tmpdir, False), (os.path.join(tmpdir, "src"), True)]
+
+            everything = WatchSpec(tmpdir)
+            assert everything.matches(os.path.join(tmpdir, "docs", "index.md"))
+            assert not everything.matches(os.path.join(tmpdir, ".git", "index"))
+            assert not everything.matches(os.path.join(tmpdir, "x.pyc"))
+            assert everything.directories() == [(tmpdir, True)]
+
+    def test_watch_reruns_cancels_and_reloads(self):
+        """Test re-running on change, cancelling in-flight runs and reloading the spec."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            source = os.path.join(tmpdir, "src", "a.py")
+            write(source)
+            log = os.path.join(tmpdir, "runs.log")
+            script = (
+                "import sys, time\n"
+                f"open({log!r}, 'a').write('start\\n')\n"
+                f"time.sleep(0.0 if open({source!r}).read() != 'slow' else 60)\n"
+                f"open({log!r}, 'a').write('end\\n')\n"
+            )
+            loads = []
+
+            def load_spec():
+                loads.append(1)
+                return WatchSpec(tmpdir, ["src/*.py"], config_files=[os.path.join(tmpdir, "cli-commander.yml")])
+
+            def runs():
+                try:
+                    with open(log) as f:
+                        return f.read().split()
+                except OSError:
+                    return []
+
+            stop = threading.Event()
+            stream = io.StringIO()
+            thread = threading.Thread(
+                target=watch, args=([sys.executable, "-c", script], load_spec),
+                kwargs={"debounce": 0.05, "stream": stream, "stop": stop},
+            )
+            thread.start()
+            try:
+                assert wait_for(lambda: runs() == ["start", "end"])
+                write(os.path.join(tmpdir, "notes.txt"))
+                write(source, "slow")
+                assert wait_for(lambda: runs() == ["start", "end", "start"])
+                time.sleep(0.3)
+                write(source, "fast")
+                assert wait_for(lambda: runs() == ["start", "end", "start", "start", "end"])
+                assert "cancelling" in stream.getvalue()
+
+                write(os.path.join(tmpdir, "cli-commander.yml"))
+                assert wait_for(lambda: len(runs()) == 7)
+                assert len(loads) == 2
+                assert "Configuration reloaded" in stream.getvalue()
+            finally:
+                stop.set()
+                thread.join(10)
+            assert not thread.is_alive()
+
+    def test_cli_spec_covers_dependencies(self):
+        """Test that the watched inputs include those of dependencies."""
+        import argparse
+        import yaml
+        from cli_commander.cli import watch_spec
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, "cli-commander.yml"), 'w') as f:
+                yaml.dump({"selectors": {
+                    "gen": {"command": "true", "inputs": ["schema/*.json"], "outputs": ["out"]},
+                    "test": {"command": "true", "inputs": ["src/**"], "depends_on": ["gen"]},
+                    "lint": {"command": "true"},
+                }}, f)
+            original_dir = os.getcwd()
+            try:
+                os.chdir(tmpdir)
+                root = os.getcwd()
+                spec = watch_spec(argparse.Namespace(selectors=["test"], exclude=[]))
+                assert spec.inputs == ["schema/*.json", "src/**"]
+                assert spec.matches(os.path.join(root, "schema", "a.json"))
+                assert not spec.matches(os.path.join(root, "out", "a.json"))
+                assert not spec.matches(os.path.join(root, "README"))
+
+                spec = watch_spec(argparse.Namespace(selectors=["lint", "test"], exclude=[]))
+                assert spec.inputs is None
+                assert spec.matches(os.path.join(root, "README"))
+            finally:
+                os.chdir(original_dir)